@@ -20,6 +20,7 @@
 
 import abc
 
+import numpy as np
 import six
 
 
@@ -242,6 +243,204 @@ class BasicBar(Bar):
         return self.__extra
 
 
+def check_ohlc(open_, high, low, close):
+    """Vectorized version of the checks done by :class:`BasicBar`, in the same order.
+
+    :rtype: A list of (message, boolean numpy.array that is True for rows that failed the check) tuples.
+    """
+    return [
+        ("high < low", high < low),
+        ("high < open", high < open_),
+        ("high < close", high < close),
+        ("low > open", low > open_),
+        ("low > close", low > close),
+    ]
+
+
+class BarColumns(object):
+    """Bars for a single instrument stored as one numpy.array per column.
+    Bars are validated once, when the columns are built, instead of every time a :class:`ColumnarBar` is built.
+
+    :param open_: The opening prices.
+    :param high: The highest prices.
+    :param low: The lowest prices.
+    :param close: The closing prices.
+    :param volume: The volumes.
+    :param adjClose: The adjusted closing prices, using NaN if not available. Can be None.
+    :param frequency: The bars frequency. Valid values defined in :class:`pyalgotrade.bar.Frequency`.
+    :param validate: Set to False to skip validation for columns that were already validated.
+    :type validate: boolean.
+    :param extra: The extra columns for each row, or None if there are no extra columns.
+    :type extra: list of dicts.
+
+    .. note::
+        Arrays that are already float64, like memory mapped ones, are used without copying them.
+    """
+
+    def __init__(self, open_, high, low, close, volume, adjClose, frequency, validate=True, extra=None):
+        self.__open = np.asarray(open_, dtype=np.float64)
+        self.__high = np.asarray(high, dtype=np.float64)
+        self.__low = np.asarray(low, dtype=np.float64)
+        self.__close = np.asarray(close, dtype=np.float64)
+        self.__volume = np.asarray(volume, dtype=np.float64)
+        if adjClose is None:
+            adjClose = np.empty(len(self.__close))
+            adjClose[:] = np.nan
+        self.__adjClose = np.asarray(adjClose, dtype=np.float64)
+        self.__frequency = frequency
+        self.__extra = extra
+
+        count = len(self.__close)
+        for column in [self.__open, self.__high, self.__low, self.__volume, self.__adjClose]:
+            if len(column) != count:
+                raise Exception("All columns must have the same length")
+        if extra is not None and len(extra) != count:
+            raise Exception("All columns must have the same length")
+        if validate:
+            self.__validate()
+
+    def __validate(self):
+        invalid = None
+        for message, failed in check_ohlc(self.__open, self.__high, self.__low, self.__close):
+            positions = np.flatnonzero(failed)
+            if len(positions) and (invalid is None or positions[0] < invalid[0]):
+                invalid = (positions[0], message)
+        if invalid is not None:
+            raise Exception("%s on row %d" % (invalid[1], invalid[0]))
+
+    def __len__(self):
+        return len(self.__close)
+
+    def getFrequency(self):
+        return self.__frequency
+
+    def getOpen(self, pos):
+        return self.__open.item(pos)
+
+    def getHigh(self, pos):
+        return self.__high.item(pos)
+
+    def getLow(self, pos):
+        return self.__low.item(pos)
+
+    def getClose(self, pos):
+        return self.__close.item(pos)
+
+    def getVolume(self, pos):
+        return self.__volume.item(pos)
+
+    def getAdjClose(self, pos):
+        ret = self.__adjClose.item(pos)
+        if ret != ret:
+            ret = None
+        return ret
+
+    def getExtraColumns(self, pos):
+        ret = {}
+        if self.__extra is not None:
+            ret = self.__extra[pos]
+        return ret
+
+    def getBar(self, pos, dateTime):
+        """Returns a :class:`ColumnarBar` for the given row."""
+        return ColumnarBar(self, pos, dateTime)
+
+
+class ColumnarBar(Bar):
+    """A :class:`Bar` that reads its values from a row in :class:`BarColumns`.
+    It holds just a reference to the columns, the row number and the datetime, so it is much cheaper to build and
+    lighter than a :class:`BasicBar`.
+    """
+
+    # Optimization to reduce memory footprint.
+    __slots__ = (
+        '__columns',
+        '__pos',
+        '__dateTime',
+        '__useAdjustedValue',
+    )
+
+    def __init__(self, columns, pos, dateTime):
+        self.__columns = columns
+        self.__pos = pos
+        self.__dateTime = dateTime
+        self.__useAdjustedValue = False
+
+    def __reduce__(self):
+        # Pickle as a BasicBar, so the columns don't get pickled.
+        args = (
+            self.__dateTime, self.getOpen(), self.getHigh(), self.getLow(), self.getClose(), self.getVolume(),
+            self.getAdjClose(), self.getFrequency()
+        )
+        state = (
+            self.__dateTime, self.getOpen(), self.getClose(), self.getHigh(), self.getLow(), self.getVolume(),
+            self.getAdjClose(), self.getFrequency(), self.__useAdjustedValue, self.getExtraColumns()
+        )
+        return (BasicBar, args, state)
+
+    def setUseAdjustedValue(self, useAdjusted):
+        if useAdjusted and self.getAdjClose() is None:
+            raise Exception("Adjusted close is not available")
+        self.__useAdjustedValue = useAdjusted
+
+    def getUseAdjValue(self):
+        return self.__useAdjustedValue
+
+    def getDateTime(self):
+        return self.__dateTime
+
+    def __getAdjusted(self, value):
+        adjClose = self.getAdjClose()
+        if adjClose is None:
+            raise Exception("Adjusted close is missing")
+        return adjClose * value / float(self.__columns.getClose(self.__pos))
+
+    def getOpen(self, adjusted=False):
+        ret = self.__columns.getOpen(self.__pos)
+        if adjusted:
+            ret = self.__getAdjusted(ret)
+        return ret
+
+    def getHigh(self, adjusted=False):
+        ret = self.__columns.getHigh(self.__pos)
+        if adjusted:
+            ret = self.__getAdjusted(ret)
+        return ret
+
+    def getLow(self, adjusted=False):
+        ret = self.__columns.getLow(self.__pos)
+        if adjusted:
+            ret = self.__getAdjusted(ret)
+        return ret
+
+    def getClose(self, adjusted=False):
+        if adjusted:
+            ret = self.getAdjClose()
+            if ret is None:
+                raise Exception("Adjusted close is missing")
+        else:
+            ret = self.__columns.getClose(self.__pos)
+        return ret
+
+    def getVolume(self):
+        return self.__columns.getVolume(self.__pos)
+
+    def getAdjClose(self):
+        return self.__columns.getAdjClose(self.__pos)
+
+    def getFrequency(self):
+        return self.__columns.getFrequency()
+
+    def getExtraColumns(self):
+        return self.__columns.getExtraColumns(self.__pos)
+
+    def getPrice(self):
+        if self.__useAdjustedValue:
+            return self.getAdjClose()
+        else:
+            return self.getClose()
+
+
 class Bars(object):
 
     """A group of :class:`Bar` objects.
@@ -301,3 +500,68 @@ class Bars(object):
     def getBar(self, instrument):
         """Returns the :class:`pyalgotrade.bar.Bar` for the given instrument or None if the instrument is not found."""
         return self.__barDict.get(instrument, None)
+
+
+class ColumnarBars(Bars):
+    """A group of :class:`ColumnarBar` objects for the same datetime, that are built when requested.
+
+    :param dateTime: The datetime for the bars.
+    :type dateTime: :class:`datetime.datetime`.
+    :param instrumentIndex: A map of instrument to position in columns and positions. It can be shared by all the
+        ColumnarBars that have bars for the same instruments.
+    :type instrumentIndex: map.
+    :param columns: The :class:`BarColumns` for each instrument.
+    :type columns: list.
+    :param positions: The row for each instrument.
+    :type positions: list.
+    :param dateTimes: The datetime for each instrument, if they are localized to different timezones, or None if all
+        the bars use dateTime.
+    :type dateTimes: list.
+    """
+
+    def __init__(self, dateTime, instrumentIndex, columns, positions, dateTimes=None):
+        if len(instrumentIndex) == 0:
+            raise Exception("No bars supplied")
+        # There is no need to check that datetimes are in sync since all the bars are for the same point in time.
+        self.__dateTime = dateTime
+        self.__instrumentIndex = instrumentIndex
+        self.__columns = columns
+        self.__positions = positions
+        self.__dateTimes = dateTimes
+        self.__bars = [None] * len(columns)
+
+    def __reduce__(self):
+        return (Bars, (dict(self.items()),))
+
+    def __getBar(self, index):
+        ret = self.__bars[index]
+        if ret is None:
+            dateTime = self.__dateTime if self.__dateTimes is None else self.__dateTimes[index]
+            ret = self.__columns[index].getBar(self.__positions[index], dateTime)
+            self.__bars[index] = ret
+        return ret
+
+    def __getitem__(self, instrument):
+        return self.__getBar(self.__instrumentIndex[instrument])
+
+    def __contains__(self, instrument):
+        return instrument in self.__instrumentIndex
+
+    def items(self):
+        return [(instrument, self.__getBar(index)) for instrument, index in six.iteritems(self.__instrumentIndex)]
+
+    def keys(self):
+        return list(self.__instrumentIndex.keys())
+
+    def getInstruments(self):
+        return list(self.__instrumentIndex.keys())
+
+    def getDateTime(self):
+        return self.__dateTime
+
+    def getBar(self, instrument):
+        ret = None
+        index = self.__instrumentIndex.get(instrument)
+        if index is not None:
+            ret = self.__getBar(index)
+        return ret
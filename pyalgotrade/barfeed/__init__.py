@@ -24,6 +24,7 @@ from pyalgotrade import bar
 from pyalgotrade.dataseries import bards
 from pyalgotrade import feed
 from pyalgotrade import dispatchprio
+from pyalgotrade import memory
 
 
 # This is only for backward compatibility since Frequency used to be defined here and not in bar.py.
@@ -90,6 +91,18 @@ class BaseBarFeed(feed.BaseFeed):
         ret.setUseAdjustedValues(self.__useAdjustedValues)
         return ret
 
+    def getMemoryUsage(self):
+        """Returns a :class:`pyalgotrade.memory.Usage` with the memory used by the bars, by the dataseries for each
+        column, and by the indicators built on top of those, for each instrument."""
+        ret = memory.Usage()
+        for instrument in sorted(self.getKeys()):
+            barDataSeries = self[instrument]
+            ret.addDataSeries(memory.BARS, instrument, barDataSeries)
+            columns = barDataSeries.getColumnDataSeries()
+            for name in sorted(columns):
+                ret.addDataSeries(memory.COLUMNS, instrument, columns[name])
+        return ret
+
     def getNextValues(self):
         dateTime = None
         bars = self.getNextBars()
@@ -0,0 +1,512 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import csv
+import datetime
+import itertools
+
+import numpy as np
+import six
+
+from pyalgotrade import bar
+from pyalgotrade.utils import csvutils
+from pyalgotrade.utils import dt
+
+
+# Bulk CSV loading: instead of building a dict per row and parsing values one at a time, rows are read in chunks and
+# every column gets parsed at once into a numpy.array. Datetimes in fixed width formats are parsed using numpy
+# arithmetic, and rows that don't match the fixed width format fall back to the regular parsing.
+
+# The number of rows to parse at once.
+CHUNK_SIZE = 100000
+# The maximum number of errors included in exceptions.
+MAX_REPORTED_ERRORS = 10
+
+# Directive -> width, for directives that can be parsed as fixed width fields.
+FIXED_WIDTH_DIRECTIVES = {"%Y": 4, "%m": 2, "%d": 2, "%H": 2, "%M": 2, "%S": 2}
+
+
+def get_name(value):
+    # Names for timezones, classes and functions, that are the same from one run to the next.
+    if value is None:
+        return None
+    if hasattr(value, "zone"):
+        return value.zone
+    return "%s.%s" % (getattr(value, "__module__", ""), getattr(value, "__name__", repr(value)))
+
+
+class ColumnMapping(object):
+    """Describes how to build bars from the columns in a CSV file.
+
+    :param columnNames: A dictionary that maps datetime, open, high, low, close, volume and adj_close to the names of the
+        columns in the file. adj_close may be missing or None if not available.
+    :type columnNames: dict.
+    :param dateTimeFormat: The strptime format for the datetime column. Can be None if dateTimeParser is set.
+    :type dateTimeFormat: string.
+    :param frequency: The bars frequency. Valid values defined in :class:`pyalgotrade.bar.Frequency`.
+    :param dailyBarTime: If not None, the time to set in every datetime.
+    :type dailyBarTime: datetime.time.
+    :param timezone: The timezone to localize datetimes.
+    :type timezone: A pytz timezone.
+    :param fileTimezone: The timezone that datetimes in the file are in, if any. They get converted to timezone, if set.
+    :type fileTimezone: A pytz timezone.
+    :param fieldNames: The names of the columns if the file has no header row.
+    :type fieldNames: list.
+    :param delimiter: The field delimiter.
+    :type delimiter: string.
+    :param sanitize: True to adjust high and low values when they are not consistent with open and close.
+    :type sanitize: boolean.
+    :param barClass: The class used to build bars.
+    :param dateTimeParser: An optional function to parse the datetime strings that can't be parsed as fixed width
+        values using dateTimeFormat. If None, datetime.datetime.strptime is used.
+    :param extraColumns: True to add the rest of the columns as extra columns.
+    :type extraColumns: boolean.
+    """
+
+    def __init__(self, columnNames, dateTimeFormat, frequency, dailyBarTime=None, timezone=None, fileTimezone=None,
+                 fieldNames=None, delimiter=",", sanitize=False, barClass=bar.BasicBar, dateTimeParser=None,
+                 extraColumns=False):
+        self.__columnNames = columnNames
+        self.__dateTimeFormat = dateTimeFormat
+        self.__frequency = frequency
+        self.__dailyBarTime = dailyBarTime
+        self.__timezone = timezone
+        self.__fileTimezone = fileTimezone
+        self.__fieldNames = fieldNames
+        self.__delimiter = delimiter
+        self.__sanitize = sanitize
+        self.__barClass = barClass
+        self.__dateTimeParser = dateTimeParser
+        self.__extraColumns = extraColumns
+        self.__haveAdjClose = False
+
+    def getColumnName(self, column):
+        return self.__columnNames.get(column)
+
+    def getColumnNames(self):
+        return self.__columnNames
+
+    def getDateTimeFormat(self):
+        return self.__dateTimeFormat
+
+    def getFrequency(self):
+        return self.__frequency
+
+    def getDailyBarTime(self):
+        return self.__dailyBarTime
+
+    def getTimezone(self):
+        return self.__timezone
+
+    def getFileTimezone(self):
+        return self.__fileTimezone
+
+    def getFieldNames(self):
+        return self.__fieldNames
+
+    def getDelimiter(self):
+        return self.__delimiter
+
+    def getSanitize(self):
+        return self.__sanitize
+
+    def getBarClass(self):
+        return self.__barClass
+
+    def getDateTimeParser(self):
+        return self.__dateTimeParser
+
+    def getExtraColumns(self):
+        return self.__extraColumns
+
+    def getCacheKey(self):
+        """Returns a string that identifies this configuration, to use in cache keys."""
+        return repr((
+            sorted(self.__columnNames.items()), self.__dateTimeFormat, self.__frequency, self.__dailyBarTime,
+            get_name(self.__timezone), get_name(self.__fileTimezone), self.__fieldNames, self.__delimiter,
+            self.__sanitize, get_name(self.__barClass), get_name(self.__dateTimeParser), self.__extraColumns
+        ))
+
+    def barsHaveAdjClose(self):
+        """Returns True once bars with adjusted close values were loaded."""
+        return self.__haveAdjClose
+
+    def setBarsHaveAdjClose(self, haveAdjClose):
+        self.__haveAdjClose = haveAdjClose
+
+
+def compile_fixed_width_format(dateTimeFormat):
+    """Returns a tuple with the fields, the literals and the width for a fixed width datetime format, or None if the
+    format can't be parsed as a fixed width one."""
+    fields = []
+    literals = []
+    pos = 0
+    i = 0
+    while i < len(dateTimeFormat):
+        if dateTimeFormat[i] == "%":
+            directive = dateTimeFormat[i:i+2]
+            width = FIXED_WIDTH_DIRECTIVES.get(directive)
+            if width is None:
+                return None
+            fields.append((directive, pos, pos + width))
+            pos += width
+            i += 2
+        else:
+            literals.append((pos, dateTimeFormat[i]))
+            pos += 1
+            i += 1
+    directives = [field[0] for field in fields]
+    if len(set(directives)) != len(directives) or not set(["%Y", "%m", "%d"]).issubset(directives):
+        return None
+    return fields, literals, pos
+
+
+def parse_fixed_width(values, compiledFormat):
+    """Parses datetime strings in a fixed width format.
+
+    :param values: The datetime strings.
+    :type values: list.
+    :param compiledFormat: The format, as returned by :func:`compile_fixed_width_format`.
+    :rtype: A tuple with a numpy.array of datetime64[us] values and a boolean numpy.array that is True for values that
+        couldn't be parsed.
+    """
+    fields, literals, width = compiledFormat
+    count = len(values)
+    if count == 0:
+        return np.empty(0, dtype="datetime64[us]"), np.zeros(0, dtype=bool)
+
+    lengths = np.fromiter(six.moves.map(len, values), dtype=np.int64, count=count)
+    invalid = lengths != width
+    try:
+        chars = np.array(values, dtype="S%d" % width).view(np.uint8).reshape(count, width)
+    except UnicodeEncodeError:
+        return np.zeros(count, dtype="datetime64[us]"), np.ones(count, dtype=bool)
+
+    for pos, char in literals:
+        invalid |= chars[:, pos] != ord(char)
+    digits = chars.astype(np.int64) - ord("0")
+    parts = {}
+    for directive, begin, end in fields:
+        value = np.zeros(count, dtype=np.int64)
+        for pos in six.moves.xrange(begin, end):
+            invalid |= (digits[:, pos] < 0) | (digits[:, pos] > 9)
+            value = value * 10 + digits[:, pos]
+        parts[directive] = value
+
+    zeros = np.zeros(count, dtype=np.int64)
+    years = parts["%Y"]
+    months = parts["%m"]
+    days = parts["%d"]
+    hours = parts.get("%H", zeros)
+    minutes = parts.get("%M", zeros)
+    seconds = parts.get("%S", zeros)
+    invalid |= (years < 1) | (months < 1) | (months > 12) | (days < 1) | (days > 31)
+    invalid |= (hours > 23) | (minutes > 59) | (seconds > 61)
+
+    # Use valid values for invalid rows, so the arithmetic below works.
+    years = np.where(invalid, 1970, years)
+    months = np.where(invalid, 1, months)
+    days = np.where(invalid, 1, days)
+    monthStarts = ((years - 1970) * 12 + months - 1).astype("datetime64[M]")
+    dates = monthStarts.astype("datetime64[D]") + (days - 1)
+    # Days that don't exist, like February 30th, end up in the next month.
+    invalid |= dates.astype("datetime64[M]") != monthStarts
+    # Leap seconds are not supported by datetime.datetime either.
+    invalid |= seconds > 59
+    timeOfDay = np.where(invalid, 0, hours * 3600 + minutes * 60 + seconds) * 1000000
+    return dates.astype("datetime64[us]") + timeOfDay.astype("timedelta64[us]"), invalid
+
+
+def parse_datetimes(values, dateTimeFormat, dateTimeParser=None):
+    """Parses datetime strings.
+
+    :param values: The datetime strings.
+    :type values: list.
+    :param dateTimeFormat: The strptime format. Can be None if dateTimeParser is set.
+    :type dateTimeFormat: string.
+    :param dateTimeParser: An optional function to parse the values that can't be parsed as fixed width values using
+        dateTimeFormat. If None, datetime.datetime.strptime is used.
+    :rtype: A tuple with a numpy.array of datetime64[us] values and a boolean numpy.array that is True for values that
+        couldn't be parsed.
+    """
+    parse = dateTimeParser
+    if parse is None:
+        def parse(value):
+            return datetime.datetime.strptime(value, dateTimeFormat)
+
+    compiledFormat = None
+    if dateTimeFormat is not None:
+        compiledFormat = compile_fixed_width_format(dateTimeFormat)
+    if compiledFormat is not None:
+        ret, invalid = parse_fixed_width(values, compiledFormat)
+        pending = np.flatnonzero(invalid)
+    else:
+        ret = np.zeros(len(values), dtype="datetime64[us]")
+        invalid = np.zeros(len(values), dtype=bool)
+        pending = six.moves.xrange(len(values))
+
+    # Values that can't be parsed using numpy are parsed one at a time, just once.
+    cache = {}
+    for pos in pending:
+        value = values[pos]
+        parsed = cache.get(value)
+        if parsed is None:
+            try:
+                parsed = np.datetime64(parse(value), "us")
+            except Exception:
+                parsed = False
+            cache[value] = parsed
+        if parsed is False:
+            invalid[pos] = True
+        else:
+            ret[pos] = parsed
+            invalid[pos] = False
+    return ret, invalid
+
+
+def parse_floats(values, allowEmpty=False):
+    """Parses float strings.
+
+    :param values: The float strings.
+    :type values: list.
+    :param allowEmpty: True to use NaN for empty strings instead of treating them as errors.
+    :type allowEmpty: boolean.
+    :rtype: A tuple with a numpy.array of float64 values and a boolean numpy.array that is True for values that couldn't
+        be parsed.
+    """
+    count = len(values)
+    try:
+        return np.array(values, dtype=np.float64), np.zeros(count, dtype=bool)
+    except ValueError:
+        pass
+
+    ret = np.empty(count, dtype=np.float64)
+    invalid = np.zeros(count, dtype=bool)
+    for pos, value in enumerate(values):
+        try:
+            ret[pos] = float(value)
+        except ValueError:
+            ret[pos] = np.nan
+            invalid[pos] = not (allowEmpty and value == "")
+    return ret, invalid
+
+
+def sanitize_ohlc(open_, high, low, close):
+    """Vectorized version of :func:`pyalgotrade.barfeed.common.sanitize_ohlc`."""
+    low = np.minimum(np.minimum(low, open_), close)
+    high = np.maximum(np.maximum(high, open_), close)
+    return open_, high, low, close
+
+
+class Errors(object):
+    """Collects row level errors."""
+
+    def __init__(self):
+        self.__errors = []
+        self.__count = 0
+
+    def add(self, lineNumber, message):
+        self.__count += 1
+        if len(self.__errors) < MAX_REPORTED_ERRORS:
+            self.__errors.append((lineNumber, message))
+
+    def getCount(self):
+        return self.__count
+
+    def getErrors(self):
+        """Returns a list of (line number, message) tuples for the first errors found."""
+        return sorted(self.__errors)
+
+    def raiseIfAny(self, path):
+        if self.__count:
+            errors = ["line %d: %s" % error for error in self.getErrors()]
+            raise Exception("%d malformed rows in %s. %s" % (self.__count, path, ". ".join(errors)))
+
+
+def read_chunks(path, fieldNames, delimiter, errors, chunkSize=CHUNK_SIZE):
+    """Yields tuples with the field names, a list of rows and the line number for each row.
+    Empty rows are skipped and rows with the wrong number of columns are reported to errors."""
+    with open(path, "r") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        if fieldNames is None:
+            fieldNames = next(reader, [])
+        columnCount = len(fieldNames)
+        while True:
+            rows = []
+            lineNumbers = []
+            read = 0
+            for row in itertools.islice(reader, chunkSize):
+                read += 1
+                if len(row) == columnCount:
+                    rows.append(row)
+                    lineNumbers.append(reader.line_num)
+                elif len(row):
+                    errors.add(reader.line_num, "expected %d columns but found %d" % (columnCount, len(row)))
+            if rows:
+                yield fieldNames, rows, lineNumbers
+            if read < chunkSize:
+                break
+
+
+def parse_rows(mapping, fieldNames, rows, lineNumbers, errors):
+    """Parses rows into columns.
+
+    :rtype: A tuple with the datetimes, a dictionary with a numpy.array for open, high, low, close, volume and
+        adj_close (None if not available), a dictionary with the values of the extra columns, and a boolean
+        numpy.array that is True for rows that couldn't be parsed.
+    """
+    columns = dict(zip(fieldNames, (list(column) for column in zip(*rows))))
+    invalid = np.zeros(len(rows), dtype=bool)
+    messages = {}
+
+    def flag(failed, get_message):
+        # Only the first error for each row gets reported.
+        for pos in np.flatnonzero(failed & ~invalid):
+            messages[pos] = get_message(pos)
+        invalid[:] |= failed
+
+    def get_column(column):
+        name = mapping.getColumnName(column)
+        if name not in columns:
+            raise Exception("Column %s not found" % name)
+        return columns[name]
+
+    dateTimeValues = get_column("datetime")
+    dateTimes, failed = parse_datetimes(dateTimeValues, mapping.getDateTimeFormat(), mapping.getDateTimeParser())
+    flag(failed, lambda pos: "invalid datetime '%s'" % dateTimeValues[pos])
+
+    values = {}
+    for column in ["open", "high", "low", "close", "volume"]:
+        columnValues = get_column(column)
+        values[column], failed = parse_floats(columnValues)
+        flag(failed, lambda pos: "invalid %s value '%s'" % (column, columnValues[pos]))
+
+    values["adj_close"] = None
+    adjCloseName = mapping.getColumnName("adj_close")
+    if adjCloseName is not None and adjCloseName in columns:
+        columnValues = columns[adjCloseName]
+        values["adj_close"], failed = parse_floats(columnValues, allowEmpty=True)
+        flag(failed, lambda pos: "invalid adj_close value '%s'" % columnValues[pos])
+
+    if mapping.getSanitize():
+        values["open"], values["high"], values["low"], values["close"] = sanitize_ohlc(
+            values["open"], values["high"], values["low"], values["close"]
+        )
+    for message, failed in bar.check_ohlc(values["open"], values["high"], values["low"], values["close"]):
+        flag(failed, lambda pos: "%s on %s" % (message, dateTimeValues[pos]))
+
+    extra = {}
+    if mapping.getExtraColumns():
+        mapped = set(mapping.getColumnNames().values())
+        for name in fieldNames:
+            if name not in mapped:
+                extraValues, failed = parse_floats(columns[name])
+                if failed.any():
+                    extra[name] = [csvutils.float_or_string(value) for value in columns[name]]
+                else:
+                    extra[name] = extraValues.tolist()
+
+    for pos in sorted(messages):
+        errors.add(lineNumbers[pos], messages[pos])
+    return dateTimes, values, extra, invalid
+
+
+def build_datetimes(dateTimes, mapping):
+    """Converts a numpy.array of datetime64[us] values into datetime.datetime instances, setting the daily bar time
+    and the timezone."""
+    dailyBarTime = mapping.getDailyBarTime()
+    if dailyBarTime is not None:
+        timeOfDay = datetime.timedelta(
+            hours=dailyBarTime.hour, minutes=dailyBarTime.minute, seconds=dailyBarTime.second,
+            microseconds=dailyBarTime.microsecond
+        )
+        dateTimes = dateTimes.astype("datetime64[D]").astype("datetime64[us]") + np.timedelta64(timeOfDay)
+    ret = dateTimes.astype("datetime64[us]").tolist()
+
+    fileTimezone = mapping.getFileTimezone()
+    timezone = mapping.getTimezone()
+    if fileTimezone is not None:
+        ret = [fileTimezone.localize(dateTime) for dateTime in ret]
+    if timezone is not None:
+        ret = [dt.localize(dateTime, timezone) for dateTime in ret]
+    return ret
+
+
+def load_bars(path, mapping, barFilter=None, skipMalformedBars=False, chunkSize=CHUNK_SIZE):
+    """Loads bars from a CSV file, parsing chunkSize rows at a time.
+
+    :param path: The path to the CSV file.
+    :type path: string.
+    :param mapping: Describes how to build bars from the columns in the file.
+    :type mapping: :class:`ColumnMapping`.
+    :param barFilter: An optional filter for the bars.
+    :type barFilter: :class:`pyalgotrade.barfeed.csvfeed.BarFilter`.
+    :param skipMalformedBars: True to skip rows that can't be parsed. If False, an exception that includes the line
+        number for the first malformed rows is raised.
+    :type skipMalformedBars: boolean.
+    :param chunkSize: The number of rows to parse at a time.
+    :type chunkSize: int.
+    :rtype: A list of bars.
+    """
+
+    ret = []
+    errors = Errors()
+    barClass = mapping.getBarClass()
+    frequency = mapping.getFrequency()
+    for fieldNames, rows, lineNumbers in read_chunks(path, mapping.getFieldNames(), mapping.getDelimiter(), errors, chunkSize):
+        dateTimes, values, extra, invalid = parse_rows(mapping, fieldNames, rows, lineNumbers, errors)
+        if not skipMalformedBars:
+            errors.raiseIfAny(path)
+        valid = np.flatnonzero(~invalid)
+        if len(valid) == 0:
+            continue
+
+        dateTimes = build_datetimes(dateTimes[valid], mapping)
+        open_ = values["open"][valid].tolist()
+        high = values["high"][valid].tolist()
+        low = values["low"][valid].tolist()
+        close = values["close"][valid].tolist()
+        volume = values["volume"][valid].tolist()
+        if values["adj_close"] is None:
+            adjClose = itertools.repeat(None)
+        else:
+            adjClose = values["adj_close"][valid]
+            if not np.isnan(adjClose).all():
+                mapping.setBarsHaveAdjClose(True)
+            adjClose = [None if value != value else value for value in adjClose.tolist()]
+
+        if extra:
+            extraRows = [dict(zip(extra.keys(), values)) for values in zip(*[
+                [columnValues[pos] for pos in valid] for columnValues in extra.values()
+            ])]
+        else:
+            extraRows = None
+
+        for i, row in enumerate(six.moves.zip(dateTimes, open_, high, low, close, volume, adjClose)):
+            if extraRows is None:
+                bar_ = barClass(*(row + (frequency,)))
+            else:
+                bar_ = barClass(*(row + (frequency,)), extra=extraRows[i])
+            if barFilter is None or barFilter.includeBar(bar_):
+                ret.append(bar_)
+
+    if not skipMalformedBars:
+        errors.raiseIfAny(path)
+    return ret
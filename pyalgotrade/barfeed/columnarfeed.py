@@ -0,0 +1,411 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import collections
+import datetime
+import heapq
+import os
+import struct
+
+import numpy as np
+import six
+from six.moves.urllib.parse import quote, unquote
+
+from pyalgotrade import bar
+from pyalgotrade import barfeed
+from pyalgotrade.barfeed import dbfeed
+from pyalgotrade.utils import dt
+
+
+# Bars for each instrument and frequency are stored in a separate file, with a fixed size header followed by the
+# columns, one after the other:
+# * timestamp: int64 with the number of microseconds since the epoch, in UTC. Sorted and unique.
+# * open, high, low, close, volume and adj_close: float64. Missing adjusted closes are stored as NaN.
+# All values are little endian. The header is 64 bytes long, so every column is 8 byte aligned.
+
+FILE_EXTENSION = ".bars"
+MAGIC = b"PYATBARS"
+VERSION = 1
+# magic, version, frequency, bar count, first timestamp, last timestamp.
+HEADER_FORMAT = "<8sIiqqq"
+HEADER_SIZE = 64
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume", "adj_close")
+COLUMN_TYPES = ("<i8", "<f8", "<f8", "<f8", "<f8", "<f8", "<f8")
+# How many instrument indexes Feed keeps around for reuse.
+INSTRUMENT_INDEX_CACHE_SIZE = 64
+
+
+def get_file_name(instrument, frequency):
+    # Instruments like BTC/USD can't be used as file names as they are.
+    return "%s-%d%s" % (quote(instrument, safe=""), frequency, FILE_EXTENSION)
+
+
+def read_header(path):
+    """Returns a dictionary with the frequency, the bar count and the first and last timestamps in the file."""
+    with open(path, "rb") as f:
+        data = f.read(HEADER_SIZE)
+    if len(data) != HEADER_SIZE:
+        raise Exception("%s is not a bar file" % path)
+    magic, version, frequency, count, firstTimestamp, lastTimestamp = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != MAGIC:
+        raise Exception("%s is not a bar file" % path)
+    if version != VERSION:
+        raise Exception("Unsupported bar file version %d" % version)
+    return {
+        "frequency": frequency,
+        "count": count,
+        "first_timestamp": firstTimestamp,
+        "last_timestamp": lastTimestamp,
+    }
+
+
+def load_columns(path):
+    """Memory maps a bar file and returns a dictionary with a read only numpy.array for each column."""
+    header = read_header(path)
+    count = header["count"]
+    ret = {}
+    if count == 0:
+        for name, dtype in zip(COLUMNS, COLUMN_TYPES):
+            ret[name] = np.empty(0, dtype=dtype)
+        return ret
+
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    offset = HEADER_SIZE
+    for name, dtype in zip(COLUMNS, COLUMN_TYPES):
+        ret[name] = data[offset:offset + count * 8].view(dtype)
+        offset += count * 8
+    return ret
+
+
+def write_columns(path, frequency, columns):
+    """Writes a bar file. The file is replaced atomically.
+
+    :param columns: A dictionary with an array for each column. Timestamps must be sorted and unique.
+    """
+    timestamps = np.asarray(columns["timestamp"], dtype=COLUMN_TYPES[0])
+    count = len(timestamps)
+    if count and np.any(np.diff(timestamps) <= 0):
+        raise Exception("Timestamps must be sorted and unique")
+
+    header = struct.pack(
+        HEADER_FORMAT, MAGIC, VERSION, frequency, count,
+        timestamps[0] if count else 0, timestamps[-1] if count else 0
+    )
+    tmpPath = path + ".tmp"
+    with open(tmpPath, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        for name, dtype in zip(COLUMNS, COLUMN_TYPES):
+            values = np.asarray(columns[name], dtype=dtype)
+            assert len(values) == count, "All columns must have the same length"
+            f.write(values.tobytes())
+    # os.replace is not available in Python 2.7, where os.rename replaces existing files on POSIX systems.
+    getattr(os, "replace", os.rename)(tmpPath, path)
+
+
+def slice_columns(columns, fromDateTime=None, toDateTime=None):
+    """Returns the rows between fromDateTime and toDateTime, both included, without copying the arrays."""
+    timestamps = columns["timestamp"]
+    begin = 0
+    end = len(timestamps)
+    if fromDateTime is not None:
+        begin = np.searchsorted(timestamps, dt.datetime_to_microseconds(fromDateTime), side="left")
+    if toDateTime is not None:
+        end = np.searchsorted(timestamps, dt.datetime_to_microseconds(toDateTime), side="right")
+    return dict((name, values[begin:end]) for name, values in six.iteritems(columns))
+
+
+def iterate_rows(columns, chunkSize=4096):
+    """Yields (timestamp, open, high, low, close, volume, adj_close) tuples with Python values.
+    Rows are converted in chunks, since that is a lot faster than converting values one at a time."""
+    count = len(columns["timestamp"])
+    for begin in six.moves.xrange(0, count, chunkSize):
+        end = min(begin + chunkSize, count)
+        for row in zip(*[columns[name][begin:end].tolist() for name in COLUMNS]):
+            yield row
+
+
+def iterate_timestamps(timestamps, chunkSize=4096):
+    """Yields (position, timestamp) tuples, converting timestamps to Python ints in chunks."""
+    for begin in six.moves.xrange(0, len(timestamps), chunkSize):
+        for pos, timestamp in enumerate(timestamps[begin:begin + chunkSize].tolist(), begin):
+            yield pos, timestamp
+
+
+def build_bar(row, dateTime, frequency):
+    adjClose = row[6]
+    if adjClose != adjClose:
+        adjClose = None
+    return bar.BasicBar(dateTime, row[1], row[2], row[3], row[4], row[5], adjClose, frequency)
+
+
+def timestamp_to_datetime(timestamp, timezone=None):
+    ret = dt.epoch_utc + datetime.timedelta(microseconds=timestamp)
+    if timezone:
+        ret = dt.localize(ret, timezone)
+    return ret
+
+
+# Columnar bar database. Each instrument and frequency is stored in a separate file inside dataDir.
+# Timestamps are stored in UTC, naive datetimes are considered to be in UTC.
+# Bars are buffered in memory and written when flush() or disconnect() are called.
+class Database(dbfeed.Database):
+    def __init__(self, dataDir):
+        if not os.path.exists(dataDir):
+            os.makedirs(dataDir)
+        self.__dataDir = dataDir
+        # (instrument, frequency) -> {timestamp: row}
+        self.__pending = {}
+
+    def getFilePath(self, instrument, frequency):
+        return os.path.join(self.__dataDir, get_file_name(instrument, frequency))
+
+    def getInstruments(self, frequency):
+        """Returns the instruments that have bars for the given frequency."""
+        suffix = "-%d%s" % (frequency, FILE_EXTENSION)
+        ret = []
+        for fileName in sorted(os.listdir(self.__dataDir)):
+            if fileName.endswith(suffix):
+                ret.append(unquote(fileName[:-len(suffix)]))
+        return ret
+
+    def addBar(self, instrument, bar, frequency):
+        adjClose = bar.getAdjClose()
+        row = (
+            bar.getOpen(), bar.getHigh(), bar.getLow(), bar.getClose(), bar.getVolume(),
+            np.nan if adjClose is None else adjClose
+        )
+        timestamp = dt.datetime_to_microseconds(bar.getDateTime())
+        self.__pending.setdefault((instrument, frequency), {})[timestamp] = row
+
+    def addBarsFromFeed(self, feed):
+        super(Database, self).addBarsFromFeed(feed)
+        self.flush()
+
+    def flush(self):
+        """Writes the bars that were added, replacing existing bars with the same datetime."""
+        for (instrument, frequency), rows in six.iteritems(self.__pending):
+            path = self.getFilePath(instrument, frequency)
+            timestamps = np.fromiter(six.iterkeys(rows), dtype=np.int64, count=len(rows))
+            values = np.array(list(six.itervalues(rows)), dtype=np.float64).reshape(len(rows), len(COLUMNS) - 1)
+            columns = {"timestamp": timestamps}
+            for i, name in enumerate(COLUMNS[1:]):
+                columns[name] = values[:, i]
+
+            if os.path.exists(path):
+                # Merge with the existing bars, giving precedence to the new ones.
+                existing = load_columns(path)
+                keep = ~np.isin(existing["timestamp"], timestamps)
+                for name in COLUMNS:
+                    columns[name] = np.concatenate((existing[name][keep], columns[name]))
+                del existing
+
+            order = np.argsort(columns["timestamp"], kind="mergesort")
+            for name in COLUMNS:
+                columns[name] = columns[name][order]
+            write_columns(path, frequency, columns)
+        self.__pending = {}
+
+    def getColumns(self, instrument, frequency, fromDateTime=None, toDateTime=None):
+        """Returns a dictionary with a memory mapped numpy.array for each column, or None if there are no bars."""
+        path = self.getFilePath(instrument, frequency)
+        if not os.path.exists(path):
+            return None
+        return slice_columns(load_columns(path), fromDateTime, toDateTime)
+
+    def getBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None):
+        columns = self.getColumns(instrument, frequency, fromDateTime, toDateTime)
+        ret = []
+        if columns is not None:
+            for row in iterate_rows(columns):
+                ret.append(build_bar(row, timestamp_to_datetime(row[0], timezone), frequency))
+        return ret
+
+    def disconnect(self):
+        self.flush()
+
+
+class Feed(barfeed.BaseBarFeed):
+    """A BarFeed that loads bars from a columnar bar database.
+    Files are memory mapped and bars are :class:`pyalgotrade.bar.ColumnarBar` views over the columns, built as they
+    are needed, so loading is almost instantaneous and memory usage doesn't depend on the number of bars.
+
+    :param dataDir: The directory with the bar files. Use :meth:`getDatabase` to add bars.
+    :type dataDir: string.
+    :param frequency: The bars frequency. Valid values defined in :class:`pyalgotrade.bar.Frequency`.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded
+        from the opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        To convert bars from another feed use **getDatabase().addBarsFromFeed(otherFeed)**.
+    """
+
+    def __init__(self, dataDir, frequency, maxLen=None):
+        super(Feed, self).__init__(frequency, maxLen)
+        self.__db = Database(dataDir)
+        self.__timestamps = {}
+        self.__barColumns = {}
+        self.__timezones = {}
+        # instrument -> (iterator over (position, timestamp), next (position, timestamp) or None)
+        self.__cursors = {}
+        # Instrument indexes for bar.ColumnarBars, shared by all the datetimes that have bars for the same instruments.
+        # Only the most recently used ones are kept, since with instruments trading at staggered times there could be
+        # as many as datetimes.
+        self.__instrumentIndexes = collections.OrderedDict()
+        self.__started = False
+        self.__currDateTime = None
+        # Heap with (timestamp, instrument index, instrument) for the next bar of each instrument. Built lazily.
+        self.__heap = None
+
+    def getDatabase(self):
+        return self.__db
+
+    def barsHaveAdjClose(self):
+        return True
+
+    def loadBars(self, instrument, timezone=None, fromDateTime=None, toDateTime=None):
+        """Loads bars for a given instrument.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param timezone: The timezone to localize datetimes. Datetimes are in UTC if None.
+        :type timezone: A pytz timezone.
+        :param fromDateTime: The first datetime to load, or None to start from the first bar.
+        :type fromDateTime: datetime.datetime.
+        :param toDateTime: The last datetime to load, or None to load up to the last bar.
+        :type toDateTime: datetime.datetime.
+        """
+        if self.__started:
+            raise Exception("Can't add more bars once you started consuming bars")
+        if instrument in self.__barColumns:
+            raise Exception("Bars for %s were already loaded" % instrument)
+
+        columns = self.__db.getColumns(instrument, self.getFrequency(), fromDateTime, toDateTime)
+        if columns is None:
+            raise Exception("There are no bars for %s" % instrument)
+        # Bars get validated here, once.
+        self.__barColumns[instrument] = bar.BarColumns(
+            columns["open"], columns["high"], columns["low"], columns["close"], columns["volume"], columns["adj_close"],
+            self.getFrequency()
+        )
+        self.__timestamps[instrument] = columns["timestamp"]
+        self.__timezones[instrument] = timezone
+        self.__resetCursor(instrument)
+        self.registerInstrument(instrument)
+        self.__heap = None
+
+    def __resetCursor(self, instrument):
+        positions = iterate_timestamps(self.__timestamps[instrument])
+        self.__cursors[instrument] = (positions, next(positions, None))
+
+    def reset(self):
+        for instrument in self.__barColumns:
+            self.__resetCursor(instrument)
+        self.__currDateTime = None
+        self.__heap = None
+        super(Feed, self).reset()
+
+    def getCurrentDateTime(self):
+        return self.__currDateTime
+
+    def start(self):
+        super(Feed, self).start()
+        self.__started = True
+
+    def stop(self):
+        pass
+
+    def join(self):
+        pass
+
+    def __getHeap(self):
+        if self.__heap is None:
+            self.__heap = []
+            # The instrument index is used to break ties so bars are always returned in the same order.
+            for i, instrument in enumerate(self.__barColumns):
+                nextPosition = self.__cursors[instrument][1]
+                if nextPosition is not None:
+                    self.__heap.append((nextPosition[1], i, instrument))
+            heapq.heapify(self.__heap)
+        return self.__heap
+
+    def eof(self):
+        return len(self.__getHeap()) == 0
+
+    def peekDateTime(self):
+        ret = None
+        heap = self.__getHeap()
+        if heap:
+            ret = timestamp_to_datetime(heap[0][0], self.__timezones[heap[0][2]])
+        return ret
+
+    def getNextBars(self):
+        heap = self.__getHeap()
+        if len(heap) == 0:
+            return None
+
+        smallestTimestamp = heap[0][0]
+        popped = []
+        while heap and heap[0][0] == smallestTimestamp:
+            popped.append(heapq.heappop(heap))
+
+        instruments = []
+        columns = []
+        positions = []
+        for _, i, instrument in popped:
+            cursor, (pos, timestamp) = self.__cursors[instrument]
+            instruments.append(instrument)
+            columns.append(self.__barColumns[instrument])
+            positions.append(pos)
+
+            nextPosition = next(cursor, None)
+            self.__cursors[instrument] = (cursor, nextPosition)
+            if nextPosition is not None:
+                heapq.heappush(heap, (nextPosition[1], i, instrument))
+
+        instrumentIndex = self.__getInstrumentIndex(tuple(instruments))
+
+        # Instruments may have been loaded using different timezones, so datetimes are built once per timezone.
+        dateTimes = {}
+        instrumentDateTimes = []
+        for instrument in instruments:
+            timezone = self.__timezones[instrument]
+            dateTime = dateTimes.get(timezone)
+            if dateTime is None:
+                dateTime = timestamp_to_datetime(smallestTimestamp, timezone)
+                dateTimes[timezone] = dateTime
+            instrumentDateTimes.append(dateTime)
+        dateTime = instrumentDateTimes[0]
+        if len(dateTimes) == 1:
+            instrumentDateTimes = None
+
+        self.__currDateTime = dateTime
+        return bar.ColumnarBars(dateTime, instrumentIndex, columns, positions, instrumentDateTimes)
+
+    def __getInstrumentIndex(self, instruments):
+        # Popping and inserting again moves the entry to the end, the most recently used one.
+        ret = self.__instrumentIndexes.pop(instruments, None)
+        if ret is None:
+            ret = dict((instrument, i) for i, instrument in enumerate(instruments))
+        self.__instrumentIndexes[instruments] = ret
+        if len(self.__instrumentIndexes) > INSTRUMENT_INDEX_CACHE_SIZE:
+            self.__instrumentIndexes.popitem(last=False)
+        return ret
@@ -0,0 +1,334 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pytz
+import six
+
+import pyalgotrade.logger
+from pyalgotrade.barfeed import bulkcsv
+from pyalgotrade.barfeed import columnarfeed
+from pyalgotrade.utils import dt
+
+
+# Cache for bars parsed from CSV files. Every entry is a directory, named after the hash of the key, with:
+# * One .npy file per column. Bars are stored in the same order as in the CSV file.
+# * meta.json, with the CSV file path, the timezone and the names of the extra columns. Its modification time is
+#   updated every time the entry is used, and it is used to evict the least recently used entries.
+# Entries are written to a temporary directory and renamed, so a half written entry is never used.
+
+logger = pyalgotrade.logger.getLogger("csvcache")
+
+META_FILE = "meta.json"
+VERSION = 1
+# The default maximum size of the cache directory, in bytes.
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+# The number of bars to build at a time when loading.
+CHUNK_SIZE = 4096
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    ret = hashlib.sha1()
+    with open(path, "rb") as f:
+        block = f.read(HASH_BLOCK_SIZE)
+        while block:
+            ret.update(block)
+            block = f.read(HASH_BLOCK_SIZE)
+    return ret.hexdigest()
+
+
+def describe_filter(barFilter):
+    """Returns a string that identifies a bar filter, to use in cache keys.
+    Filters can implement getCacheKey to override the default, that is based on the filter attributes."""
+    if barFilter is None:
+        return None
+    getCacheKey = getattr(barFilter, "getCacheKey", None)
+    if getCacheKey is not None:
+        return getCacheKey()
+    attrs = sorted((name, repr(value)) for name, value in six.iteritems(vars(barFilter)))
+    return repr((bulkcsv.get_name(type(barFilter)), attrs))
+
+
+def get_entry_size(entryPath):
+    return sum(os.path.getsize(os.path.join(entryPath, name)) for name in os.listdir(entryPath))
+
+
+def bars_to_columns(bars):
+    """Returns a tuple with a dictionary of numpy.arrays and the metadata to rebuild the bars, or None if the bars
+    can't be cached."""
+    zone = None
+    if len(bars) and not dt.datetime_is_naive(bars[0].getDateTime()):
+        zone = getattr(bars[0].getDateTime().tzinfo, "zone", None)
+        if zone is None:
+            return None
+
+    columns = {
+        "timestamp": np.array([dt.datetime_to_microseconds(bar_.getDateTime()) for bar_ in bars], dtype=np.int64),
+        "open": np.array([bar_.getOpen() for bar_ in bars], dtype=np.float64),
+        "high": np.array([bar_.getHigh() for bar_ in bars], dtype=np.float64),
+        "low": np.array([bar_.getLow() for bar_ in bars], dtype=np.float64),
+        "close": np.array([bar_.getClose() for bar_ in bars], dtype=np.float64),
+        "volume": np.array([bar_.getVolume() for bar_ in bars], dtype=np.float64),
+        "adj_close": np.array([
+            np.nan if bar_.getAdjClose() is None else bar_.getAdjClose() for bar_ in bars
+        ], dtype=np.float64),
+    }
+
+    extraNames = sorted(bars[0].getExtraColumns().keys()) if len(bars) else []
+    for i, name in enumerate(extraNames):
+        values = []
+        for bar_ in bars:
+            extra = bar_.getExtraColumns()
+            if len(extra) != len(extraNames) or name not in extra:
+                return None
+            values.append(extra[name])
+        # Columns must be all floats or all strings.
+        if all(isinstance(value, float) for value in values):
+            columns["extra_%d" % i] = np.array(values, dtype=np.float64)
+        elif all(isinstance(value, six.string_types) for value in values):
+            columns["extra_%d" % i] = np.array(values, dtype=np.str_)
+        else:
+            return None
+
+    haveAdjClose = not np.isnan(columns["adj_close"]).all()
+    return columns, {"zone": zone, "extra": extraNames, "have_adj_close": haveAdjClose}
+
+
+def build_bars(columns, meta, mapping):
+    ret = []
+    barClass = mapping.getBarClass()
+    frequency = mapping.getFrequency()
+    zone = meta["zone"]
+    timezone = None if zone is None else pytz.timezone(zone)
+    extraColumns = [columns["extra_%d" % i] for i in range(len(meta["extra"]))]
+
+    count = len(columns["timestamp"])
+    for begin in six.moves.xrange(0, count, CHUNK_SIZE):
+        end = min(begin + CHUNK_SIZE, count)
+        dateTimes = columns["timestamp"][begin:end].astype("datetime64[us]").tolist()
+        if timezone is not None:
+            dateTimes = [pytz.utc.localize(dateTime).astimezone(timezone) for dateTime in dateTimes]
+        values = [columns[name][begin:end].tolist() for name in columnarfeed.COLUMNS[1:]]
+        adjCloses = [None if value != value else value for value in values[5]]
+        if extraColumns:
+            extraValues = [column[begin:end].tolist() for column in extraColumns]
+            extras = [dict(zip(meta["extra"], row)) for row in zip(*extraValues)]
+        for i, row in enumerate(zip(dateTimes, values[0], values[1], values[2], values[3], values[4], adjCloses)):
+            if extraColumns:
+                ret.append(barClass(*(row + (frequency,)), extra=extras[i]))
+            else:
+                ret.append(barClass(*(row + (frequency,))))
+    return ret
+
+
+class Cache(object):
+    """An on disk cache for bars parsed from CSV files, that is used by :class:`pyalgotrade.barfeed.csvfeed.BarFeed`
+    once set with :meth:`pyalgotrade.barfeed.csvfeed.BarFeed.setCache`.
+
+    Entries are keyed by the CSV file path, size, modification time and content hash, the row parser configuration,
+    the bar filter and whether malformed bars were skipped, so changes to any of those end up in a different entry.
+    Once the cache directory gets bigger than maxSize, the least recently used entries are removed.
+
+    :param cacheDir: The directory where entries are stored. It gets created if it doesn't exist.
+    :type cacheDir: string.
+    :param maxSize: The maximum size of the cache directory, in bytes.
+    :type maxSize: int.
+    :param hashContents: True to include a hash of the contents of the CSV file in the key. If False, only the file size
+        and modification time are used to detect changes, which avoids reading the file on every load.
+    :type hashContents: boolean.
+
+    .. note::
+        * Only row parsers that provide a :class:`pyalgotrade.barfeed.bulkcsv.ColumnMapping` are supported, since that
+          is what describes their configuration.
+        * Loading bars from the cache skips parsing the CSV file entirely. Bars get built from the cached columns.
+        * Bars that can't be cached, like the ones with extra columns that mix numbers and strings, are parsed every
+          time they are loaded. Those loads are counted by :meth:`getUncacheable` instead of :meth:`getMisses`.
+    """
+
+    def __init__(self, cacheDir, maxSize=DEFAULT_MAX_SIZE, hashContents=True):
+        self.__cacheDir = cacheDir
+        self.__maxSize = maxSize
+        self.__hashContents = hashContents
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__uncacheable = 0
+        # Keys for bars that can't be cached.
+        self.__uncacheableKeys = set()
+        if not os.path.exists(cacheDir):
+            os.makedirs(cacheDir)
+
+    def getCacheDir(self):
+        return self.__cacheDir
+
+    def getMaxSize(self):
+        return self.__maxSize
+
+    def getHits(self):
+        """Returns the number of times bars were loaded from the cache."""
+        return self.__hits
+
+    def getMisses(self):
+        """Returns the number of times bars had to be parsed because there was no entry for them."""
+        return self.__misses
+
+    def getUncacheable(self):
+        """Returns the number of times bars had to be parsed because they can't be cached."""
+        return self.__uncacheable
+
+    def getEvictions(self):
+        """Returns the number of entries removed to keep the cache directory under the maximum size."""
+        return self.__evictions
+
+    def getSize(self):
+        """Returns the size of the cache directory, in bytes."""
+        return sum(size for _, _, size in self.__getEntries())
+
+    def getKey(self, path, mapping, barFilter=None, skipMalformedBars=False):
+        """Returns the key for the bars in a CSV file.
+
+        :param path: The path to the CSV file.
+        :type path: string.
+        :param mapping: The configuration of the row parser.
+        :type mapping: :class:`pyalgotrade.barfeed.bulkcsv.ColumnMapping`.
+        :param barFilter: The bar filter, if any.
+        :type barFilter: :class:`pyalgotrade.barfeed.csvfeed.BarFilter`.
+        :param skipMalformedBars: True if malformed bars are skipped.
+        :type skipMalformedBars: boolean.
+        :rtype: string.
+        """
+        stat = os.stat(path)
+        contentHash = hash_file(path) if self.__hashContents else None
+        key = repr((
+            VERSION, os.path.abspath(path), stat.st_size, stat.st_mtime, contentHash, mapping.getCacheKey(),
+            describe_filter(barFilter), skipMalformedBars
+        ))
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def __getEntryPath(self, key):
+        return os.path.join(self.__cacheDir, key)
+
+    def __getEntries(self):
+        # Returns (last used time, entry path, size) tuples.
+        ret = []
+        for name in os.listdir(self.__cacheDir):
+            entryPath = os.path.join(self.__cacheDir, name)
+            metaPath = os.path.join(entryPath, META_FILE)
+            if not os.path.exists(metaPath):
+                continue
+            try:
+                ret.append((os.path.getmtime(metaPath), entryPath, get_entry_size(entryPath)))
+            except OSError:
+                # The entry was removed by another process.
+                pass
+        return ret
+
+    def load(self, key, mapping):
+        """Returns the cached bars, or None if there is no entry for the key."""
+        if key in self.__uncacheableKeys:
+            self.__uncacheable += 1
+            return None
+
+        entryPath = self.__getEntryPath(key)
+        metaPath = os.path.join(entryPath, META_FILE)
+        try:
+            with open(metaPath, "r") as f:
+                meta = json.load(f)
+            columns = {}
+            for name in meta["columns"]:
+                columns[name] = np.load(os.path.join(entryPath, name + ".npy"))
+            # Mark the entry as recently used.
+            os.utime(metaPath, None)
+        except (IOError, OSError, ValueError, KeyError):
+            self.__misses += 1
+            return None
+
+        self.__hits += 1
+        if meta["have_adj_close"]:
+            mapping.setBarsHaveAdjClose(True)
+        return build_bars(columns, meta, mapping)
+
+    def store(self, key, path, bars):
+        """Stores the bars parsed from a CSV file.
+
+        :rtype: True if the bars were stored, False if they can't be cached.
+        """
+        converted = bars_to_columns(bars)
+        if converted is None:
+            # Remember the key so later loads skip the cache without counting as misses, and log just once.
+            if key not in self.__uncacheableKeys:
+                self.__uncacheableKeys.add(key)
+                logger.warning("Bars from %s can't be cached and will be parsed every time" % path)
+            return False
+        columns, meta = converted
+        meta["path"] = os.path.abspath(path)
+        meta["columns"] = sorted(columns.keys())
+
+        tmpPath = tempfile.mkdtemp(dir=self.__cacheDir, prefix=".tmp-")
+        try:
+            for name, values in six.iteritems(columns):
+                np.save(os.path.join(tmpPath, name + ".npy"), values)
+            with open(os.path.join(tmpPath, META_FILE), "w") as f:
+                json.dump(meta, f)
+            entryPath = self.__getEntryPath(key)
+            if os.path.exists(entryPath):
+                shutil.rmtree(entryPath)
+            os.rename(tmpPath, entryPath)
+        finally:
+            if os.path.exists(tmpPath):
+                shutil.rmtree(tmpPath)
+        self.evict()
+        return True
+
+    def evict(self):
+        """Removes the least recently used entries until the cache directory is not bigger than the maximum size."""
+        entries = sorted(self.__getEntries())
+        size = sum(entry[2] for entry in entries)
+        for _, entryPath, entrySize in entries:
+            if size <= self.__maxSize:
+                break
+            shutil.rmtree(entryPath, ignore_errors=True)
+            size -= entrySize
+            self.__evictions += 1
+
+    def invalidate(self, path):
+        """Removes every entry for a CSV file."""
+        path = os.path.abspath(path)
+        for _, entryPath, _ in self.__getEntries():
+            try:
+                with open(os.path.join(entryPath, META_FILE), "r") as f:
+                    entryFile = json.load(f).get("path")
+            except (IOError, OSError, ValueError):
+                continue
+            if entryFile == path:
+                shutil.rmtree(entryPath, ignore_errors=True)
+
+    def clear(self):
+        """Removes every entry."""
+        self.__uncacheableKeys.clear()
+        for _, entryPath, _ in self.__getEntries():
+            shutil.rmtree(entryPath, ignore_errors=True)
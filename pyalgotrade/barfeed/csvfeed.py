@@ -26,9 +26,19 @@ import six
 from pyalgotrade.utils import dt
 from pyalgotrade.utils import csvutils
 from pyalgotrade.barfeed import membf
+from pyalgotrade.barfeed import bulkcsv
 from pyalgotrade import bar
 
 
+def overrides_methods(instance, cls, methodNames):
+    """Returns True if the class of instance overrides any of the methods defined by cls."""
+    for methodName in methodNames:
+        if six.get_unbound_function(getattr(type(instance), methodName)) is not \
+                six.get_unbound_function(getattr(cls, methodName)):
+            return True
+    return False
+
+
 # Interface for csv row parsers.
 class RowParser(object):
     def parseBar(self, csvRowDict):
@@ -40,6 +50,11 @@ class RowParser(object):
     def getDelimiter(self):
         raise NotImplementedError()
 
+    # Override to return a pyalgotrade.barfeed.bulkcsv.ColumnMapping to support bulk loading.
+    # The mapping replaces parseBar, so return None if a subclass overrides it (check overrides_methods).
+    def getColumnMapping(self):
+        return None
+
 
 # Interface for bar filters.
 class BarFilter(object):
@@ -101,6 +116,8 @@ class BarFeed(membf.BarFeed):
 
         self.__barFilter = None
         self.__dailyTime = datetime.time(0, 0, 0)
+        self.__bulkLoading = False
+        self.__cache = None
 
     def getDailyBarTime(self):
         return self.__dailyTime
@@ -114,6 +131,36 @@ class BarFeed(membf.BarFeed):
     def setBarFilter(self, barFilter):
         self.__barFilter = barFilter
 
+    def getBulkLoading(self):
+        return self.__bulkLoading
+
+    def setBulkLoading(self, bulkLoading):
+        """Enables or disables bulk loading. When enabled, and if the row parser supports it, CSV files are parsed in
+        chunks, one column at a time, using :mod:`pyalgotrade.barfeed.bulkcsv`. This is a lot faster for large files.
+
+        :param bulkLoading: True to enable bulk loading.
+        :type bulkLoading: boolean.
+
+        .. note::
+            * Malformed rows raise an exception that includes the line number of the first ones, instead of failing
+              on the first one.
+            * Row parsers that override parseBar (or _parseDate in :class:`GenericRowParser`) are parsed row by row,
+              since bulk loading would skip those methods.
+        """
+        self.__bulkLoading = bulkLoading
+
+    def getCache(self):
+        return self.__cache
+
+    def setCache(self, cache):
+        """Sets a cache for the bars parsed from CSV files. Files that were already parsed, with the same row parser
+        configuration and bar filter, get loaded from the cache instead.
+
+        :param cache: The cache, or None to disable caching.
+        :type cache: :class:`pyalgotrade.barfeed.csvcache.Cache`.
+        """
+        self.__cache = cache
+
     def addBarsFromCSV(self, instrument, path, rowParser, skipMalformedBars=False):
         def parse_bar_skip_malformed(row):
             ret = None
@@ -128,13 +175,29 @@ class BarFeed(membf.BarFeed):
         else:
             parse_bar = rowParser.parseBar
 
+        columnMapping = None
+        if self.__bulkLoading or self.__cache is not None:
+            columnMapping = rowParser.getColumnMapping()
+
+        loadedBars = None
+        cacheKey = None
+        if self.__cache is not None and columnMapping is not None:
+            cacheKey = self.__cache.getKey(path, columnMapping, self.__barFilter, skipMalformedBars)
+            loadedBars = self.__cache.load(cacheKey, columnMapping)
+
         # Load the csv file
-        loadedBars = []
-        reader = csvutils.FastDictReader(open(path, "r"), fieldnames=rowParser.getFieldNames(), delimiter=rowParser.getDelimiter())
-        for row in reader:
-            bar_ = parse_bar(row)
-            if bar_ is not None and (self.__barFilter is None or self.__barFilter.includeBar(bar_)):
-                loadedBars.append(bar_)
+        if loadedBars is None:
+            if self.__bulkLoading and columnMapping is not None:
+                loadedBars = bulkcsv.load_bars(path, columnMapping, self.__barFilter, skipMalformedBars)
+            else:
+                loadedBars = []
+                reader = csvutils.FastDictReader(open(path, "r"), fieldnames=rowParser.getFieldNames(), delimiter=rowParser.getDelimiter())
+                for row in reader:
+                    bar_ = parse_bar(row)
+                    if bar_ is not None and (self.__barFilter is None or self.__barFilter.includeBar(bar_)):
+                        loadedBars.append(bar_)
+            if cacheKey is not None:
+                self.__cache.store(cacheKey, path, loadedBars)
 
         self.addBarsFromSequence(instrument, loadedBars)
 
@@ -156,6 +219,7 @@ class GenericRowParser(RowParser):
         self.__volumeColName = columnNames["volume"]
         self.__adjCloseColName = columnNames["adj_close"]
         self.__columnNames = columnNames
+        self.__columnMapping = None
 
     def _parseDate(self, dateString):
         ret = datetime.datetime.strptime(dateString, self.__dateTimeFormat)
@@ -168,7 +232,7 @@ class GenericRowParser(RowParser):
         return ret
 
     def barsHaveAdjClose(self):
-        return self.__haveAdjClose
+        return self.__haveAdjClose or (self.__columnMapping is not None and self.__columnMapping.barsHaveAdjClose())
 
     def getFieldNames(self):
         # It is expected for the first row to have the field names.
@@ -177,6 +241,17 @@ class GenericRowParser(RowParser):
     def getDelimiter(self):
         return ","
 
+    def getColumnMapping(self):
+        # Subclasses that customize parsing have to be parsed row by row.
+        if overrides_methods(self, GenericRowParser, ["parseBar", "_parseDate"]):
+            return None
+        if self.__columnMapping is None:
+            self.__columnMapping = bulkcsv.ColumnMapping(
+                self.__columnNames, self.__dateTimeFormat, self.__frequency, dailyBarTime=self.__dailyBarTime,
+                timezone=self.__timezone, barClass=self.__barClass, extraColumns=True
+            )
+        return self.__columnMapping
+
     def parseBar(self, csvRowDict):
         dateTime = self._parseDate(csvRowDict[self.__dateTimeColName])
         open_ = float(csvRowDict[self.__openColName])
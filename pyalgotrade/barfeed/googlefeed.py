@@ -21,6 +21,7 @@
 """
 
 from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import bulkcsv
 from pyalgotrade.barfeed import common
 from pyalgotrade.utils import dt
 from pyalgotrade import bar
@@ -36,6 +37,16 @@ import datetime
 # Date,Open,High,Low,Close,Volume
 #
 # The csv Date column must have the following format: D-B-YY
+COLUMN_NAMES = {
+    "datetime": "Date",
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "volume": "Volume",
+    "adj_close": None,
+}
+
 
 def parse_date(date):
     # Sample: 3-Dec-05
@@ -79,6 +90,15 @@ class RowParser(csvfeed.RowParser):
     def getDelimiter(self):
         return ","
 
+    def getColumnMapping(self):
+        # Subclasses that customize parsing have to be parsed row by row.
+        if csvfeed.overrides_methods(self, RowParser, ["parseBar"]):
+            return None
+        return bulkcsv.ColumnMapping(
+            COLUMN_NAMES, None, self.__frequency, dailyBarTime=self.__dailyBarTime, timezone=self.__timezone,
+            sanitize=self.__sanitize, dateTimeParser=parse_date
+        )
+
     def parseBar(self, csvRowDict):
         dateTime = self.__parseDate(csvRowDict["Date"])
         close = float(csvRowDict["Close"])
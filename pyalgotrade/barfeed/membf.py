@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import heapq
+
 import six
 
 from pyalgotrade import barfeed
@@ -31,6 +33,10 @@ from pyalgotrade import utils
 #
 # Subclasses should:
 # - Forward the call to start() if they override it.
+#
+# If heap scheduling is enabled, the datetime of the next bar for each instrument is kept in a heap so advancing one
+# step costs O(k log n), where k is the number of instruments that have bars for that datetime, instead of scanning
+# every instrument a few times.
 
 class BarFeed(barfeed.BaseBarFeed):
     def __init__(self, frequency, maxLen=None):
@@ -40,12 +46,16 @@ class BarFeed(barfeed.BaseBarFeed):
         self.__nextPos = {}
         self.__started = False
         self.__currDateTime = None
+        self.__useHeapScheduling = False
+        # Heap with (datetime, instrument index, instrument) for the next bar of each instrument. Built lazily.
+        self.__heap = None
 
     def reset(self):
         self.__nextPos = {}
         for instrument in self.__bars.keys():
             self.__nextPos.setdefault(instrument, 0)
         self.__currDateTime = None
+        self.__heap = None
         super(BarFeed, self).reset()
 
     def getCurrentDateTime(self):
@@ -61,6 +71,53 @@ class BarFeed(barfeed.BaseBarFeed):
     def join(self):
         pass
 
+    def setUseHeapScheduling(self, useHeap):
+        if self.__started:
+            raise Exception("Can't change the scheduling mode once you started consuming bars")
+        self.__useHeapScheduling = useHeap
+        self.__heap = None
+
+    def getUseHeapScheduling(self):
+        return self.__useHeapScheduling
+
+    def __getHeap(self):
+        if self.__heap is None:
+            self.__heap = []
+            # The instrument index is used to break ties so bars are returned in the same order as without the heap.
+            for i, (instrument, bars) in enumerate(six.iteritems(self.__bars)):
+                nextPos = self.__nextPos[instrument]
+                if nextPos < len(bars):
+                    self.__heap.append((bars[nextPos].getDateTime(), i, instrument))
+            heapq.heapify(self.__heap)
+        return self.__heap
+
+    def __getNextBarsUsingHeap(self):
+        heap = self.__getHeap()
+        if len(heap) == 0:
+            return None
+
+        smallestDateTime = heap[0][0]
+        popped = []
+        while heap and heap[0][0] == smallestDateTime:
+            popped.append(heapq.heappop(heap))
+
+        # Push the next bars only after popping, so we take at most one bar per instrument.
+        ret = {}
+        for _, i, instrument in popped:
+            bars = self.__bars[instrument]
+            nextPos = self.__nextPos[instrument]
+            ret[instrument] = bars[nextPos]
+            nextPos += 1
+            self.__nextPos[instrument] = nextPos
+            if nextPos < len(bars):
+                heapq.heappush(heap, (bars[nextPos].getDateTime(), i, instrument))
+
+        if self.__currDateTime == smallestDateTime:
+            raise Exception("Duplicate bars found for %s on %s" % (list(ret.keys()), smallestDateTime))
+
+        self.__currDateTime = smallestDateTime
+        return bar.Bars(ret)
+
     def addBarsFromSequence(self, instrument, bars):
         if self.__started:
             raise Exception("Can't add more bars once you started consuming bars")
@@ -73,8 +130,12 @@ class BarFeed(barfeed.BaseBarFeed):
         self.__bars[instrument].sort(key=lambda b: b.getDateTime())
 
         self.registerInstrument(instrument)
+        self.__heap = None
 
     def eof(self):
+        if self.__useHeapScheduling:
+            return len(self.__getHeap()) == 0
+
         ret = True
         # Check if there is at least one more bar to return.
         for instrument, bars in six.iteritems(self.__bars):
@@ -85,6 +146,10 @@ class BarFeed(barfeed.BaseBarFeed):
         return ret
 
     def peekDateTime(self):
+        if self.__useHeapScheduling:
+            heap = self.__getHeap()
+            return heap[0][0] if heap else None
+
         ret = None
 
         for instrument, bars in six.iteritems(self.__bars):
@@ -94,6 +159,9 @@ class BarFeed(barfeed.BaseBarFeed):
         return ret
 
     def getNextBars(self):
+        if self.__useHeapScheduling:
+            return self.__getNextBarsUsingHeap()
+
         # All bars must have the same datetime. We will return all the ones with the smallest datetime.
         smallestDateTime = self.peekDateTime()
 
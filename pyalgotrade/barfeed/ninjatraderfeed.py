@@ -20,6 +20,7 @@
 
 import pyalgotrade.barfeed
 from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import bulkcsv
 from pyalgotrade import bar
 from pyalgotrade.utils import dt
 
@@ -90,6 +91,35 @@ class RowParser(csvfeed.RowParser):
     def getDelimiter(self):
         return ";"
 
+    def getColumnMapping(self):
+        # Subclasses that customize parsing have to be parsed row by row.
+        if csvfeed.overrides_methods(self, RowParser, ["parseBar"]):
+            return None
+        columnNames = {
+            "datetime": "Date Time",
+            "open": "Open",
+            "high": "High",
+            "low": "Low",
+            "close": "Close",
+            "volume": "Volume",
+        }
+        if self.__frequency == pyalgotrade.bar.Frequency.MINUTE:
+            dateTimeFormat = "%Y%m%d %H%M%S"
+            dateTimeParser = parse_datetime
+            dailyBarTime = None
+        elif self.__frequency == pyalgotrade.bar.Frequency.DAY:
+            dateTimeFormat = "%Y%m%d"
+            dateTimeParser = None
+            dailyBarTime = self.__dailyBarTime
+        else:
+            assert(False)
+        # According to NinjaTrader documentation the exported data will be in UTC.
+        return bulkcsv.ColumnMapping(
+            columnNames, dateTimeFormat, self.__frequency, dailyBarTime=dailyBarTime, timezone=self.__timezone,
+            fileTimezone=pytz.utc, fieldNames=self.getFieldNames(), delimiter=self.getDelimiter(),
+            dateTimeParser=dateTimeParser
+        )
+
     def parseBar(self, csvRowDict):
         dateTime = self.__parseDateTime(csvRowDict["Date Time"])
         close = float(csvRowDict["Close"])
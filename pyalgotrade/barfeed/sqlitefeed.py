@@ -20,12 +20,33 @@
 
 from pyalgotrade.barfeed import dbfeed
 from pyalgotrade.barfeed import membf
+from pyalgotrade.barfeed import streamingfeed
 from pyalgotrade import bar
 from pyalgotrade.utils import dt
 
+import contextlib
+import re
 import sqlite3
 import os
 
+import six
+
+
+# Pragmas that speed up bulk imports considerably, at the expense of durability if the OS crashes (not the process).
+# page_size only takes effect when the database gets created.
+BULK_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -65536,  # In KiB when negative.
+    "temp_store": "MEMORY",
+}
+# The number of bars to insert with each executemany.
+BATCH_SIZE = 10000
+
+# Pragma names and values can't be passed as parameters.
+PRAGMA_NAME_RE = re.compile(r"^[a-z_]+$")
+PRAGMA_VALUE_RE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
 
 def normalize_instrument(instrument):
     return instrument.upper()
@@ -34,18 +55,67 @@ def normalize_instrument(instrument):
 # SQLite DB.
 # Timestamps are stored in UTC.
 class Database(dbfeed.Database):
-    def __init__(self, dbFilePath):
+    """A SQLite bar database.
+
+    :param dbFilePath: The path to the database file. It gets created if it doesn't exist.
+    :type dbFilePath: string.
+    :param pragmas: Optional pragmas to set when connecting, like :data:`BULK_PRAGMAS`.
+    :type pragmas: dict.
+    """
+
+    def __init__(self, dbFilePath, pragmas=None):
         self.__instrumentIds = {}
+        self.__transactionDepth = 0
 
         # If the file doesn't exist, we'll create it and initialize it.
         initialize = False
         if not os.path.exists(dbFilePath):
             initialize = True
-        self.__connection = sqlite3.connect(dbFilePath)
+        # Bars may be read from a different thread when prefetching (see pyalgotrade.barfeed.streamingfeed).
+        self.__connection = sqlite3.connect(dbFilePath, check_same_thread=False)
         self.__connection.isolation_level = None  # To do auto-commit
+        # Pragmas like page_size have to be set before creating the schema.
+        if pragmas:
+            for name, value in sorted(six.iteritems(pragmas)):
+                self.setPragma(name, value)
         if initialize:
             self.createSchema()
 
+    def setPragma(self, name, value):
+        """Sets a SQLite pragma, like journal_mode, synchronous, page_size or cache_size."""
+        value = str(value)
+        if not PRAGMA_NAME_RE.match(name) or not PRAGMA_VALUE_RE.match(value):
+            raise Exception("Invalid pragma %s = %s" % (name, value))
+        self.__connection.execute("pragma %s = %s" % (name, value)).fetchall()
+
+    def getPragma(self, name):
+        if not PRAGMA_NAME_RE.match(name):
+            raise Exception("Invalid pragma %s" % name)
+        ret = self.__connection.execute("pragma %s" % name).fetchone()
+        if ret is not None:
+            ret = ret[0]
+        return ret
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """A context manager that runs the statements inside it in a single transaction, that gets committed on exit,
+        or rolled back if an exception is raised. Nested transactions are part of the outermost one."""
+        self.__transactionDepth += 1
+        if self.__transactionDepth == 1:
+            self.__connection.execute("begin")
+        try:
+            yield
+        except Exception:
+            self.__transactionDepth -= 1
+            if self.__transactionDepth == 0:
+                self.__connection.execute("rollback")
+                # Instruments added in the transaction are gone.
+                self.__instrumentIds = {}
+            raise
+        self.__transactionDepth -= 1
+        if self.__transactionDepth == 0:
+            self.__connection.execute("commit")
+
     def __findInstrumentId(self, instrument):
         cursor = self.__connection.cursor()
         sql = "select instrument_id from instrument where name = ?"
@@ -92,23 +162,90 @@ class Database(dbfeed.Database):
             ", volume real not null"
             ", adj_close real"
             ", primary key (instrument_id, frequency, timestamp))")
+        self.createIndexes()
+
+    def createIndexes(self):
+        """Creates the indexes used to load bars for many instruments at once. Databases created with previous versions
+        don't have them, and calling this will add them."""
+        self.__connection.execute("create index if not exists bar_frequency_timestamp on bar (frequency, timestamp)")
+
+    def __getBarParams(self, instrumentId, bar, frequency):
+        return (
+            instrumentId, frequency, dt.datetime_to_timestamp(bar.getDateTime()), bar.getOpen(), bar.getHigh(),
+            bar.getLow(), bar.getClose(), bar.getVolume(), bar.getAdjClose()
+        )
+
+    def __upsertBars(self, params):
+        # Bars are identified by the primary key, so replacing a row is the same as updating it.
+        sql = "insert or replace into bar (instrument_id, frequency, timestamp, open, high, low, close, volume, adj_close)" \
+            " values (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        self.__connection.executemany(sql, params)
 
     def addBar(self, instrument, bar, frequency):
-        instrument = normalize_instrument(instrument)
-        instrumentId = self.__getOrCreateInstrument(instrument)
-        timeStamp = dt.datetime_to_timestamp(bar.getDateTime())
+        instrumentId = self.__getOrCreateInstrument(normalize_instrument(instrument))
+        self.__upsertBars([self.__getBarParams(instrumentId, bar, frequency)])
 
-        try:
-            sql = "insert into bar (instrument_id, frequency, timestamp, open, high, low, close, volume, adj_close) values (?, ?, ?, ?, ?, ?, ?, ?, ?)"
-            params = [instrumentId, frequency, timeStamp, bar.getOpen(), bar.getHigh(), bar.getLow(), bar.getClose(), bar.getVolume(), bar.getAdjClose()]
-            self.__connection.execute(sql, params)
-        except sqlite3.IntegrityError:
-            sql = "update bar set open = ?, high = ?, low = ?, close = ?, volume = ?, adj_close = ?" \
-                " where instrument_id = ? and frequency = ? and timestamp = ?"
-            params = [bar.getOpen(), bar.getHigh(), bar.getLow(), bar.getClose(), bar.getVolume(), bar.getAdjClose(), instrumentId, frequency, timeStamp]
-            self.__connection.execute(sql, params)
+    def addBarsFromSequence(self, instrument, bars, frequency, batchSize=BATCH_SIZE):
+        """Adds or updates many bars for an instrument, using one transaction per batch of bars.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param bars: The bars.
+        :param frequency: The bars frequency.
+        :param batchSize: The number of bars to add in each transaction.
+        :type batchSize: int.
+        """
+        instrumentId = None
+        params = []
+        for bar_ in bars:
+            if instrumentId is None:
+                instrumentId = self.__getOrCreateInstrument(normalize_instrument(instrument))
+            params.append(self.__getBarParams(instrumentId, bar_, frequency))
+            if len(params) == batchSize:
+                with self.transaction():
+                    self.__upsertBars(params)
+                params = []
+        if params:
+            with self.transaction():
+                self.__upsertBars(params)
+
+    def addBars(self, bars, frequency):
+        params = []
+        for instrument in bars.getInstruments():
+            instrumentId = self.__getOrCreateInstrument(normalize_instrument(instrument))
+            params.append(self.__getBarParams(instrumentId, bars.getBar(instrument), frequency))
+        with self.transaction():
+            self.__upsertBars(params)
+
+    def addBarsFromFeed(self, feed, batchSize=BATCH_SIZE):
+        """Adds or updates all the bars in a feed, using one transaction per batch of bars.
+
+        :param feed: The feed.
+        :type feed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+        :param batchSize: The number of bars to add in each transaction.
+        :type batchSize: int.
+        """
+        frequency = feed.getFrequency()
+        params = []
+        for dateTime, bars in feed:
+            if not bars:
+                continue
+            for instrument in bars.getInstruments():
+                instrumentId = self.__getOrCreateInstrument(normalize_instrument(instrument))
+                params.append(self.__getBarParams(instrumentId, bars.getBar(instrument), frequency))
+            if len(params) >= batchSize:
+                with self.transaction():
+                    self.__upsertBars(params)
+                params = []
+        if params:
+            with self.transaction():
+                self.__upsertBars(params)
 
     def getBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None):
+        return list(self.iterBars(instrument, frequency, timezone, fromDateTime, toDateTime))
+
+    def iterBars(self, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None, chunkSize=1000):
+        """Yields the bars for an instrument sorted by datetime, fetching chunkSize rows at a time."""
         instrument = normalize_instrument(instrument)
         sql = "select bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.adj_close, bar.frequency" \
             " from bar join instrument on (bar.instrument_id = instrument.instrument_id)" \
@@ -124,15 +261,75 @@ class Database(dbfeed.Database):
 
         sql += " order by bar.timestamp asc"
         cursor = self.__connection.cursor()
-        cursor.execute(sql, args)
-        ret = []
-        for row in cursor:
-            dateTime = dt.timestamp_to_datetime(row[0])
-            if timezone:
-                dateTime = dt.localize(dateTime, timezone)
-            ret.append(bar.BasicBar(dateTime, row[1], row[2], row[3], row[4], row[5], row[6], row[7]))
-        cursor.close()
-        return ret
+        try:
+            cursor.execute(sql, args)
+            rows = cursor.fetchmany(chunkSize)
+            while rows:
+                for row in rows:
+                    dateTime = dt.timestamp_to_datetime(row[0])
+                    if timezone:
+                        dateTime = dt.localize(dateTime, timezone)
+                    yield bar.BasicBar(dateTime, row[1], row[2], row[3], row[4], row[5], row[6], row[7])
+                rows = cursor.fetchmany(chunkSize)
+        finally:
+            cursor.close()
+
+    def iterMergedBars(self, instruments, frequency, timezone=None, fromDateTime=None, toDateTime=None, chunkSize=1000):
+        """Yields :class:`pyalgotrade.bar.Bars` for many instruments, sorted by datetime. Bars are merged by the query
+        itself, fetching chunkSize rows at a time.
+
+        :param instruments: Instrument identifiers.
+        :type instruments: list.
+        :param frequency: The bars frequency.
+        :param timezone: The timezone to localize datetimes. Datetimes are in UTC if None.
+        :type timezone: A pytz timezone.
+        :param fromDateTime: The first datetime to load, or None to start from the first bar.
+        :type fromDateTime: datetime.datetime.
+        :param toDateTime: The last datetime to load, or None to load up to the last bar.
+        :type toDateTime: datetime.datetime.
+        """
+        # Bars are returned using the instrument identifiers as given.
+        names = dict((normalize_instrument(instrument), instrument) for instrument in instruments)
+        if len(names) == 0:
+            return
+
+        sql = "select instrument.name, bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.adj_close" \
+            " from bar join instrument on (bar.instrument_id = instrument.instrument_id)" \
+            " where bar.frequency = ? and instrument.name in (%s)" % ", ".join(["?"] * len(names))
+        args = [frequency] + sorted(names.keys())
+
+        if fromDateTime is not None:
+            sql += " and bar.timestamp >= ?"
+            args.append(dt.datetime_to_timestamp(fromDateTime))
+        if toDateTime is not None:
+            sql += " and bar.timestamp <= ?"
+            args.append(dt.datetime_to_timestamp(toDateTime))
+
+        sql += " order by bar.timestamp asc, instrument.name asc"
+        cursor = self.__connection.cursor()
+        try:
+            cursor.execute(sql, args)
+            currentTimestamp = None
+            currentBars = {}
+            rows = cursor.fetchmany(chunkSize)
+            while rows:
+                for row in rows:
+                    if row[1] != currentTimestamp:
+                        if currentBars:
+                            yield bar.Bars(currentBars)
+                        currentTimestamp = row[1]
+                        currentBars = {}
+                        dateTime = dt.timestamp_to_datetime(row[1])
+                        if timezone:
+                            dateTime = dt.localize(dateTime, timezone)
+                    currentBars[names[row[0]]] = bar.BasicBar(
+                        dateTime, row[2], row[3], row[4], row[5], row[6], row[7], frequency
+                    )
+                rows = cursor.fetchmany(chunkSize)
+            if currentBars:
+                yield bar.Bars(currentBars)
+        finally:
+            cursor.close()
 
     def disconnect(self):
         self.__connection.close()
@@ -154,3 +351,49 @@ class Feed(membf.BarFeed):
     def loadBars(self, instrument, timezone=None, fromDateTime=None, toDateTime=None):
         bars = self.__db.getBars(instrument, self.getFrequency(), timezone, fromDateTime, toDateTime)
         self.addBarsFromSequence(instrument, bars)
+
+
+class StreamingFeed(streamingfeed.Feed):
+    """A :class:`pyalgotrade.barfeed.streamingfeed.Feed` that loads bars for many instruments from a SQLite database
+    with a single query, that returns them already merged by datetime, as they are needed.
+
+    :param dbFilePath: The path to the database file.
+    :type dbFilePath: string.
+    :param frequency: The bars frequency.
+    :param instruments: Instrument identifiers.
+    :type instruments: list.
+    :param timezone: The timezone to localize datetimes. Datetimes are in UTC if None.
+    :type timezone: A pytz timezone.
+    :param fromDateTime: The first datetime to load, or None to start from the first bar.
+    :type fromDateTime: datetime.datetime.
+    :param toDateTime: The last datetime to load, or None to load up to the last bar.
+    :type toDateTime: datetime.datetime.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded
+        from the opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param prefetch: The number of batches of bars to read ahead in a background thread, or 0 to disable prefetching.
+    :type prefetch: int.
+    """
+
+    def __init__(self, dbFilePath, frequency, instruments, timezone=None, fromDateTime=None, toDateTime=None,
+                 maxLen=None, prefetch=0):
+        super(StreamingFeed, self).__init__(frequency, maxLen, prefetch)
+        self.__db = Database(dbFilePath)
+        self.__instruments = list(instruments)
+        self.__timezone = timezone
+        self.__fromDateTime = fromDateTime
+        self.__toDateTime = toDateTime
+        for instrument in self.__instruments:
+            self.registerInstrument(instrument)
+
+    def getDatabase(self):
+        return self.__db
+
+    def barsHaveAdjClose(self):
+        return True
+
+    def _iterateBars(self):
+        return self.__db.iterMergedBars(
+            self.__instruments, self.getFrequency(), self.__timezone, self.__fromDateTime, self.__toDateTime
+        )
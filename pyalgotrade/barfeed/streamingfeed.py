@@ -0,0 +1,514 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import collections
+import csv
+import heapq
+import io
+import os
+import threading
+
+from six.moves import queue
+
+from pyalgotrade import barfeed
+from pyalgotrade import bar
+from pyalgotrade.barfeed import columnarfeed
+from pyalgotrade.utils import csvutils
+
+
+# A non real-time BarFeed that reads bars from one cursor per instrument, as they are needed, and merges them by
+# datetime using a heap. Only the next bar for each instrument (plus whatever the cursors buffer) is kept in memory,
+# instead of every bar for every instrument like membf.BarFeed does.
+
+# The number of bar.Bars in each batch when prefetching.
+PREFETCH_BATCH_SIZE = 64
+
+
+class Cursor(object):
+    """Base class for cursors that return the bars for a single instrument, sorted by datetime.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    def open(self):
+        """Override to return an iterator over the bars, sorted by datetime. This gets called once every time the
+        feed is started or reset."""
+        raise NotImplementedError()
+
+    def barsHaveAdjClose(self):
+        return False
+
+
+class SequenceCursor(Cursor):
+    """A cursor over a sequence of bars already sorted by datetime."""
+
+    def __init__(self, bars, haveAdjClose=False):
+        self.__bars = bars
+        self.__haveAdjClose = haveAdjClose
+
+    def open(self):
+        return iter(self.__bars)
+
+    def barsHaveAdjClose(self):
+        return self.__haveAdjClose
+
+
+def iterate_lines_backwards(path, blockSize=65536):
+    """Yields the lines in a text file, without line terminators, starting from the last one."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        remainder = b""
+        while pos > 0:
+            size = min(blockSize, pos)
+            pos -= size
+            f.seek(pos)
+            lines = (f.read(size) + remainder).split(b"\n")
+            # The first line may be incomplete, so it is kept for the next block.
+            remainder = lines[0]
+            for line in reversed(lines[1:]):
+                yield line.rstrip(b"\r").decode("utf-8")
+        yield remainder.rstrip(b"\r").decode("utf-8")
+
+
+class CSVCursor(Cursor):
+    """A cursor over the bars in a CSV file, parsed as they are needed.
+
+    :param path: The path to the CSV file.
+    :type path: string.
+    :param rowParser: The parser for each row, like :class:`pyalgotrade.barfeed.yahoofeed.RowParser`.
+    :type rowParser: :class:`pyalgotrade.barfeed.csvfeed.RowParser`.
+    :param barFilter: An optional filter for the bars.
+    :type barFilter: :class:`pyalgotrade.barfeed.csvfeed.BarFilter`.
+    :param skipMalformedBars: True to skip rows that can't be parsed.
+    :type skipMalformedBars: boolean.
+    :param haveAdjClose: True if bars have adjusted close values.
+    :type haveAdjClose: boolean.
+
+    .. note::
+        Rows must be sorted by datetime, in ascending or descending order (like Yahoo! Finance files).
+        Descending files are read backwards, one block at a time.
+    """
+
+    def __init__(self, path, rowParser, barFilter=None, skipMalformedBars=False, haveAdjClose=False):
+        self.__path = path
+        self.__rowParser = rowParser
+        self.__barFilter = barFilter
+        self.__skipMalformedBars = skipMalformedBars
+        self.__haveAdjClose = haveAdjClose
+
+    def barsHaveAdjClose(self):
+        return self.__haveAdjClose
+
+    def __parseRows(self, rows):
+        rowParser = self.__rowParser
+        barFilter = self.__barFilter
+        for row in rows:
+            if self.__skipMalformedBars:
+                try:
+                    bar_ = rowParser.parseBar(row)
+                except Exception:
+                    continue
+            else:
+                bar_ = rowParser.parseBar(row)
+            if bar_ is not None and (barFilter is None or barFilter.includeBar(bar_)):
+                yield bar_
+
+    def __readForward(self):
+        with io.open(self.__path, "r", newline="") as f:
+            reader = csvutils.FastDictReader(
+                f, fieldnames=self.__rowParser.getFieldNames(), delimiter=self.__rowParser.getDelimiter()
+            )
+            for bar_ in self.__parseRows(reader):
+                yield bar_
+
+    def __readBackwards(self):
+        fieldNames = self.__rowParser.getFieldNames()
+        lines = iterate_lines_backwards(self.__path)
+        if fieldNames is None:
+            # The field names are in the first row, which is the last one to be read.
+            with io.open(self.__path, "r", newline="") as f:
+                fieldNames = next(csv.reader(f, delimiter=self.__rowParser.getDelimiter()))
+            lines = self.__skipLast(lines)
+        reader = csvutils.FastDictReader(lines, fieldnames=fieldNames, delimiter=self.__rowParser.getDelimiter())
+        for bar_ in self.__parseRows(reader):
+            yield bar_
+
+    def __skipLast(self, values):
+        previous = None
+        for i, value in enumerate(values):
+            if i:
+                yield previous
+            previous = value
+
+    def open(self):
+        # Check the order using the first two bars.
+        forward = self.__readForward()
+        first = []
+        for bar_ in forward:
+            first.append(bar_)
+            if len(first) == 2:
+                break
+        if len(first) == 2 and first[1].getDateTime() < first[0].getDateTime():
+            forward.close()
+            return self.__readBackwards()
+        return self.__chain(first, forward)
+
+    def __chain(self, first, rest):
+        for bar_ in first:
+            yield bar_
+        for bar_ in rest:
+            yield bar_
+
+
+class SQLiteCursor(Cursor):
+    """A cursor over the bars for an instrument in a :class:`pyalgotrade.barfeed.sqlitefeed.Database`, fetched in
+    chunks.
+
+    :param database: The database.
+    :type database: :class:`pyalgotrade.barfeed.sqlitefeed.Database`.
+    :param instrument: Instrument identifier.
+    :type instrument: string.
+    :param frequency: The bars frequency.
+    :param timezone: The timezone to localize datetimes. Datetimes are in UTC if None.
+    :type timezone: A pytz timezone.
+    :param fromDateTime: The first datetime to load, or None to start from the first bar.
+    :type fromDateTime: datetime.datetime.
+    :param toDateTime: The last datetime to load, or None to load up to the last bar.
+    :type toDateTime: datetime.datetime.
+    :param chunkSize: The number of rows to fetch at a time.
+    :type chunkSize: int.
+    """
+
+    def __init__(self, database, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None,
+                 chunkSize=1000):
+        self.__database = database
+        self.__args = (instrument, frequency, timezone, fromDateTime, toDateTime, chunkSize)
+
+    def barsHaveAdjClose(self):
+        return True
+
+    def open(self):
+        return self.__database.iterBars(*self.__args)
+
+
+class ColumnarCursor(Cursor):
+    """A cursor over the bars for an instrument in a :class:`pyalgotrade.barfeed.columnarfeed.Database`. Files are
+    memory mapped and rows are converted in chunks.
+
+    :param database: The database.
+    :type database: :class:`pyalgotrade.barfeed.columnarfeed.Database`.
+    :param instrument: Instrument identifier.
+    :type instrument: string.
+    :param frequency: The bars frequency.
+    :param timezone: The timezone to localize datetimes. Datetimes are in UTC if None.
+    :type timezone: A pytz timezone.
+    :param fromDateTime: The first datetime to load, or None to start from the first bar.
+    :type fromDateTime: datetime.datetime.
+    :param toDateTime: The last datetime to load, or None to load up to the last bar.
+    :type toDateTime: datetime.datetime.
+    :param chunkSize: The number of rows to convert at a time.
+    :type chunkSize: int.
+    """
+
+    def __init__(self, database, instrument, frequency, timezone=None, fromDateTime=None, toDateTime=None,
+                 chunkSize=4096):
+        self.__database = database
+        self.__instrument = instrument
+        self.__frequency = frequency
+        self.__timezone = timezone
+        self.__fromDateTime = fromDateTime
+        self.__toDateTime = toDateTime
+        self.__chunkSize = chunkSize
+
+    def barsHaveAdjClose(self):
+        return True
+
+    def open(self):
+        columns = self.__database.getColumns(
+            self.__instrument, self.__frequency, self.__fromDateTime, self.__toDateTime
+        )
+        if columns is None:
+            raise Exception("There are no bars for %s" % self.__instrument)
+        return self.__iterate(columns)
+
+    def __iterate(self, columns):
+        for row in columnarfeed.iterate_rows(columns, self.__chunkSize):
+            dateTime = columnarfeed.timestamp_to_datetime(row[0], self.__timezone)
+            yield columnarfeed.build_bar(row, dateTime, self.__frequency)
+
+
+def merge_cursors(cursors):
+    """Yields :class:`pyalgotrade.bar.Bars` merging the bars from the cursors by datetime.
+
+    :param cursors: Instrument to :class:`Cursor` dictionary.
+    :type cursors: dict.
+    """
+
+    iterators = []
+    try:
+        # Heap with (datetime, instrument index, instrument, bar) for the next bar of each instrument.
+        # The instrument index is used to break ties so bars are always returned in the same order.
+        heap = []
+        for i, instrument in enumerate(sorted(cursors)):
+            iterator = cursors[instrument].open()
+            iterators.append(iterator)
+            nextBar = next(iterator, None)
+            if nextBar is not None:
+                heap.append((nextBar.getDateTime(), i, instrument, nextBar))
+        heapq.heapify(heap)
+
+        while heap:
+            smallestDateTime = heap[0][0]
+            popped = []
+            while heap and heap[0][0] == smallestDateTime:
+                popped.append(heapq.heappop(heap))
+
+            # Push the next bars only after popping, so we take at most one bar per instrument. Duplicate bars show
+            # up as consecutive bar.Bars with the same datetime.
+            ret = {}
+            for _, i, instrument, bar_ in popped:
+                ret[instrument] = bar_
+                nextBar = next(iterators[i], None)
+                if nextBar is not None:
+                    heapq.heappush(heap, (nextBar.getDateTime(), i, instrument, nextBar))
+            yield bar.Bars(ret)
+    finally:
+        for iterator in iterators:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+
+class Prefetcher(object):
+    """Consumes an iterator in a background thread, putting batches of values into a bounded queue.
+    Values are returned in the same order, and the thread blocks when the queue is full.
+
+    :param iterator: The iterator to consume. If it has a close method, it will be called from the background thread
+        once done.
+    :param queueSize: The maximum number of batches in the queue.
+    :type queueSize: int.
+    :param batchSize: The number of values in each batch.
+    :type batchSize: int.
+    """
+
+    # Seconds to wait for space in the queue before checking if we were stopped.
+    PUT_TIMEOUT = 0.1
+
+    def __init__(self, iterator, queueSize, batchSize=PREFETCH_BATCH_SIZE):
+        assert queueSize > 0, "Invalid queue size"
+        assert batchSize > 0, "Invalid batch size"
+        self.__queue = queue.Queue(queueSize)
+        self.__batchSize = batchSize
+        self.__stopped = threading.Event()
+        self.__batch = collections.deque()
+        self.__done = False
+        self.__thread = threading.Thread(target=self.__run, args=(iterator,))
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def __put(self, item):
+        while not self.__stopped.is_set():
+            try:
+                self.__queue.put(item, True, Prefetcher.PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def __run(self, iterator):
+        try:
+            batch = []
+            for value in iterator:
+                batch.append(value)
+                if len(batch) == self.__batchSize:
+                    if not self.__put((batch, None)):
+                        return
+                    batch = []
+            if batch and not self.__put((batch, None)):
+                return
+            self.__put((None, None))
+        except Exception as e:
+            # The error is raised in the consumer thread, right after the values that were built before it.
+            self.__put((batch, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def next(self):
+        """Returns the next value, or None once the iterator is exhausted."""
+        while not self.__batch:
+            if self.__done:
+                return None
+            batch, error = self.__queue.get()
+            if batch is None:
+                self.__done = True
+            else:
+                self.__batch.extend(batch)
+            if error is not None:
+                self.__done = True
+                if not self.__batch:
+                    raise error
+                # Raise once the values built before the error are consumed.
+                self.__batch.append(error)
+        ret = self.__batch.popleft()
+        if isinstance(ret, Exception):
+            raise ret
+        return ret
+
+    def stop(self):
+        """Stops the background thread and waits for it to finish."""
+        self.__stopped.set()
+        # Unblock the thread if it is waiting for space in the queue.
+        try:
+            while True:
+                self.__queue.get_nowait()
+        except queue.Empty:
+            pass
+        self.__thread.join()
+
+
+class Feed(barfeed.BaseBarFeed):
+    """A BarFeed that reads bars from one :class:`Cursor` per instrument and merges them by datetime as they are
+    needed, so memory usage depends on the number of instruments and not on the number of bars.
+
+    :param frequency: The bars frequency. Valid values defined in :class:`pyalgotrade.bar.Frequency`.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded
+        from the opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    :param prefetch: If greater than 0, bars are read and merged in a background thread, that stays up to this many
+        batches of :class:`pyalgotrade.bar.Bars` ahead of the strategy. If 0, bars are read as they are needed.
+    :type prefetch: int.
+
+    .. note::
+        * Bars returned by each cursor must be sorted by datetime.
+        * Just like with other feeds, an exception is raised if an instrument has duplicate bars for a datetime.
+        * Prefetching returns exactly the same bars in the same order. Since it uses a thread, it pays off when reading
+          bars waits on I/O, like files on network mounts, and not so much when parsing is CPU bound.
+    """
+
+    def __init__(self, frequency, maxLen=None, prefetch=0):
+        super(Feed, self).__init__(frequency, maxLen)
+        self.__cursors = {}
+        self.__prefetch = prefetch
+        # Merged bars, once we started reading them. Either a generator or a Prefetcher.
+        self.__source = None
+        # True once the source was opened. It only gets opened again after a reset.
+        self.__opened = False
+        # The next bar.Bars to return, if already read.
+        self.__next = None
+        self.__started = False
+        self.__currDateTime = None
+
+    def addCursor(self, instrument, cursor):
+        """Adds the cursor with the bars for an instrument.
+
+        :param instrument: Instrument identifier.
+        :type instrument: string.
+        :param cursor: The cursor.
+        :type cursor: :class:`Cursor`.
+        """
+        if self.__started:
+            raise Exception("Can't add more bars once you started consuming bars")
+        if instrument in self.__cursors:
+            raise Exception("A cursor for %s was already added" % instrument)
+        self.__closeSource()
+        self.__opened = False
+        self.__next = None
+        self.__cursors[instrument] = cursor
+        self.registerInstrument(instrument)
+
+    def addBarsFromCSV(self, instrument, path, rowParser, barFilter=None, skipMalformedBars=False,
+                       haveAdjClose=False):
+        """Adds a :class:`CSVCursor` for an instrument."""
+        self.addCursor(instrument, CSVCursor(path, rowParser, barFilter, skipMalformedBars, haveAdjClose))
+
+    def barsHaveAdjClose(self):
+        return any(cursor.barsHaveAdjClose() for cursor in self.__cursors.values())
+
+    def __closeSource(self):
+        if self.__source is not None:
+            if self.__prefetch:
+                self.__source.stop()
+            else:
+                self.__source.close()
+            self.__source = None
+
+    def _iterateBars(self):
+        # Override to return the bar.Bars from a different source, sorted by datetime.
+        return merge_cursors(self.__cursors)
+
+    def __peek(self):
+        if not self.__opened:
+            if self.__prefetch:
+                self.__source = Prefetcher(self._iterateBars(), self.__prefetch)
+            else:
+                self.__source = self._iterateBars()
+            self.__opened = True
+        if self.__next is None and self.__source is not None:
+            if self.__prefetch:
+                self.__next = self.__source.next()
+            else:
+                self.__next = next(self.__source, None)
+        return self.__next
+
+    def reset(self):
+        self.__closeSource()
+        self.__opened = False
+        self.__next = None
+        self.__currDateTime = None
+        super(Feed, self).reset()
+
+    def getCurrentDateTime(self):
+        return self.__currDateTime
+
+    def start(self):
+        super(Feed, self).start()
+        self.__started = True
+
+    def stop(self):
+        self.__closeSource()
+
+    def join(self):
+        pass
+
+    def eof(self):
+        return self.__peek() is None
+
+    def peekDateTime(self):
+        ret = self.__peek()
+        if ret is not None:
+            ret = ret.getDateTime()
+        return ret
+
+    def getNextBars(self):
+        ret = self.__peek()
+        if ret is None:
+            return None
+        self.__next = None
+
+        if self.__currDateTime == ret.getDateTime():
+            raise Exception("Duplicate bars found for %s on %s" % (ret.getInstruments(), ret.getDateTime()))
+
+        self.__currDateTime = ret.getDateTime()
+        return ret
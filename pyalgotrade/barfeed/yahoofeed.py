@@ -19,6 +19,7 @@
 """
 
 from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import bulkcsv
 from pyalgotrade.barfeed import common
 from pyalgotrade.utils import dt
 from pyalgotrade import bar
@@ -34,6 +35,16 @@ import datetime
 # Date,Open,High,Low,Close,Volume,Adj Close
 #
 # The csv Date column must have the following format: YYYY-MM-DD
+COLUMN_NAMES = {
+    "datetime": "Date",
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "volume": "Volume",
+    "adj_close": "Adj Close",
+}
+
 
 def parse_date(date):
     # Sample: 2005-12-30
@@ -71,6 +82,15 @@ class RowParser(csvfeed.RowParser):
     def getDelimiter(self):
         return ","
 
+    def getColumnMapping(self):
+        # Subclasses that customize parsing have to be parsed row by row.
+        if csvfeed.overrides_methods(self, RowParser, ["parseBar"]):
+            return None
+        return bulkcsv.ColumnMapping(
+            COLUMN_NAMES, "%Y-%m-%d", self.__frequency, dailyBarTime=self.__dailyBarTime, timezone=self.__timezone,
+            sanitize=self.__sanitize, barClass=self.__barClass, dateTimeParser=parse_date
+        )
+
     def parseBar(self, csvRowDict):
         dateTime = self.__parseDate(csvRowDict["Date"])
         close = float(csvRowDict["Close"])
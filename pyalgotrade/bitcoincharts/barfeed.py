@@ -21,6 +21,7 @@
 from pyalgotrade import barfeed
 from pyalgotrade import bar
 from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import streamingfeed
 from pyalgotrade.utils import dt
 
 import datetime
@@ -186,3 +187,32 @@ class CSVTradeFeed(csvfeed.BarFeed):
             super(CSVTradeFeed, self).addBarsFromCSV(instrument, path, rowParser)
         finally:
             self.setBarFilter(prevBarFilter)
+
+
+class TradeCursor(streamingfeed.Cursor):
+    """A :class:`pyalgotrade.barfeed.streamingfeed.Cursor` that reads trades from a Historic Trade Data CSV file, as
+    they are needed, to use with :class:`pyalgotrade.barfeed.streamingfeed.Feed`.
+
+    :param path: The path to the file.
+    :type path: string.
+    :param timezone: An optional timezone to use to localize bars. By default bars are loaded in UTC.
+    :type timezone: A pytz timezone.
+    :param fromDateTime: An optional datetime to use to filter bars to load.
+        If supplied only those bars whose datetime is greater than or equal to fromDateTime are loaded.
+    :type fromDateTime: datetime.datetime.
+    :param toDateTime: An optional datetime to use to filter bars to load.
+        If supplied only those bars whose datetime is lower than or equal to toDateTime are loaded.
+    :type toDateTime: datetime.datetime.
+    """
+
+    def __init__(self, path, timezone=None, fromDateTime=None, toDateTime=None):
+        self.__path = path
+        self.__timezone = timezone
+        self.__barFilter = None
+        if fromDateTime or toDateTime:
+            self.__barFilter = csvfeed.DateRangeFilter(to_utc_if_naive(fromDateTime), to_utc_if_naive(toDateTime))
+
+    def open(self):
+        # A new UnixTimeFix every time so the same datetimes are returned after a reset.
+        rowParser = RowParser(UnixTimeFix(), self.__timezone)
+        return streamingfeed.CSVCursor(self.__path, rowParser, self.__barFilter).open()
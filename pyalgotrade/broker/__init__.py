@@ -24,6 +24,7 @@ import six
 
 from pyalgotrade import observer
 from pyalgotrade import dispatchprio
+from pyalgotrade import memory
 
 
 # This class is used to prevent bugs like the one triggered in testcases.bitstamp_test:TestCase.testRoundingBug.
@@ -459,6 +460,35 @@ class OrderExecutionInfo(object):
         return self.__dateTime
 
 
+class PortfolioSnapshot(object):
+    """The state of the portfolio at a given point in time.
+
+    :param dateTime: The datetime for the snapshot, or None if not available.
+    :type dateTime: :class:`datetime.datetime`.
+    :param cash: The available cash.
+    :type cash: float.
+    :param equity: The portfolio value (cash + shares * price).
+    :type equity: float.
+    """
+
+    def __init__(self, dateTime, cash, equity):
+        self.__dateTime = dateTime
+        self.__cash = cash
+        self.__equity = equity
+
+    def getDateTime(self):
+        """Returns the :class:`datatime.datetime` for the snapshot, or None if not available."""
+        return self.__dateTime
+
+    def getCash(self):
+        """Returns the available cash."""
+        return self.__cash
+
+    def getEquity(self):
+        """Returns the portfolio value (cash + shares * price)."""
+        return self.__equity
+
+
 class OrderEvent(object):
     class Type:
         SUBMITTED = 1  # Order has been submitted.
@@ -514,6 +544,14 @@ class Broker(observer.Subject):
     def getOrderUpdatedEvent(self):
         return self.__orderEvent
 
+    def getPortfolioSnapshot(self):
+        """Returns a :class:`PortfolioSnapshot` with the current state of the portfolio.
+
+        .. note::
+            The default implementation requires subclasses to implement getEquity.
+        """
+        return PortfolioSnapshot(None, self.getCash(), self.getEquity())
+
     @abc.abstractmethod
     def getInstrumentTraits(self, instrument):
         raise NotImplementedError()
@@ -547,6 +585,15 @@ class Broker(observer.Subject):
         """
         raise NotImplementedError()
 
+    def getMemoryUsage(self):
+        """Returns a :class:`pyalgotrade.memory.Usage` with the memory used by the active orders, for each instrument,
+        and by the positions."""
+        ret = memory.Usage()
+        for order in self.getActiveOrders():
+            ret.addObject("orders", order.getInstrument(), order)
+        ret.addObject("positions", None, self.getPositions())
+        return ret
+
     @abc.abstractmethod
     def submitOrder(self, order):
         """Submits an order.
@@ -19,6 +19,7 @@
 """
 
 import abc
+import bisect
 
 import six
 
@@ -165,6 +166,128 @@ class StopLimitOrder(broker.StopLimitOrder, BacktestingOrder):
         return broker_.getFillStrategy().fillStopLimitOrder(broker_, self, bar_)
 
 
+######################################################################
+# Order index
+
+class PriceLevels(object):
+    """Order ids sorted by price. Orders with the same price are kept in the order they were added."""
+
+    def __init__(self):
+        self.__prices = []
+        self.__orderIds = []
+
+    def __len__(self):
+        return len(self.__prices)
+
+    def add(self, price, orderId):
+        pos = bisect.bisect_right(self.__prices, price)
+        self.__prices.insert(pos, price)
+        self.__orderIds.insert(pos, orderId)
+
+    def remove(self, price, orderId):
+        begin = bisect.bisect_left(self.__prices, price)
+        end = bisect.bisect_right(self.__prices, price)
+        pos = self.__orderIds.index(orderId, begin, end)
+        del self.__prices[pos]
+        del self.__orderIds[pos]
+
+    def getAtLeast(self, price):
+        """Returns the ids for orders with a price >= price."""
+        return self.__orderIds[bisect.bisect_left(self.__prices, price):]
+
+    def getAtMost(self, price):
+        """Returns the ids for orders with a price <= price."""
+        return self.__orderIds[:bisect.bisect_right(self.__prices, price)]
+
+
+class InstrumentOrders(object):
+    """Active orders for an instrument.
+    Accepted good till canceled limit and stop orders rest in price levels, and only the ones whose trigger price falls
+    within a bar's range need to be processed. The remaining orders need to be processed on every bar.
+    """
+
+    def __init__(self):
+        self.__orders = {}
+        self.__alwaysProcess = {}
+        # Order id -> (price levels, price) for resting orders.
+        self.__resting = {}
+        self.__buyLimits = PriceLevels()
+        self.__sellLimits = PriceLevels()
+        self.__buyStops = PriceLevels()
+        self.__sellStops = PriceLevels()
+
+    def __len__(self):
+        return len(self.__orders)
+
+    def __getPriceLevel(self, order):
+        # Returns the price levels and the price where the order rests, or None if it has to be processed with every
+        # bar. This matches the price triggers in fillstrategy.DefaultStrategy.
+        if order.isInitial() or order.isSubmitted() or not order.getGoodTillCanceled():
+            return None
+
+        ret = None
+        orderType = order.getType()
+        if orderType == broker.Order.Type.LIMIT or (orderType == broker.Order.Type.STOP_LIMIT and order.getStopHit()):
+            # Buy limit orders trigger when low <= limit price, and sell limit orders when high >= limit price.
+            if order.isBuy():
+                ret = (self.__buyLimits, order.getLimitPrice())
+            else:
+                ret = (self.__sellLimits, order.getLimitPrice())
+        elif orderType in [broker.Order.Type.STOP, broker.Order.Type.STOP_LIMIT] and not order.getStopHit():
+            # Buy stop orders trigger when high >= stop price, and sell stop orders when low <= stop price.
+            if order.isBuy():
+                ret = (self.__buyStops, order.getStopPrice())
+            else:
+                ret = (self.__sellStops, order.getStopPrice())
+        return ret
+
+    def __index(self, order):
+        priceLevel = self.__getPriceLevel(order)
+        if priceLevel is None:
+            self.__alwaysProcess[order.getId()] = order
+        else:
+            priceLevel[0].add(priceLevel[1], order.getId())
+            self.__resting[order.getId()] = priceLevel
+
+    def __unindex(self, order):
+        priceLevel = self.__resting.pop(order.getId(), None)
+        if priceLevel is None:
+            del self.__alwaysProcess[order.getId()]
+        else:
+            priceLevel[0].remove(priceLevel[1], order.getId())
+
+    def add(self, order):
+        self.__orders[order.getId()] = order
+        self.__index(order)
+
+    def remove(self, order):
+        del self.__orders[order.getId()]
+        self.__unindex(order)
+
+    def update(self, order):
+        """Indexes the order again after its state changed."""
+        if self.__resting.get(order.getId()) != self.__getPriceLevel(order):
+            self.__unindex(order)
+            self.__index(order)
+
+    def getOrders(self):
+        return list(self.__orders.values())
+
+    def getOrdersToProcess(self, bar_, useAdjustedValues):
+        """Returns the orders that may get updated with this bar."""
+        low = bar_.getLow(useAdjustedValues)
+        high = bar_.getHigh(useAdjustedValues)
+        ret = list(self.__alwaysProcess.values())
+        for levels, orderIds in [
+            (self.__buyLimits, self.__buyLimits.getAtLeast(low)),
+            (self.__sellLimits, self.__sellLimits.getAtMost(high)),
+            (self.__buyStops, self.__buyStops.getAtMost(high)),
+            (self.__sellStops, self.__sellStops.getAtLeast(low)),
+        ]:
+            ret.extend(self.__orders[orderId] for orderId in orderIds)
+        return ret
+
+
 ######################################################################
 # Broker
 
@@ -177,9 +300,17 @@ class Broker(broker.Broker):
     :type barFeed: :class:`pyalgotrade.barfeed.BarFeed`
     :param commission: An object responsible for calculating order commissions.
     :type commission: :class:`Commission`
+
+    .. note::
+        When using :class:`pyalgotrade.broker.fillstrategy.DefaultStrategy`, active orders are indexed by instrument
+        and price, so on every bar only the orders for instruments that have a bar, and whose limit or stop price
+        falls within the bar's range, are processed. Other fill strategies get every active order processed.
     """
 
     LOGGER_NAME = "broker.backtesting"
+    # Position values are recalculated from scratch every this many bars, so rounding errors from updating the total
+    # incrementally don't build up.
+    REVALUE_INTERVAL = 1000
 
     def __init__(self, cash, barFeed, commission=None):
         super(Broker, self).__init__()
@@ -192,7 +323,16 @@ class Broker(broker.Broker):
             self.__commission = commission
         self.__shares = {}
         self.__instrumentPrice = {}  # Used by setShares
+        # Mark to market value for each position, and the total, updated as fills and bars arrive.
+        self.__positionValues = {}
+        self.__positionsValue = 0
+        # The bars used to mark to market and how many bars were processed since the last revaluation.
+        self.__markedBars = None
+        self.__barsSinceRevalue = 0
+        self.__portfolioSnapshot = None
         self.__activeOrders = {}
+        # Active orders indexed by instrument and price.
+        self.__instrumentOrders = {}
         self.__useAdjustedValues = False
         self.__fillStrategy = fillstrategy.DefaultStrategy()
         self.__logger = logger.getLogger(Broker.LOGGER_NAME)
@@ -219,11 +359,20 @@ class Broker(broker.Broker):
         assert(order.getId() not in self.__activeOrders)
         assert(order.getId() is not None)
         self.__activeOrders[order.getId()] = order
+        instrumentOrders = self.__instrumentOrders.get(order.getInstrument())
+        if instrumentOrders is None:
+            instrumentOrders = InstrumentOrders()
+            self.__instrumentOrders[order.getInstrument()] = instrumentOrders
+        instrumentOrders.add(order)
 
     def _unregisterOrder(self, order):
         assert(order.getId() in self.__activeOrders)
         assert(order.getId() is not None)
         del self.__activeOrders[order.getId()]
+        instrumentOrders = self.__instrumentOrders[order.getInstrument()]
+        instrumentOrders.remove(order)
+        if len(instrumentOrders) == 0:
+            del self.__instrumentOrders[order.getInstrument()]
 
     def getLogger(self):
         return self.__logger
@@ -243,6 +392,7 @@ class Broker(broker.Broker):
 
     def setCash(self, cash):
         self.__cash = cash
+        self.__portfolioSnapshot = None
 
     def getCommission(self):
         """Returns the strategy used to calculate order commissions.
@@ -276,14 +426,21 @@ class Broker(broker.Broker):
         if not self.__barFeed.barsHaveAdjClose():
             raise Exception("The barfeed doesn't support adjusted close values")
         self.__useAdjustedValues = useAdjusted
+        # Prices may have changed.
+        self.__revalue()
 
     def getActiveOrders(self, instrument=None):
         if instrument is None:
             ret = list(self.__activeOrders.values())
         else:
-            ret = [order for order in self.__activeOrders.values() if order.getInstrument() == instrument]
+            instrumentOrders = self.__instrumentOrders.get(instrument)
+            ret = [] if instrumentOrders is None else instrumentOrders.getOrders()
         return ret
 
+    def getInstrumentsWithActiveOrders(self):
+        """Returns the instruments that have active orders."""
+        return list(self.__instrumentOrders.keys())
+
     def _getCurrentDateTime(self):
         return self.__barFeed.getCurrentDateTime()
 
@@ -305,6 +462,7 @@ class Broker(broker.Broker):
         assert not self.__started, "Can't setShares once the strategy started executing"
         self.__shares[instrument] = quantity
         self.__instrumentPrice[instrument] = price
+        self.__updatePositionValue(instrument)
 
     def getPositions(self):
         return self.__shares
@@ -325,16 +483,64 @@ class Broker(broker.Broker):
 
         return ret
 
-    def getEquity(self):
-        """Returns the portfolio value (cash + shares * price)."""
-
-        ret = self.getCash()
-        for instrument, shares in six.iteritems(self.__shares):
+    def __updatePositionValue(self, instrument):
+        shares = self.__shares.get(instrument, 0)
+        if shares:
             instrumentPrice = self._getPriceForInstrument(instrument)
             assert instrumentPrice is not None, "Price for %s is missing" % instrument
-            ret += instrumentPrice * shares
+            value = instrumentPrice * shares
+        else:
+            value = 0
+        self.__positionsValue += value - self.__positionValues.pop(instrument, 0)
+        if shares:
+            self.__positionValues[instrument] = value
+        # Reset the total when there is at most one position left to avoid accumulating rounding errors.
+        if len(self.__positionValues) <= 1:
+            self.__positionsValue = sum(self.__positionValues.values(), 0)
+        self.__portfolioSnapshot = None
+
+    # Recalculates the value of every position and the total from scratch.
+    def __revalue(self):
+        for instrument in list(self.__positionValues.keys()):
+            value = self._getPriceForInstrument(instrument) * self.__shares[instrument]
+            self.__positionValues[instrument] = value
+        self.__positionsValue = sum(self.__positionValues.values(), 0)
+        self.__barsSinceRevalue = 0
+        self.__portfolioSnapshot = None
+
+    # Returns True if the feed has bars that were not used to mark to market yet. This happens if someone reads the
+    # equity in a handler for the new bars that runs before onBars.
+    def __isStale(self):
+        return self.__barFeed.getCurrentBars() is not self.__markedBars
+
+    def getEquity(self):
+        """Returns the portfolio value (cash + shares * price).
+
+        .. note::
+            Position values are updated as orders get filled and as new bars arrive for the instruments held, so this
+            doesn't need to go through all the positions.
+        """
+
+        if self.__isStale():
+            ret = self.getCash()
+            for instrument, shares in six.iteritems(self.__shares):
+                if shares:
+                    ret += self._getPriceForInstrument(instrument) * shares
+        else:
+            ret = self.getCash() + self.__positionsValue
         return ret
 
+    def getPortfolioSnapshot(self):
+        """Returns a :class:`pyalgotrade.broker.PortfolioSnapshot` with the current state of the portfolio.
+        The same instance is returned until the portfolio changes, so all the analyzers share it on every bar.
+        """
+
+        if self.__portfolioSnapshot is None or self.__isStale():
+            self.__portfolioSnapshot = broker.PortfolioSnapshot(
+                self._getCurrentDateTime(), self.getCash(), self.getEquity()
+            )
+        return self.__portfolioSnapshot
+
     # Tries to commit an order execution.
     def commitOrderExecution(self, order, dateTime, fillInfo):
         price = fillInfo.getPrice()
@@ -372,6 +578,7 @@ class Broker(broker.Broker):
                 del self.__shares[order.getInstrument()]
             else:
                 self.__shares[order.getInstrument()] = updatedShares
+            self.__updatePositionValue(order.getInstrument())
 
             # Let the strategy know that the order was filled.
             self.__fillStrategy.onOrderFilled(self, order)
@@ -460,6 +667,9 @@ class Broker(broker.Broker):
             if order.isActive():
                 # This may trigger orders to be added/removed from __activeOrders.
                 self.__processOrder(order, bar_)
+                # The order may have switched price levels, for example if the stop price was hit.
+                if order.isActive():
+                    self.__instrumentOrders[order.getInstrument()].update(order)
             else:
                 # If an order is not active it should be because it was canceled in this same loop and it should
                 # have been removed.
@@ -467,12 +677,35 @@ class Broker(broker.Broker):
                 assert(order not in self.__activeOrders)
 
     def onBars(self, dateTime, bars):
+        # Mark to market only the positions for instruments that have new bars.
+        self.__portfolioSnapshot = None
+        self.__markedBars = bars
+        self.__barsSinceRevalue += 1
+        if self.__barsSinceRevalue >= Broker.REVALUE_INTERVAL:
+            self.__revalue()
+        else:
+            for instrument in bars.getInstruments():
+                if instrument in self.__positionValues:
+                    self.__updatePositionValue(instrument)
+
         # Let the fill strategy know that new bars are being processed.
         self.__fillStrategy.onBars(self, bars)
 
         # This is to froze the orders that will be processed in this event, to avoid new getting orders introduced
         # and processed on this very same event.
-        ordersToProcess = list(self.__activeOrders.values())
+        if type(self.__fillStrategy) is fillstrategy.DefaultStrategy:
+            # Skip orders for instruments that have no bars, and resting orders whose trigger price is outside the
+            # bar's range, since processing them would have no effect.
+            # Orders are processed in the order they were submitted, same as when all of them get processed.
+            # Only instruments that have orders are looked up in the bars, since usually just a few of them do.
+            ordersToProcess = []
+            for instrument, instrumentOrders in six.iteritems(self.__instrumentOrders):
+                bar = bars.getBar(instrument)
+                if bar is not None:
+                    ordersToProcess.extend(instrumentOrders.getOrdersToProcess(bar, self.__useAdjustedValues))
+            ordersToProcess.sort(key=lambda order: order.getId())
+        else:
+            ordersToProcess = list(self.__activeOrders.values())
 
         for order in ordersToProcess:
             # This may trigger orders to be added/removed from __activeOrders.
@@ -231,34 +231,51 @@ class DefaultStrategy(FillStrategy):
 
     def __init__(self, volumeLimit=0.25):
         super(DefaultStrategy, self).__init__()
+        self.__bars = None
+        # Instruments whose volume was already reset for the current bars.
+        self.__volumeReset = set()
         self.__volumeLeft = {}
         self.__volumeUsed = {}
         self.setVolumeLimit(volumeLimit)
         self.setSlippageModel(slippage.NoSlippage())
 
     def onBars(self, broker_, bars):
-        volumeLeft = {}
-
-        for instrument in bars.getInstruments():
-            bar = bars[instrument]
-            # Reset the volume available for each instrument.
-            if bar.getFrequency() == pyalgotrade.bar.Frequency.TRADE:
-                volumeLeft[instrument] = bar.getVolume()
-            elif self.__volumeLimit is not None:
-                # We can't round here because there is no order to request the instrument traits.
-                volumeLeft[instrument] = bar.getVolume() * self.__volumeLimit
-            # Reset the volume used for each instrument.
-            self.__volumeUsed[instrument] = 0.0
+        # Volume accounting is done lazily, only for the instruments that have orders processed in these bars, so
+        # bars with no orders for most of the instruments don't pay for them.
+        # The volume used for instruments that are not in these bars is kept.
+        self.__bars = bars
+        self.__volumeReset = set()
+        self.__volumeLeft = {}
 
-        self.__volumeLeft = volumeLeft
+    def __resetVolume(self, instrument):
+        # Reset the volume available and the volume used for the instrument, if it was not done yet for the current
+        # bars.
+        if instrument not in self.__volumeReset and self.__bars is not None:
+            bar = self.__bars.getBar(instrument)
+            if bar is not None:
+                self.__volumeReset.add(instrument)
+                if bar.getFrequency() == pyalgotrade.bar.Frequency.TRADE:
+                    self.__volumeLeft[instrument] = bar.getVolume()
+                elif self.__volumeLimit is not None:
+                    # We can't round here because there is no order to request the instrument traits.
+                    self.__volumeLeft[instrument] = bar.getVolume() * self.__volumeLimit
+                self.__volumeUsed[instrument] = 0.0
 
     def getVolumeLeft(self):
+        if self.__bars is not None:
+            for instrument in self.__bars.getInstruments():
+                self.__resetVolume(instrument)
         return self.__volumeLeft
 
     def getVolumeUsed(self):
+        if self.__bars is not None:
+            for instrument in self.__bars.getInstruments():
+                self.__resetVolume(instrument)
         return self.__volumeUsed
 
     def onOrderFilled(self, broker_, order):
+        self.__resetVolume(order.getInstrument())
+
         # Update the volume left.
         if self.__volumeLimit is not None:
             # We round the volume left here becuase it was not rounded when it was initialized.
@@ -300,6 +317,7 @@ class DefaultStrategy(FillStrategy):
 
     def __calculateFillSize(self, broker_, order, bar):
         ret = 0
+        self.__resetVolume(order.getInstrument())
 
         # If self.__volumeLimit is None then allow all the order to get filled.
         if self.__volumeLimit is not None:
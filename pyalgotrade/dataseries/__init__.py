@@ -23,20 +23,44 @@ import abc
 import six
 from six.moves import xrange
 
+import numpy as np
+
 from pyalgotrade import observer
 from pyalgotrade.utils import collections
+from pyalgotrade.utils import dt
 
 DEFAULT_MAX_LEN = 1024
 
+# Use AUTO_MAX_LEN as maxLen to size a dataseries according to the look-back declared by its consumers (check
+# SequenceDataSeries.requireLookBack). Those dataseries hold at least AUTO_MIN_LEN values.
+AUTO_MAX_LEN = "auto"
+AUTO_MIN_LEN = 2
+
 
 def get_checked_max_len(maxLen):
     if maxLen is None:
         maxLen = DEFAULT_MAX_LEN
-    if not maxLen > 0:
+    if maxLen != AUTO_MAX_LEN and not maxLen > 0:
         raise Exception("Invalid maximum length")
     return maxLen
 
 
+def get_derived_max_len(dataSeries, maxLen):
+    """Returns the maximum length to use for a dataseries calculated from another one.
+    If maxLen is None and dataSeries is automatically sized, :data:`AUTO_MAX_LEN` is returned so the derived dataseries
+    is automatically sized as well.
+    """
+    if maxLen is None and isinstance(dataSeries, SequenceDataSeries) and dataSeries.isAutoSized():
+        maxLen = AUTO_MAX_LEN
+    return maxLen
+
+
+def require_look_back(dataSeries, lookBack, consumer=None):
+    """Calls :meth:`SequenceDataSeries.requireLookBack` if dataSeries supports look-back declarations."""
+    if isinstance(dataSeries, SequenceDataSeries):
+        dataSeries.requireLookBack(lookBack, consumer)
+
+
 # It is important to inherit object to get __getitem__ to work properly.
 # Check http://code.activestate.com/lists/python-list/621258/
 @six.add_metaclass(abc.ABCMeta)
@@ -89,26 +113,81 @@ class SequenceDataSeries(DataSeries):
     def __init__(self, maxLen=None):
         super(SequenceDataSeries, self).__init__()
         maxLen = get_checked_max_len(maxLen)
+        self.__autoSized = maxLen == AUTO_MAX_LEN
+        if self.__autoSized:
+            maxLen = AUTO_MIN_LEN
+        self.__lookBack = 0
+        self.__consumers = []
 
         self.__newValueEvent = observer.Event()
-        self.__values = collections.ListDeque(maxLen)
+        self.__values = self._createValuesDeque(maxLen)
         self.__dateTimes = collections.ListDeque(maxLen)
 
+    # Subclasses can override this to use a different container for the values.
+    def _createValuesDeque(self, maxLen):
+        return collections.ListDeque(maxLen)
+
+    def _getValuesDeque(self):
+        return self.__values
+
+    def _getDateTimesDeque(self):
+        return self.__dateTimes
+
     def __len__(self):
         return len(self.__values)
 
     def __getitem__(self, key):
         return self.__values[key]
 
-    def setMaxLen(self, maxLen):
-        """Sets the maximum number of values to hold and resizes accordingly if necessary."""
+    def _resize(self, maxLen):
         self.__values.resize(maxLen)
         self.__dateTimes.resize(maxLen)
 
+    def setMaxLen(self, maxLen):
+        """Sets the maximum number of values to hold and resizes accordingly if necessary.
+
+        .. note::
+            If the dataseries was automatically sized, it won't be anymore.
+        """
+        self.__autoSized = False
+        self._resize(maxLen)
+
     def getMaxLen(self):
         """Returns the maximum number of values to hold."""
         return self.__values.getMaxLen()
 
+    def isAutoSized(self):
+        """Returns True if the maximum number of values to hold is given by the look-back required by consumers."""
+        return self.__autoSized
+
+    def requireLookBack(self, lookBack, consumer=None):
+        """Declares that a consumer needs the last lookBack values. If the dataseries was built using
+        :data:`AUTO_MAX_LEN`, it grows to hold that many values.
+
+        :param lookBack: The number of values needed.
+        :type lookBack: int.
+        :param consumer: The :class:`DataSeries` that needs the values, if any.
+        :type consumer: :class:`DataSeries`.
+
+        .. note::
+            Declare the look-back before values get appended, since values that were already discarded can't be
+            recovered.
+        """
+        if consumer is not None:
+            self.__consumers.append(consumer)
+        if lookBack > self.__lookBack:
+            self.__lookBack = lookBack
+            if self.__autoSized and lookBack > self.getMaxLen():
+                self._resize(lookBack)
+
+    def getLookBack(self):
+        """Returns the largest look-back declared by consumers, or 0 if none was declared."""
+        return self.__lookBack
+
+    def getConsumers(self):
+        """Returns the :class:`DataSeries` instances that declared a look-back on this one."""
+        return self.__consumers
+
     # Event handler receives:
     # 1: Dataseries generating the event
     # 2: The datetime for the new value
@@ -145,3 +224,69 @@ class SequenceDataSeries(DataSeries):
 
     def getDateTimes(self):
         return self.__dateTimes.data()
+
+
+class NumericSequenceDataSeries(SequenceDataSeries):
+    """A :class:`SequenceDataSeries` that holds float values in numpy arrays, which reduces memory usage and gives
+    access to the values as a numpy.array without copying.
+
+    :param maxLen: The maximum number of values to hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+
+    .. note::
+        * None values are supported and are stored as NaN.
+        * Ints are supported and are stored as floats. Values are returned just as they were appended.
+        * If a value that is not a float, an int or None is appended, it switches to holding values just like a
+          :class:`SequenceDataSeries`.
+        * Appending and reading values one at a time is slower than with a :class:`SequenceDataSeries`, since every
+          value has to be converted to and from a float, so this is not used by bar feeds nor technical indicators.
+    """
+
+    def __init__(self, maxLen=None):
+        super(NumericSequenceDataSeries, self).__init__(maxLen)
+        # The int64 timestamps are built lazily, only if getDateTimesAsArray is used.
+        self.__timestamps = None
+        self.__timestampCount = 0
+
+    def _createValuesDeque(self, maxLen):
+        return collections.NumericDeque(maxLen)
+
+    def isNumeric(self):
+        """Returns True if values are being held in a numpy array of floats."""
+        return self._getValuesDeque().isNumeric()
+
+    def _resize(self, maxLen):
+        super(NumericSequenceDataSeries, self)._resize(maxLen)
+        if self.__timestamps is not None:
+            self.__timestamps.resize(maxLen)
+
+    def asarray(self):
+        """Returns a numpy.array with the values, where None values are NaN.
+
+        .. note::
+            The array is a view and it should not be modified. It is only valid until the next value gets appended.
+            If values are not numeric, a new array is returned.
+        """
+        return self._getValuesDeque().asarray()
+
+    def getDateTimesAsArray(self):
+        """Returns a numpy.array of numpy.datetime64 (with microsecond resolution) associated with each value.
+        Timezone aware datetimes are converted to UTC, naive ones are used as they are, and None datetimes are NaT.
+
+        .. note::
+            The array is a view and it should not be modified. It is only valid until the next value gets appended.
+        """
+        if self.__timestamps is None:
+            self.__timestamps = collections.NumPyDeque(self.getMaxLen(), dtype=np.int64)
+
+        # Convert the datetimes that were appended since the last time.
+        appendCount = self._getValuesDeque().getAppendCount()
+        pending = min(appendCount - self.__timestampCount, len(self))
+        if pending:
+            dateTimes = self._getDateTimesDeque()
+            for dateTime in dateTimes[len(dateTimes) - pending:]:
+                self.__timestamps.append(dt.datetime_to_microseconds(dateTime))
+            self.__timestampCount = appendCount
+        return self.__timestamps.data().view("datetime64[us]")
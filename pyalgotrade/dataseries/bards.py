@@ -34,6 +34,8 @@ class BarDataSeries(dataseries.SequenceDataSeries):
 
     def __init__(self, maxLen=None):
         super(BarDataSeries, self).__init__(maxLen)
+        # Values for extra columns are sized just like the rest of the values.
+        self.__extraMaxLen = dataseries.get_checked_max_len(maxLen)
         self.__openDS = dataseries.SequenceDataSeries(maxLen)
         self.__closeDS = dataseries.SequenceDataSeries(maxLen)
         self.__highDS = dataseries.SequenceDataSeries(maxLen)
@@ -46,7 +48,7 @@ class BarDataSeries(dataseries.SequenceDataSeries):
     def __getOrCreateExtraDS(self, name):
         ret = self.__extraDS.get(name)
         if ret is None:
-            ret = dataseries.SequenceDataSeries(self.getMaxLen())
+            ret = dataseries.SequenceDataSeries(self.__extraMaxLen)
             self.__extraDS[name] = ret
         return ret
 
@@ -109,3 +111,13 @@ class BarDataSeries(dataseries.SequenceDataSeries):
     def getExtraDataSeries(self, name):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` for an extra column."""
         return self.__getOrCreateExtraDS(name)
+
+    def getColumnDataSeries(self):
+        """Returns a dictionary that maps column names to the :class:`pyalgotrade.dataseries.DataSeries` for every
+        column, including extra ones."""
+        ret = dict(self.__extraDS)
+        ret.update({
+            "open": self.__openDS, "high": self.__highDS, "low": self.__lowDS, "close": self.__closeDS,
+            "volume": self.__volumeDS, "adj_close": self.__adjCloseDS
+        })
+        return ret
@@ -0,0 +1,149 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import sys
+
+from pyalgotrade import dataseries
+from pyalgotrade.dataseries import bards
+
+
+# Estimated bytes for each value in a dataseries holding floats in a numpy array: two float64 slots, since
+# NumPyDeque allocates twice the maximum length, plus the reference to the datetime.
+NUMERIC_SLOT_SIZE = 2 * 8 + 8
+# Estimated bytes for each value in a dataseries holding references: the reference to the value and the reference to
+# the datetime. The size of the value itself is added on top of this one.
+REFERENCE_SLOT_SIZE = 8 + 8
+
+
+def get_slot_size(dataSeries):
+    """Returns the estimated number of bytes used by each value in a dataseries."""
+    if isinstance(dataSeries, dataseries.NumericSequenceDataSeries) and dataSeries.isNumeric():
+        ret = NUMERIC_SLOT_SIZE
+    else:
+        ret = REFERENCE_SLOT_SIZE
+        if len(dataSeries) and dataSeries[-1] is not None:
+            ret += sys.getsizeof(dataSeries[-1])
+    return ret
+
+
+class Entry(object):
+    """The sizing for a single dataseries in a :class:`Report`."""
+
+    def __init__(self, name, dataSeries):
+        self.__name = name
+        self.__dataSeries = dataSeries
+
+    def getName(self):
+        """Returns the name of the dataseries. Consumers are named after the dataseries they are built on."""
+        return self.__name
+
+    def getDataSeries(self):
+        return self.__dataSeries
+
+    def getMaxLen(self):
+        return self.__dataSeries.getMaxLen()
+
+    def getLookBack(self):
+        """Returns the largest look-back declared by consumers of the dataseries."""
+        return self.__dataSeries.getLookBack()
+
+    def isAutoSized(self):
+        return self.__dataSeries.isAutoSized()
+
+    def getSlotsSaved(self):
+        """Returns the number of values saved when compared to using dataseries.DEFAULT_MAX_LEN."""
+        return dataseries.DEFAULT_MAX_LEN - self.getMaxLen()
+
+    def getBytesSaved(self):
+        """Returns the estimated number of bytes saved when compared to using dataseries.DEFAULT_MAX_LEN."""
+        return self.getSlotsSaved() * get_slot_size(self.__dataSeries)
+
+
+class Report(object):
+    """Sizing for every dataseries in a feed and for the dataseries built on top of those.
+
+    .. note::
+        This class should not be instantiated directly. Use :func:`report` instead.
+    """
+
+    def __init__(self):
+        self.__entries = []
+        self.__visited = set()
+
+    def addDataSeries(self, name, dataSeries):
+        """Adds a dataseries and, recursively, the consumers that declared a look-back on it."""
+        if id(dataSeries) in self.__visited or not isinstance(dataSeries, dataseries.SequenceDataSeries):
+            return
+        self.__visited.add(id(dataSeries))
+        self.__entries.append(Entry(name, dataSeries))
+        for consumer in dataSeries.getConsumers():
+            self.addDataSeries("%s/%s" % (name, type(consumer).__name__), consumer)
+
+    def getEntries(self):
+        """Returns a list of :class:`Entry` instances."""
+        return self.__entries
+
+    def getSlots(self):
+        """Returns the total number of values that all the dataseries can hold."""
+        return sum(entry.getMaxLen() for entry in self.__entries)
+
+    def getSlotsSaved(self):
+        """Returns the total number of values saved when compared to using dataseries.DEFAULT_MAX_LEN."""
+        return sum(entry.getSlotsSaved() for entry in self.__entries)
+
+    def getBytesSaved(self):
+        """Returns the estimated number of bytes saved when compared to using dataseries.DEFAULT_MAX_LEN."""
+        return sum(entry.getBytesSaved() for entry in self.__entries)
+
+    def __str__(self):
+        lines = ["%-40s %8s %9s %5s %12s" % ("Dataseries", "MaxLen", "LookBack", "Auto", "Bytes saved")]
+        for entry in self.__entries:
+            lines.append("%-40s %8d %9d %5s %12d" % (
+                entry.getName(), entry.getMaxLen(), entry.getLookBack(), "yes" if entry.isAutoSized() else "no",
+                entry.getBytesSaved()
+            ))
+        lines.append("Total: %d values, %d values saved, %d bytes saved (estimated)" % (
+            self.getSlots(), self.getSlotsSaved(), self.getBytesSaved()
+        ))
+        return "\n".join(lines)
+
+
+def report(feed):
+    """Builds a report with the maximum length, the look-back declared by consumers and the estimated memory saved,
+    for every dataseries in a feed and for the dataseries built on top of those, like
+    :class:`pyalgotrade.technical.EventBasedFilter` instances.
+
+    :param feed: The feed.
+    :type feed: :class:`pyalgotrade.feed.BaseFeed`.
+    :rtype: A :class:`Report` instance.
+
+    .. note::
+        Values are estimated for the maximum lengths in use, so the report is more accurate after the feed was
+        processed.
+    """
+    ret = Report()
+    for key in sorted(feed.getKeys()):
+        ds = feed[key]
+        ret.addDataSeries(key, ds)
+        if isinstance(ds, bards.BarDataSeries):
+            columns = ds.getColumnDataSeries()
+            for name in sorted(columns):
+                ret.addDataSeries("%s/%s" % (key, name), columns[name])
+    return ret
@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import heapq
+
 from pyalgotrade import utils
 from pyalgotrade import observer
 from pyalgotrade import dispatchprio
@@ -31,6 +33,11 @@ class Dispatcher(object):
         self.__startEvent = observer.Event()
         self.__idleEvent = observer.Event()
         self.__currDateTime = None
+        self.__useHeapScheduling = False
+        # Used only when heap scheduling is enabled.
+        self.__heap = []
+        self.__realtimeSubjects = []
+        self.__scheduleDirty = True
 
     # Returns the current event datetime. It may be None for events from realtime subjects.
     def getCurrentDateTime(self):
@@ -48,6 +55,17 @@ class Dispatcher(object):
     def getSubjects(self):
         return self.__subjects
 
+    def setUseHeapScheduling(self, useHeap):
+        # When enabled, non-realtime subjects are kept in a heap sorted by their next datetime, so picking the
+        # subjects to dispatch costs O(k log n) instead of scanning every subject twice.
+        # It assumes that the next datetime for a non-realtime subject only changes when that subject dispatches,
+        # and that once a non-realtime subject hits eof it stays there.
+        self.__useHeapScheduling = useHeap
+        self.__scheduleDirty = True
+
+    def getUseHeapScheduling(self):
+        return self.__useHeapScheduling
+
     def addSubject(self, subject):
         # Skip the subject if it was already added.
         if subject in self.__subjects:
@@ -65,6 +83,8 @@ class Dispatcher(object):
                 pos += 1
             self.__subjects.insert(pos, subject)
 
+        # Positions may have changed so the schedule needs to be rebuilt.
+        self.__scheduleDirty = True
         subject.onDispatcherRegistered(self)
 
     # Return True if events were dispatched.
@@ -98,6 +118,80 @@ class Dispatcher(object):
                     eventsDispatched = True
         return eof, eventsDispatched
 
+    # Puts a non-realtime subject back in the heap once it dispatched. If it has no datetime for the next event it
+    # gets moved to the list of subjects that are checked on every iteration, unless it hit eof.
+    def __reschedule(self, pos, subject):
+        if not subject.eof():
+            dateTime = subject.peekDateTime()
+            if dateTime is None:
+                self.__realtimeSubjects.append((pos, subject))
+                self.__realtimeSubjects.sort(key=lambda item: item[0])
+            else:
+                heapq.heappush(self.__heap, (dateTime, pos, subject))
+
+    def __buildSchedule(self):
+        self.__heap = []
+        self.__realtimeSubjects = []
+        for pos, subject in enumerate(self.__subjects):
+            dateTime = None
+            if not subject.eof():
+                dateTime = subject.peekDateTime()
+            # Subjects that are already at eof are checked on every iteration, just like realtime ones, since we
+            # can't tell if they'll generate events later.
+            if dateTime is None:
+                self.__realtimeSubjects.append((pos, subject))
+            else:
+                heapq.heappush(self.__heap, (dateTime, pos, subject))
+        self.__scheduleDirty = False
+
+    # Same as __dispatch but using the heap to find the subjects with the lowest datetime.
+    def __dispatchUsingHeap(self):
+        if self.__scheduleDirty:
+            self.__buildSchedule()
+
+        smallestDateTime = None
+        eof = True
+        eventsDispatched = False
+
+        # Drop entries that are out of date from the top of the heap.
+        while self.__heap:
+            dateTime, pos, subject = self.__heap[0]
+            if not subject.eof() and subject.peekDateTime() == dateTime:
+                eof = False
+                smallestDateTime = dateTime
+                break
+            heapq.heappop(self.__heap)
+            self.__reschedule(pos, subject)
+
+        for pos, subject in self.__realtimeSubjects:
+            if not subject.eof():
+                eof = False
+                smallestDateTime = utils.safe_min(smallestDateTime, subject.peekDateTime())
+
+        # Dispatch realtime subjects and those subjects with the lowest datetime, in priority order.
+        if not eof:
+            self.__currDateTime = smallestDateTime
+
+            scheduled = []
+            while self.__heap and self.__heap[0][0] == smallestDateTime:
+                _, pos, subject = heapq.heappop(self.__heap)
+                scheduled.append((pos, subject))
+
+            if self.__realtimeSubjects:
+                candidates = sorted(scheduled + self.__realtimeSubjects, key=lambda item: item[0])
+            else:
+                candidates = scheduled
+                candidates.sort(key=lambda item: item[0])
+
+            for pos, subject in candidates:
+                if self.__dispatchSubject(subject, smallestDateTime):
+                    eventsDispatched = True
+
+            # Put the subjects back in the heap now that they have new datetimes.
+            for pos, subject in scheduled:
+                self.__reschedule(pos, subject)
+        return eof, eventsDispatched
+
     def run(self):
         try:
             for subject in self.__subjects:
@@ -105,8 +199,12 @@ class Dispatcher(object):
 
             self.__startEvent.emit()
 
+            self.__scheduleDirty = True
             while not self.__stop:
-                eof, eventsDispatched = self.__dispatch()
+                if self.__useHeapScheduling:
+                    eof, eventsDispatched = self.__dispatchUsingHeap()
+                else:
+                    eof, eventsDispatched = self.__dispatch()
                 if eof:
                     self.__stop = True
                 elif not eventsDispatched:
@@ -22,6 +22,7 @@ import abc
 
 from pyalgotrade import observer
 from pyalgotrade import dataseries
+from pyalgotrade import memory
 
 
 def feed_iterator(feed):
@@ -118,3 +119,11 @@ class BaseFeed(observer.Subject):
     def __contains__(self, key):
         """Returns True if a :class:`pyalgotrade.dataseries.DataSeries` for the given key is available."""
         return key in self.__ds
+
+    def getMemoryUsage(self):
+        """Returns a :class:`pyalgotrade.memory.Usage` with the memory used by the dataseries in the feed, and by the
+        indicators built on top of those."""
+        ret = memory.Usage()
+        for key in sorted(self.__ds):
+            ret.addDataSeries(memory.DATASERIES, key, self.__ds[key])
+        return ret
@@ -0,0 +1,250 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import sys
+
+import numpy as np
+import six
+
+from pyalgotrade import dataseries
+from pyalgotrade import observer
+
+
+# The size of a reference held in a list or in a numpy array of objects.
+POINTER_SIZE = 8
+# Components used by feeds. Other components are used by brokers, analyzers and plotters.
+BARS = "bars"
+COLUMNS = "columns"
+DATASERIES = "dataseries"
+INDICATORS = "indicators"
+
+
+def _get_attributes(obj):
+    ret = []
+    if hasattr(obj, "__dict__"):
+        ret.extend(six.itervalues(vars(obj)))
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            # Private slot names are mangled.
+            if name.startswith("__") and not name.endswith("__"):
+                name = "_%s%s" % (cls.__name__.lstrip("_"), name)
+            try:
+                ret.append(getattr(obj, name))
+            except AttributeError:
+                pass
+    return ret
+
+
+def get_size(obj, seen=None):
+    """Returns the estimated number of bytes used by an object.
+    Containers (lists, tuples, sets, dictionaries), numpy arrays and dataseries are sized along with the values they
+    hold. For other objects, only the values directly referenced by their attributes are taken into account.
+
+    :param obj: The object.
+    :param seen: A set with the ids of the objects that were already sized, and that should not be sized again.
+    :type seen: set.
+    """
+    if seen is None:
+        seen = set()
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, dataseries.DataSeries):
+        ret = get_dataseries_size(obj)
+    elif isinstance(obj, np.ndarray):
+        ret = sys.getsizeof(obj)
+    elif isinstance(obj, dict):
+        ret = sys.getsizeof(obj)
+        for key, value in six.iteritems(obj):
+            ret += get_size(key, seen) + get_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        ret = sys.getsizeof(obj)
+        for value in obj:
+            ret += get_size(value, seen)
+    else:
+        ret = sys.getsizeof(obj)
+        if hasattr(obj, "__dict__"):
+            ret += sys.getsizeof(vars(obj))
+        for value in _get_attributes(obj):
+            if value is not None and id(value) not in seen:
+                seen.add(id(value))
+                ret += sys.getsizeof(value)
+    return ret
+
+
+def get_dataseries_size(dataSeries):
+    """Returns the estimated number of bytes used by a :class:`pyalgotrade.dataseries.DataSeries`.
+    Datetimes are shared with the bars, so only the references to them are taken into account.
+    """
+    if not isinstance(dataSeries, dataseries.SequenceDataSeries):
+        return sys.getsizeof(dataSeries)
+
+    length = len(dataSeries)
+    # The references to the datetimes.
+    ret = length * POINTER_SIZE
+    if isinstance(dataSeries, dataseries.NumericSequenceDataSeries) and dataSeries.isNumeric():
+        # A numpy array of floats twice as big as the maximum length is allocated up front.
+        ret += 2 * dataSeries.getMaxLen() * 8
+    elif length:
+        # The last value is taken as a sample for all of them.
+        ret += length * (POINTER_SIZE + get_size(dataSeries[-1]))
+    return ret
+
+
+class Usage(object):
+    """Element counts and estimated bytes, by component and by instrument.
+    Components are things like :data:`BARS`, :data:`INDICATORS`, "broker" or "analyzers/<name>". Values that are not
+    related to an instrument are added using None as the instrument.
+    """
+
+    def __init__(self):
+        # (component, instrument) -> [count, bytes]
+        self.__entries = {}
+        # Used to avoid counting the same object twice.
+        self.__seen = set()
+
+    def add(self, component, instrument, count, size):
+        """Adds a number of elements and their estimated size in bytes."""
+        entry = self.__entries.setdefault((component, instrument), [0, 0])
+        entry[0] += count
+        entry[1] += size
+
+    def addObject(self, component, instrument, obj):
+        """Adds an object. The number of elements is the length of the object, or 1 if it has no length.
+        Objects that were already added are skipped."""
+        if id(obj) in self.__seen:
+            return
+        try:
+            count = len(obj)
+        except TypeError:
+            count = 1
+        # Values shared between objects are also counted just once.
+        self.add(component, instrument, count, get_size(obj, self.__seen))
+
+    def addDataSeries(self, component, instrument, dataSeries):
+        """Adds a :class:`pyalgotrade.dataseries.DataSeries` and, recursively, the consumers that declared a look-back on
+        it, like :class:`pyalgotrade.technical.EventBasedFilter` instances, as :data:`INDICATORS`."""
+        self.addObject(component, instrument, dataSeries)
+        if isinstance(dataSeries, dataseries.SequenceDataSeries):
+            for consumer in dataSeries.getConsumers():
+                self.addDataSeries(INDICATORS, instrument, consumer)
+
+    def merge(self, usage):
+        """Adds the values from another :class:`Usage` instance."""
+        for (component, instrument), (count, size) in six.iteritems(usage.getEntries()):
+            self.add(component, instrument, count, size)
+
+    def getEntries(self):
+        """Returns a dictionary that maps (component, instrument) to [element count, estimated bytes]."""
+        return self.__entries
+
+    def getComponents(self):
+        return sorted(set(component for component, _ in self.__entries))
+
+    def getInstruments(self):
+        return sorted(set(instrument for _, instrument in self.__entries if instrument is not None))
+
+    def __sum(self, index, component, instrument):
+        ret = 0
+        for (entryComponent, entryInstrument), values in six.iteritems(self.__entries):
+            if component is not None and entryComponent != component:
+                continue
+            if instrument is not None and entryInstrument != instrument:
+                continue
+            ret += values[index]
+        return ret
+
+    def getCount(self, component=None, instrument=None):
+        """Returns the number of elements, optionally filtered by component and/or instrument."""
+        return self.__sum(0, component, instrument)
+
+    def getBytes(self, component=None, instrument=None):
+        """Returns the estimated number of bytes, optionally filtered by component and/or instrument."""
+        return self.__sum(1, component, instrument)
+
+    def __str__(self):
+        lines = ["%-30s %12s %14s" % ("Component", "Elements", "Bytes")]
+        for component in self.getComponents():
+            lines.append("%-30s %12d %14d" % (component, self.getCount(component), self.getBytes(component)))
+        lines.append("%-30s %12d %14d" % ("Total", self.getCount(), self.getBytes()))
+        return "\n".join(lines)
+
+
+class Timeline(object):
+    """Takes a snapshot of the memory used by a strategy every a given number of bars.
+
+    :param strat: The strategy.
+    :type strat: :class:`pyalgotrade.strategy.BaseStrategy`.
+    :param period: The number of bars between snapshots.
+    :type period: int.
+    :param plotter: An optional plotter whose series will be accounted as well.
+    :type plotter: :class:`pyalgotrade.plotter.StrategyPlotter`.
+    :param logUsage: True to log the memory used by each component with every snapshot.
+    :type logUsage: boolean.
+
+    .. note::
+        Taking a snapshot walks every dataseries, analyzer and plotter series, so the period should not be too short.
+    """
+
+    def __init__(self, strat, period, plotter=None, logUsage=False):
+        if period <= 0:
+            raise Exception("Invalid period")
+        self.__strat = strat
+        self.__period = period
+        self.__plotter = plotter
+        self.__logUsage = logUsage
+        self.__barCount = 0
+        # List of (datetime, {component: bytes}).
+        self.__snapshots = []
+        self.__snapshotEvent = observer.Event()
+        strat.getBarsProcessedEvent().subscribe(self.__onBarsProcessed)
+
+    def __onBarsProcessed(self, strat, bars):
+        self.__barCount += 1
+        if self.__barCount % self.__period == 0:
+            self.__takeSnapshot(bars.getDateTime())
+
+    def __takeSnapshot(self, dateTime):
+        usage = self.__strat.getMemoryUsage(self.__plotter)
+        snapshot = dict((component, usage.getBytes(component)) for component in usage.getComponents())
+        self.__snapshots.append((dateTime, snapshot))
+        if self.__logUsage:
+            self.__strat.info("Memory usage: %s" % ", ".join(
+                "%s=%d" % (component, snapshot[component]) for component in sorted(snapshot)
+            ))
+        self.__snapshotEvent.emit(dateTime, usage)
+
+    def getSnapshotEvent(self):
+        """Returns the event that will be emitted when a snapshot is taken.
+        To subscribe you need to pass in a callable object that receives two parameters:
+
+         1. A :class:`datetime.datetime` instance.
+         2. A :class:`Usage` instance.
+        """
+        return self.__snapshotEvent
+
+    def getSnapshots(self):
+        """Returns a list of (datetime, dictionary) tuples, where the dictionary maps components to estimated bytes."""
+        return self.__snapshots
+
+    def getTotals(self):
+        """Returns a list of (datetime, estimated bytes) tuples."""
+        return [(dateTime, sum(snapshot.values())) for dateTime, snapshot in self.__snapshots]
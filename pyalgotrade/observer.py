@@ -58,6 +58,14 @@ class Event(object):
         else:
             self.__unsubscribeImpl(handler)
 
+    def replace(self, handler, newHandler):
+        # Replaces a handler keeping its position, so handlers still get called in the same order.
+        assert not self.__emitting
+        self.__handlers[self.__handlers.index(handler)] = newHandler
+
+    def getHandlerCount(self):
+        return len(self.__handlers)
+
     def emit(self, *args, **kwargs):
         try:
             self.__emitting += 1
@@ -68,6 +76,19 @@ class Event(object):
             if not self.__emitting:
                 self.__applyChanges()
 
+    # Same as emit, but calls each handler through the active pyalgotrade.profiler.Profiler. The profiler swaps this in
+    # place of emit while it is running, so emit doesn't pay for profiling when it is not.
+    def _profiledEmit(self, *args, **kwargs):
+        call = Event._profilerCall
+        try:
+            self.__emitting += 1
+            for handler in self.__handlers:
+                call(handler, args, kwargs)
+        finally:
+            self.__emitting -= 1
+            if not self.__emitting:
+                self.__applyChanges()
+
 
 @six.add_metaclass(abc.ABCMeta)
 class Subject(object):
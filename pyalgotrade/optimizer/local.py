@@ -21,55 +21,60 @@
 import logging
 import multiprocessing
 import os
-import random
-import socket
-import threading
-import time
+import shutil
+import tempfile
 
+from six.moves import queue
+
+import pyalgotrade.logger
 from pyalgotrade.optimizer import base
 from pyalgotrade.optimizer import server
-from pyalgotrade.optimizer import worker
-from pyalgotrade.optimizer import xmlrpcserver
+from pyalgotrade.optimizer import sharedbars
 
 logger = logging.getLogger(__name__)
 
+# How often to check that workers are still alive while waiting for results.
+WORKER_CHECK_INTERVAL = 5
 
-class ServerThread(threading.Thread):
-    def __init__(self, server):
-        super(ServerThread, self).__init__()
-        self.__server = server
 
-    def run(self):
-        self.__results = self.__server.serve()
+def get_context():
+    # Fork, when available, so workers start instantly and share the parent's memory, copy on write.
+    if hasattr(multiprocessing, "get_context") and "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing
 
 
-def worker_process(strategyClass, port, logLevel):
-    class Worker(worker.Worker):
-        def runStrategy(self, barFeed, *args, **kwargs):
-            strat = strategyClass(barFeed, *args, **kwargs)
+def run_batch(strategyClass, sharedBars, batch, workerLogger):
+    # Returns the best result and parameters in the batch.
+    bestResult = None
+    bestParameters = batch[0]
+    for parameters in batch:
+        workerLogger.info("Running strategy with parameters %s" % (str(parameters)))
+        result = None
+        try:
+            strat = strategyClass(sharedBars.getBarFeed(), *parameters)
             strat.run()
-            return strat.getResult()
-
-    # Create a worker and run it.
+            result = strat.getResult()
+        except Exception as e:
+            workerLogger.exception("Error running strategy with parameters %s: %s" % (str(parameters), e))
+        workerLogger.info("Result %s" % result)
+        if result is not None and (bestResult is None or result > bestResult):
+            bestResult = result
+            bestParameters = parameters
+    return bestResult, bestParameters
+
+
+def worker_process(strategyClass, sharedBars, taskQueue, resultQueue, logLevel):
+    workerLogger = pyalgotrade.logger.getLogger("worker-%s" % (os.getpid()))
+    workerLogger.setLevel(logLevel)
     try:
-        name = "worker-%s" % (os.getpid())
-        w = Worker("localhost", port, name)
-        w.getLogger().setLevel(logLevel)
-        w.run()
+        # Process batches until the None sentinel is received.
+        batch = taskQueue.get()
+        while batch is not None:
+            resultQueue.put(run_batch(strategyClass, sharedBars, batch, workerLogger))
+            batch = taskQueue.get()
     except Exception as e:
-        w.getLogger().exception("Failed to run worker: %s" % (e))
-
-
-def find_port():
-    while True:
-        ret = random.randint(1025, 65536)
-        try:
-            s = socket.socket()
-            s.bind(("localhost", ret))
-            s.close()
-            return ret
-        except socket.error:
-            pass
+        workerLogger.exception("Failed to run worker: %s" % (e))
 
 
 def stop_process(p):
@@ -81,60 +86,84 @@ def stop_process(p):
         p.join(timeout)
 
 
+def get_result(resultQueue, workers):
+    while True:
+        try:
+            return resultQueue.get(timeout=WORKER_CHECK_INTERVAL)
+        except queue.Empty:
+            if not all(process.is_alive() for process in workers):
+                raise Exception("A worker process finished unexpectedly")
+
+
+def run_batches(paramSource, resultSinc, batchSize, taskQueue, resultQueue, workers):
+    def submit_next():
+        batch = [p.args for p in paramSource.getNext(batchSize)]
+        if len(batch):
+            taskQueue.put(batch)
+        return len(batch) > 0
+
+    # Keep two batches per worker queued so workers don't have to wait for the next one.
+    pending = 0
+    while pending < len(workers) * 2 and submit_next():
+        pending += 1
+
+    bestResult = None
+    while pending:
+        result, parameters = get_result(resultQueue, workers)
+        pending -= 1
+        if result is not None and (bestResult is None or result > bestResult):
+            logger.info("Best result so far %s with parameters %s" % (result, parameters))
+            bestResult = result
+        resultSinc.push(result, base.Parameters(*parameters))
+        if submit_next():
+            pending += 1
+
+
 def run_impl(strategyClass, barFeed, strategyParameters, batchSize, workerCount=None, logLevel=logging.ERROR, resultSinc=None):
     if workerCount is None:
         workerCount = multiprocessing.cpu_count()
     assert workerCount > 0, "No workers"
+    assert batchSize > 0, "Invalid batch size"
 
     ret = None
-    workers = []
-    port = find_port()
-    if port is None:
-        raise Exception("Failed to find a port to listen")
-
-    # Build and start the server thread before the worker processes.
-    # We'll manually stop the server once workers have finished.
     paramSource = base.ParameterSource(strategyParameters)
     if resultSinc is None:
         resultSinc = base.ResultSinc()
 
-    # Create and start the server.
-    logger.info("Starting server on port %s" % port)
-    srv = xmlrpcserver.Server(paramSource, resultSinc, barFeed, "localhost", port, autoStop=False, batchSize=batchSize)
-    serverThread = ServerThread(srv)
-    serverThread.start()
-    logger.info("Waiting for the server to be ready")
-    srv.waitServing()
-
+    # Publish the bars once, into memory mapped files that all the workers share.
+    logger.info("Loading bars")
+    dataDir = tempfile.mkdtemp(prefix="pyalgotrade-")
     try:
+        sharedBars = sharedbars.publish(barFeed, dataDir)
+        # Map the files before forking so workers inherit them.
+        sharedBars.getTimeline()
+
+        context = get_context()
+        taskQueue = context.Queue()
+        resultQueue = context.Queue()
+        workers = []
         logger.info("Starting %s workers" % workerCount)
-        # Build the worker processes.
         for i in range(workerCount):
-            workers.append(multiprocessing.Process(
+            workers.append(context.Process(
                 target=worker_process,
-                args=(strategyClass, port, logLevel))
-            )
-        # Start workers
-        for process in workers:
-            process.start()
-
-        # Wait for all jobs to complete.
-        while srv.jobsPending():
-            time.sleep(1)
+                args=(strategyClass, sharedBars, taskQueue, resultQueue, logLevel)
+            ))
+        try:
+            for process in workers:
+                process.start()
+            run_batches(paramSource, resultSinc, batchSize, taskQueue, resultQueue, workers)
+        finally:
+            # Stop workers
+            for process in workers:
+                taskQueue.put(None)
+            for process in workers:
+                stop_process(process)
     finally:
-        # Stop workers
-        for process in workers:
-            stop_process(process)
-
-        # Stop and wait the server to finish.
-        logger.info("Stopping server")
-        srv.stop()
-        serverThread.join()
-
-        bestResult, bestParameters = resultSinc.getBest()
-        if bestResult is not None:
-            ret = server.Results(bestParameters.args, bestResult)
+        shutil.rmtree(dataDir, ignore_errors=True)
 
+    bestResult, bestParameters = resultSinc.getBest()
+    if bestResult is not None:
+        ret = server.Results(bestParameters.args, bestResult)
     return ret
 
 
@@ -152,6 +181,10 @@ def run(strategyClass, barFeed, strategyParameters, workerCount=None, logLevel=l
     :param batchSize: The number of strategy executions that are delivered to each worker.
     :type batchSize: int.
     :rtype: A :class:`Results` instance with the best results found.
+
+    .. note::
+        Worker processes are started once and receive batches of parameters through a queue. Where available, workers
+        are forked so they share the parent's memory.
     """
 
     return run_impl(strategyClass, barFeed, strategyParameters, batchSize, workerCount=workerCount, logLevel=logLevel)
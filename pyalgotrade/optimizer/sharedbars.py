@@ -0,0 +1,303 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import array
+import datetime
+import os
+
+import numpy as np
+from six.moves import cPickle
+
+from pyalgotrade import bar
+from pyalgotrade import barfeed
+from pyalgotrade.barfeed import columnarfeed
+from pyalgotrade.utils import dt
+
+
+# Bars are published into a directory with:
+# * One columnar bar file per instrument (see pyalgotrade.barfeed.columnarfeed).
+# * The timeline, with the timestamp and the instrument group for each pyalgotrade.bar.Bars in the feed.
+# * The extra columns, pickled, for instruments that have them.
+# Every process memory maps the same files, so the bars are loaded into memory just once, by the OS, no matter how many
+# processes are using them. Extra columns can hold any value, so they can't be memory mapped and every process loads
+# its own copy.
+
+TIMESTAMPS_FILE = "timestamps.npy"
+GROUPS_FILE = "groups.npy"
+EXTRA_FILE_EXTENSION = ".extra"
+
+
+def get_extra_file_path(dataDir, instrument, frequency):
+    return os.path.join(dataDir, columnarfeed.get_file_name(instrument, frequency) + EXTRA_FILE_EXTENSION)
+
+
+def publish(barFeed, dataDir):
+    """Consumes a bar feed and writes the bars into dataDir so they can be shared by many processes.
+
+    :param barFeed: The bar feed to publish.
+    :type barFeed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+    :param dataDir: The directory where the files will be written to.
+    :type dataDir: string.
+    :rtype: A :class:`SharedBars` instance.
+    """
+
+    instruments = list(barFeed.getRegisteredInstruments())
+    instrumentIds = dict((instrument, i) for i, instrument in enumerate(instruments))
+    # Columns for each instrument, in columnarfeed.COLUMNS order.
+    columns = [[array.array(typeCode) for typeCode in "qdddddd"] for _ in instruments]
+    # Extra columns for each instrument and row.
+    extras = [[] for _ in instruments]
+    timestamps = array.array("q")
+    groupIds = array.array("i")
+    # tuple with the instrument ids -> group id.
+    groups = {}
+    timeZone = None
+    naive = True
+    # Adjusted closes can only be used if every bar has one.
+    barsHaveAdjClose = True
+
+    for dateTime, bars in barFeed:
+        if len(timestamps) == 0:
+            naive = dt.datetime_is_naive(dateTime)
+            if not naive:
+                timeZone = dateTime.tzinfo
+        timestamp = dt.datetime_to_microseconds(dateTime)
+        timestamps.append(timestamp)
+
+        group = []
+        for instrument, bar_ in bars.items():
+            instrumentId = instrumentIds.get(instrument)
+            if instrumentId is None:
+                instrumentId = len(instruments)
+                instruments.append(instrument)
+                instrumentIds[instrument] = instrumentId
+                columns.append([array.array(typeCode) for typeCode in "qdddddd"])
+                extras.append([])
+            group.append(instrumentId)
+
+            adjClose = bar_.getAdjClose()
+            barsHaveAdjClose = barsHaveAdjClose and adjClose is not None
+            extras[instrumentId].append(bar_.getExtraColumns())
+            row = (
+                timestamp, bar_.getOpen(), bar_.getHigh(), bar_.getLow(), bar_.getClose(), bar_.getVolume(),
+                np.nan if adjClose is None else adjClose
+            )
+            for column, value in zip(columns[instrumentId], row):
+                column.append(value)
+
+        group = tuple(group)
+        groupId = groups.get(group)
+        if groupId is None:
+            groupId = len(groups)
+            groups[group] = groupId
+        groupIds.append(groupId)
+
+    if not os.path.exists(dataDir):
+        os.makedirs(dataDir)
+    for instrument, instrumentColumns, instrumentExtras in zip(instruments, columns, extras):
+        instrumentColumns = dict(
+            (name, np.frombuffer(column, dtype=column.typecode))
+            for name, column in zip(columnarfeed.COLUMNS, instrumentColumns)
+        )
+        columnarfeed.write_columns(
+            os.path.join(dataDir, columnarfeed.get_file_name(instrument, barFeed.getFrequency())),
+            barFeed.getFrequency(), instrumentColumns
+        )
+        if any(instrumentExtras):
+            with open(get_extra_file_path(dataDir, instrument, barFeed.getFrequency()), "wb") as f:
+                cPickle.dump(instrumentExtras, f, cPickle.HIGHEST_PROTOCOL)
+    np.save(os.path.join(dataDir, TIMESTAMPS_FILE), np.frombuffer(timestamps, dtype=np.int64))
+    np.save(os.path.join(dataDir, GROUPS_FILE), np.frombuffer(groupIds, dtype=np.int32))
+
+    groups = sorted(groups, key=lambda group: groups[group])
+    return SharedBars(
+        dataDir, barFeed.getFrequency(), instruments, groups, timeZone, naive, barsHaveAdjClose and len(timestamps) > 0
+    )
+
+
+class SharedBars(object):
+    """Bars published with :func:`publish`.
+    Files are memory mapped, read only, the first time bars are needed. When pickled, only the location of the files and
+    a few attributes get serialized, so sending instances to other processes is cheap regardless of the number of bars.
+
+    .. note::
+        This class should not be instantiated directly. Use :func:`publish` instead.
+    """
+
+    def __init__(self, dataDir, frequency, instruments, groups, timeZone, naive, barsHaveAdjClose):
+        self.__dataDir = dataDir
+        self.__frequency = frequency
+        self.__instruments = instruments
+        self.__groups = groups
+        self.__timeZone = timeZone
+        self.__naive = naive
+        self.__barsHaveAdjClose = barsHaveAdjClose
+        self.__loaded = None
+
+    def __getstate__(self):
+        return (
+            self.__dataDir, self.__frequency, self.__instruments, self.__groups, self.__timeZone, self.__naive,
+            self.__barsHaveAdjClose
+        )
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __load(self):
+        if self.__loaded is None:
+            timestamps = np.load(os.path.join(self.__dataDir, TIMESTAMPS_FILE), mmap_mode="r")
+            groupIds = np.load(os.path.join(self.__dataDir, GROUPS_FILE), mmap_mode="r")
+            barColumns = []
+            for instrument in self.__instruments:
+                columns = columnarfeed.load_columns(
+                    os.path.join(self.__dataDir, columnarfeed.get_file_name(instrument, self.__frequency))
+                )
+                extra = None
+                extraFilePath = get_extra_file_path(self.__dataDir, instrument, self.__frequency)
+                if os.path.exists(extraFilePath):
+                    with open(extraFilePath, "rb") as f:
+                        extra = cPickle.load(f)
+                # Bars were already validated when they were built.
+                barColumns.append(bar.BarColumns(
+                    columns["open"], columns["high"], columns["low"], columns["close"], columns["volume"],
+                    columns["adj_close"], self.__frequency, validate=False, extra=extra
+                ))
+            # The instrument indexes are shared by all the bar.ColumnarBars in the same group.
+            groups = []
+            for group in self.__groups:
+                instrumentIndex = dict((self.__instruments[instrumentId], i) for i, instrumentId in enumerate(group))
+                groups.append((instrumentIndex, group))
+            self.__loaded = (timestamps, groupIds, barColumns, groups)
+        return self.__loaded
+
+    def getDataDir(self):
+        return self.__dataDir
+
+    def getFrequency(self):
+        return self.__frequency
+
+    def getInstruments(self):
+        return self.__instruments
+
+    def barsHaveAdjClose(self):
+        return self.__barsHaveAdjClose
+
+    def getTimeline(self):
+        """Returns a tuple with the timestamps and the group ids for every :class:`pyalgotrade.bar.Bars`."""
+        timestamps, groupIds, _, _ = self.__load()
+        return timestamps, groupIds
+
+    def getBarColumns(self):
+        """Returns a list with the :class:`pyalgotrade.bar.BarColumns` for each instrument."""
+        return self.__load()[2]
+
+    def getGroups(self):
+        """Returns a list with the instrument index and the instrument ids for each group."""
+        return self.__load()[3]
+
+    def timestampToDateTime(self, timestamp):
+        if self.__naive:
+            ret = dt.epoch_naive + datetime.timedelta(microseconds=timestamp)
+        else:
+            ret = columnarfeed.timestamp_to_datetime(timestamp, self.__timeZone)
+        return ret
+
+    def getBarFeed(self, maxLen=None):
+        """Returns a new :class:`SharedBarFeed` for these bars."""
+        return SharedBarFeed(self, maxLen)
+
+
+class SharedBarFeed(barfeed.BaseBarFeed):
+    """A BarFeed that replays bars published with :func:`publish`, in the same order as the original feed.
+    Bars are :class:`pyalgotrade.bar.ColumnarBar` views over the memory mapped files.
+
+    :param sharedBars: The published bars.
+    :type sharedBars: :class:`SharedBars`.
+    :param maxLen: The maximum number of values that the :class:`pyalgotrade.dataseries.bards.BarDataSeries` will hold.
+        Once a bounded length is full, when new items are added, a corresponding number of items are discarded
+        from the opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+    :type maxLen: int.
+    """
+
+    def __init__(self, sharedBars, maxLen=None):
+        super(SharedBarFeed, self).__init__(sharedBars.getFrequency(), maxLen)
+        for instrument in sharedBars.getInstruments():
+            self.registerInstrument(instrument)
+        self.__sharedBars = sharedBars
+        self.__timestamps, self.__groupIds = sharedBars.getTimeline()
+        self.__barColumns = sharedBars.getBarColumns()
+        self.__groups = sharedBars.getGroups()
+        self.__currDateTime = None
+        self.__resetCursor()
+
+    def __resetCursor(self):
+        self.__cursor = columnarfeed.iterate_timestamps(self.__timestamps)
+        self.__next = next(self.__cursor, None)
+        self.__nextDateTime = None
+        # The next row for each instrument.
+        self.__positions = [0] * len(self.__barColumns)
+
+    def reset(self):
+        self.__resetCursor()
+        self.__currDateTime = None
+        super(SharedBarFeed, self).reset()
+
+    def getCurrentDateTime(self):
+        return self.__currDateTime
+
+    def barsHaveAdjClose(self):
+        return self.__sharedBars.barsHaveAdjClose()
+
+    def start(self):
+        super(SharedBarFeed, self).start()
+
+    def stop(self):
+        pass
+
+    def join(self):
+        pass
+
+    def eof(self):
+        return self.__next is None
+
+    def peekDateTime(self):
+        # The datetime is built once, since it is peeked before getting the next bars.
+        if self.__nextDateTime is None and self.__next is not None:
+            self.__nextDateTime = self.__sharedBars.timestampToDateTime(self.__next[1])
+        return self.__nextDateTime
+
+    def getNextBars(self):
+        if self.__next is None:
+            return None
+
+        pos = self.__next[0]
+        dateTime = self.peekDateTime()
+        self.__next = next(self.__cursor, None)
+        self.__nextDateTime = None
+        instrumentIndex, group = self.__groups[self.__groupIds.item(pos)]
+        columns = []
+        positions = []
+        for instrumentId in group:
+            columns.append(self.__barColumns[instrumentId])
+            positions.append(self.__positions[instrumentId])
+            self.__positions[instrumentId] += 1
+
+        self.__currDateTime = dateTime
+        return bar.ColumnarBars(dateTime, instrumentIndex, columns, positions)
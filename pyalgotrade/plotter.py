@@ -25,6 +25,7 @@ from matplotlib import ticker
 import six
 
 from pyalgotrade import broker
+from pyalgotrade import memory
 from pyalgotrade import warninghelpers
 
 
@@ -360,7 +361,8 @@ class StrategyPlotter(object):
 
         # Feed the portfolio evolution subplot.
         if self.__portfolioSubplot:
-            self.__portfolioSubplot.getSeries("Portfolio").addValue(dateTime, strat.getBroker().getEquity())
+            equity = strat.getBroker().getPortfolioSnapshot().getEquity()
+            self.__portfolioSubplot.getSeries("Portfolio").addValue(dateTime, equity)
             # This is in case additional dataseries were added to the portfolio subplot.
             self.__portfolioSubplot.onBars(bars)
 
@@ -402,6 +404,20 @@ class StrategyPlotter(object):
         """
         return self.__portfolioSubplot
 
+    def getMemoryUsage(self):
+        """Returns a :class:`pyalgotrade.memory.Usage` with the estimated memory used by the values in every series.
+        Values in instrument subplots are accounted for the instrument."""
+        ret = memory.Usage()
+        ret.addObject("plotter", None, self.__dateTimes)
+        subplots = [(instrument, subplot) for instrument, subplot in six.iteritems(self.__barSubplots)]
+        subplots.extend((None, subplot) for subplot in self.__namedSubplots.values())
+        if self.__portfolioSubplot is not None:
+            subplots.append((None, self.__portfolioSubplot))
+        for instrument, subplot in subplots:
+            for series in subplot.getAllSeries().values():
+                ret.addObject("plotter", instrument, series.getValues())
+        return ret
+
     def __buildFigureImpl(self, fromDateTime=None, toDateTime=None, postPlotFun=_post_plot_fun):
         dateTimes = _filter_datetimes(self.__dateTimes, fromDateTime, toDateTime)
         dateTimes.sort()
@@ -0,0 +1,288 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import timeit
+
+import six
+
+from pyalgotrade import observer
+from pyalgotrade import dispatcher
+from pyalgotrade import stratanalyzer
+from pyalgotrade.broker import fillstrategy
+
+
+# The profiler replaces a few methods while it is running and puts the original ones back once it stops, so nothing
+# gets slower when it is not in use:
+# * observer.Event.emit, to time each handler.
+# * The Dispatcher methods that run a loop iteration and dispatch each subject.
+# * The methods in every fillstrategy.FillStrategy subclass, and beforeOnBars in every
+#   stratanalyzer.StrategyAnalyzer subclass, since those are not called through events.
+
+_active = None
+
+FILL_STRATEGY_METHODS = [
+    "onBars", "onOrderFilled", "fillMarketOrder", "fillLimitOrder", "fillStopOrder", "fillStopLimitOrder"
+]
+
+
+def _get_handler_name(handler):
+    instance = getattr(handler, "__self__", None)
+    function = getattr(handler, "__func__", None)
+    if instance is not None and function is not None:
+        ret = "%s.%s" % (type(instance).__name__, function.__name__)
+    else:
+        ret = getattr(handler, "__qualname__", getattr(handler, "__name__", None))
+        if ret is None:
+            ret = type(handler).__name__
+    return ret
+
+
+def _get_subclasses(cls):
+    ret = [cls]
+    for subclass in cls.__subclasses__():
+        ret.extend(_get_subclasses(subclass))
+    return ret
+
+
+class HandlerStats(object):
+    """Time spent in a handler or method."""
+
+    def __init__(self, name):
+        self.__name = name
+        self.calls = 0
+        self.cumulativeTime = 0.0
+        self.ownTime = 0.0
+
+    def getName(self):
+        return self.__name
+
+    def getCalls(self):
+        return self.calls
+
+    def getCumulativeTime(self):
+        """Returns the time spent in the handler, including the time spent in the handlers that it triggered."""
+        return self.cumulativeTime
+
+    def getOwnTime(self):
+        """Returns the time spent in the handler, excluding the time spent in the handlers that it triggered."""
+        return self.ownTime
+
+    def getTimePerCall(self):
+        """Returns the cumulative time per call."""
+        return self.cumulativeTime / self.calls if self.calls else 0.0
+
+
+class Profiler(object):
+    """Records the time spent in each :class:`pyalgotrade.dispatcher.Dispatcher` subject's dispatch, in each
+    :class:`pyalgotrade.observer.Event` handler (broker, strategy, analyzers, technical filters, etc) and in
+    :class:`pyalgotrade.broker.fillstrategy.FillStrategy` methods.
+
+    Use it as a context manager, or call :meth:`start` and :meth:`stop`:
+
+    .. code-block:: python
+
+        with profiler.Profiler() as prof:
+            strat.run()
+        print(prof.getReport())
+
+    .. note::
+        * Only one profiler can be running at a time.
+        * The methods are patched at class level, so the profiler affects the whole process. Strategies running in
+          other threads at the same time get profiled too, mixing their results with these and breaking the own
+          time calculation, since events must be emitted from the thread that started the profiler.
+        * Handlers are identified by class and method name, so the time spent by every SMA instance is added up.
+        * Fill strategy and analyzer classes have to be defined before the profiler starts.
+    """
+
+    def __init__(self):
+        # Handler name -> HandlerStats
+        self.__stats = {}
+        # The time spent in handlers called by the ones being timed, for each nesting level.
+        self.__stack = []
+        self.__iterations = 0
+        self.__emits = 0
+        self.__elapsed = 0.0
+        self.__begin = None
+        self.__patched = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __patch(self, cls, name, replacement):
+        self.__patched.append((cls, name, cls.__dict__[name]))
+        setattr(cls, name, replacement)
+
+    # Wraps a method so calls get timed and identified by the class of the instance and the method name.
+    def __wrap(self, cls, name):
+        method = cls.__dict__[name]
+        call = self._call
+
+        def wrapper(self_, *args, **kwargs):
+            return call(method, (self_,) + args, kwargs, "%s.%s" % (type(self_).__name__, name))
+        self.__patch(cls, name, wrapper)
+
+    def start(self):
+        """Starts profiling."""
+        global _active
+        if _active is not None:
+            raise Exception("A profiler is already running")
+
+        try:
+            self.__patchAll()
+        except Exception:
+            self.__unpatchAll()
+            raise
+
+        self.__begin = timeit.default_timer()
+        # Set last so a failure while patching leaves no profiler registered.
+        _active = self
+
+    def stop(self):
+        """Stops profiling. Results are kept, and profiling can be started again to add up more results."""
+        global _active
+        if _active is not self:
+            return
+        self.__elapsed += timeit.default_timer() - self.__begin
+        self.__unpatchAll()
+        _active = None
+
+    def __patchAll(self):
+        observer.Event._profilerCall = self._call
+        self.__patch(observer.Event, "emit", observer.Event.__dict__["_profiledEmit"])
+
+        profiler = self
+        dispatchSubject = dispatcher.Dispatcher.__dict__["_Dispatcher__dispatchSubject"]
+
+        def profiledDispatchSubject(dispatcher_, subject, currEventDateTime):
+            return profiler._call(
+                dispatchSubject, (dispatcher_, subject, currEventDateTime), {},
+                "%s.dispatch" % type(subject).__name__
+            )
+        self.__patch(dispatcher.Dispatcher, "_Dispatcher__dispatchSubject", profiledDispatchSubject)
+        for name in ["_Dispatcher__dispatch", "_Dispatcher__dispatchUsingHeap"]:
+            self.__patch(dispatcher.Dispatcher, name, self.__countIterations(dispatcher.Dispatcher.__dict__[name]))
+
+        for cls in _get_subclasses(fillstrategy.FillStrategy):
+            for name in FILL_STRATEGY_METHODS:
+                if name in cls.__dict__:
+                    self.__wrap(cls, name)
+        for cls in _get_subclasses(stratanalyzer.StrategyAnalyzer):
+            if "beforeOnBars" in cls.__dict__:
+                self.__wrap(cls, "beforeOnBars")
+
+    def __unpatchAll(self):
+        for cls, name, original in reversed(self.__patched):
+            setattr(cls, name, original)
+        self.__patched = []
+        if "_profilerCall" in observer.Event.__dict__:
+            del observer.Event._profilerCall
+
+    def __countIterations(self, method):
+        def wrapper(*args, **kwargs):
+            self.__iterations += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+    def _call(self, handler, args, kwargs, name=None):
+        if name is None:
+            name = _get_handler_name(handler)
+            self.__emits += 1
+        stack = self.__stack
+        stack.append(0.0)
+        begin = timeit.default_timer()
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            elapsed = timeit.default_timer() - begin
+            childrenTime = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            stats = self.__stats.get(name)
+            if stats is None:
+                stats = HandlerStats(name)
+                self.__stats[name] = stats
+            stats.calls += 1
+            stats.cumulativeTime += elapsed
+            stats.ownTime += elapsed - childrenTime
+
+    def getStats(self):
+        """Returns a dictionary that maps handler names to :class:`HandlerStats` instances."""
+        return self.__stats
+
+    def getElapsedTime(self):
+        """Returns the number of seconds the profiler was running."""
+        ret = self.__elapsed
+        if _active is self:
+            ret += timeit.default_timer() - self.__begin
+        return ret
+
+    def getIterations(self):
+        """Returns the number of dispatcher loop iterations."""
+        return self.__iterations
+
+    def getEventCount(self):
+        """Returns the number of times an event handler was called."""
+        return self.__emits
+
+    def getIterationsPerSecond(self):
+        elapsed = self.getElapsedTime()
+        return self.__iterations / elapsed if elapsed else 0.0
+
+    def getEventsPerSecond(self):
+        """Returns the number of event handlers called per second."""
+        elapsed = self.getElapsedTime()
+        return self.__emits / elapsed if elapsed else 0.0
+
+    def getTop(self, count=20, sortBy="cumulative"):
+        """Returns a list with the :class:`HandlerStats` for the handlers that took the most time.
+
+        :param count: The maximum number of handlers to return.
+        :type count: int.
+        :param sortBy: "cumulative", "own" or "perCall".
+        :type sortBy: string.
+        """
+        keys = {
+            "cumulative": HandlerStats.getCumulativeTime,
+            "own": HandlerStats.getOwnTime,
+            "perCall": HandlerStats.getTimePerCall,
+        }
+        if sortBy not in keys:
+            raise Exception("Invalid sortBy value")
+        return sorted(six.itervalues(self.__stats), key=keys[sortBy], reverse=True)[:count]
+
+    def getReport(self, count=20, sortBy="cumulative"):
+        """Returns a string with the handlers that took the most time. Check :meth:`getTop`."""
+        lines = [
+            "%d dispatcher iterations (%.1f/s), %d handler calls (%.1f/s) in %.3f seconds" % (
+                self.__iterations, self.getIterationsPerSecond(), self.__emits, self.getEventsPerSecond(),
+                self.getElapsedTime()
+            ),
+            "%-50s %10s %12s %12s %14s" % ("Handler", "Calls", "Cumulative", "Own", "Per call (us)"),
+        ]
+        for stats in self.getTop(count, sortBy):
+            lines.append("%-50s %10d %12.4f %12.4f %14.2f" % (
+                stats.getName(), stats.getCalls(), stats.getCumulativeTime(), stats.getOwnTime(),
+                stats.getTimePerCall() * 1e6
+            ))
+        return "\n".join(lines)
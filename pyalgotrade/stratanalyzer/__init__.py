@@ -35,3 +35,8 @@ class StrategyAnalyzer(object):
 
     def beforeOnBars(self, strat, bars):
         pass
+
+    def getBuffers(self):
+        """Returns a dictionary that maps names to the containers (dataseries, lists, dictionaries) holding values that
+        grow as bars are processed. Used for memory accounting."""
+        return {}
@@ -65,7 +65,7 @@ class DrawDown(stratanalyzer.StrategyAnalyzer):
         self.__currDrawDown = DrawDownHelper()
 
     def calculateEquity(self, strat):
-        return strat.getBroker().getEquity()
+        return strat.getBroker().getPortfolioSnapshot().getEquity()
 
     def beforeOnBars(self, strat, bars):
         equity = self.calculateEquity(strat)
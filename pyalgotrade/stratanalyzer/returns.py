@@ -180,7 +180,7 @@ class ReturnsAnalyzerBase(stratanalyzer.StrategyAnalyzer):
         return ret
 
     def attached(self, strat):
-        self.__portfolioReturns = TimeWeightedReturns(strat.getBroker().getEquity())
+        self.__portfolioReturns = TimeWeightedReturns(strat.getBroker().getPortfolioSnapshot().getEquity())
 
     # An event will be notified when return are calculated at each bar. The hander should receive 1 parameter:
     # 1: The current datetime.
@@ -195,7 +195,7 @@ class ReturnsAnalyzerBase(stratanalyzer.StrategyAnalyzer):
         return self.__portfolioReturns.getCumulativeReturns()
 
     def beforeOnBars(self, strat, bars):
-        self.__portfolioReturns.update(strat.getBroker().getEquity())
+        self.__portfolioReturns.update(strat.getBroker().getPortfolioSnapshot().getEquity())
 
         # Notify that new returns are available.
         self.__event.emit(bars.getDateTime(), self)
@@ -233,3 +233,6 @@ class Returns(stratanalyzer.StrategyAnalyzer):
     def getCumulativeReturns(self):
         """Returns a :class:`pyalgotrade.dataseries.DataSeries` with the cumulative returns for each bar."""
         return self.__cumReturns
+
+    def getBuffers(self):
+        return {"returns": self.__netReturns, "cumulativeReturns": self.__cumReturns}
@@ -102,6 +102,9 @@ class SharpeRatio(stratanalyzer.StrategyAnalyzer):
     def getReturns(self):
         return self.__returns
 
+    def getBuffers(self):
+        return {"returns": self.__returns}
+
     def beforeAttach(self, strat):
         # Get or create a shared ReturnsAnalyzerBase
         analyzer = returns.ReturnsAnalyzerBase.getOrCreateShared(strat)
@@ -53,6 +53,15 @@ class Trades(stratanalyzer.StrategyAnalyzer):
         self.__evenTrades = 0
         self.__posTrackers = {}
 
+    def getBuffers(self):
+        return {
+            "all": self.__all, "profits": self.__profits, "losses": self.__losses, "allReturns": self.__allReturns,
+            "positiveReturns": self.__positiveReturns, "negativeReturns": self.__negativeReturns,
+            "allCommissions": self.__allCommissions, "profitableCommissions": self.__profitableCommissions,
+            "unprofitableCommissions": self.__unprofitableCommissions, "evenCommissions": self.__evenCommissions,
+            "positionTrackers": self.__posTrackers,
+        }
+
     def __updateTrades(self, posTracker):
         price = 0  # The price doesn't matter since the position should be closed.
         assert posTracker.getPosition() == 0
@@ -29,6 +29,7 @@ from pyalgotrade import observer
 from pyalgotrade import dispatcher
 import pyalgotrade.strategy.position
 from pyalgotrade import logger
+from pyalgotrade import memory
 from pyalgotrade.barfeed import resampled
 
 
@@ -529,6 +530,29 @@ class BaseStrategy(object):
     def getNamedAnalyzer(self, name):
         return self.__namedAnalyzers.get(name, None)
 
+    def getMemoryUsage(self, plotter=None):
+        """Returns a :class:`pyalgotrade.memory.Usage` with the estimated memory used by the feed (bars, column
+        dataseries and indicators), the broker, the analyzers and, optionally, a plotter.
+
+        :param plotter: An optional plotter whose series will be accounted as well.
+        :type plotter: :class:`pyalgotrade.plotter.StrategyPlotter`.
+        """
+        ret = memory.Usage()
+        ret.merge(self.__barFeed.getMemoryUsage())
+        for resampledBarFeed in self.__resampledBarFeeds:
+            ret.merge(resampledBarFeed.getMemoryUsage())
+        ret.merge(self.__broker.getMemoryUsage())
+
+        analyzerNames = dict((id(analyzer), name) for name, analyzer in six.iteritems(self.__namedAnalyzers))
+        for analyzer in self.__analyzers:
+            name = analyzerNames.get(id(analyzer), type(analyzer).__name__)
+            for buffer_ in six.itervalues(analyzer.getBuffers()):
+                ret.addObject("analyzers/%s" % name, None, buffer_)
+
+        if plotter is not None:
+            ret.merge(plotter.getMemoryUsage())
+        return ret
+
     def debug(self, msg):
         """Logs a message with level DEBUG on the strategy logger."""
         self.getLogger().debug(msg)
@@ -0,0 +1,116 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+from pyalgotrade import dispatcher
+from pyalgotrade import logger
+
+
+class Runner(object):
+    """Runs many strategies over a single pass of the same bar feed.
+
+    Every strategy keeps its own broker, positions and analyzers, but the bars are loaded, built and dispatched
+    just once, and the :class:`pyalgotrade.dataseries.bards.BarDataSeries` are shared, so indicators built on them
+    can also be shared among the strategies.
+    Running the strategies this way yields the same results as running each one of them separately, since bars are
+    processed by each broker and strategy pair in the same order as in a single strategy run.
+
+    :param strategies: The strategies to run. All of them must use the same bar feed.
+    :type strategies: list of :class:`pyalgotrade.strategy.BaseStrategy`.
+
+    .. note::
+        * The strategies should not be run separately, before or after being run with this class.
+        * Calling stop on a strategy has no effect. Use :meth:`stop` instead to stop all of them.
+        * Adjusted values are set on the bar feed, so all the strategies should use the same setting.
+    """
+
+    def __init__(self, strategies):
+        if len(strategies) == 0:
+            raise Exception("No strategies to run")
+        barFeed = strategies[0].getFeed()
+        for strat in strategies:
+            if strat.getFeed() is not barFeed:
+                raise Exception("All strategies must use the same bar feed")
+
+        self.__strategies = list(strategies)
+        self.__barFeed = barFeed
+        self.__dispatcher = dispatcher.Dispatcher()
+        for strat in self.__strategies:
+            stratDispatcher = strat.getDispatcher()
+            # Forward dispatcher events to each strategy.
+            self.__dispatcher.getStartEvent().subscribe(stratDispatcher.getStartEvent().emit)
+            self.__dispatcher.getIdleEvent().subscribe(stratDispatcher.getIdleEvent().emit)
+        # Subjects added by the strategies in onStart, like resampled bar feeds, have to be dispatched as well.
+        self.__dispatcher.getStartEvent().subscribe(self.__addSubjects)
+
+    def __addSubjects(self):
+        for strat in self.__strategies:
+            stratDispatcher = strat.getDispatcher()
+            # The broker, the bar feed and any resampled bar feed for each strategy. Subjects shared among the
+            # strategies, like the bar feed, are added just once.
+            for subject in stratDispatcher.getSubjects():
+                self.__dispatcher.addSubject(subject)
+            if stratDispatcher.getUseHeapScheduling():
+                self.__dispatcher.setUseHeapScheduling(True)
+
+    def getStrategies(self):
+        return self.__strategies
+
+    def getFeed(self):
+        """Returns the :class:`pyalgotrade.barfeed.BaseBarFeed` shared by all the strategies."""
+        return self.__barFeed
+
+    def getDispatcher(self):
+        return self.__dispatcher
+
+    def run(self):
+        """Call once (**and only once**) to run the strategies."""
+        # Log messages should use the datetime from the dispatcher that is actually running.
+        if logger.Formatter.DATETIME_HOOK is not None:
+            logger.Formatter.DATETIME_HOOK = self.__dispatcher.getCurrentDateTime
+
+        self.__addSubjects()
+        self.__dispatcher.run()
+
+        bars = self.__barFeed.getCurrentBars()
+        if bars is None:
+            raise Exception("Feed was empty")
+        for strat in self.__strategies:
+            strat.onFinish(bars)
+
+    def stop(self):
+        """Stops all the strategies."""
+        self.__dispatcher.stop()
+
+    def getResults(self):
+        """Returns a list with the result for each strategy, in the same order as they were given."""
+        return [strat.getResult() for strat in self.__strategies]
+
+
+def run(strategies):
+    """Runs many strategies over a single pass of the same bar feed and returns their results.
+
+    :param strategies: The strategies to run. All of them must use the same bar feed.
+    :type strategies: list of :class:`pyalgotrade.strategy.BaseStrategy`.
+    :rtype: A list with the result for each strategy.
+    """
+
+    runner = Runner(strategies)
+    runner.run()
+    return runner.getResults()
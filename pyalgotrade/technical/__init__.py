@@ -18,10 +18,73 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import inspect
+
+import numpy as np
+import six
+
 from pyalgotrade.utils import collections
 from pyalgotrade import dataseries
 
 
+# Values are processed in chunks of windows when calculating in batch mode, so the memory used by the temporary
+# 2D arrays is bounded no matter how long the input is.
+BATCH_CHUNK_SIZE = 2**20
+
+
+def _to_array(values):
+    # Results are returned as a float array using NaN for None, unless there are non numeric values.
+    try:
+        if all(isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool) for value in values if value is not None):
+            return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    except TypeError:
+        pass
+    ret = np.empty(len(values), dtype=object)
+    ret[:] = values
+    return ret
+
+
+# Returns a tuple with:
+# 1: The values that are not None, the ones that get added to a window that skips None values.
+# 2: The position, for every value, of the last value that is not None in the first array (-1 if there is none).
+def _split_none(values, dtype=np.float64):
+    mask = np.array([value is not None for value in values], dtype=bool)
+    notNone = [value for value in values if value is not None]
+    if dtype is object:
+        compressed = np.empty(len(notNone), dtype=object)
+        compressed[:] = notNone
+    else:
+        compressed = np.array(notNone, dtype=dtype)
+    return compressed, np.cumsum(mask) - 1
+
+
+# Maps results calculated over the values that are not None back to the original positions.
+def _expand(results, positions):
+    ret = np.empty(len(positions), dtype=results.dtype)
+    ret[:] = None if results.dtype == object else np.nan
+    valid = positions >= 0
+    ret[valid] = results[positions[valid]]
+    return ret
+
+
+# Applies func to every window of windowSize consecutive values. func receives a 2D array with one window per row and
+# should return one value per row. Positions where the window is not full are set to NaN.
+def _rolling(values, windowSize, func):
+    ret = np.empty(len(values))
+    ret[:] = np.nan
+    windowCount = len(values) - windowSize + 1
+    if windowCount > 0:
+        values = np.ascontiguousarray(values)
+        windows = np.lib.stride_tricks.as_strided(
+            values, shape=(windowCount, windowSize), strides=(values.strides[0], values.strides[0]), writeable=False
+        )
+        chunkSize = max(1, BATCH_CHUNK_SIZE // windowSize)
+        for begin in range(0, windowCount, chunkSize):
+            end = min(begin + chunkSize, windowCount)
+            ret[begin + windowSize - 1:end + windowSize - 1] = func(np.array(windows[begin:end]))
+    return ret
+
+
 class EventWindow(object):
     """An EventWindow class is responsible for making calculation over a moving window of values.
 
@@ -47,6 +110,49 @@ class EventWindow(object):
         if value is not None or not self.__skipNone:
             self.__values.append(value)
 
+    def onNewValues(self, dateTimes, values):
+        """Processes a sequence of values in a single call, leaving the window in the same state as if
+        :meth:`onNewValue` was called for every value, and returns the values that :meth:`getValue` would have
+        returned after each one of them.
+
+        :param dateTimes: The datetimes for the values. Can be None.
+        :type dateTimes: list.
+        :param values: The values to process.
+        :type values: list or numpy.array.
+        :rtype: A numpy.array of floats, using NaN for None, or of objects if there are non numeric results.
+
+        .. note::
+            The default implementation calls :meth:`onNewValue` and :meth:`getValue` once per value.
+            Subclasses override :meth:`_calculateBatch` to calculate all the values at once.
+        """
+        if dateTimes is None:
+            dateTimes = [None] * len(values)
+        assert len(dateTimes) == len(values), "dateTimes and values must have the same length"
+
+        ret = None
+        # Vectorized calculations start from an empty window.
+        if len(self.__values) == 0 and self.__skipNone:
+            ret = self._calculateBatch(dateTimes, values)
+        if ret is None:
+            ret = []
+            for dateTime, value in zip(dateTimes, values):
+                self.onNewValue(dateTime, value)
+                ret.append(self.getValue())
+            ret = _to_array(ret)
+        return ret
+
+    # Override to calculate the results for a sequence of values in one pass, starting from an empty window.
+    # Implementations must return exactly the same values as the streaming calculation, and update the state
+    # (using _loadValues to fill the window) as if onNewValue was called for every value.
+    # Return None to fall back to processing values one by one.
+    def _calculateBatch(self, dateTimes, values):
+        return None
+
+    # Appends the last values in the sequence to the window.
+    def _loadValues(self, values):
+        for value in values[max(0, len(values) - self.__windowSize):]:
+            self.__values.append(value)
+
     def getValues(self):
         """Returns a numpy.array with the values in the window."""
         return self.__values.data()
@@ -73,15 +179,28 @@ class EventBasedFilter(dataseries.SequenceDataSeries):
     :type eventWindow: :class:`EventWindow`.
     :param maxLen: The maximum number of values to hold.
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
-        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
+        opposite end. If None then dataseries.DEFAULT_MAX_LEN is used, unless dataSeries is automatically sized, in
+        which case this filter is automatically sized as well.
     :type maxLen: int.
+
+    .. note::
+        The filter declares the event window size as the look-back it requires from the DataSeries being filtered.
+        Check :meth:`pyalgotrade.dataseries.SequenceDataSeries.requireLookBack`.
     """
 
     def __init__(self, dataSeries, eventWindow, maxLen=None):
-        super(EventBasedFilter, self).__init__(maxLen)
+        super(EventBasedFilter, self).__init__(dataseries.get_derived_max_len(dataSeries, maxLen))
+        # The event window keeps its own copy of the values, but a full window has to be available in the DataSeries
+        # being filtered so that seeding a chain of filters gives every one of them enough values to warm up.
+        dataseries.require_look_back(dataSeries, eventWindow.getWindowSize(), self)
         self.__dataSeries = dataSeries
         self.__dataSeries.getNewValueEvent().subscribe(self.__onNewValue)
         self.__eventWindow = eventWindow
+        # Values that were calculated but not appended yet. Only used when the filter is part of a fused chain and
+        # nobody is subscribed to it (check pyalgotrade.technical.fusion).
+        self.__pending = None
+        # Reading the values directly saves a call on the hot path.
+        self.__valuesDeque = self._getValuesDeque()
 
     def __onNewValue(self, dataSeries, dateTime, value):
         # Let the event window perform calculations.
@@ -91,8 +210,196 @@ class EventBasedFilter(dataseries.SequenceDataSeries):
         # Add the new value.
         self.appendWithDateTime(dateTime, newValue)
 
+    # Returns the handler subscribed to the DataSeries being filtered.
+    def _getHandler(self):
+        return self.__onNewValue
+
+    # When lazy, values passed to _appendLazy are kept aside and appended the next time the filter is read.
+    def _setLazy(self, lazy):
+        if lazy:
+            if self.__pending is None:
+                self.__pending = []
+                self.__pendingLimit = 2 * self.getMaxLen()
+        elif self.__pending is not None:
+            self._flush()
+            self.__pending = None
+
+    def _isLazy(self):
+        return self.__pending is not None
+
+    def _appendLazy(self, dateTime, value):
+        pending = self.__pending
+        pending.append((dateTime, value))
+        # Only the last maxLen values are needed.
+        if len(pending) > self.__pendingLimit:
+            del pending[:-self.getMaxLen()]
+
+    def _flush(self):
+        pending = self.__pending
+        if pending:
+            self.__pending = []
+            for dateTime, value in pending[-self.getMaxLen():]:
+                self.appendWithDateTime(dateTime, value)
+
+    # Pending values, if any, are appended before reading.
+
+    def __len__(self):
+        if self.__pending:
+            self._flush()
+        return len(self.__valuesDeque)
+
+    def __getitem__(self, key):
+        if self.__pending:
+            self._flush()
+        return self.__valuesDeque[key]
+
+    def getValueAbsolute(self, pos):
+        if self.__pending:
+            self._flush()
+        return super(EventBasedFilter, self).getValueAbsolute(pos)
+
+    def getDateTimes(self):
+        if self.__pending:
+            self._flush()
+        return super(EventBasedFilter, self).getDateTimes()
+
+    def seed(self, dateTimes, values):
+        """Warms up the filter using a sequence of historical values that were not (and will not be) appended to the
+        DataSeries being filtered. The values are calculated in batch mode and the last ones are appended to this
+        DataSeries, so filtering new values afterwards gives exactly the same results as if the historical values were
+        filtered one by one.
+
+        :param dateTimes: The datetimes for the values. Can be None.
+        :type dateTimes: list.
+        :param values: The historical values.
+        :type values: list or numpy.array.
+        :rtype: A numpy.array with all the values calculated, as returned by :meth:`EventWindow.onNewValues`.
+
+        .. note::
+            * Only the last maxLen values are appended, and those are the only ones that other filters built on top
+              of this one will receive.
+            * NaN values are appended as None.
+        """
+        if self.__pending:
+            self._flush()
+        ret = self.__eventWindow.onNewValues(dateTimes, values)
+        if dateTimes is None:
+            dateTimes = [None] * len(values)
+        isFloat = ret.dtype != object
+        for i in range(max(0, len(ret) - self.getMaxLen()), len(ret)):
+            value = ret[i]
+            if isFloat:
+                value = None if np.isnan(value) else float(value)
+            self.appendWithDateTime(dateTimes[i], value)
+        return ret
+
     def getDataSeries(self):
         return self.__dataSeries
 
     def getEventWindow(self):
         return self.__eventWindow
+
+
+# Makes parameters hashable so they can be used as part of a key. Returns None if that is not possible.
+def _freeze(value):
+    if isinstance(value, (list, tuple, np.ndarray)):
+        ret = []
+        for item in value:
+            item = _freeze(item)
+            if item is None:
+                return None
+            ret.append(item)
+        ret = (type(value).__name__, tuple(ret))
+    else:
+        try:
+            hash(value)
+            ret = (value, )
+        except TypeError:
+            ret = None
+    return ret
+
+
+class IndicatorRegistry(object):
+    """Builds indicators and shares the ones built on the same :class:`pyalgotrade.dataseries.DataSeries` using the same
+    parameters, so each indicator gets calculated just once no matter how many times it was requested.
+
+    Indicators are identified by the dataseries being filtered, the indicator class and the parameters used to build
+    it (including maxLen), after filling in default values. For example, **SMA(ds, 20)** and **SMA(ds, 20, maxLen=None)**
+    are the same indicator.
+
+    .. note::
+        * Indicators are kept alive for as long as the registry is, and the same goes for the dataseries being filtered.
+        * Since indicators are shared, they should not be modified (for example, seeded) after being built.
+        * Indicators built with parameters that can't be hashed, other than lists and tuples, are not shared.
+    """
+
+    def __init__(self):
+        # (dataSeries, indicatorClass, parameters) -> indicator
+        self.__indicators = {}
+        # indicatorClass -> [built, hits]
+        self.__stats = {}
+        self.__hits = 0
+        self.__misses = 0
+
+    def __getKey(self, indicatorClass, dataSeries, args, kwargs):
+        callArgs = inspect.getcallargs(indicatorClass.__init__, None, dataSeries, *args, **kwargs)
+        spec = inspect.getfullargspec(indicatorClass.__init__) if six.PY3 else inspect.getargspec(indicatorClass.__init__)
+        # Skip self and the dataseries.
+        parameters = []
+        for name in spec.args[2:]:
+            value = callArgs[name]
+            if name == "maxLen":
+                value = dataseries.get_checked_max_len(dataseries.get_derived_max_len(dataSeries, value))
+            parameters.append((name, value))
+        for name in sorted(callArgs):
+            if name not in spec.args:
+                parameters.append((name, callArgs[name]))
+
+        parameters = _freeze(parameters)
+        if parameters is None:
+            return None
+        return (dataSeries, indicatorClass, parameters)
+
+    def get(self, indicatorClass, dataSeries, *args, **kwargs):
+        """Returns an indicator built on dataSeries, reusing an existing one if it was already built with the same
+        parameters.
+
+        :param indicatorClass: The indicator class, for example :class:`pyalgotrade.technical.ma.SMA`.
+        :param dataSeries: The dataseries to filter. This is the first argument for the indicator class.
+        :type dataSeries: :class:`pyalgotrade.dataseries.DataSeries`.
+        :param args: Positional arguments for the indicator class, after the dataseries.
+        :param kwargs: Keyword arguments for the indicator class.
+        """
+
+        key = self.__getKey(indicatorClass, dataSeries, args, kwargs)
+        ret = None
+        if key is not None:
+            ret = self.__indicators.get(key)
+
+        stats = self.__stats.setdefault(indicatorClass, [0, 0])
+        if ret is None:
+            ret = indicatorClass(dataSeries, *args, **kwargs)
+            if key is not None:
+                self.__indicators[key] = ret
+            self.__misses += 1
+            stats[0] += 1
+        else:
+            self.__hits += 1
+            stats[1] += 1
+        return ret
+
+    def __len__(self):
+        return len(self.__indicators)
+
+    def getHits(self):
+        """Returns the number of times an existing indicator was returned, this is, the number of duplicates avoided."""
+        return self.__hits
+
+    def getMisses(self):
+        """Returns the number of indicators that were built."""
+        return self.__misses
+
+    def getStats(self):
+        """Returns a dictionary that maps each indicator class to a tuple with the number of indicators built and the
+        number of duplicates avoided."""
+        return dict((indicatorClass, tuple(stats)) for indicatorClass, stats in six.iteritems(self.__stats))
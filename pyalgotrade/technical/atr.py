@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
 
@@ -54,6 +56,38 @@ class ATREventWindow(technical.EventWindow):
             else:
                 self.__value = (self.__value * (self.getWindowSize() - 1) + tr) / float(self.getWindowSize())
 
+    def _calculateBatch(self, dateTimes, values):
+        if any(value is None for value in values):
+            return None
+
+        useAdjusted = self.__useAdjustedValues
+        highs = np.array([bar.getHigh(useAdjusted) for bar in values], dtype=np.float64)
+        lows = np.array([bar.getLow(useAdjusted) for bar in values], dtype=np.float64)
+        closes = np.array([bar.getClose(useAdjusted) for bar in values], dtype=np.float64)
+        # The first true range is just high - low since there is no previous close.
+        trueRanges = highs - lows
+        tr2 = np.abs(highs[1:] - closes[:-1])
+        tr3 = np.abs(lows[1:] - closes[:-1])
+        trueRanges[1:] = np.maximum(np.maximum(trueRanges[1:], tr2), tr3)
+        if len(values):
+            self.__prevClose = values[-1].getClose(useAdjusted)
+
+        period = self.getWindowSize()
+        results = np.empty(len(values))
+        results[:] = np.nan
+        if len(values) >= period:
+            # Every value depends on the previous one, so this is a plain loop over floats.
+            value = trueRanges[:period].mean()
+            results[period - 1] = value
+            i = period
+            for tr in trueRanges[period:].tolist():
+                value = (value * (period - 1) + tr) / float(period)
+                results[i] = value
+                i += 1
+            self.__value = value
+        self._loadValues(trueRanges)
+        return results
+
     def getValue(self):
         return self.__value
 
@@ -36,11 +36,15 @@ class BollingerBands(object):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param incremental: True to update the standard deviation in O(1) time per value.
+        Check :class:`pyalgotrade.technical.stats.RollingMoments` for more information.
+    :type incremental: boolean.
     """
 
-    def __init__(self, dataSeries, period, numStdDev, maxLen=None):
+    def __init__(self, dataSeries, period, numStdDev, maxLen=None, incremental=False):
+        maxLen = dataseries.get_derived_max_len(dataSeries, maxLen)
         self.__sma = ma.SMA(dataSeries, period, maxLen=maxLen)
-        self.__stdDev = stats.StdDev(dataSeries, period, maxLen=maxLen)
+        self.__stdDev = stats.StdDev(dataSeries, period, maxLen=maxLen, incremental=incremental)
         self.__upperBand = dataseries.SequenceDataSeries(maxLen)
         self.__lowerBand = dataseries.SequenceDataSeries(maxLen)
         self.__numStdDev = numStdDev
@@ -0,0 +1,412 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+
+# Cross-sectional indicators calculate the same indicator for every instrument in a universe. Instead of having one
+# filter per instrument, each indicator keeps an (instruments x window) matrix, and all the instruments that have a bar
+# get updated at once with a few numpy operations per bar.
+
+INITIAL_CAPACITY = 64
+
+
+class Engine(object):
+    """Feeds values from a bar feed to cross-sectional indicators.
+
+    :param barFeed: The bar feed that provides the bars.
+    :type barFeed: :class:`pyalgotrade.barfeed.BaseBarFeed`.
+    :param valueGetter: A function that receives a :class:`pyalgotrade.bar.Bar` and returns the value to use. If None,
+        :meth:`pyalgotrade.bar.Bar.getPrice` is used.
+    :type valueGetter: function.
+
+    .. note::
+        * Bars are received using the bar feed's new values event, so the bar feed has to be dispatched, for example,
+          by running a strategy.
+        * Instruments are assigned a position, the one used in the vectors returned by :meth:`Indicator.getValues`,
+          in the order they are registered in the bar feed or show up in the bars.
+        * Indicators are brought up to date with the current bars when their values are requested, so they can be
+          used from a strategy's onBars even if they were built after the strategy subscribed to the bar feed.
+        * The values for instruments that have no bar in the current bars are the ones calculated with their last bar.
+    """
+
+    def __init__(self, barFeed, valueGetter=None):
+        self.__barFeed = barFeed
+        self.__valueGetter = valueGetter
+        self.__instruments = []
+        self.__instrumentIds = {}
+        self.__capacity = INITIAL_CAPACITY
+        self.__indicators = []
+        self.__lastBars = None
+        self.__dateTime = None
+        for instrument in barFeed.getRegisteredInstruments():
+            self.__addInstrument(instrument)
+        barFeed.getNewValuesEvent().subscribe(self.__onBars)
+
+    def __addInstrument(self, instrument):
+        ret = len(self.__instruments)
+        self.__instruments.append(instrument)
+        self.__instrumentIds[instrument] = ret
+        if len(self.__instruments) > self.__capacity:
+            self.__capacity *= 2
+            for indicator in self.__indicators:
+                indicator._resize(self.__capacity)
+        return ret
+
+    def __onBars(self, dateTime, bars):
+        # Bars may have been processed already if an indicator value was requested before this handler got called.
+        if bars is self.__lastBars:
+            return
+        self.__lastBars = bars
+        self.__dateTime = dateTime
+
+        rows = []
+        values = []
+        for instrument, bar in bars.items():
+            value = bar.getPrice() if self.__valueGetter is None else self.__valueGetter(bar)
+            if value is not None:
+                row = self.__instrumentIds.get(instrument)
+                if row is None:
+                    row = self.__addInstrument(instrument)
+                rows.append(row)
+                values.append(value)
+        if rows:
+            rows = np.array(rows, dtype=np.intp)
+            values = np.array(values, dtype=np.float64)
+            for indicator in self.__indicators:
+                indicator._update(rows, values)
+
+    def _sync(self):
+        bars = self.__barFeed.getCurrentBars()
+        if bars is not None and bars is not self.__lastBars:
+            self.__onBars(bars.getDateTime(), bars)
+
+    def _addIndicator(self, indicator):
+        self.__indicators.append(indicator)
+        indicator._resize(self.__capacity)
+
+    def getBarFeed(self):
+        return self.__barFeed
+
+    def getInstruments(self):
+        """Returns the instruments, in the same order as the values returned by :meth:`Indicator.getValues`."""
+        return self.__instruments
+
+    def getInstrumentPosition(self, instrument):
+        """Returns the position for an instrument in the vectors returned by :meth:`Indicator.getValues`, or None."""
+        return self.__instrumentIds.get(instrument)
+
+    def getCurrentDateTime(self):
+        """Returns the datetime for the last bars processed."""
+        self._sync()
+        return self.__dateTime
+
+
+class Indicator(object):
+    """Base class for cross-sectional indicators.
+
+    :param engine: The engine that feeds values to the indicator.
+    :type engine: :class:`Engine`.
+    :param windowSize: The number of values to keep for each instrument.
+    :type windowSize: int.
+
+    .. note::
+        This is a base class and should not be used directly.
+    """
+
+    def __init__(self, engine, windowSize):
+        assert(windowSize > 0)
+        self.__engine = engine
+        self.__windowSize = windowSize
+        self.__window = np.empty((0, windowSize))
+        # Where the next value goes in the window, and how many values are in the window, for each instrument.
+        self.__heads = np.zeros(0, dtype=np.intp)
+        self.__counts = np.zeros(0, dtype=np.intp)
+        self.__results = np.empty(0)
+        engine._addIndicator(self)
+
+    def _resize(self, capacity):
+        size = len(self.__heads)
+        window = np.empty((capacity, self.__windowSize))
+        window[:size] = self.__window
+        self.__window = window
+        self.__heads = np.concatenate([self.__heads, np.zeros(capacity - size, dtype=np.intp)])
+        self.__counts = np.concatenate([self.__counts, np.zeros(capacity - size, dtype=np.intp)])
+        self.__results = np.concatenate([self.__results, np.full(capacity - size, np.nan)])
+        self._resizeState(size, capacity)
+
+    # Override to grow any additional per instrument state.
+    def _resizeState(self, size, capacity):
+        pass
+
+    # Grows a per instrument array filling new slots with value.
+    @staticmethod
+    def _grow(values, capacity, value):
+        return np.concatenate([values, np.full(capacity - len(values), value, dtype=values.dtype)])
+
+    def _update(self, rows, values):
+        heads = self.__heads[rows]
+        self.__window[rows, heads] = values
+        self.__heads[rows] = (heads + 1) % self.__windowSize
+        counts = np.minimum(self.__counts[rows] + 1, self.__windowSize)
+        self.__counts[rows] = counts
+        full = counts == self.__windowSize
+        results = np.full(len(rows), np.nan)
+        if full.any():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                results[full] = self._calculate(rows[full], values[full])
+        self.__results[rows] = results
+
+    # Override to calculate the results for instruments whose window is full. rows are the instrument positions and
+    # values are the values that were just added.
+    def _calculate(self, rows, values):
+        raise NotImplementedError()
+
+    # Returns the windows for the given instruments, one per row, with values in no particular order.
+    def _getWindows(self, rows):
+        return self.__window[rows]
+
+    # Returns the windows for the given instruments, one per row, from the oldest value to the newest one.
+    def _getOrderedWindows(self, rows):
+        columns = (self.__heads[rows][:, np.newaxis] + np.arange(self.__windowSize)) % self.__windowSize
+        return self.__window[rows[:, np.newaxis], columns]
+
+    # Returns the oldest value in the window for the given instruments.
+    def _getOldest(self, rows):
+        return self.__window[rows, self.__heads[rows]]
+
+    # Returns the value before the newest one in the window for the given instruments.
+    def _getPrevious(self, rows):
+        return self.__window[rows, (self.__heads[rows] - 2) % self.__windowSize]
+
+    def getEngine(self):
+        return self.__engine
+
+    def getWindowSize(self):
+        return self.__windowSize
+
+    def getValue(self, instrument):
+        """Returns the last value for an instrument, or None if it is not available."""
+        self.__engine._sync()
+        ret = None
+        row = self.__engine.getInstrumentPosition(instrument)
+        if row is not None:
+            value = self.__results[row]
+            if not np.isnan(value):
+                ret = float(value)
+        return ret
+
+    def getValues(self):
+        """Returns a numpy.array with the last value for every instrument, in the same order as
+        :meth:`Engine.getInstruments`, using NaN where values are not available."""
+        self.__engine._sync()
+        return self.__results[:len(self.__engine.getInstruments())].copy()
+
+    def getValuesDict(self):
+        """Returns a dictionary that maps instruments to their last value, skipping those with no value available."""
+        values = self.getValues()
+        return dict(
+            (instrument, float(value))
+            for instrument, value in zip(self.__engine.getInstruments(), values) if not np.isnan(value)
+        )
+
+
+class SMA(Indicator):
+    """Simple Moving Average for every instrument.
+
+    :param engine: The engine that feeds values to the indicator.
+    :type engine: :class:`Engine`.
+    :param period: The number of values to use to calculate the SMA.
+    :type period: int.
+    """
+
+    def __init__(self, engine, period):
+        super(SMA, self).__init__(engine, period)
+
+    def _calculate(self, rows, values):
+        return self._getWindows(rows).mean(axis=1)
+
+
+class EMA(Indicator):
+    """Exponential Moving Average for every instrument.
+
+    :param engine: The engine that feeds values to the indicator.
+    :type engine: :class:`Engine`.
+    :param period: The number of values to use to calculate the EMA. Must be an integer greater than 1.
+    :type period: int.
+    """
+
+    def __init__(self, engine, period):
+        assert(period > 1)
+        self.__multiplier = (2.0 / (period + 1))
+        self.__ema = np.empty(0)
+        super(EMA, self).__init__(engine, period)
+
+    def _resizeState(self, size, capacity):
+        self.__ema = Indicator._grow(self.__ema, capacity, np.nan)
+
+    def _calculate(self, rows, values):
+        ema = self.__ema[rows]
+        # The first value is the SMA.
+        first = np.isnan(ema)
+        if first.any():
+            ema[first] = self._getWindows(rows[first]).mean(axis=1)
+        notFirst = ~first
+        ema[notFirst] = (values[notFirst] - ema[notFirst]) * self.__multiplier + ema[notFirst]
+        self.__ema[rows] = ema
+        return ema
+
+
+class StdDev(Indicator):
+    """Standard deviation for every instrument.
+
+    :param engine: The engine that feeds values to the indicator.
+    :type engine: :class:`Engine`.
+    :param period: The number of values to use to calculate the Standard deviation.
+    :type period: int.
+    :param ddof: Delta degrees of freedom.
+    :type ddof: int.
+    """
+
+    def __init__(self, engine, period, ddof=0):
+        super(StdDev, self).__init__(engine, period)
+        self.__ddof = ddof
+
+    def _calculate(self, rows, values):
+        return self._getWindows(rows).std(axis=1, ddof=self.__ddof)
+
+
+class ZScore(Indicator):
+    """Z-Score for every instrument.
+
+    :param engine: The engine that feeds values to the indicator.
+    :type engine: :class:`Engine`.
+    :param period: The number of values to use to calculate the Z-Score.
+    :type period: int.
+    :param ddof: Delta degrees of freedom to use for the standard deviation.
+    :type ddof: int.
+    """
+
+    def __init__(self, engine, period, ddof=0):
+        assert(period > 1)
+        super(ZScore, self).__init__(engine, period)
+        self.__ddof = ddof
+
+    def _calculate(self, rows, values):
+        windows = self._getWindows(rows)
+        return (values - windows.mean(axis=1)) / windows.std(axis=1, ddof=self.__ddof)
+
+
+class RateOfChange(Indicator):
+    """Rate of change for every instrument.
+
+    :param engine: The engine that feeds values to the indicator.
+    :type engine: :class:`Engine`.
+    :param valuesAgo: The number of values back that a given value will compare to. Must be > 0.
+    :type valuesAgo: int.
+    """
+
+    def __init__(self, engine, valuesAgo):
+        assert(valuesAgo > 0)
+        super(RateOfChange, self).__init__(engine, valuesAgo + 1)
+
+    def _calculate(self, rows, values):
+        prev = self._getOldest(rows)
+        diff = values - prev
+        return np.where(diff == 0, 0.0, np.where(prev != 0, diff / prev, np.nan))
+
+
+class RSI(Indicator):
+    """Relative Strength Index for every instrument.
+
+    :param engine: The engine that feeds values to the indicator.
+    :type engine: :class:`Engine`.
+    :param period: The period. Note that if period is **n**, then **n+1** values are used. Must be > 1.
+    :type period: int.
+    """
+
+    def __init__(self, engine, period):
+        assert(period > 1)
+        self.__period = period
+        self.__avgGain = np.empty(0)
+        self.__avgLoss = np.empty(0)
+        # We need N + 1 samples to calculate N averages because they are calculated based on the diff with previous
+        # values.
+        super(RSI, self).__init__(engine, period + 1)
+
+    def _resizeState(self, size, capacity):
+        self.__avgGain = Indicator._grow(self.__avgGain, capacity, np.nan)
+        self.__avgLoss = Indicator._grow(self.__avgLoss, capacity, np.nan)
+
+    def _calculate(self, rows, values):
+        avgGain = self.__avgGain[rows]
+        avgLoss = self.__avgLoss[rows]
+
+        # The first averages are calculated using the whole window.
+        first = np.isnan(avgGain)
+        if first.any():
+            changes = np.diff(self._getOrderedWindows(rows[first]), axis=1)
+            avgGain[first] = np.where(changes > 0, changes, 0).sum(axis=1) / float(self.__period)
+            avgLoss[first] = np.where(changes < 0, -changes, 0).sum(axis=1) / float(self.__period)
+
+        # The rest of the averages are smoothed.
+        notFirst = ~first
+        if notFirst.any():
+            changes = values[notFirst] - self._getPrevious(rows[notFirst])
+            gain = np.where(changes > 0, changes, 0)
+            loss = np.where(changes < 0, -changes, 0)
+            avgGain[notFirst] = (avgGain[notFirst] * (self.__period - 1) + gain) / float(self.__period)
+            avgLoss[notFirst] = (avgLoss[notFirst] * (self.__period - 1) + loss) / float(self.__period)
+
+        self.__avgGain[rows] = avgGain
+        self.__avgLoss[rows] = avgLoss
+        return np.where(avgLoss == 0, 100.0, 100 - 100 / (1 + avgGain / avgLoss))
+
+
+class High(Indicator):
+    """The highest value for every instrument.
+
+    :param engine: The engine that feeds values to the indicator.
+    :type engine: :class:`Engine`.
+    :param period: The number of values to use to calculate the highest value.
+    :type period: int.
+    """
+
+    def __init__(self, engine, period):
+        super(High, self).__init__(engine, period)
+
+    def _calculate(self, rows, values):
+        return self._getWindows(rows).max(axis=1)
+
+
+class Low(Indicator):
+    """The lowest value for every instrument.
+
+    :param engine: The engine that feeds values to the indicator.
+    :type engine: :class:`Engine`.
+    :param period: The number of values to use to calculate the lowest value.
+    :type period: int.
+    """
+
+    def __init__(self, engine, period):
+        super(Low, self).__init__(engine, period)
+
+    def _calculate(self, rows, values):
+        return self._getWindows(rows).min(axis=1)
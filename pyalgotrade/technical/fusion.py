@@ -0,0 +1,132 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+from pyalgotrade import technical
+
+
+class FusedFilters(object):
+    """Updates a group of :class:`pyalgotrade.technical.EventBasedFilter` built on top of each other, for example
+    **ZScore(RateOfChange(SMA(ds)))**, with a single subscription to the source dataseries.
+
+    Filters are updated one after the other, in a single call, instead of having each filter emit an event to the
+    ones built on top of it.
+    Intermediate filters that nobody else is subscribed to are lazy: values get appended the next time they are
+    read, so filters that are never read never get values appended.
+
+    :param filters: The filters to fuse, along with all the filters they are built on top of, up to the source
+        dataseries.
+    :type filters: list of :class:`pyalgotrade.technical.EventBasedFilter`.
+    :param materialize: Intermediate filters that should get values appended as soon as they are calculated.
+    :type materialize: list of :class:`pyalgotrade.technical.EventBasedFilter`.
+
+    .. note::
+        * All the filters must be built, directly or indirectly, on the same source dataseries.
+        * Filters should be fused once everything that subscribes to them has been built, since subscribers added
+          later are not notified about values for lazy filters.
+        * Subscribers to the fused filters are notified in the order the filters get updated, that is, every filter
+          is updated after the one it is built on top of.
+    """
+
+    def __init__(self, filters, materialize=None):
+        if len(filters) == 0:
+            raise Exception("No filters to fuse")
+
+        # Collect the filters, each one after the one it is built on top of.
+        self.__filters = []
+        positions = {}
+        source = None
+        for filter_ in filters:
+            chain = []
+            dataSeries = filter_
+            while isinstance(dataSeries, technical.EventBasedFilter) and dataSeries not in positions:
+                chain.append(dataSeries)
+                dataSeries = dataSeries.getDataSeries()
+            if not isinstance(dataSeries, technical.EventBasedFilter):
+                if source is None:
+                    source = dataSeries
+                elif dataSeries is not source:
+                    raise Exception("All filters must be built on the same source dataseries")
+            for chainFilter in reversed(chain):
+                positions[chainFilter] = len(self.__filters)
+                self.__filters.append(chainFilter)
+
+        # Stop the filters from being updated one by one. Filters on top of the source keep their position among the
+        # handlers, since subscribers after them may be reading their values.
+        handler = None
+        for filter_ in self.__filters:
+            if filter_.getDataSeries() is source and handler is None:
+                handler = filter_._getHandler()
+                source.getNewValueEvent().replace(handler, self.__onNewValue)
+            else:
+                filter_.getDataSeries().getNewValueEvent().unsubscribe(filter_._getHandler())
+
+        # (filter, event window, position of the input filter or None for the source, lazy)
+        if materialize is None:
+            materialize = []
+        self.__stages = []
+        for filter_ in self.__filters:
+            dataSeries = filter_.getDataSeries()
+            inputPos = None if dataSeries is source else positions[dataSeries]
+            lazy = filter_.getNewValueEvent().getHandlerCount() == 0 and filter_ not in materialize \
+                and filter_ not in filters
+            if lazy:
+                filter_._setLazy(True)
+            self.__stages.append((filter_, filter_.getEventWindow(), inputPos, lazy))
+        self.__source = source
+        self.__values = [None] * len(self.__stages)
+
+    def __onNewValue(self, dataSeries, dateTime, sourceValue):
+        # The last value calculated by each filter.
+        values = self.__values
+        pos = 0
+        for filter_, eventWindow, inputPos, lazy in self.__stages:
+            eventWindow.onNewValue(dateTime, sourceValue if inputPos is None else values[inputPos])
+            newValue = eventWindow.getValue()
+            values[pos] = newValue
+            if lazy:
+                filter_._appendLazy(dateTime, newValue)
+            else:
+                filter_.appendWithDateTime(dateTime, newValue)
+            pos += 1
+
+    def getSource(self):
+        """Returns the source :class:`pyalgotrade.dataseries.DataSeries`."""
+        return self.__source
+
+    def getFilters(self):
+        """Returns the fused filters, in the order they get updated."""
+        return self.__filters
+
+    def getLazyFilters(self):
+        """Returns the filters that get values appended only when they are read."""
+        return [filter_ for filter_, _, _, lazy in self.__stages if lazy]
+
+
+def fuse(filters, materialize=None):
+    """Fuses filters. Check :class:`FusedFilters` for more information.
+
+    :param filters: The filters to fuse, along with all the filters they are built on top of, up to the source
+        dataseries.
+    :type filters: list of :class:`pyalgotrade.technical.EventBasedFilter`.
+    :param materialize: Intermediate filters that should get values appended as soon as they are calculated.
+    :type materialize: list of :class:`pyalgotrade.technical.EventBasedFilter`.
+    :rtype: :class:`FusedFilters`.
+    """
+    return FusedFilters(filters, materialize)
@@ -18,25 +18,96 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import collections
+
 from pyalgotrade import technical
 
 
-class HighLowEventWindow(technical.EventWindow):
+class SlidingExtremum(object):
+    """Keeps track of the lowest or highest of the last N values in amortized O(1) time per value.
+
+    :param windowSize: The number of values to consider. Must be greater than 0.
+    :type windowSize: int.
+    :param useMin: True to track the lowest value, False to track the highest one.
+    :type useMin: boolean.
+
+    .. note::
+        If there is a NaN in the window the result is NaN, just like numpy.min/numpy.max.
+    """
+
     def __init__(self, windowSize, useMin):
-        super(HighLowEventWindow, self).__init__(windowSize)
+        assert(windowSize > 0)
+        self.__windowSize = windowSize
         self.__useMin = useMin
+        # (position, value) pairs for the values that can still become the extremum. Values are monotonic, and the
+        # first one is always the current extremum.
+        self.__candidates = collections.deque()
+        self.__count = 0
+        self.__lastNaNPos = None
+
+    def add(self, value):
+        """Adds a new value, discarding the oldest one if the window is full."""
+        pos = self.__count
+        self.__count += 1
+
+        if value != value:
+            self.__lastNaNPos = pos
+        elif self.__useMin:
+            while self.__candidates and self.__candidates[-1][1] >= value:
+                self.__candidates.pop()
+            self.__candidates.append((pos, value))
+        else:
+            while self.__candidates and self.__candidates[-1][1] <= value:
+                self.__candidates.pop()
+            self.__candidates.append((pos, value))
+
+        # Drop the candidate that just went out of the window.
+        if self.__candidates and self.__candidates[0][0] <= pos - self.__windowSize:
+            self.__candidates.popleft()
+
+    def windowFull(self):
+        return self.__count >= self.__windowSize
 
     def getValue(self):
+        """Returns the extremum of the last N values, or None if less than N values were added."""
         ret = None
         if self.windowFull():
-            values = self.getValues()
-            if self.__useMin:
-                ret = values.min()
+            if self.__lastNaNPos is not None and self.__lastNaNPos > self.__count - 1 - self.__windowSize:
+                ret = float("nan")
             else:
-                ret = values.max()
+                ret = self.__candidates[0][1]
         return ret
 
 
+class HighLowEventWindow(technical.EventWindow):
+    def __init__(self, windowSize, useMin):
+        super(HighLowEventWindow, self).__init__(windowSize)
+        self.__useMin = useMin
+        self.__extremum = SlidingExtremum(windowSize, useMin)
+
+    def onNewValue(self, dateTime, value):
+        super(HighLowEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__extremum.add(float(value))
+
+    def getValue(self):
+        return self.__extremum.getValue()
+
+    def _loadValues(self, values):
+        super(HighLowEventWindow, self)._loadValues(values)
+        for value in values[max(0, len(values) - self.getWindowSize()):]:
+            self.__extremum.add(float(value))
+
+    def _calculateBatch(self, dateTimes, values):
+        values, positions = technical._split_none(values)
+        if self.__useMin:
+            results = technical._rolling(values, self.getWindowSize(), lambda windows: windows.min(axis=1))
+        else:
+            results = technical._rolling(values, self.getWindowSize(), lambda windows: windows.max(axis=1))
+        self._loadValues(values)
+        return technical._expand(results, positions)
+
+
 class High(technical.EventBasedFilter):
     """This filter calculates the highest value.
 
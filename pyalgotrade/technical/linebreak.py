@@ -75,14 +75,19 @@ class LineBreak(dataseries.SequenceDataSeries):
             raise Exception("barDataSeries must be a dataseries.bards.BarDataSeries instance")
         if reversalLines < 2:
             raise Exception("reversalLines must be greater than 1")
-        if dataseries.get_checked_max_len(maxLen) < reversalLines:
+        maxLen = dataseries.get_checked_max_len(dataseries.get_derived_max_len(barDataSeries, maxLen))
+        if maxLen != dataseries.AUTO_MAX_LEN and maxLen < reversalLines:
             raise Exception("maxLen can't be smaller than reversalLines")
 
         super(LineBreak, self).__init__(maxLen)
+        # Reversals are checked using the last reversalLines lines.
+        self.requireLookBack(reversalLines)
 
         self.__reversalLines = reversalLines
         self.__useAdjustedValues = useAdjustedValues
 
+        # Only the new bar is needed.
+        barDataSeries.requireLookBack(1, self)
         barDataSeries.getNewValueEvent().subscribe(self.__onNewBar)
 
     def __onNewBar(self, dataSeries, dateTime, value):
@@ -35,11 +35,110 @@ def lsreg(x, y):
     return res[0], res[1]
 
 
-class LeastSquaresRegressionWindow(technical.EventWindow):
+class RollingRegression(object):
+    """Calculates a least-squares regression line over the last N (x, y) points in O(1) time per point, updating the
+    means and co-moments as points get in and out of the window.
+
+    :param windowSize: The number of points to consider. Must be greater than 1.
+    :type windowSize: int.
+
+    .. note::
+        To avoid accumulating rounding errors, everything is calculated from scratch once the window gets full and then
+        once every windowSize points. In between, the values of the regression line differ from the exact ones by less
+        than 1e-12 times the magnitude of the y values. When x values are timestamps, evaluating the line returned by
+        :func:`scipy.stats.linregress` is less accurate, since the intercept is far from the window, so results differ
+        from the ones calculated that way by up to 1e-10 times the magnitude of the y values.
+        If there is a NaN in the window the results are NaN.
+    """
+
     def __init__(self, windowSize):
+        assert(windowSize > 1)
+        self.__xs = collections.NumPyDeque(windowSize)
+        self.__ys = collections.NumPyDeque(windowSize)
+        self.__windowSize = windowSize
+        self.__meanX = None
+        self.__meanY = None
+        # Sum of (x - meanX)^2 and sum of (x - meanX) * (y - meanY).
+        self.__sxx = None
+        self.__sxy = None
+        self.__nanCount = 0
+        self.__updates = 0
+        self.__outdated = True
+
+    def __recalculate(self):
+        xs = self.__xs.data()
+        ys = self.__ys.data()
+        self.__meanX = xs.mean()
+        self.__meanY = ys.mean()
+        deviationsX = xs - self.__meanX
+        self.__sxx = np.multiply(deviationsX, deviationsX).sum()
+        self.__sxy = np.multiply(deviationsX, ys - self.__meanY).sum()
+        self.__updates = 0
+        self.__outdated = False
+
+    def add(self, x, y):
+        """Adds a new point, discarding the oldest one if the window is full."""
+        oldX = None
+        oldY = None
+        if self.windowFull():
+            oldX = self.__xs[0]
+            oldY = self.__ys[0]
+            if oldY != oldY:
+                self.__nanCount -= 1
+        self.__xs.append(x)
+        self.__ys.append(y)
+        if y != y:
+            self.__nanCount += 1
+
+        if not self.windowFull() or self.__nanCount:
+            self.__outdated = True
+        elif self.__outdated or self.__updates >= self.__windowSize:
+            self.__recalculate()
+        else:
+            # Remove the old point, going from N to N - 1 points, and then add the new one.
+            count = float(self.__windowSize)
+            meanX = self.__meanX - (oldX - self.__meanX) / (count - 1)
+            meanY = self.__meanY - (oldY - self.__meanY) / (count - 1)
+            sxx = self.__sxx - (oldX - meanX) * (oldX - self.__meanX)
+            sxy = self.__sxy - (oldX - meanX) * (oldY - self.__meanY)
+
+            deltaX = x - meanX
+            self.__meanX = meanX + deltaX / count
+            self.__meanY = meanY + (y - meanY) / count
+            self.__sxx = sxx + deltaX * (x - self.__meanX)
+            self.__sxy = sxy + deltaX * (y - self.__meanY)
+            self.__updates += 1
+
+    def windowFull(self):
+        return len(self.__xs) == self.__windowSize
+
+    def getSlope(self):
+        """Returns the slope of the regression line, or None if less than N points were added."""
+        ret = None
+        if self.windowFull():
+            if self.__nanCount:
+                ret = float("nan")
+            else:
+                ret = self.__sxy / self.__sxx
+        return ret
+
+    def getValueAt(self, x):
+        """Returns the value of the regression line at x, or None if less than N points were added."""
+        ret = None
+        if self.windowFull():
+            if self.__nanCount:
+                ret = float("nan")
+            else:
+                ret = self.__meanY + self.__sxy / self.__sxx * (x - self.__meanX)
+        return ret
+
+
+class LeastSquaresRegressionWindow(technical.EventWindow):
+    def __init__(self, windowSize, incremental=False):
         assert(windowSize > 1)
         super(LeastSquaresRegressionWindow, self).__init__(windowSize)
         self._timestamps = collections.NumPyDeque(windowSize)
+        self.__regression = RollingRegression(windowSize) if incremental else None
 
     def onNewValue(self, dateTime, value):
         technical.EventWindow.onNewValue(self, dateTime, value)
@@ -48,12 +147,17 @@ class LeastSquaresRegressionWindow(technical.EventWindow):
             if len(self._timestamps):
                 assert(timestamp > self._timestamps[-1])
             self._timestamps.append(timestamp)
+            if self.__regression is not None:
+                self.__regression.add(timestamp, value)
 
     def __getValueAtImpl(self, timestamp):
         ret = None
         if self.windowFull():
-            a, b = lsreg(self._timestamps.data(), self.getValues())
-            ret = a * timestamp + b
+            if self.__regression is not None:
+                ret = self.__regression.getValueAt(timestamp)
+            else:
+                a, b = lsreg(self._timestamps.data(), self.getValues())
+                ret = a * timestamp + b
         return ret
 
     def getValueAt(self, dateTime):
@@ -77,9 +181,14 @@ class LeastSquaresRegression(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param incremental: True to update the regression in O(1) time per value using :class:`RollingRegression`.
+        Results match within the tolerance documented in that class.
+    :type incremental: boolean.
     """
-    def __init__(self, dataSeries, windowSize, maxLen=None):
-        super(LeastSquaresRegression, self).__init__(dataSeries, LeastSquaresRegressionWindow(windowSize), maxLen)
+    def __init__(self, dataSeries, windowSize, maxLen=None, incremental=False):
+        super(LeastSquaresRegression, self).__init__(
+            dataSeries, LeastSquaresRegressionWindow(windowSize, incremental), maxLen
+        )
 
     def getValueAt(self, dateTime):
         """Calculates the value at a given time based on the regression line.
@@ -92,15 +201,27 @@ class LeastSquaresRegression(technical.EventBasedFilter):
 
 
 class SlopeEventWindow(technical.EventWindow):
-    def __init__(self, windowSize):
+    def __init__(self, windowSize, incremental=False):
         super(SlopeEventWindow, self).__init__(windowSize)
         self.__x = np.asarray(range(windowSize))
+        self.__regression = RollingRegression(windowSize) if incremental else None
+        # The slope doesn't change if x is shifted, so values are just numbered.
+        self.__nextX = 0
+
+    def onNewValue(self, dateTime, value):
+        super(SlopeEventWindow, self).onNewValue(dateTime, value)
+        if value is not None and self.__regression is not None:
+            self.__regression.add(self.__nextX, value)
+            self.__nextX += 1
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            y = self.getValues()
-            ret = lsreg(self.__x, y)[0]
+            if self.__regression is not None:
+                ret = self.__regression.getSlope()
+            else:
+                y = self.getValues()
+                ret = lsreg(self.__x, y)[0]
         return ret
 
 
@@ -115,13 +236,16 @@ class Slope(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param incremental: True to update the slope in O(1) time per value using :class:`RollingRegression`.
+        Results match within the tolerance documented in that class.
+    :type incremental: boolean.
 
     .. note::
         This filter ignores the time elapsed between the different values.
     """
 
-    def __init__(self, dataSeries, period, maxLen=None):
-        super(Slope, self).__init__(dataSeries, SlopeEventWindow(period), maxLen)
+    def __init__(self, dataSeries, period, maxLen=None, incremental=False):
+        super(Slope, self).__init__(dataSeries, SlopeEventWindow(period, incremental), maxLen)
 
 
 class TrendEventWindow(SlopeEventWindow):
@@ -59,6 +59,23 @@ class SMAEventWindow(technical.EventWindow):
             else:
                 self.__value = self.__value + value / float(self.getWindowSize()) - firstValue / float(self.getWindowSize())
 
+    def _calculateBatch(self, dateTimes, values):
+        values, positions = technical._split_none(values)
+        period = self.getWindowSize()
+        results = np.empty(len(values))
+        results[:] = np.nan
+        if len(values) >= period:
+            # The running sum is calculated with np.add.accumulate, that adds values sequentially, interleaving the
+            # values that get in and out of the window in the same order as onNewValue does.
+            steps = np.empty((len(values) - period) * 2 + 1)
+            steps[0] = values[:period].mean()
+            steps[1::2] = values[period:] / float(period)
+            steps[2::2] = -(values[:-period] / float(period))
+            results[period - 1:] = np.add.accumulate(steps)[0::2]
+            self.__value = results[-1]
+        self._loadValues(values)
+        return technical._expand(results, positions)
+
     def getValue(self):
         return self.__value
 
@@ -96,6 +113,26 @@ class EMAEventWindow(technical.EventWindow):
             else:
                 self.__value = (value - self.__value) * self.__multiplier + self.__value
 
+    def _calculateBatch(self, dateTimes, values):
+        values, positions = technical._split_none(values)
+        period = self.getWindowSize()
+        results = np.empty(len(values))
+        results[:] = np.nan
+        if len(values) >= period:
+            # Every value depends on the previous one, so this can't be vectorized without changing the results.
+            # A plain loop over floats is still much faster than going through the event chain.
+            value = values[:period].mean()
+            results[period - 1] = value
+            multiplier = self.__multiplier
+            i = period
+            for newValue in values[period:].tolist():
+                value = (newValue - value) * multiplier + value
+                results[i] = value
+                i += 1
+            self.__value = value
+        self._loadValues(values)
+        return technical._expand(results, positions)
+
     def getValue(self):
         return self.__value
 
@@ -131,6 +168,14 @@ class WMAEventWindow(technical.EventWindow):
             ret = accum / float(weightSum)
         return ret
 
+    def _calculateBatch(self, dateTimes, values):
+        values, positions = technical._split_none(values)
+        weights = self.__weights
+        weightSum = float(weights.sum())
+        results = technical._rolling(values, self.getWindowSize(), lambda windows: (windows * weights).sum(axis=1) / weightSum)
+        self._loadValues(values)
+        return technical._expand(results, positions)
+
 
 class WMA(technical.EventBasedFilter):
     """Weighted Moving Average filter.
@@ -44,7 +44,9 @@ class MACD(dataseries.SequenceDataSeries):
         assert(fastEMA < slowEMA)
         assert(signalEMA > 0)
 
+        maxLen = dataseries.get_derived_max_len(dataSeries, maxLen)
         super(MACD, self).__init__(maxLen)
+        dataseries.require_look_back(dataSeries, slowEMA, self)
 
         # We need to skip some values when calculating the fast EMA in order for both EMA
         # to calculate their first values at the same time.
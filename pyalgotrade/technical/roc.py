@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade import technical
 
 
@@ -38,6 +40,19 @@ class ROCEventWindow(technical.EventWindow):
                     ret = diff / prev
         return ret
 
+    def _calculateBatch(self, dateTimes, values):
+        values, positions = technical._split_none(values)
+        windowSize = self.getWindowSize()
+        results = np.empty(len(values))
+        results[:] = np.nan
+        if len(values) >= windowSize:
+            prev = values[:len(values) - windowSize + 1]
+            diff = values[windowSize - 1:] - prev
+            with np.errstate(divide="ignore", invalid="ignore"):
+                results[windowSize - 1:] = np.where(diff == 0, 0.0, np.where(prev != 0, diff / prev, np.nan))
+        self._loadValues(values)
+        return technical._expand(results, positions)
+
 
 class RateOfChange(technical.EventBasedFilter):
     """Rate of change filter as described in http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:rate_of_change_roc_and_momentum.
@@ -19,6 +19,7 @@
 """
 
 from six.moves import xrange
+import numpy as np
 
 from pyalgotrade import technical
 
@@ -97,7 +98,7 @@ class RSIEventWindow(technical.EventWindow):
                 avgLoss = (self.__prevLoss * (self.__period-1) + currLoss) / float(self.__period)
 
             if avgLoss == 0:
-                self.__value = 100
+                self.__value = 100.0
             else:
                 rs = avgGain / avgLoss
                 self.__value = 100 - 100 / (1 + rs)
@@ -105,6 +106,32 @@ class RSIEventWindow(technical.EventWindow):
             self.__prevGain = avgGain
             self.__prevLoss = avgLoss
 
+    def _calculateBatch(self, dateTimes, values):
+        values, positions = technical._split_none(values)
+        windowSize = self.getWindowSize()
+        results = np.empty(len(values))
+        results[:] = np.nan
+        if len(values) >= windowSize:
+            # Averages are smoothed using the previous ones, so this is a plain loop over floats.
+            avgGain, avgLoss = avg_gain_loss(values, 0, windowSize)
+            period = self.__period
+            prevValues = values.tolist()
+            for i in xrange(windowSize - 1, len(values)):
+                if i >= windowSize:
+                    currGain, currLoss = gain_loss_one(prevValues[i-1], prevValues[i])
+                    avgGain = (avgGain * (period-1) + currGain) / float(period)
+                    avgLoss = (avgLoss * (period-1) + currLoss) / float(period)
+                if avgLoss == 0:
+                    results[i] = 100.0
+                else:
+                    rs = avgGain / avgLoss
+                    results[i] = 100 - 100 / (1 + rs)
+            self.__prevGain = avgGain
+            self.__prevLoss = avgLoss
+            self.__value = results[-1]
+        self._loadValues(values)
+        return technical._expand(results, positions)
+
     def getValue(self):
         return self.__value
 
@@ -18,21 +18,157 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import math
+
+import numpy as np
+
 from pyalgotrade import technical
+from pyalgotrade.utils import collections
+
+# RollingMoments calculates values from scratch when the sum of squared differences from the mean gets smaller than
+# this, times the window size, times the largest squared value seen since the last time it did so.
+RECALCULATE_THRESHOLD = 1e-10
+
+
+class RollingMoments(object):
+    """Calculates the mean and variance of the last N values in O(1) time per value, using Welford's algorithm
+    to add the new value and remove the oldest one.
+
+    :param windowSize: The number of values to consider. Must be greater than 0.
+    :type windowSize: int.
+
+    .. note::
+        To avoid accumulating rounding errors, the mean and variance are calculated from scratch, just like numpy does,
+        once the window gets full and then once every windowSize values. They are also calculated from scratch while the
+        standard deviation is below 1e-5 times the largest magnitude of the values seen since the last time, as happens
+        after a level shift, so windows with (almost) constant values are as slow as using numpy for every window.
+        In between, the mean and the standard deviation differ from the ones calculated over the whole window by less
+        than 1e-12 times the largest magnitude of the last 2 * windowSize values.
+        Results that are divided by the standard deviation, like the z-score, get larger differences if it is very
+        small compared to the values.
+        If there is a NaN in the window the results are NaN.
+    """
+
+    def __init__(self, windowSize):
+        assert(windowSize > 0)
+        self.__values = collections.NumPyDeque(windowSize)
+        self.__windowSize = windowSize
+        self.__mean = None
+        # Sum of squared differences from the mean.
+        self.__m2 = None
+        # The largest squared value seen since the last recalculation. Rounding errors in m2 are proportional to it.
+        self.__scale = 0.0
+        self.__nanCount = 0
+        self.__updates = 0
+        self.__outdated = True
+
+    def __recalculate(self):
+        values = self.__values.data()
+        self.__mean = values.mean()
+        deviations = values - self.__mean
+        self.__m2 = np.multiply(deviations, deviations).sum()
+        self.__scale = np.multiply(values, values).max()
+        self.__updates = 0
+        self.__outdated = False
+
+    def add(self, value):
+        """Adds a new value, discarding the oldest one if the window is full."""
+        oldValue = None
+        if self.windowFull():
+            oldValue = self.__values[0]
+            if oldValue != oldValue:
+                self.__nanCount -= 1
+        self.__values.append(value)
+        if value != value:
+            self.__nanCount += 1
+
+        if not self.windowFull() or self.__nanCount:
+            self.__outdated = True
+        elif self.__outdated or self.__updates >= self.__windowSize:
+            self.__recalculate()
+        else:
+            delta = value - oldValue
+            mean = self.__mean + delta / float(self.__windowSize)
+            self.__m2 += delta * (value - mean + oldValue - self.__mean)
+            self.__mean = mean
+            self.__updates += 1
+            self.__scale = max(self.__scale, value * value)
+            # If the variance is tiny compared to the values seen lately, like after a level shift, the rounding errors
+            # accumulated in m2 could be as big as m2 itself.
+            if self.__m2 < self.__scale * self.__windowSize * RECALCULATE_THRESHOLD:
+                self.__recalculate()
+
+    def windowFull(self):
+        return len(self.__values) == self.__windowSize
+
+    def getMean(self):
+        """Returns the mean of the last N values, or None if less than N values were added."""
+        ret = None
+        if self.windowFull():
+            ret = float("nan") if self.__nanCount else self.__mean
+        return ret
+
+    def getVariance(self, ddof=0):
+        """Returns the variance of the last N values, or None if less than N values were added.
+
+        :param ddof: Delta degrees of freedom.
+        :type ddof: int.
+        """
+        ret = None
+        if self.windowFull():
+            if self.__nanCount or self.__windowSize - ddof <= 0:
+                ret = float("nan")
+            else:
+                # Rounding errors could make it slightly negative.
+                ret = max(self.__m2, 0.0) / float(self.__windowSize - ddof)
+        return ret
+
+    def getStdDev(self, ddof=0):
+        """Returns the standard deviation of the last N values, or None if less than N values were added.
+
+        :param ddof: Delta degrees of freedom.
+        :type ddof: int.
+        """
+        ret = self.getVariance(ddof)
+        if ret is not None:
+            ret = math.sqrt(ret)
+        return ret
 
 
 class StdDevEventWindow(technical.EventWindow):
-    def __init__(self, period, ddof):
+    def __init__(self, period, ddof, incremental=False):
         assert(period > 0)
         super(StdDevEventWindow, self).__init__(period)
         self.__ddof = ddof
+        self.__moments = RollingMoments(period) if incremental else None
+
+    def onNewValue(self, dateTime, value):
+        super(StdDevEventWindow, self).onNewValue(dateTime, value)
+        if value is not None and self.__moments is not None:
+            self.__moments.add(value)
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            ret = self.getValues().std(ddof=self.__ddof)
+            if self.__moments is not None:
+                ret = self.__moments.getStdDev(self.__ddof)
+            else:
+                ret = self.getValues().std(ddof=self.__ddof)
         return ret
 
+    def _calculateBatch(self, dateTimes, values):
+        values, positions = technical._split_none(values)
+        ddof = self.__ddof
+        results = technical._rolling(values, self.getWindowSize(), lambda windows: windows.std(axis=1, ddof=ddof))
+        self._loadValues(values)
+        return technical._expand(results, positions)
+
+    def _loadValues(self, values):
+        super(StdDevEventWindow, self)._loadValues(values)
+        if self.__moments is not None:
+            for value in values[max(0, len(values) - self.getWindowSize()):]:
+                self.__moments.add(value)
+
 
 class StdDev(technical.EventBasedFilter):
     """Standard deviation filter.
@@ -47,28 +183,59 @@ class StdDev(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param incremental: True to update the results in O(1) time per value using :class:`RollingMoments`, instead of
+        calculating them over the whole window. Results match within the tolerance documented in that class.
+    :type incremental: boolean.
     """
 
-    def __init__(self, dataSeries, period, ddof=0, maxLen=None):
-        super(StdDev, self).__init__(dataSeries, StdDevEventWindow(period, ddof), maxLen)
+    def __init__(self, dataSeries, period, ddof=0, maxLen=None, incremental=False):
+        super(StdDev, self).__init__(dataSeries, StdDevEventWindow(period, ddof, incremental), maxLen)
 
 
 class ZScoreEventWindow(technical.EventWindow):
-    def __init__(self, period, ddof):
+    def __init__(self, period, ddof, incremental=False):
         assert(period > 1)
         super(ZScoreEventWindow, self).__init__(period)
         self.__ddof = ddof
+        self.__moments = RollingMoments(period) if incremental else None
+
+    def onNewValue(self, dateTime, value):
+        super(ZScoreEventWindow, self).onNewValue(dateTime, value)
+        if value is not None and self.__moments is not None:
+            self.__moments.add(value)
 
     def getValue(self):
         ret = None
         if self.windowFull():
             values = self.getValues()
             lastValue = values[-1]
-            mean = values.mean()
-            std = values.std(ddof=self.__ddof)
+            if self.__moments is not None:
+                mean = self.__moments.getMean()
+                std = self.__moments.getStdDev(self.__ddof)
+            else:
+                mean = values.mean()
+                std = values.std(ddof=self.__ddof)
             ret = (lastValue - mean) / float(std)
         return ret
 
+    def _calculateBatch(self, dateTimes, values):
+        values, positions = technical._split_none(values)
+        ddof = self.__ddof
+
+        def zscore(windows):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return (windows[:, -1] - windows.mean(axis=1)) / windows.std(axis=1, ddof=ddof)
+
+        results = technical._rolling(values, self.getWindowSize(), zscore)
+        self._loadValues(values)
+        return technical._expand(results, positions)
+
+    def _loadValues(self, values):
+        super(ZScoreEventWindow, self)._loadValues(values)
+        if self.__moments is not None:
+            for value in values[max(0, len(values) - self.getWindowSize()):]:
+                self.__moments.add(value)
+
 
 class ZScore(technical.EventBasedFilter):
     """Z-Score filter.
@@ -83,7 +250,10 @@ class ZScore(technical.EventBasedFilter):
         Once a bounded length is full, when new items are added, a corresponding number of items are discarded from the
         opposite end. If None then dataseries.DEFAULT_MAX_LEN is used.
     :type maxLen: int.
+    :param incremental: True to update the results in O(1) time per value using :class:`RollingMoments`, instead of
+        calculating them over the whole window. Results match within the tolerance documented in that class.
+    :type incremental: boolean.
     """
 
-    def __init__(self, dataSeries, period, ddof=0, maxLen=None):
-        super(ZScore, self).__init__(dataSeries, ZScoreEventWindow(period, ddof), maxLen)
+    def __init__(self, dataSeries, period, ddof=0, maxLen=None, incremental=False):
+        super(ZScore, self).__init__(dataSeries, ZScoreEventWindow(period, ddof, incremental), maxLen)
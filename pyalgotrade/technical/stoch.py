@@ -18,9 +18,12 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
 from pyalgotrade.technical import ma
+from pyalgotrade.technical import highlow
 
 
 def get_low_high_values(useAdjusted, bars):
@@ -39,11 +42,23 @@ class SOEventWindow(technical.EventWindow):
         assert(period > 1)
         super(SOEventWindow, self).__init__(period, dtype=object)
         self.__useAdjusted = useAdjustedValues
+        self.__lowestLow = highlow.SlidingExtremum(period, True)
+        self.__highestHigh = highlow.SlidingExtremum(period, False)
+
+    def __addBar(self, bar):
+        self.__lowestLow.add(bar.getLow(self.__useAdjusted))
+        self.__highestHigh.add(bar.getHigh(self.__useAdjusted))
+
+    def onNewValue(self, dateTime, value):
+        super(SOEventWindow, self).onNewValue(dateTime, value)
+        if value is not None:
+            self.__addBar(value)
 
     def getValue(self):
         ret = None
         if self.windowFull():
-            lowestLow, highestHigh = get_low_high_values(self.__useAdjusted, self.getValues())
+            lowestLow = self.__lowestLow.getValue()
+            highestHigh = self.__highestHigh.getValue()
             currentClose = self.getValues()[-1].getClose(self.__useAdjusted)
             closeDelta = currentClose - lowestLow
             if closeDelta:
@@ -52,6 +67,27 @@ class SOEventWindow(technical.EventWindow):
                 ret = 0.0
         return ret
 
+    def _calculateBatch(self, dateTimes, values):
+        values, positions = technical._split_none(values, dtype=object)
+        useAdjusted = self.__useAdjusted
+        lows = np.array([bar.getLow(useAdjusted) for bar in values], dtype=np.float64)
+        highs = np.array([bar.getHigh(useAdjusted) for bar in values], dtype=np.float64)
+        closes = np.array([bar.getClose(useAdjusted) for bar in values], dtype=np.float64)
+
+        windowSize = self.getWindowSize()
+        lowestLows = technical._rolling(lows, windowSize, lambda windows: windows.min(axis=1))
+        highestHighs = technical._rolling(highs, windowSize, lambda windows: windows.max(axis=1))
+        closeDeltas = closes - lowestLows
+        with np.errstate(divide="ignore", invalid="ignore"):
+            results = np.where(closeDeltas == 0, 0.0, closeDeltas / (highestHighs - lowestLows) * 100)
+        self._loadValues(values)
+        return technical._expand(results, positions)
+
+    def _loadValues(self, values):
+        super(SOEventWindow, self)._loadValues(values)
+        for bar in values[max(0, len(values) - self.getWindowSize()):]:
+            self.__addBar(bar)
+
 
 class StochasticOscillator(technical.EventBasedFilter):
     """Fast Stochastic Oscillator filter as described in
@@ -18,6 +18,8 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import numpy as np
+
 from pyalgotrade import technical
 from pyalgotrade.dataseries import bards
 
@@ -43,6 +45,31 @@ class VWAPEventWindow(technical.EventWindow):
             ret = cumTotal / float(cumVolume)
         return ret
 
+    def _calculateBatch(self, dateTimes, values):
+        values, positions = technical._split_none(values, dtype=object)
+        if self.__useTypicalPrice:
+            prices = np.array([bar.getTypicalPrice() for bar in values], dtype=np.float64)
+        else:
+            prices = np.array([bar.getPrice() for bar in values], dtype=np.float64)
+        volumes = np.array([bar.getVolume() for bar in values], dtype=np.float64)
+
+        def sequential_sum(windows):
+            # Add the columns one by one, in the same order as getValue does, so rounding errors are the same.
+            ret = windows[:, 0].copy()
+            for i in range(1, windows.shape[1]):
+                ret += windows[:, i]
+            return ret
+
+        windowSize = self.getWindowSize()
+        cumTotal = technical._rolling(prices * volumes, windowSize, sequential_sum)
+        cumVolume = technical._rolling(volumes, windowSize, sequential_sum)
+        if (cumVolume == 0).any():
+            # Let getValue fail the same way it does when streaming.
+            return None
+        results = cumTotal / cumVolume
+        self._loadValues(values)
+        return technical._expand(results, positions)
+
 
 class VWAP(technical.EventBasedFilter):
     """Volume Weighted Average Price filter.
@@ -18,7 +18,10 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import operator
+
 import numpy as np
+import six
 
 
 def lt(v1, v2):
@@ -57,52 +60,63 @@ def intersect(values1, values2, skipNone=False):
 
 
 # Like a collections.deque but using a numpy.array.
+# Values are stored in a buffer twice as big as maxLen, and the ones in use are always contiguous. Once the end of the
+# buffer is reached, the values in use are moved to the beginning. That happens once every maxLen appends, so appending
+# is amortized O(1) and data() can still return a view without copying.
 class NumPyDeque(object):
     def __init__(self, maxLen, dtype=float):
         assert maxLen > 0, "Invalid maximum length"
 
-        self.__values = np.empty(maxLen, dtype=dtype)
+        self.__values = np.empty(maxLen * 2, dtype=dtype)
         self.__maxLen = maxLen
-        self.__nextPos = 0
+        self.__begin = 0
+        self.__len = 0
 
     def getMaxLen(self):
         return self.__maxLen
 
     def append(self, value):
-        if self.__nextPos < self.__maxLen:
-            self.__values[self.__nextPos] = value
-            self.__nextPos += 1
+        end = self.__begin + self.__len
+        if end == len(self.__values):
+            # Move the values that will be kept to the beginning of the buffer.
+            keep = min(self.__len, self.__maxLen - 1)
+            self.__values[0:keep] = self.__values[end - keep:end]
+            self.__begin = 0
+            self.__len = keep
+            end = keep
+
+        self.__values[end] = value
+        if self.__len < self.__maxLen:
+            self.__len += 1
         else:
-            # Shift items to the left and put the last value.
-            # I'm not using np.roll to avoid creating a new array.
-            self.__values[0:-1] = self.__values[1:]
-            self.__values[self.__nextPos - 1] = value
+            self.__begin += 1
 
     def data(self):
-        # If all values are not initialized, return a portion of the array.
-        if self.__nextPos < self.__maxLen:
-            ret = self.__values[0:self.__nextPos]
-        else:
-            ret = self.__values
-        return ret
+        return self.__values[self.__begin:self.__begin + self.__len]
 
     def resize(self, maxLen):
         assert maxLen > 0, "Invalid maximum length"
 
         # Create empty, copy last values and swap.
-        values = np.empty(maxLen, dtype=self.__values.dtype)
-        lastValues = self.__values[0:self.__nextPos]
-        values[0:min(maxLen, len(lastValues))] = lastValues[-1*min(maxLen, len(lastValues)):]
+        values = np.empty(maxLen * 2, dtype=self.__values.dtype)
+        count = min(maxLen, self.__len)
+        values[0:count] = self.data()[self.__len - count:]
         self.__values = values
 
         self.__maxLen = maxLen
-        if self.__nextPos >= self.__maxLen:
-            self.__nextPos = self.__maxLen
+        self.__begin = 0
+        self.__len = count
 
     def __len__(self):
-        return self.__nextPos
+        return self.__len
 
     def __getitem__(self, key):
+        if type(key) is int:
+            if key < 0:
+                key += self.__len
+            if key < 0 or key >= self.__len:
+                raise IndexError("Index out of range")
+            return self.__values[self.__begin + key]
         return self.data()[key]
 
 
@@ -139,3 +153,127 @@ class ListDeque(object):
 
     def __getitem__(self, key):
         return self.__values[key]
+
+
+# Like a ListDeque but holding numeric values in a NumPyDeque of floats, with NaN in place of None. Values are returned
+# just as they were appended and asarray() returns a view of the values without copying.
+# Ints and NaN values are stored as floats too. The first time one of them gets appended, a second NumPyDeque with the
+# kind of each value is built, so they can be told apart from floats and None. Series that only hold floats and None
+# don't pay for it.
+# Once any other value gets appended (bools, ints too big to be represented exactly as floats, objects) it switches to a
+# ListDeque and behaves just like one.
+class NumericDeque(object):
+    KIND_FLOAT = 0
+    KIND_NONE = 1
+    KIND_NAN = 2
+    KIND_INT = 3
+
+    # Ints up to this size can be stored as floats without losing precision.
+    MAX_INT = 2 ** 53
+
+    def __init__(self, maxLen):
+        self.__values = NumPyDeque(maxLen, dtype=np.float64)
+        self.__kinds = None
+        self.__numeric = True
+        self.__appendCount = 0
+        # The values as a list, built when data() gets called and discarded when values change.
+        self.__data = None
+
+    def isNumeric(self):
+        return self.__numeric
+
+    # Returns the number of values appended so far, including the ones that were discarded.
+    def getAppendCount(self):
+        return self.__appendCount
+
+    def getMaxLen(self):
+        return self.__values.getMaxLen()
+
+    def __switchToList(self):
+        values = ListDeque(self.__values.getMaxLen())
+        for value in self.data():
+            values.append(value)
+        self.__values = values
+        self.__kinds = None
+        self.__numeric = False
+
+    def __buildKinds(self):
+        self.__kinds = NumPyDeque(self.__values.getMaxLen(), dtype=np.int8)
+        for value in self.__values.data():
+            self.__kinds.append(NumericDeque.KIND_FLOAT if value == value else NumericDeque.KIND_NONE)
+
+    def append(self, value):
+        self.__appendCount += 1
+        self.__data = None
+        if not self.__numeric:
+            self.__values.append(value)
+            return
+
+        if value is None:
+            value = np.nan
+            kind = NumericDeque.KIND_NONE
+        elif isinstance(value, float):
+            kind = NumericDeque.KIND_FLOAT if value == value else NumericDeque.KIND_NAN
+        elif isinstance(value, six.integer_types) and not isinstance(value, bool) and \
+                abs(value) <= NumericDeque.MAX_INT:
+            kind = NumericDeque.KIND_INT
+        else:
+            self.__switchToList()
+            self.__values.append(value)
+            return
+
+        kinds = self.__kinds
+        # Kinds are only needed once there are NaN or int values.
+        if kinds is None and kind >= NumericDeque.KIND_NAN:
+            self.__buildKinds()
+            kinds = self.__kinds
+        self.__values.append(value)
+        if kinds is not None:
+            kinds.append(kind)
+
+    def asarray(self):
+        if self.__numeric:
+            return self.__values.data()
+        return np.asarray(self.__values.data())
+
+    def __toList(self, values, kinds):
+        if kinds is None:
+            return [None if value != value else value for value in values.tolist()]
+        return [self.__fromFloat(value, kind) for value, kind in zip(values.tolist(), kinds.tolist())]
+
+    def __fromFloat(self, value, kind):
+        if kind == NumericDeque.KIND_FLOAT or kind == NumericDeque.KIND_NAN:
+            return value
+        elif kind == NumericDeque.KIND_NONE:
+            return None
+        return int(value)
+
+    def data(self):
+        if not self.__numeric:
+            return self.__values.data()
+        if self.__data is None:
+            kinds = None if self.__kinds is None else self.__kinds.data()
+            self.__data = self.__toList(self.__values.data(), kinds)
+        return self.__data
+
+    def resize(self, maxLen):
+        self.__values.resize(maxLen)
+        if self.__kinds is not None:
+            self.__kinds.resize(maxLen)
+        self.__data = None
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __getitem__(self, key):
+        if not self.__numeric:
+            return self.__values[key]
+        elif isinstance(key, slice):
+            kinds = None if self.__kinds is None else self.__kinds.data()[key]
+            return self.__toList(self.__values.data()[key], kinds)
+        else:
+            key = operator.index(key)
+            value = float(self.__values[key])
+            if self.__kinds is None:
+                return None if value != value else value
+            return self.__fromFloat(value, self.__kinds[key])
@@ -58,6 +58,18 @@ def datetime_to_timestamp(dateTime):
     return diff.total_seconds()
 
 
+def datetime_to_microseconds(dateTime):
+    """ Converts a datetime.datetime to an integer number of microseconds since the epoch.
+    Naive datetimes are not localized and None is converted to the smallest int64 (NaT for numpy.datetime64)."""
+    if dateTime is None:
+        return NAT_MICROSECONDS
+    if datetime_is_naive(dateTime):
+        diff = dateTime - epoch_naive
+    else:
+        diff = dateTime - epoch_utc
+    return (diff.days * 86400 + diff.seconds) * 1000000 + diff.microseconds
+
+
 def timestamp_to_datetime(timeStamp, localized=True):
     """ Converts a UTC timestamp to a datetime.datetime."""
     ret = datetime.datetime.utcfromtimestamp(timeStamp)
@@ -82,4 +94,6 @@ def get_last_monday(year):
     return ret
 
 
-epoch_utc = as_utc(datetime.datetime(1970, 1, 1))
+epoch_naive = datetime.datetime(1970, 1, 1)
+epoch_utc = as_utc(epoch_naive)
+NAT_MICROSECONDS = -2**63
@@ -105,3 +105,86 @@ class BarsTestCase(common.TestCase):
         self.assertEquals(bars.getInstruments(), ["a", "b"])
         self.assertEquals(bars.getDateTime(), dt)
         self.assertEquals(bars.getBar("a").getClose(), 1)
+
+
+class ColumnarBarsTestCase(common.TestCase):
+    def buildColumns(self, adjClose=[4, 5]):
+        return bar.BarColumns([2, 3], [3, 4], [1, 2], [2.1, 3.5], [10, 20], adjClose, bar.Frequency.DAY)
+
+    def testInvalidColumns(self):
+        with self.assertRaisesRegexp(Exception, "high < low on row 1"):
+            bar.BarColumns([1, 1], [1, 1], [1, 2], [1, 1], [1, 1], None, bar.Frequency.DAY)
+        with self.assertRaisesRegexp(Exception, "low > close on row 0"):
+            bar.BarColumns([1, 2], [1, 1], [1, 1.5], [0.5, 1], [1, 1], None, bar.Frequency.DAY)
+        with self.assertRaisesRegexp(Exception, "same length"):
+            bar.BarColumns([1], [1, 1], [1, 1], [1, 1], [1, 1], None, bar.Frequency.DAY)
+
+    def testSameAsBasicBar(self):
+        dateTime = datetime.datetime.now()
+        columns = self.buildColumns()
+        self.assertEquals(len(columns), 2)
+        b1 = columns.getBar(1, dateTime)
+        b2 = bar.BasicBar(dateTime, 3, 4, 2, 3.5, 20, 5, bar.Frequency.DAY)
+        for useAdjusted in [False, True]:
+            b1.setUseAdjustedValue(useAdjusted)
+            b2.setUseAdjustedValue(useAdjusted)
+            self.assertEquals(b1.getUseAdjValue(), b2.getUseAdjValue())
+            self.assertEquals(b1.getDateTime(), b2.getDateTime())
+            self.assertEquals(b1.getOpen(useAdjusted), b2.getOpen(useAdjusted))
+            self.assertEquals(b1.getHigh(useAdjusted), b2.getHigh(useAdjusted))
+            self.assertEquals(b1.getLow(useAdjusted), b2.getLow(useAdjusted))
+            self.assertEquals(b1.getClose(useAdjusted), b2.getClose(useAdjusted))
+            self.assertEquals(b1.getVolume(), b2.getVolume())
+            self.assertEquals(b1.getAdjClose(), b2.getAdjClose())
+            self.assertEquals(b1.getFrequency(), b2.getFrequency())
+            self.assertEquals(b1.getPrice(), b2.getPrice())
+            self.assertEquals(b1.getTypicalPrice(), b2.getTypicalPrice())
+
+    def testNoAdjClose(self):
+        b = self.buildColumns(None).getBar(0, datetime.datetime.now())
+        self.assertIsNone(b.getAdjClose())
+        with self.assertRaises(Exception):
+            b.setUseAdjustedValue(True)
+        with self.assertRaises(Exception):
+            b.getOpen(True)
+        with self.assertRaises(Exception):
+            b.getClose(True)
+
+    def testPickle(self):
+        b1 = self.buildColumns().getBar(0, datetime.datetime.now())
+        b1.setUseAdjustedValue(True)
+        b2 = cPickle.loads(cPickle.dumps(b1))
+        self.assertTrue(isinstance(b2, bar.BasicBar))
+        self.assertEquals(b1.getDateTime(), b2.getDateTime())
+        self.assertEquals(b1.getOpen(), b2.getOpen())
+        self.assertEquals(b1.getClose(), b2.getClose())
+        self.assertEquals(b1.getAdjClose(), b2.getAdjClose())
+        self.assertEquals(b1.getPrice(), b2.getPrice())
+
+    def testBars(self):
+        dateTime = datetime.datetime.now()
+        columns = [self.buildColumns(), self.buildColumns(None)]
+        instrumentIndex = {"a": 0, "b": 1}
+        bars = bar.ColumnarBars(dateTime, instrumentIndex, columns, [0, 1])
+        self.assertEquals(bars["a"].getClose(), 2.1)
+        self.assertEquals(bars["b"].getClose(), 3.5)
+        # Bars are built once.
+        self.assertTrue(bars["a"] is bars.getBar("a"))
+        self.assertTrue("a" in bars)
+        self.assertFalse("c" in bars)
+        self.assertIsNone(bars.getBar("c"))
+        self.assertEquals(sorted(bars.getInstruments()), ["a", "b"])
+        self.assertEquals(sorted(bars.keys()), ["a", "b"])
+        self.assertEquals(sorted([(instrument, bar_.getClose()) for instrument, bar_ in bars.items()]), [("a", 2.1), ("b", 3.5)])
+        self.assertEquals(bars.getDateTime(), dateTime)
+
+        # The index can be shared among ColumnarBars.
+        otherBars = bar.ColumnarBars(dateTime, instrumentIndex, columns, [1, 0])
+        self.assertEquals(otherBars["a"].getClose(), 3.5)
+
+        pickled = cPickle.loads(cPickle.dumps(bars))
+        self.assertEquals(type(pickled), bar.Bars)
+        self.assertEquals(pickled["b"].getClose(), 3.5)
+
+        with self.assertRaises(Exception):
+            bar.ColumnarBars(dateTime, {}, [], [])
@@ -24,6 +24,7 @@ from . import common
 
 from pyalgotrade import barfeed
 from pyalgotrade.barfeed import common as bfcommon
+from pyalgotrade.barfeed import membf
 from pyalgotrade import bar
 from pyalgotrade import dispatcher
 
@@ -88,3 +89,61 @@ class CommonTestCase(common.TestCase):
         self.assertEqual(bfcommon.sanitize_ohlc(10, 9, 9, 10), (10, 10, 9, 10))
         self.assertEqual(bfcommon.sanitize_ohlc(10, 12, 11, 10), (10, 12, 10, 10))
         self.assertEqual(bfcommon.sanitize_ohlc(10, 12, 10, 9), (10, 12, 9, 9))
+
+
+class TestMemBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+def build_mem_bar_feed(useHeapScheduling):
+    ret = TestMemBarFeed(bar.Frequency.DAY)
+    ret.setUseHeapScheduling(useHeapScheduling)
+    begin = datetime.datetime(2001, 1, 1)
+    # Instruments trade with different periodicity so not all of them have bars on every datetime.
+    for i in range(1, 6):
+        bars = []
+        for j in range(0, 30, i):
+            dateTime = begin + datetime.timedelta(days=j)
+            bars.append(bar.BasicBar(dateTime, j, j, j, j, i, None, bar.Frequency.DAY))
+        ret.addBarsFromSequence("inst-%d" % i, bars)
+    return ret
+
+
+class MemBarFeedTestCase(common.TestCase):
+    def testHeapScheduling(self):
+        expected = [(dateTime, bars.getInstruments()) for dateTime, bars in build_mem_bar_feed(False)]
+        barFeed = build_mem_bar_feed(True)
+        self.assertEqual([(dateTime, bars.getInstruments()) for dateTime, bars in barFeed], expected)
+        self.assertTrue(barFeed.eof())
+        self.assertEqual(barFeed.peekDateTime(), None)
+
+    def testHeapSchedulingReset(self):
+        barFeed = build_mem_bar_feed(True)
+        barFeed.loadAll()
+        lastDateTime = barFeed.getCurrentDateTime()
+        barFeed.reset()
+        self.assertFalse(barFeed.eof())
+        self.assertEqual(barFeed.peekDateTime(), datetime.datetime(2001, 1, 1))
+        barFeed.loadAll()
+        self.assertEqual(barFeed.getCurrentDateTime(), lastDateTime)
+
+    def testHeapSchedulingDuplicateBars(self):
+        barFeed = TestMemBarFeed(bar.Frequency.DAY)
+        barFeed.setUseHeapScheduling(True)
+        dateTime = datetime.datetime(2001, 1, 1)
+        barFeed.addBarsFromSequence("orcl", [
+            bar.BasicBar(dateTime, 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+            bar.BasicBar(dateTime, 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+        ])
+        with self.assertRaisesRegexp(Exception, "Duplicate bars found for.*"):
+            barFeed.loadAll()
+
+    def testCantChangeSchedulingOnceStarted(self):
+        barFeed = build_mem_bar_feed(False)
+        barFeed.start()
+        with self.assertRaisesRegexp(Exception, "Can't change the scheduling mode.*"):
+            barFeed.setUseHeapScheduling(True)
+
+    def testBaseBarFeed(self):
+        check_base_barfeed(self, build_mem_bar_feed(True), False)
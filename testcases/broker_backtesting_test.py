@@ -19,13 +19,17 @@
 """
 
 import datetime
+import random
 
 from . import common
 
 from pyalgotrade import broker
 from pyalgotrade.broker import backtesting
+from pyalgotrade.broker import fillstrategy
+from pyalgotrade.barfeed import membf
 from pyalgotrade import bar
 from pyalgotrade import barfeed
+from pyalgotrade import strategy
 
 
 class OrderUpdateCallback:
@@ -2604,3 +2608,243 @@ class StopLimitOrderTestCase(BaseTestCase):
         self.assertTrue(order.getExecutionInfo().getPrice() == 8)
         self.assertEqual(order.getFilled(), 1)
         self.assertEqual(order.getRemaining(), 0)
+
+
+class FullScanFillStrategy(fillstrategy.DefaultStrategy):
+    # The broker only uses the order index with DefaultStrategy, so this processes every active order on every bar.
+    pass
+
+
+class RandomBarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return True
+
+
+class RandomOrdersStrategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed, instruments, fillStrategy, seed):
+        super(RandomOrdersStrategy, self).__init__(barFeed, 100000)
+        self.getBroker().setFillStrategy(fillStrategy)
+        self.__instruments = instruments
+        self.__random = random.Random(seed)
+        self.events = []
+        self.getBroker().getOrderUpdatedEvent().subscribe(self.__onOrderEvent)
+
+    def __onOrderEvent(self, broker_, orderEvent):
+        order = orderEvent.getOrder()
+        eventInfo = orderEvent.getEventInfo()
+        if isinstance(eventInfo, broker.OrderExecutionInfo):
+            eventInfo = (eventInfo.getPrice(), eventInfo.getQuantity(), eventInfo.getDateTime())
+        self.events.append((order.getId(), orderEvent.getEventType(), eventInfo))
+        # Submit orders from order events as well.
+        if orderEvent.getEventType() == broker.OrderEvent.Type.FILLED and self.__random.random() < 0.3:
+            self.__submitRandomOrder(order.getInstrument(), order.getExecutionInfo().getPrice())
+
+    def __submitRandomOrder(self, instrument, price):
+        rnd = self.__random
+        brk = self.getBroker()
+        action = rnd.choice([broker.Order.Action.BUY, broker.Order.Action.SELL])
+        quantity = rnd.randint(1, 30)
+        offset = rnd.uniform(-5, 5)
+        orderType = rnd.randint(0, 3)
+        if orderType == 0:
+            order = brk.createMarketOrder(action, instrument, quantity)
+        elif orderType == 1:
+            order = brk.createLimitOrder(action, instrument, round(price + offset, 1), quantity)
+        elif orderType == 2:
+            order = brk.createStopOrder(action, instrument, round(price + offset, 1), quantity)
+        else:
+            order = brk.createStopLimitOrder(
+                action, instrument, round(price + offset, 1), round(price + rnd.uniform(-5, 5), 1), quantity
+            )
+        order.setGoodTillCanceled(rnd.random() < 0.8)
+        order.setAllOrNone(rnd.random() < 0.2)
+        brk.submitOrder(order)
+
+    def onBars(self, bars):
+        rnd = self.__random
+        for instrument in bars.getInstruments():
+            for i in range(rnd.randint(0, 3)):
+                self.__submitRandomOrder(instrument, bars[instrument].getClose())
+        activeOrders = self.getBroker().getActiveOrders()
+        for order in activeOrders:
+            if rnd.random() < 0.02:
+                self.getBroker().cancelOrder(order)
+
+
+def build_random_bar_feed(instruments, seed):
+    rnd = random.Random(seed)
+    ret = RandomBarFeed(bar.Frequency.DAY)
+    for instrument in instruments:
+        bars = []
+        price = 100
+        dateTime = datetime.datetime(2001, 1, 1)
+        for i in range(150):
+            dateTime += datetime.timedelta(days=1)
+            # Instruments don't have bars for every date.
+            if rnd.random() < 0.2:
+                continue
+            open_ = price
+            close = price + rnd.uniform(-3, 3)
+            high = max(open_, close) + rnd.uniform(0, 2)
+            low = min(open_, close) - rnd.uniform(0, 2)
+            bars.append(bar.BasicBar(dateTime, open_, high, low, close, rnd.randint(50, 200), close, bar.Frequency.DAY))
+            price = close
+        ret.addBarsFromSequence(instrument, bars)
+    return ret
+
+
+class OrderIndexTestCase(common.TestCase):
+    def runStrategy(self, fillStrategy, useAdjustedValues, seed):
+        instruments = ["inst-%d" % i for i in range(5)]
+        barFeed = build_random_bar_feed(instruments, seed)
+        strat = RandomOrdersStrategy(barFeed, instruments, fillStrategy, seed)
+        strat.setUseAdjustedValues(useAdjustedValues)
+        strat.run()
+        return strat
+
+    def testSameAsFullScan(self):
+        for seed in range(4):
+            for useAdjustedValues in [False, True]:
+                expected = self.runStrategy(FullScanFillStrategy(), useAdjustedValues, seed)
+                actual = self.runStrategy(fillstrategy.DefaultStrategy(), useAdjustedValues, seed)
+                self.assertTrue(len(expected.events) > 1000)
+                self.assertEqual(actual.events, expected.events)
+                self.assertEqual(actual.getBroker().getCash(), expected.getBroker().getCash())
+                self.assertEqual(actual.getBroker().getPositions(), expected.getBroker().getPositions())
+                self.assertEqual(
+                    [order.getId() for order in actual.getBroker().getActiveOrders()],
+                    [order.getId() for order in expected.getBroker().getActiveOrders()]
+                )
+
+    def testGetActiveOrdersForInstrument(self):
+        barFeed = build_random_bar_feed(["a", "b"], 1)
+        brk = backtesting.Broker(1000, barFeed)
+        orders = []
+        for instrument in ["a", "b", "a"]:
+            order = brk.createLimitOrder(broker.Order.Action.BUY, instrument, 1, 1)
+            brk.submitOrder(order)
+            orders.append(order)
+        self.assertEqual(brk.getActiveOrders("a"), [orders[0], orders[2]])
+        self.assertEqual(brk.getActiveOrders("b"), [orders[1]])
+        self.assertEqual(brk.getActiveOrders("c"), [])
+        self.assertEqual(sorted(brk.getInstrumentsWithActiveOrders()), ["a", "b"])
+        brk.cancelOrder(orders[0])
+        self.assertEqual(brk.getActiveOrders("a"), [orders[2]])
+        brk.cancelOrder(orders[1])
+        self.assertEqual(brk.getInstrumentsWithActiveOrders(), ["a"])
+
+    def testPriceLevels(self):
+        levels = backtesting.PriceLevels()
+        for price, orderId in [(10, 1), (9, 2), (10, 3), (11, 4)]:
+            levels.add(price, orderId)
+        self.assertEqual(len(levels), 4)
+        self.assertEqual(levels.getAtLeast(10), [1, 3, 4])
+        self.assertEqual(levels.getAtMost(10), [2, 1, 3])
+        self.assertEqual(levels.getAtLeast(12), [])
+        self.assertEqual(levels.getAtMost(8.9), [])
+        levels.remove(10, 1)
+        self.assertEqual(levels.getAtLeast(10), [3, 4])
+
+
+def get_expected_equity(brk, barFeed):
+    ret = brk.getCash()
+    for instrument, shares in brk.getPositions().items():
+        ret += barFeed.getLastBar(instrument).getPrice() * shares
+    return ret
+
+
+class PortfolioValueTestCase(common.TestCase):
+    def testIncrementalEquity(self):
+        class Strategy(RandomOrdersStrategy):
+            def onBars(self, bars):
+                expected = get_expected_equity(self.getBroker(), self.getFeed())
+                self.assertEqual(round(self.getBroker().getEquity(), 6), round(expected, 6))
+                super(Strategy, self).onBars(bars)
+
+        revalueInterval = backtesting.Broker.REVALUE_INTERVAL
+        try:
+            # Also revaluing positions from scratch every few bars.
+            for interval in [revalueInterval, 3]:
+                backtesting.Broker.REVALUE_INTERVAL = interval
+                barFeed = build_random_bar_feed(["inst-%d" % i for i in range(5)], 1)
+                strat = Strategy(barFeed, None, fillstrategy.DefaultStrategy(), 1)
+                strat.assertEqual = self.assertEqual
+                strat.run()
+                self.assertTrue(len(strat.getBroker().getPositions()) > 1)
+        finally:
+            backtesting.Broker.REVALUE_INTERVAL = revalueInterval
+
+    def testEquityBeforeOnBars(self):
+        barFeed = build_random_bar_feed(["inst-%d" % i for i in range(3)], 1)
+        equities = []
+        # Subscribed before the broker, so it gets the new bars first.
+        barFeed.getNewValuesEvent().subscribe(
+            lambda dateTime, bars: equities.append((brk.getEquity(), get_expected_equity(brk, barFeed)))
+        )
+        brk = backtesting.Broker(1000, barFeed)
+        brk.setAllowNegativeCash(True)
+        brk.start()
+        barFeed.start()
+        while not barFeed.eof():
+            barFeed.dispatch()
+            for instrument in barFeed.getCurrentBars().getInstruments():
+                if brk.getShares(instrument) == 0:
+                    brk.submitOrder(brk.createMarketOrder(broker.Order.Action.BUY, instrument, 10))
+            self.assertEqual(brk.getPortfolioSnapshot().getEquity(), brk.getEquity())
+        self.assertEqual(len(brk.getPositions()), 3)
+        for equity, expected in equities:
+            self.assertEqual(round(equity, 6), round(expected, 6))
+
+    def testUseAdjustedValuesWhileRunning(self):
+        class Strategy(strategy.BacktestingStrategy):
+            def onBars(self, bars):
+                brk = self.getBroker()
+                self.assertEqual(round(brk.getEquity(), 6), round(get_expected_equity(brk, self.getFeed()), 6))
+                if len(brk.getPositions()) == 0:
+                    for instrument in bars.getInstruments():
+                        self.marketOrder(instrument, 10)
+                elif not brk.getUseAdjustedValues():
+                    self.setUseAdjustedValues(True)
+                    self.assertEqual(round(brk.getEquity(), 6), round(get_expected_equity(brk, self.getFeed()), 6))
+
+        barFeed = RandomBarFeed(bar.Frequency.DAY)
+        for i, instrument in enumerate(["inst-1", "inst-2"]):
+            bars = []
+            for day in range(1, 10):
+                price = 10 + day + i
+                bars.append(bar.BasicBar(
+                    datetime.datetime(2001, 1, day), price, price, price, price, 1000, price / 2.0, bar.Frequency.DAY
+                ))
+            barFeed.addBarsFromSequence(instrument, bars)
+        strat = Strategy(barFeed, 1000)
+        strat.assertEqual = self.assertEqual
+        strat.run()
+        brk = strat.getBroker()
+        self.assertTrue(brk.getUseAdjustedValues())
+        self.assertEqual(brk.getPositions(), {"inst-1": 10, "inst-2": 10})
+        self.assertEqual(brk.getEquity(), brk.getCash() + 10 * (19 + 20) / 2.0)
+
+    def testPortfolioSnapshot(self):
+        barFeed = BarFeed(BaseTestCase.TestInstrument, bar.Frequency.DAY)
+        brk = backtesting.Broker(1000, barFeed)
+        barFeed.dispatchBars(10, 15, 8, 12)
+        snapshot = brk.getPortfolioSnapshot()
+        self.assertEqual(snapshot.getCash(), 1000)
+        self.assertEqual(snapshot.getEquity(), 1000)
+        self.assertEqual(snapshot.getDateTime(), barFeed.getCurrentDateTime())
+        # The same snapshot is shared until the portfolio changes.
+        self.assertTrue(brk.getPortfolioSnapshot() is snapshot)
+
+        order = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 1)
+        brk.submitOrder(order)
+        self.assertTrue(brk.getPortfolioSnapshot() is snapshot)
+        barFeed.dispatchBars(10, 15, 8, 12)
+        self.assertTrue(order.isFilled())
+        snapshot = brk.getPortfolioSnapshot()
+        self.assertEqual(snapshot.getCash(), 990)
+        self.assertEqual(snapshot.getEquity(), 1002)
+
+        brk.setCash(100)
+        self.assertEqual(brk.getPortfolioSnapshot().getEquity(), 112)
+        barFeed.dispatchBars(20, 25, 18, 22)
+        self.assertEqual(brk.getPortfolioSnapshot().getEquity(), 122)
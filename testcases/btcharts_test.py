@@ -23,6 +23,8 @@ import datetime
 from . import common
 
 from pyalgotrade.bitcoincharts import barfeed
+from pyalgotrade.barfeed import streamingfeed
+from pyalgotrade import bar
 from pyalgotrade.utils import dt
 
 
@@ -81,3 +83,17 @@ class TestCase(common.TestCase):
         self.assertEquals(loaded[-1][1]["bitstampUSD"].getDateTime(), dt.as_utc(datetime.datetime(2012, 5, 30, 23, 49, 21)))
         self.assertEquals(loaded[-1][1]["bitstampUSD"].getClose(), 5.14)
         self.assertEquals(loaded[-1][1]["bitstampUSD"].getVolume(), 20)
+
+    def testTradeCursorWithPrefetch(self):
+        csvFeed = barfeed.CSVTradeFeed()
+        csvFeed.addBarsFromCSV(common.get_data_file_path("bitstampUSD.csv"), "bitstampUSD", fromDateTime=dt.as_utc(datetime.datetime(2012, 5, 29)))
+        expected = [(dateTime, bars["bitstampUSD"].getPrice()) for dateTime, bars in csvFeed]
+
+        feed = streamingfeed.Feed(bar.Frequency.TRADE, prefetch=2)
+        feed.addCursor("bitstampUSD", barfeed.TradeCursor(common.get_data_file_path("bitstampUSD.csv"), fromDateTime=dt.as_utc(datetime.datetime(2012, 5, 29))))
+        self.assertEquals([(dateTime, bars["bitstampUSD"].getPrice()) for dateTime, bars in feed], expected)
+        self.assertEquals(len(expected), 646)
+
+        # Datetimes with more than 1 trade per second are fixed the same way after a reset.
+        feed.reset()
+        self.assertEquals([(dateTime, bars["bitstampUSD"].getPrice()) for dateTime, bars in feed], expected)
@@ -0,0 +1,235 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+
+import numpy as np
+
+from . import common
+
+from pyalgotrade.barfeed import bulkcsv
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import googlefeed
+from pyalgotrade.barfeed import ninjatraderfeed
+from pyalgotrade.barfeed import quandlfeed
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade import bar
+from pyalgotrade import marketsession
+
+
+def load_bars(buildFeed, bulkLoading, files, **kwargs):
+    feed = buildFeed()
+    feed.setBulkLoading(bulkLoading)
+    for instrument, fileName in files:
+        feed.addBarsFromCSV(instrument, common.get_data_file_path(fileName), **kwargs)
+    ret = []
+    for dateTime, bars in feed:
+        for instrument in sorted(bars.getInstruments()):
+            bar_ = bars[instrument]
+            ret.append((
+                instrument, bar_.getDateTime(), str(bar_.getDateTime().tzinfo), bar_.getOpen(), bar_.getHigh(),
+                bar_.getLow(), bar_.getClose(), bar_.getVolume(), bar_.getAdjClose(), bar_.getExtraColumns()
+            ))
+    return ret
+
+
+def write_generic_csv(path, rows):
+    with open(path, "w") as f:
+        f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+        for row in rows:
+            f.write(row + "\n")
+
+
+# Row parsers that customize parsing, and that can't be bulk loaded.
+class ShiftedDateRowParser(csvfeed.GenericRowParser):
+    def _parseDate(self, dateString):
+        return super(ShiftedDateRowParser, self)._parseDate(dateString) + datetime.timedelta(hours=1)
+
+
+class DoubledCloseRowParser(yahoofeed.RowParser):
+    def parseBar(self, csvRowDict):
+        ret = super(DoubledCloseRowParser, self).parseBar(csvRowDict)
+        return bar.BasicBar(
+            ret.getDateTime(), ret.getOpen(), ret.getHigh() * 2, ret.getLow(), ret.getClose() * 2, ret.getVolume(),
+            ret.getAdjClose(), ret.getFrequency()
+        )
+
+
+class BulkLoadingTestCase(common.TestCase):
+    def assertSameBars(self, buildFeed, files, expectedCount, **kwargs):
+        expected = load_bars(buildFeed, False, files, **kwargs)
+        self.assertEqual(len(expected), expectedCount)
+        self.assertEqual(load_bars(buildFeed, True, files, **kwargs), expected)
+
+    def testYahoo(self):
+        files = [("orcl", "orcl-2000-yahoofinance.csv"), ("spy", "spy-2010-yahoofinance.csv")]
+        self.assertSameBars(lambda: yahoofeed.Feed(), files, 504)
+        self.assertSameBars(lambda: yahoofeed.Feed(timezone=marketsession.USEquities.timezone), files, 504)
+
+        def build_feed():
+            ret = yahoofeed.Feed()
+            ret.setDailyBarTime(datetime.time(16))
+            ret.sanitizeBars(True)
+            return ret
+        self.assertSameBars(build_feed, files, 504)
+
+    def testGoogle(self):
+        self.assertSameBars(lambda: googlefeed.Feed(), [("orcl", "orcl-2010-googlefinance.csv")], 252)
+        self.assertSameBars(
+            lambda: googlefeed.Feed(), [("orcl", "orcl-2010-googlefinance-malformed.csv")], 251,
+            skipMalformedBars=True
+        )
+
+    def testQuandl(self):
+        self.assertSameBars(lambda: quandlfeed.Feed(), [("orcl", "WIKI-ORCL-2000-quandl.csv")], 252)
+
+    def testNinjaTrader(self):
+        files = [("spy", "nt-spy-minute-2011.csv")]
+        self.assertSameBars(lambda: ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE), files, 14180)
+        self.assertSameBars(
+            lambda: ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE, marketsession.USEquities.timezone), files,
+            14180
+        )
+
+    def testGeneric(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("Date Time,Open,High,Low,Close,Volume,Adj Close,Notes,Score\n")
+                f.write("2013-01-01 13:59:00,13.51,13.56,13.51,13.56,273.88,,first,1\n")
+                f.write("\n")
+                # Fields that don't match the fixed width format are parsed using strptime.
+                f.write("2013-1-1 14:00:00,13.51,13.56,13.51,13.56,273.88,13.5,-,2.5\n")
+
+            def build_feed():
+                return csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+
+            expected = load_bars(build_feed, False, [("inst", path)])
+            self.assertEqual(load_bars(build_feed, True, [("inst", path)]), expected)
+            self.assertEqual(expected[0][-1], {"Notes": "first", "Score": 1.0})
+            self.assertEqual(expected[1][8], 13.5)
+
+            feed = build_feed()
+            feed.setBulkLoading(True)
+            self.assertFalse(feed.barsHaveAdjClose())
+            feed.addBarsFromCSV("inst", path)
+            self.assertTrue(feed.barsHaveAdjClose())
+
+    def testCustomRowParsers(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            write_generic_csv(path, ["2013-01-01 13:59:00,1,2,0.5,1.5,10,"])
+            rowParser = ShiftedDateRowParser(
+                {
+                    "datetime": "Date Time", "open": "Open", "high": "High", "low": "Low", "close": "Close",
+                    "volume": "Volume", "adj_close": "Adj Close"
+                },
+                "%Y-%m-%d %H:%M:%S", None, bar.Frequency.MINUTE, None
+            )
+            self.assertIsNone(rowParser.getColumnMapping())
+            feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+            feed.setBulkLoading(True)
+            csvfeed.BarFeed.addBarsFromCSV(feed, "inst", path, rowParser)
+            self.assertEqual([dateTime for dateTime, bars in feed], [datetime.datetime(2013, 1, 1, 14, 59)])
+
+        rowParser = DoubledCloseRowParser(None, bar.Frequency.DAY)
+        self.assertIsNone(rowParser.getColumnMapping())
+        self.assertIsNotNone(yahoofeed.RowParser(None, bar.Frequency.DAY).getColumnMapping())
+        for bulkLoading in [False, True]:
+            feed = yahoofeed.Feed()
+            feed.setBulkLoading(bulkLoading)
+            csvfeed.BarFeed.addBarsFromCSV(
+                feed, "orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"), rowParser
+            )
+            dateTime, bars = next(iter(feed))
+            self.assertEqual(bars["orcl"].getClose(), 2 * 118.12)
+
+    def testChunks(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            begin = datetime.datetime(2013, 1, 1)
+            write_generic_csv(path, [
+                "%s,1,2,0.5,1.5,10," % (begin + datetime.timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S")
+                for i in range(25)
+            ])
+            mapping = csvfeed.GenericRowParser(
+                {
+                    "datetime": "Date Time", "open": "Open", "high": "High", "low": "Low", "close": "Close",
+                    "volume": "Volume", "adj_close": "Adj Close"
+                },
+                "%Y-%m-%d %H:%M:%S", None, bar.Frequency.MINUTE, None
+            ).getColumnMapping()
+            bars = bulkcsv.load_bars(path, mapping, chunkSize=7)
+            self.assertEqual([bar_.getDateTime() for bar_ in bars], [
+                begin + datetime.timedelta(minutes=i) for i in range(25)
+            ])
+            self.assertFalse(mapping.barsHaveAdjClose())
+
+    def testErrors(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            write_generic_csv(path, [
+                "2013-01-01 13:59:00,1,2,0.5,1.5,10,",
+                "2013-02-30 13:59:00,1,2,0.5,1.5,10,",
+                "2013-01-01 14:00:00,1,0.5,0.5,1.5,10,",
+                "2013-01-01 14:01:00,abc,2,0.5,1.5,10,",
+                "2013-01-01 14:02:00,1,2,0.5",
+                "2013-01-01 14:03:00,1,2,0.5,1.5,10,",
+            ])
+
+            feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+            feed.setBulkLoading(True)
+            with self.assertRaisesRegexp(Exception, "4 malformed rows in .*bars.csv. "
+                                                    "line 3: invalid datetime '2013-02-30 13:59:00'. "
+                                                    "line 4: high < open on 2013-01-01 14:00:00. "
+                                                    "line 5: invalid open value 'abc'. "
+                                                    "line 6: expected 7 columns but found 4"):
+                feed.addBarsFromCSV("inst", path)
+
+            feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+            feed.setBulkLoading(True)
+            feed.addBarsFromCSV("inst", path, skipMalformedBars=True)
+            self.assertEqual([dateTime.minute for dateTime, bars in feed], [59, 3])
+
+
+class ParseTestCase(common.TestCase):
+    def testFixedWidthFormats(self):
+        self.assertEqual(bulkcsv.compile_fixed_width_format("%Y-%m-%d")[2], 10)
+        self.assertEqual(bulkcsv.compile_fixed_width_format("%Y%m%d %H%M%S")[2], 15)
+        self.assertEqual(bulkcsv.compile_fixed_width_format("%d-%b-%y"), None)
+        self.assertEqual(bulkcsv.compile_fixed_width_format("%H:%M:%S"), None)
+
+    def testParseDateTimes(self):
+        values = ["2000-01-02 03:04:05", "2000-02-29 23:59:59", "2001-02-29 00:00:00", "2000-01-02 24:00:00",
+                  "2000-01-02", "2000-1-2 3:4:5"]
+        dateTimes, invalid = bulkcsv.parse_datetimes(values, "%Y-%m-%d %H:%M:%S")
+        self.assertEqual(invalid.tolist(), [False, False, True, True, True, False])
+        self.assertEqual(dateTimes[~invalid].tolist(), [
+            datetime.datetime(2000, 1, 2, 3, 4, 5),
+            datetime.datetime(2000, 2, 29, 23, 59, 59),
+            datetime.datetime(2000, 1, 2, 3, 4, 5),
+        ])
+
+    def testParseFloats(self):
+        values, invalid = bulkcsv.parse_floats(["1.5", "", "-", "2"], allowEmpty=True)
+        self.assertEqual(invalid.tolist(), [False, False, True, False])
+        self.assertEqual(values[0], 1.5)
+        self.assertTrue(np.isnan(values[1]))
@@ -0,0 +1,205 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+
+from . import common
+from . import barfeed_test
+from . import feed_test
+
+from pyalgotrade.barfeed import columnarfeed
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade import bar
+from pyalgotrade import marketsession
+from pyalgotrade.utils import dt
+
+
+def load_yahoo_feed():
+    ret = yahoofeed.Feed()
+    ret.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"), marketsession.USEquities.timezone)
+    ret.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2001-yahoofinance.csv"), marketsession.USEquities.timezone)
+    return ret
+
+
+class ColumnarFeedTestCase(common.TestCase):
+    def testBaseFeedInterface(self):
+        with common.TmpDir() as tmpPath:
+            feed = columnarfeed.Feed(tmpPath, bar.Frequency.DAY)
+            feed.getDatabase().addBarsFromFeed(load_yahoo_feed())
+            feed.loadBars("orcl")
+            feed_test.tstBaseFeedInterface(self, feed)
+
+    def testBaseBarFeed(self):
+        with common.TmpDir() as tmpPath:
+            feed = columnarfeed.Feed(tmpPath, bar.Frequency.DAY)
+            feed.getDatabase().addBarsFromFeed(load_yahoo_feed())
+            feed.loadBars("orcl")
+            barfeed_test.check_base_barfeed(self, feed, True)
+
+    def testLoadDailyBars(self):
+        with common.TmpDir() as tmpPath:
+            yahooFeed = load_yahoo_feed()
+            feed = columnarfeed.Feed(tmpPath, bar.Frequency.DAY)
+            feed.getDatabase().addBarsFromFeed(yahooFeed)
+            feed.loadBars("orcl", marketsession.USEquities.timezone)
+            for dateTime, bars in feed:
+                pass
+
+            yahooDS = yahooFeed["orcl"]
+            columnarDS = feed["orcl"]
+            self.assertEqual(len(yahooDS), 500)
+            self.assertEqual(len(yahooDS), len(columnarDS))
+            for i in range(len(yahooDS)):
+                self.assertEqual(yahooDS[i].getDateTime(), columnarDS[i].getDateTime())
+                self.assertEqual(yahooDS[i].getOpen(), columnarDS[i].getOpen())
+                self.assertEqual(yahooDS[i].getHigh(), columnarDS[i].getHigh())
+                self.assertEqual(yahooDS[i].getLow(), columnarDS[i].getLow())
+                self.assertEqual(yahooDS[i].getClose(), columnarDS[i].getClose())
+                self.assertEqual(yahooDS[i].getVolume(), columnarDS[i].getVolume())
+                self.assertEqual(yahooDS[i].getAdjClose(), columnarDS[i].getAdjClose())
+
+    def testFromToDateTime(self):
+        with common.TmpDir() as tmpPath:
+            feed = columnarfeed.Feed(tmpPath, bar.Frequency.DAY)
+            feed.getDatabase().addBarsFromFeed(load_yahoo_feed())
+            feed.loadBars(
+                "orcl", marketsession.USEquities.timezone,
+                dt.localize(datetime.datetime(2001, 1, 2), marketsession.USEquities.timezone),
+                dt.localize(datetime.datetime(2001, 12, 31), marketsession.USEquities.timezone)
+            )
+            for dateTime, bars in feed:
+                pass
+            self.assertEqual(len(feed["orcl"]), 248)
+            self.assertEqual(feed["orcl"][0].getDateTime().date(), datetime.date(2001, 1, 2))
+            self.assertEqual(feed["orcl"][-1].getDateTime().date(), datetime.date(2001, 12, 31))
+
+    def testMultipleInstruments(self):
+        with common.TmpDir() as tmpPath:
+            memFeed = barfeed_test.build_mem_bar_feed(False)
+            db = columnarfeed.Database(tmpPath)
+            db.addBarsFromFeed(memFeed)
+            self.assertEqual(db.getInstruments(bar.Frequency.DAY), ["inst-%d" % i for i in range(1, 6)])
+            self.assertEqual(db.getInstruments(bar.Frequency.MINUTE), [])
+
+            feed = columnarfeed.Feed(tmpPath, bar.Frequency.DAY)
+            for instrument in db.getInstruments(bar.Frequency.DAY):
+                feed.loadBars(instrument)
+            expected = barfeed_test.build_mem_bar_feed(False)
+            for (dateTime, bars), (expectedDateTime, expectedBars) in zip(feed, expected):
+                self.assertEqual(dt.unlocalize(dateTime), expectedDateTime)
+                self.assertEqual(sorted(bars.getInstruments()), sorted(expectedBars.getInstruments()))
+                for instrument in bars.getInstruments():
+                    self.assertEqual(bars[instrument].getClose(), expectedBars[instrument].getClose())
+                    self.assertEqual(bars[instrument].getAdjClose(), None)
+            self.assertTrue(feed.eof())
+            self.assertEqual(len(feed["inst-1"]), 30)
+            self.assertEqual(len(feed["inst-5"]), 6)
+
+            # Go through the bars again after a reset.
+            feed.reset()
+            self.assertEqual(dt.unlocalize(feed.peekDateTime()), datetime.datetime(2001, 1, 1))
+            self.assertEqual(len([bars for bars in feed]), 30)
+
+    def testMultipleTimezones(self):
+        with common.TmpDir() as tmpPath:
+            db = columnarfeed.Database(tmpPath)
+            dateTime = datetime.datetime(2001, 1, 2, 15)
+            for instrument in ["orcl", "BTC/USD"]:
+                db.addBar(
+                    instrument, bar.BasicBar(dateTime, 1, 1, 1, 1, 10, None, bar.Frequency.DAY), bar.Frequency.DAY
+                )
+            db.disconnect()
+
+            feed = columnarfeed.Feed(tmpPath, bar.Frequency.DAY)
+            feed.loadBars("orcl", marketsession.USEquities.timezone)
+            feed.loadBars("BTC/USD")
+            bars = feed.getNextBars()
+            self.assertEqual(bars["orcl"].getDateTime().tzinfo.zone, marketsession.USEquities.timezone.zone)
+            self.assertEqual(bars["orcl"].getDateTime().hour, 10)
+            self.assertEqual(bars["BTC/USD"].getDateTime().tzinfo.zone, "UTC")
+            self.assertEqual(bars["BTC/USD"].getDateTime().hour, 15)
+            self.assertEqual(bars["orcl"].getDateTime(), bars["BTC/USD"].getDateTime())
+
+    def testInstrumentIndexCacheIsBounded(self):
+        with common.TmpDir() as tmpPath:
+            db = columnarfeed.Database(tmpPath)
+            count = columnarfeed.INSTRUMENT_INDEX_CACHE_SIZE * 2
+            # Each instrument has bars at different times, and there is a bar for all of them at the end.
+            for i in range(count):
+                instrument = "inst-%d" % i
+                dateTimes = [datetime.datetime(2001, 1, 1) + datetime.timedelta(days=i), datetime.datetime(2002, 1, 1)]
+                for dateTime in dateTimes:
+                    db.addBar(
+                        instrument, bar.BasicBar(dateTime, 1, 1, 1, 1, 10, None, bar.Frequency.DAY), bar.Frequency.DAY
+                    )
+            db.disconnect()
+
+            feed = columnarfeed.Feed(tmpPath, bar.Frequency.DAY)
+            for i in range(count):
+                feed.loadBars("inst-%d" % i)
+            for i, (dateTime, bars) in enumerate(feed):
+                if i < count:
+                    self.assertEqual(bars.getInstruments(), ["inst-%d" % i])
+                else:
+                    self.assertEqual(len(bars.getInstruments()), count)
+            self.assertEqual(i, count)
+            self.assertEqual(len(feed._Feed__instrumentIndexes), columnarfeed.INSTRUMENT_INDEX_CACHE_SIZE)
+
+    def testUpdateBars(self):
+        with common.TmpDir() as tmpPath:
+            db = columnarfeed.Database(tmpPath)
+            dateTimes = [datetime.datetime(2001, 1, i) for i in range(1, 5)]
+            for dateTime in dateTimes[:3]:
+                db.addBar("BTC/USD", bar.BasicBar(dateTime, 1, 1, 1, 1, 10, None, bar.Frequency.DAY), bar.Frequency.DAY)
+            db.flush()
+            # Replace one bar and add a new one.
+            for dateTime in dateTimes[2:]:
+                db.addBar("BTC/USD", bar.BasicBar(dateTime, 2, 2, 2, 2, 20, 2, bar.Frequency.DAY), bar.Frequency.DAY)
+            db.disconnect()
+
+            self.assertTrue(os.path.exists(os.path.join(tmpPath, "BTC%2FUSD-86400.bars")))
+            self.assertEqual(db.getInstruments(bar.Frequency.DAY), ["BTC/USD"])
+            header = columnarfeed.read_header(db.getFilePath("BTC/USD", bar.Frequency.DAY))
+            self.assertEqual(header["count"], 4)
+            self.assertEqual(header["frequency"], bar.Frequency.DAY)
+
+            bars = db.getBars("BTC/USD", bar.Frequency.DAY)
+            self.assertEqual([dt.unlocalize(bar_.getDateTime()) for bar_ in bars], dateTimes)
+            self.assertEqual([bar_.getClose() for bar_ in bars], [1, 1, 2, 2])
+            self.assertEqual([bar_.getAdjClose() for bar_ in bars], [None, None, 2, 2])
+            self.assertEqual(db.getBars("BTC/USD", bar.Frequency.MINUTE), [])
+
+    def testErrors(self):
+        with common.TmpDir() as tmpPath:
+            feed = columnarfeed.Feed(tmpPath, bar.Frequency.DAY)
+            with self.assertRaisesRegexp(Exception, "There are no bars for orcl"):
+                feed.loadBars("orcl")
+
+            feed.getDatabase().addBarsFromFeed(load_yahoo_feed())
+            feed.loadBars("orcl")
+            with self.assertRaisesRegexp(Exception, "Bars for orcl were already loaded"):
+                feed.loadBars("orcl")
+
+            path = os.path.join(tmpPath, "invalid.bars")
+            with open(path, "wb") as f:
+                f.write(b"invalid")
+            with self.assertRaisesRegexp(Exception, ".* is not a bar file"):
+                columnarfeed.load_columns(path)
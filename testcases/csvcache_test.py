@@ -0,0 +1,191 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+import time
+
+from . import common
+from . import bulkcsv_test
+
+from pyalgotrade.barfeed import csvcache
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import ninjatraderfeed
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade import bar
+from pyalgotrade import marketsession
+
+
+def load_bars(feed, files, cache):
+    feed.setCache(cache)
+    for instrument, path in files:
+        feed.addBarsFromCSV(instrument, path)
+    ret = []
+    for dateTime, bars in feed:
+        for instrument in sorted(bars.getInstruments()):
+            bar_ = bars[instrument]
+            ret.append((
+                instrument, bar_.getDateTime(), str(bar_.getDateTime().tzinfo), bar_.getOpen(), bar_.getHigh(),
+                bar_.getLow(), bar_.getClose(), bar_.getVolume(), bar_.getAdjClose(), bar_.getExtraColumns()
+            ))
+    return ret
+
+
+class CSVCacheTestCase(common.TestCase):
+    def testHitsAndMisses(self):
+        files = [
+            ("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv")),
+            ("spy", common.get_data_file_path("spy-2010-yahoofinance.csv")),
+        ]
+        expected = load_bars(yahoofeed.Feed(timezone=marketsession.USEquities.timezone), files, None)
+        with common.TmpDir() as tmpPath:
+            cache = csvcache.Cache(os.path.join(tmpPath, "cache"))
+            for i in range(3):
+                bars = load_bars(yahoofeed.Feed(timezone=marketsession.USEquities.timezone), files, cache)
+                self.assertEqual(bars, expected)
+            self.assertEqual(cache.getMisses(), 2)
+            self.assertEqual(cache.getHits(), 4)
+            self.assertGreater(cache.getSize(), 0)
+
+            # A different timezone is a different entry.
+            load_bars(yahoofeed.Feed(), files, cache)
+            self.assertEqual(cache.getMisses(), 4)
+
+            # So is a different bar filter.
+            feed = yahoofeed.Feed()
+            feed.setBarFilter(csvfeed.DateRangeFilter(datetime.datetime(2000, 3, 1), datetime.datetime(2000, 3, 31)))
+            self.assertEqual(len(load_bars(feed, files[:1], cache)), 23)
+            feed = yahoofeed.Feed()
+            feed.setBarFilter(csvfeed.DateRangeFilter(datetime.datetime(2000, 3, 1), datetime.datetime(2000, 3, 31)))
+            self.assertEqual(len(load_bars(feed, files[:1], cache)), 23)
+            self.assertEqual(cache.getMisses(), 5)
+            self.assertEqual(cache.getHits(), 5)
+
+            cache.invalidate(files[0][1])
+            load_bars(yahoofeed.Feed(timezone=marketsession.USEquities.timezone), files, cache)
+            self.assertEqual(cache.getMisses(), 6)
+            self.assertEqual(cache.getHits(), 6)
+
+            cache.clear()
+            self.assertEqual(cache.getSize(), 0)
+
+    def testMinuteBars(self):
+        files = [("spy", common.get_data_file_path("nt-spy-minute-2011.csv"))]
+
+        def build_feed():
+            return ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE, marketsession.USEquities.timezone)
+
+        expected = load_bars(build_feed(), files, None)
+        with common.TmpDir() as tmpPath:
+            cache = csvcache.Cache(tmpPath)
+            self.assertEqual(load_bars(build_feed(), files, cache), expected)
+            self.assertEqual(load_bars(build_feed(), files, cache), expected)
+            self.assertEqual(cache.getHits(), 1)
+
+    def testExtraColumnsAndAdjClose(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("Date Time,Open,High,Low,Close,Volume,Adj Close,Notes,Score\n")
+                f.write("2013-01-01 13:59:00,13.51,13.56,13.51,13.56,273.88,,first,1\n")
+                f.write("2013-01-01 14:00:00,13.51,13.56,13.51,13.56,273.88,13.5,second,2.5\n")
+            files = [("inst", path)]
+            expected = load_bars(csvfeed.GenericBarFeed(bar.Frequency.MINUTE), files, None)
+            self.assertEqual(expected[0][-1], {"Notes": "first", "Score": 1.0})
+
+            cache = csvcache.Cache(os.path.join(tmpPath, "cache"))
+            load_bars(csvfeed.GenericBarFeed(bar.Frequency.MINUTE), files, cache)
+            feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+            self.assertEqual(load_bars(feed, files, cache), expected)
+            self.assertEqual(cache.getHits(), 1)
+            self.assertTrue(feed.barsHaveAdjClose())
+
+    def testUncacheableBars(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("Date Time,Open,High,Low,Close,Volume,Adj Close,Notes\n")
+                f.write("2013-01-01 13:59:00,13.51,13.56,13.51,13.56,273.88,,1\n")
+                f.write("2013-01-01 14:00:00,13.51,13.56,13.51,13.56,273.88,,second\n")
+            files = [("inst", path)]
+            expected = load_bars(csvfeed.GenericBarFeed(bar.Frequency.MINUTE), files, None)
+
+            cache = csvcache.Cache(os.path.join(tmpPath, "cache"))
+            for i in range(3):
+                self.assertEqual(load_bars(csvfeed.GenericBarFeed(bar.Frequency.MINUTE), files, cache), expected)
+            self.assertEqual(cache.getMisses(), 1)
+            self.assertEqual(cache.getUncacheable(), 2)
+            self.assertEqual(cache.getHits(), 0)
+            self.assertEqual(cache.getSize(), 0)
+
+    def testFileChanges(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            bulkcsv_test.write_generic_csv(path, ["2013-01-01 13:59:00,1,2,0.5,1.5,10,"])
+            cache = csvcache.Cache(os.path.join(tmpPath, "cache"))
+            feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+            self.assertEqual(load_bars(feed, [("inst", path)], cache)[0][6], 1.5)
+
+            # Same size, different contents.
+            bulkcsv_test.write_generic_csv(path, ["2013-01-01 13:59:00,1,2,0.5,1.2,10,"])
+            feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+            self.assertEqual(load_bars(feed, [("inst", path)], cache)[0][6], 1.2)
+            self.assertEqual(cache.getMisses(), 2)
+            self.assertEqual(cache.getHits(), 0)
+
+    def testEviction(self):
+        with common.TmpDir() as tmpPath:
+            cache = csvcache.Cache(os.path.join(tmpPath, "cache"))
+            paths = []
+            for i in range(3):
+                path = os.path.join(tmpPath, "bars-%d.csv" % i)
+                bulkcsv_test.write_generic_csv(path, ["2013-01-01 13:59:00,1,2,0.5,1.5,10,"])
+                paths.append(path)
+                load_bars(csvfeed.GenericBarFeed(bar.Frequency.MINUTE), [("inst", path)], cache)
+                # Make sure last used times are different.
+                time.sleep(0.01)
+            entrySize = cache.getSize() / 3
+
+            # Use the first one so the second one is the least recently used.
+            load_bars(csvfeed.GenericBarFeed(bar.Frequency.MINUTE), [("inst", paths[0])], cache)
+            self.assertEqual(cache.getHits(), 1)
+
+            cache = csvcache.Cache(cache.getCacheDir(), maxSize=entrySize * 2)
+            cache.evict()
+            self.assertEqual(cache.getEvictions(), 1)
+            for path in [paths[0], paths[2], paths[1]]:
+                load_bars(csvfeed.GenericBarFeed(bar.Frequency.MINUTE), [("inst", path)], cache)
+            self.assertEqual(cache.getHits(), 2)
+            self.assertEqual(cache.getMisses(), 1)
+            # Storing the second one again evicted the first one.
+            self.assertEqual(cache.getEvictions(), 2)
+            self.assertLessEqual(cache.getSize(), cache.getMaxSize())
+
+    def testCorruptedEntry(self):
+        with common.TmpDir() as tmpPath:
+            path = common.get_data_file_path("orcl-2000-yahoofinance.csv")
+            cache = csvcache.Cache(os.path.join(tmpPath, "cache"))
+            expected = load_bars(yahoofeed.Feed(), [("orcl", path)], cache)
+            for name in os.listdir(cache.getCacheDir()):
+                os.remove(os.path.join(cache.getCacheDir(), name, "close.npy"))
+            self.assertEqual(load_bars(yahoofeed.Feed(), [("orcl", path)], cache), expected)
+            self.assertEqual(cache.getMisses(), 2)
+            self.assertEqual(load_bars(yahoofeed.Feed(), [("orcl", path)], cache), expected)
+            self.assertEqual(cache.getHits(), 1)
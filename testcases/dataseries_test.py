@@ -20,6 +20,8 @@
 
 import datetime
 
+import numpy as np
+import pytz
 from six.moves import xrange
 
 from . import common
@@ -27,6 +29,10 @@ from . import common
 from pyalgotrade import dataseries
 from pyalgotrade.dataseries import bards
 from pyalgotrade.dataseries import aligned
+from pyalgotrade.dataseries import sizing
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import rsi
 from pyalgotrade import bar
 
 
@@ -143,6 +149,127 @@ class TestSequenceDataSeries(common.TestCase):
         self.assertEqual(ds[-1], 99)
 
 
+class TestNumericSequenceDataSeries(common.TestCase):
+    def testSeqLikeOps(self):
+        seq = [float(i) for i in xrange(10)]
+        seq[3] = None
+        ds = dataseries.NumericSequenceDataSeries()
+        for value in seq:
+            ds.append(value)
+
+        self.assertTrue(ds.isNumeric())
+        self.assertEqual(len(ds), len(seq))
+        for i in xrange(-len(seq), len(seq)):
+            self.assertEqual(ds[i], seq[i])
+            self.assertEqual(ds.getValueAbsolute(i), seq[i] if i >= 0 else None)
+        for i in xrange(-20, 20):
+            self.assertEqual(ds[i:], seq[i:])
+            self.assertEqual(ds[i::2], seq[i::2])
+        self.assertEqual(type(ds[0]), float)
+        with self.assertRaises(IndexError):
+            ds[10]
+        with self.assertRaises(IndexError):
+            ds[-11]
+
+    def testBounded(self):
+        ds = dataseries.NumericSequenceDataSeries(maxLen=3)
+        for i in xrange(100):
+            ds.append(float(i))
+            self.assertEqual(ds[-1], i)
+        self.assertEqual(ds[:], [97, 98, 99])
+        self.assertEqual(list(ds.asarray()), [97, 98, 99])
+
+        ds.setMaxLen(2)
+        self.assertEqual(ds[:], [98, 99])
+        self.assertEqual(len(ds.getDateTimes()), 2)
+
+    def testAsArray(self):
+        ds = dataseries.NumericSequenceDataSeries()
+        ds.append(1.5)
+        ds.append(None)
+        ds.append(2.5)
+        values = ds.asarray()
+        self.assertEqual(values.dtype, np.float64)
+        self.assertEqual(values[0], 1.5)
+        self.assertTrue(np.isnan(values[1]))
+        self.assertEqual(values[2], 2.5)
+
+    def testSwitchToGenericValues(self):
+        ds = dataseries.NumericSequenceDataSeries(maxLen=3)
+        ds.append(1.5)
+        ds.append(None)
+        self.assertTrue(ds.isNumeric())
+        ds.append(True)
+        self.assertFalse(ds.isNumeric())
+        ds.append(float("nan"))
+        self.assertEqual(ds[0:2], [None, True])
+        self.assertTrue(np.isnan(ds[-1]))
+
+        ds = dataseries.NumericSequenceDataSeries()
+        ds.append(2 ** 60)
+        self.assertFalse(ds.isNumeric())
+        self.assertEqual(ds[-1], 2 ** 60)
+
+    def testIntsAndNaN(self):
+        ds = dataseries.NumericSequenceDataSeries(maxLen=4)
+        ds.append(1.5)
+        ds.append(None)
+        ds.append(1)
+        self.assertTrue(ds.isNumeric())
+        self.assertEqual(type(ds[-1]), int)
+        self.assertEqual(ds[-1], 1)
+        self.assertEqual(ds[:], [1.5, None, 1])
+        ds.append(float("nan"))
+        ds.append(-3)
+        self.assertTrue(ds.isNumeric())
+        self.assertEqual(len(ds), 4)
+        self.assertIsNone(ds[0])
+        self.assertEqual(type(ds[1]), int)
+        self.assertTrue(np.isnan(ds[2]))
+        self.assertEqual(type(ds[2]), float)
+        self.assertEqual(ds[3], -3)
+        self.assertEqual(ds[::3], [None, -3])
+        values = ds.asarray()
+        self.assertEqual(values.dtype, np.float64)
+        self.assertTrue(np.isnan(values[0]))
+        self.assertEqual(list(values[[1, 3]]), [1, -3])
+
+        ds.setMaxLen(2)
+        self.assertTrue(np.isnan(ds[0]))
+        self.assertEqual(ds[1], -3)
+
+    def testValuesDataIsCached(self):
+        ds = dataseries.NumericSequenceDataSeries()
+        ds.append(1.5)
+        ds.append(None)
+        values = ds._getValuesDeque()
+        data = values.data()
+        self.assertEqual(data, [1.5, None])
+        self.assertIs(values.data(), data)
+        ds.append(2)
+        self.assertEqual(values.data(), [1.5, None, 2])
+
+    def testDateTimesAsArray(self):
+        ds = dataseries.NumericSequenceDataSeries(maxLen=5)
+        begin = datetime.datetime(2000, 1, 1, 10, 30, 15, 123)
+        for i in xrange(1, 10):
+            ds.appendWithDateTime(begin + datetime.timedelta(days=i), float(i))
+            if i == 2:
+                self.assertEqual(list(ds.getDateTimesAsArray().astype(datetime.datetime)), ds.getDateTimes()[:])
+
+        dateTimes = ds.getDateTimesAsArray()
+        self.assertEqual(dateTimes.dtype, np.dtype("datetime64[us]"))
+        self.assertEqual(list(dateTimes.astype(datetime.datetime)), ds.getDateTimes())
+
+        ds = dataseries.NumericSequenceDataSeries()
+        ds.appendWithDateTime(pytz.timezone("US/Eastern").localize(begin), 2.0)
+        self.assertEqual(ds.getDateTimesAsArray()[0], np.datetime64(begin + datetime.timedelta(hours=5)))
+
+        ds = dataseries.NumericSequenceDataSeries()
+        ds.append(1.0)
+        self.assertTrue(np.isnat(ds.getDateTimesAsArray()[0]))
+
+
 class TestBarDataSeries(common.TestCase):
     def testEmpty(self):
         ds = bards.BarDataSeries()
@@ -424,3 +551,103 @@ class TestUpdatedDefaultMaxLen(common.TestCase):
         self.assertEqual(len(ds), 2048)
         self.assertEqual(ds[0], 952)
         self.assertEqual(ds[-1], 2999)
+
+
+class TestAutoSizedDataSeries(common.TestCase):
+    def loadFeed(self, maxLen):
+        feed = yahoofeed.Feed(maxLen=maxLen)
+        feed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        return feed
+
+    def testMaxLen(self):
+        ds = dataseries.SequenceDataSeries(dataseries.AUTO_MAX_LEN)
+        self.assertTrue(ds.isAutoSized())
+        self.assertEqual(ds.getMaxLen(), dataseries.AUTO_MIN_LEN)
+        self.assertEqual(ds.getLookBack(), 0)
+
+        ds.requireLookBack(10)
+        ds.requireLookBack(5)
+        self.assertEqual(ds.getMaxLen(), 10)
+        self.assertEqual(ds.getLookBack(), 10)
+        for i in xrange(20):
+            ds.append(i)
+        self.assertEqual(ds[:], list(range(10, 20)))
+
+        with self.assertRaisesRegexp(Exception, "Invalid maximum length"):
+            dataseries.SequenceDataSeries(-1)
+
+    def testOverride(self):
+        ds = dataseries.NumericSequenceDataSeries(dataseries.AUTO_MAX_LEN)
+        ds.setMaxLen(3)
+        self.assertFalse(ds.isAutoSized())
+        ds.requireLookBack(10)
+        self.assertEqual(ds.getMaxLen(), 3)
+        self.assertEqual(ds.getLookBack(), 10)
+
+        # Look-back is declared but explicitly sized dataseries are left alone.
+        ds = dataseries.SequenceDataSeries(5)
+        ds.requireLookBack(10)
+        self.assertEqual(ds.getMaxLen(), 5)
+
+    def testFilters(self):
+        feed = self.loadFeed(dataseries.AUTO_MAX_LEN)
+        close = feed["orcl"].getCloseDataSeries()
+        sma = ma.SMA(close, 20)
+        smaOfSMA = ma.SMA(sma, 5)
+        rsi_ = rsi.RSI(close, 14)
+        explicit = ma.SMA(close, 10, maxLen=100)
+        self.assertEqual(close.getMaxLen(), 20)
+        self.assertEqual(close.getConsumers(), [sma, rsi_, explicit])
+        self.assertEqual(sma.getMaxLen(), 5)
+        self.assertTrue(sma.isAutoSized())
+        self.assertEqual(smaOfSMA.getMaxLen(), dataseries.AUTO_MIN_LEN)
+        self.assertEqual(explicit.getMaxLen(), 100)
+        self.assertFalse(explicit.isAutoSized())
+        self.assertEqual(feed["orcl"].getOpenDataSeries().getMaxLen(), dataseries.AUTO_MIN_LEN)
+
+        expectedFeed = self.loadFeed(None)
+        expectedClose = expectedFeed["orcl"].getCloseDataSeries()
+        expectedSMA = ma.SMA(ma.SMA(expectedClose, 20), 5)
+        expectedRSI = rsi.RSI(expectedClose, 14)
+        for f in [feed, expectedFeed]:
+            f.start()
+            while not f.eof():
+                f.dispatch()
+        self.assertEqual(smaOfSMA[-2:], expectedSMA[-2:])
+        self.assertEqual(rsi_[-2:], expectedRSI[-2:])
+        self.assertEqual(close[:], expectedClose[-20:])
+
+    def testSeedChain(self):
+        values = [float(i) for i in range(100)]
+        ds = dataseries.NumericSequenceDataSeries(dataseries.AUTO_MAX_LEN)
+        sma = ma.SMA(ds, 10)
+        smaOfSMA = ma.SMA(sma, 5)
+        sma.seed(None, values)
+
+        expectedDS = dataseries.NumericSequenceDataSeries()
+        expectedSMA = ma.SMA(ma.SMA(expectedDS, 10), 5)
+        for value in values:
+            expectedDS.append(value)
+        self.assertAlmostEqual(smaOfSMA[-1], expectedSMA[-1])
+
+    def testReport(self):
+        feed = self.loadFeed(dataseries.AUTO_MAX_LEN)
+        ma.SMA(ma.SMA(feed["orcl"].getCloseDataSeries(), 20), 5)
+        report = sizing.report(feed)
+        names = [entry.getName() for entry in report.getEntries()]
+        self.assertEqual(names, [
+            "orcl", "orcl/adj_close", "orcl/close", "orcl/close/SMA", "orcl/close/SMA/SMA", "orcl/high", "orcl/low",
+            "orcl/open", "orcl/volume"
+        ])
+        self.assertEqual(report.getSlots(), 20 + 5 + 7 * dataseries.AUTO_MIN_LEN)
+        self.assertEqual(report.getSlotsSaved(), 9 * dataseries.DEFAULT_MAX_LEN - report.getSlots())
+        self.assertEqual(
+            report.getEntries()[2].getBytesSaved(),
+            (dataseries.DEFAULT_MAX_LEN - 20) * sizing.get_slot_size(feed["orcl"].getCloseDataSeries())
+        )
+        self.assertTrue(report.getBytesSaved() > 0)
+        self.assertIn("orcl/close/SMA/SMA", str(report))
+
+        report = sizing.report(self.loadFeed(None))
+        self.assertEqual(report.getSlotsSaved(), 0)
+        self.assertEqual(report.getBytesSaved(), 0)
@@ -18,12 +18,14 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
 import os
 
 from six.moves import xrange
 
 from . import common
 from . import feed_test
+from . import barfeed_test
 
 from pyalgotrade.barfeed import yahoofeed
 from pyalgotrade.barfeed import sqlitefeed
@@ -127,3 +129,115 @@ class SQLiteFeedTestCase(common.TestCase):
             self.assertEqual(len(barDS.getHighDataSeries()), 2)
             self.assertEqual(len(barDS.getLowDataSeries()), 2)
             self.assertEqual(len(barDS.getAdjCloseDataSeries()), 2)
+
+
+class SQLiteDatabaseTestCase(common.TestCase):
+    def testPragmas(self):
+        with common.TmpDir() as tmpPath:
+            db = sqlitefeed.Database(os.path.join(tmpPath, "bars.sqlite"), pragmas=sqlitefeed.BULK_PRAGMAS)
+            self.assertEqual(db.getPragma("journal_mode"), "wal")
+            self.assertEqual(db.getPragma("synchronous"), 1)
+            self.assertEqual(db.getPragma("cache_size"), -65536)
+            with self.assertRaisesRegexp(Exception, "Invalid pragma .*"):
+                db.setPragma("journal_mode", "wal; drop table bar")
+            db.disconnect()
+
+    def testBulkImport(self):
+        with common.TmpDir() as tmpPath:
+            db = sqlitefeed.Database(os.path.join(tmpPath, "bars.sqlite"), pragmas=sqlitefeed.BULK_PRAGMAS)
+            db.addBarsFromFeed(barfeed_test.build_mem_bar_feed(False), batchSize=7)
+
+            expected = barfeed_test.build_mem_bar_feed(False)
+            feed = sqlitefeed.Feed(os.path.join(tmpPath, "bars.sqlite"), bar.Frequency.DAY)
+            for i in range(1, 6):
+                feed.loadBars("inst-%d" % i)
+            for (dateTime, bars), (expectedDateTime, expectedBars) in zip(feed, expected):
+                self.assertEqual(dateTime.replace(tzinfo=None), expectedDateTime)
+                self.assertEqual(sorted(bars.getInstruments()), sorted(expectedBars.getInstruments()))
+                for instrument in bars.getInstruments():
+                    self.assertEqual(bars[instrument].getClose(), expectedBars[instrument].getClose())
+            self.assertEqual(len(feed["inst-1"]), 30)
+            feed.getDatabase().disconnect()
+            db.disconnect()
+
+    def testUpsert(self):
+        with common.TmpDir() as tmpPath:
+            db = sqlitefeed.Database(os.path.join(tmpPath, "bars.sqlite"))
+            dateTimes = [datetime.datetime(2001, 1, i) for i in range(1, 5)]
+            db.addBarsFromSequence("btc", [
+                bar.BasicBar(dateTime, 1, 1, 1, 1, 10, None, bar.Frequency.DAY) for dateTime in dateTimes[:3]
+            ], bar.Frequency.DAY)
+            # Replace one bar and add a new one.
+            db.addBarsFromSequence("BTC", [
+                bar.BasicBar(dateTime, 2, 2, 2, 2, 20, 2, bar.Frequency.DAY) for dateTime in dateTimes[2:]
+            ], bar.Frequency.DAY, batchSize=1)
+            db.addBar("btc", bar.BasicBar(dateTimes[0], 3, 3, 3, 3, 30, None, bar.Frequency.DAY), bar.Frequency.DAY)
+
+            bars = db.getBars("btc", bar.Frequency.DAY)
+            self.assertEqual([bar_.getDateTime().replace(tzinfo=None) for bar_ in bars], dateTimes)
+            self.assertEqual([bar_.getClose() for bar_ in bars], [3, 1, 2, 2])
+            self.assertEqual([bar_.getAdjClose() for bar_ in bars], [None, None, 2, 2])
+            self.assertEqual([bar_.getClose() for bar_ in db.iterBars("btc", bar.Frequency.DAY, chunkSize=1)], [3, 1, 2, 2])
+            db.disconnect()
+
+    def testTransactionRollback(self):
+        with common.TmpDir() as tmpPath:
+            db = sqlitefeed.Database(os.path.join(tmpPath, "bars.sqlite"))
+            dateTime = datetime.datetime(2001, 1, 1)
+            with self.assertRaisesRegexp(Exception, "Rollback"):
+                with db.transaction():
+                    with db.transaction():
+                        db.addBar("btc", bar.BasicBar(dateTime, 1, 1, 1, 1, 10, None, bar.Frequency.DAY), bar.Frequency.DAY)
+                    raise Exception("Rollback")
+            self.assertEqual(db.getBars("btc", bar.Frequency.DAY), [])
+
+            with db.transaction():
+                db.addBar("btc", bar.BasicBar(dateTime, 1, 1, 1, 1, 10, None, bar.Frequency.DAY), bar.Frequency.DAY)
+            self.assertEqual(len(db.getBars("btc", bar.Frequency.DAY)), 1)
+            db.disconnect()
+
+    def testMergedBars(self):
+        with common.TmpDir() as tmpPath:
+            dbFilePath = os.path.join(tmpPath, "bars.sqlite")
+            db = sqlitefeed.Database(dbFilePath)
+            db.addBarsFromFeed(barfeed_test.build_mem_bar_feed(False))
+            expected = [
+                (dateTime.replace(tzinfo=None), sorted(bars.getInstruments()))
+                for dateTime, bars in barfeed_test.build_mem_bar_feed(False)
+            ]
+
+            merged = [
+                (bars.getDateTime().replace(tzinfo=None), sorted(bars.getInstruments()))
+                for bars in db.iterMergedBars(["inst-%d" % i for i in range(1, 6)], bar.Frequency.DAY, chunkSize=4)
+            ]
+            self.assertEqual(merged, expected)
+            merged = list(db.iterMergedBars(
+                ["inst-2", "inst-3"], bar.Frequency.DAY, fromDateTime=datetime.datetime(2001, 1, 3),
+                toDateTime=datetime.datetime(2001, 1, 7)
+            ))
+            self.assertEqual([bars.getDateTime().day for bars in merged], [3, 4, 5, 7])
+            self.assertEqual(list(db.iterMergedBars([], bar.Frequency.DAY)), [])
+            db.disconnect()
+
+            for prefetch in [0, 2]:
+                feed = sqlitefeed.StreamingFeed(
+                    dbFilePath, bar.Frequency.DAY, ["inst-%d" % i for i in range(1, 6)], prefetch=prefetch
+                )
+                self.assertEqual([
+                    (dateTime.replace(tzinfo=None), sorted(bars.getInstruments())) for dateTime, bars in feed
+                ], expected)
+                self.assertTrue(feed.barsHaveAdjClose())
+                self.assertEqual(len(feed["inst-5"]), 6)
+                feed.reset()
+                self.assertEqual(len([bars for bars in feed]), 30)
+                feed.getDatabase().disconnect()
+
+    def testStreamingFeedBaseBarFeed(self):
+        with common.TmpDir() as tmpPath:
+            dbFilePath = os.path.join(tmpPath, "bars.sqlite")
+            db = sqlitefeed.Database(dbFilePath)
+            db.addBarsFromFeed(barfeed_test.build_mem_bar_feed(False))
+            db.disconnect()
+            feed = sqlitefeed.StreamingFeed(dbFilePath, bar.Frequency.DAY, ["inst-%d" % i for i in range(1, 6)])
+            barfeed_test.check_base_barfeed(self, feed, True)
+            feed.getDatabase().disconnect()
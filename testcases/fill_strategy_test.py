@@ -26,6 +26,7 @@ from . import broker_backtesting_test
 from pyalgotrade import broker
 from pyalgotrade.broker import fillstrategy
 from pyalgotrade.broker import backtesting
+from pyalgotrade.broker import slippage
 from pyalgotrade import bar
 
 
@@ -131,3 +132,38 @@ class DefaultStrategyTestCase(BaseTestCase):
             self.strategy.onOrderFilled(None, self.__getFilledMarketOrder(25, 11))
         self.assertEquals(self.strategy.getVolumeLeft()[BaseTestCase.TestInstrument], 1)
         self.assertEquals(self.strategy.getVolumeUsed()[BaseTestCase.TestInstrument], 24)
+
+    def testVolumeIsResetForEachBars(self):
+        self.strategy.onBars(None, self.barsBuilder.nextBars(11, 12, 4, 9, 100))
+        self.strategy.onOrderFilled(None, self.__getFilledMarketOrder(20, 11))
+        self.assertEquals(self.strategy.getVolumeLeft()[BaseTestCase.TestInstrument], 5)
+        self.assertEquals(self.strategy.getVolumeUsed()[BaseTestCase.TestInstrument], 20)
+
+        self.strategy.onBars(None, self.barsBuilder.nextBars(11, 12, 4, 9, 200))
+        self.assertEquals(self.strategy.getVolumeUsed()[BaseTestCase.TestInstrument], 0)
+        self.strategy.onOrderFilled(None, self.__getFilledMarketOrder(20, 11))
+        self.assertEquals(self.strategy.getVolumeLeft()[BaseTestCase.TestInstrument], 30)
+        self.assertEquals(self.strategy.getVolumeUsed()[BaseTestCase.TestInstrument], 20)
+
+    def testVolumeUsedIsKeptForInstrumentsWithoutBars(self):
+        self.strategy.onBars(None, self.barsBuilder.nextBars(11, 12, 4, 9, 100))
+        self.strategy.onOrderFilled(None, self.__getFilledMarketOrder(20, 11))
+        self.assertEquals(self.strategy.getVolumeUsed()[BaseTestCase.TestInstrument], 20)
+
+        otherBarsBuilder = broker_backtesting_test.BarsBuilder("ibm", bar.Frequency.MINUTE)
+        self.strategy.onBars(None, otherBarsBuilder.nextBars(11, 12, 4, 9, 100))
+        self.assertEquals(self.strategy.getVolumeUsed(), {BaseTestCase.TestInstrument: 20, "ibm": 0})
+        self.assertEquals(self.strategy.getVolumeLeft(), {"ibm": 25})
+
+    def testNoVolumeLimitWithSlippage(self):
+        brk = backtesting.Broker(1000, broker_backtesting_test.BarFeed(BaseTestCase.TestInstrument, bar.Frequency.MINUTE))
+        self.strategy.setVolumeLimit(None)
+        self.strategy.setSlippageModel(slippage.VolumeShareSlippage())
+        bars = self.barsBuilder.nextBars(10, 12, 4, 9, 100)
+        self.strategy.onBars(brk, bars)
+        order = brk.createMarketOrder(broker.Order.Action.BUY, BaseTestCase.TestInstrument, 10)
+        fillInfo = self.strategy.fillMarketOrder(brk, order, bars[BaseTestCase.TestInstrument])
+        self.assertEquals(fillInfo.getQuantity(), 10)
+        self.assertEquals(fillInfo.getPrice(), 10 * (1 + 0.1 * 0.1 ** 2))
+        self.assertEquals(self.strategy.getVolumeLeft(), {})
+        self.assertEquals(self.strategy.getVolumeUsed()[BaseTestCase.TestInstrument], 0)
@@ -0,0 +1,148 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import sys
+
+import numpy as np
+
+from . import common
+
+from pyalgotrade import memory
+from pyalgotrade import dataseries
+from pyalgotrade import plotter
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.stratanalyzer import returns
+from pyalgotrade.stratanalyzer import trades
+from pyalgotrade.technical import ma
+
+sys.path.append("samples")
+import sma_crossover
+
+
+def load_feed(maxLen=None):
+    ret = yahoofeed.Feed(maxLen=maxLen)
+    ret.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+    ret.addBarsFromCSV("aapl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+    return ret
+
+
+class GetSizeTestCase(common.TestCase):
+    def testContainers(self):
+        values = [float(i) for i in range(10)]
+        self.assertEqual(memory.get_size(values), sys.getsizeof(values) + 10 * sys.getsizeof(1.0))
+        # The same values are counted once.
+        self.assertEqual(memory.get_size([values, values]), sys.getsizeof([None, None]) + memory.get_size(values))
+        array = np.zeros(100)
+        self.assertGreaterEqual(memory.get_size({"array": array}), array.nbytes)
+        self.assertEqual(memory.get_size(None), 0)
+
+    def testDataSeries(self):
+        ds = dataseries.NumericSequenceDataSeries(100)
+        for i in range(10):
+            ds.append(float(i))
+        self.assertEqual(memory.get_dataseries_size(ds), 2 * 100 * 8 + 10 * memory.POINTER_SIZE)
+
+        ds = dataseries.SequenceDataSeries(100)
+        self.assertEqual(memory.get_dataseries_size(ds), 0)
+        for i in range(10):
+            ds.append("value")
+        self.assertEqual(memory.get_dataseries_size(ds), 10 * (2 * memory.POINTER_SIZE + sys.getsizeof("value")))
+
+
+class UsageTestCase(common.TestCase):
+    def testAddAndMerge(self):
+        usage = memory.Usage()
+        usage.add("a", "orcl", 1, 10)
+        usage.add("a", "orcl", 2, 20)
+        usage.add("b", None, 3, 30)
+        values = [1.5, 2.5]
+        usage.addObject("c", "aapl", values)
+        usage.addObject("c", "aapl", values)
+        self.assertEqual(usage.getComponents(), ["a", "b", "c"])
+        self.assertEqual(usage.getInstruments(), ["aapl", "orcl"])
+        self.assertEqual(usage.getCount("a"), 3)
+        self.assertEqual(usage.getBytes("a", "orcl"), 30)
+        self.assertEqual(usage.getCount("c"), 2)
+        self.assertEqual(usage.getBytes(instrument="aapl"), memory.get_size(values))
+
+        other = memory.Usage()
+        other.merge(usage)
+        other.add("b", None, 1, 1)
+        self.assertEqual(other.getCount(), usage.getCount() + 1)
+        self.assertEqual(other.getBytes("b"), 31)
+        self.assertIn("Total", str(other))
+
+    def testFeed(self):
+        feed = load_feed()
+        ma.SMA(ma.SMA(feed["orcl"].getCloseDataSeries(), 10), 5)
+        feed.loadAll()
+
+        usage = feed.getMemoryUsage()
+        self.assertEqual(usage.getComponents(), [memory.BARS, memory.COLUMNS, memory.INDICATORS])
+        self.assertEqual(usage.getInstruments(), ["aapl", "orcl"])
+        self.assertEqual(usage.getCount(memory.BARS, "orcl"), 252)
+        self.assertEqual(usage.getCount(memory.COLUMNS, "orcl"), 252 * 6)
+        self.assertEqual(usage.getCount(memory.INDICATORS, "orcl"), 252 * 2)
+        self.assertEqual(usage.getCount(memory.INDICATORS, "aapl"), 0)
+        self.assertEqual(
+            usage.getBytes(memory.COLUMNS, "orcl"), 6 * 252 * (2 * memory.POINTER_SIZE + memory.get_size(1.0))
+        )
+
+        # A smaller maxLen should show up in the usage.
+        smallFeed = load_feed(10)
+        smallFeed.loadAll()
+        smallUsage = smallFeed.getMemoryUsage()
+        self.assertEqual(smallUsage.getCount(memory.BARS, "orcl"), 10)
+        self.assertLess(smallUsage.getBytes(), usage.getBytes())
+
+
+class StrategyTestCase(common.TestCase):
+    def testStrategyAndTimeline(self):
+        feed = yahoofeed.Feed()
+        feed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        strat = sma_crossover.SMACrossOver(feed, "orcl", 20)
+        strat.attachAnalyzerEx(returns.Returns(), "returns")
+        strat.attachAnalyzer(trades.Trades())
+        plt = plotter.StrategyPlotter(strat)
+        timeline = memory.Timeline(strat, 50, plt)
+        usages = []
+        timeline.getSnapshotEvent().subscribe(lambda dateTime, usage: usages.append(usage))
+        strat.run()
+
+        usage = strat.getMemoryUsage(plt)
+        for component in [memory.BARS, memory.COLUMNS, memory.INDICATORS, "positions", "analyzers/returns",
+                          "analyzers/Trades", "plotter"]:
+            self.assertIn(component, usage.getComponents())
+            self.assertGreater(usage.getBytes(component), 0)
+        self.assertEqual(usage.getCount("analyzers/returns"), 252 * 2)
+        self.assertGreater(usage.getBytes("plotter", "orcl"), 0)
+        self.assertEqual(strat.getMemoryUsage().getBytes("plotter"), 0)
+
+        snapshots = timeline.getSnapshots()
+        self.assertEqual(len(snapshots), 252 // 50)
+        self.assertEqual(len(usages), len(snapshots))
+        self.assertEqual(snapshots[0][0], feed["orcl"][49].getDateTime())
+        totals = [total for _, total in timeline.getTotals()]
+        # Bars, returns and plotter values keep growing.
+        self.assertEqual(totals, sorted(totals))
+        self.assertEqual(snapshots[-1][1][memory.BARS], usages[-1].getBytes(memory.BARS))
+
+        with self.assertRaisesRegexp(Exception, "Invalid period"):
+            memory.Timeline(strat, 0)
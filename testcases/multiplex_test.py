@@ -0,0 +1,161 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+
+from . import common
+from . import smacrossover_strategy_test
+from . import strategy_test
+
+from pyalgotrade import bar
+from pyalgotrade import strategy
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.barfeed import membf
+from pyalgotrade.stratanalyzer import returns
+from pyalgotrade.stratanalyzer import trades
+from pyalgotrade.strategy import multiplex
+
+
+PARAMETERS = [
+    (smacrossover_strategy_test.MarketOrderStrategy, 10, 25),
+    (smacrossover_strategy_test.LimitOrderStrategy, 10, 25),
+    (smacrossover_strategy_test.MarketOrderStrategy, 5, 15),
+    (smacrossover_strategy_test.LimitOrderStrategy, 20, 40),
+]
+
+
+def load_feed():
+    ret = yahoofeed.Feed()
+    ret.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2001-yahoofinance.csv"))
+    return ret
+
+
+def build_strategy(feed, strategyClass, fastSMA, slowSMA):
+    ret = strategyClass(feed, fastSMA, slowSMA)
+    ret.attachAnalyzerEx(returns.Returns(), "returns")
+    ret.attachAnalyzerEx(trades.Trades(), "trades")
+    return ret
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+class ResampledStrategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed):
+        super(ResampledStrategy, self).__init__(barFeed)
+        self.resampledBars = []
+        self.resampleBarFeed(bar.Frequency.DAY, lambda bars: self.resampledBars.append(bars.getDateTime()))
+
+    def onBars(self, bars):
+        pass
+
+
+class ResampleOnStartStrategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed):
+        super(ResampleOnStartStrategy, self).__init__(barFeed)
+        self.resampledBars = []
+
+    def onStart(self):
+        self.resampleBarFeed(bar.Frequency.DAY, lambda bars: self.resampledBars.append(bars.getDateTime()))
+
+    def onBars(self, bars):
+        pass
+
+
+class RunnerTestCase(common.TestCase):
+    def testSameAsSeparateRuns(self):
+        expected = []
+        for params in PARAMETERS:
+            strat = build_strategy(load_feed(), *params)
+            strat.run()
+            expected.append(strat)
+
+        feed = load_feed()
+        strategies = [build_strategy(feed, *params) for params in PARAMETERS]
+        runner = multiplex.Runner(strategies)
+        runner.run()
+
+        self.assertEqual(runner.getFeed(), feed)
+        self.assertEqual(runner.getResults(), [strat.getResult() for strat in expected])
+        for actual, expected in zip(strategies, expected):
+            self.assertEqual(actual.getFinalValue(), expected.getFinalValue())
+            self.assertEqual(
+                list(actual.getNamedAnalyzer("returns").getCumulativeReturns()),
+                list(expected.getNamedAnalyzer("returns").getCumulativeReturns())
+            )
+            self.assertEqual(
+                list(actual.getNamedAnalyzer("trades").getAll()),
+                list(expected.getNamedAnalyzer("trades").getAll())
+            )
+        self.assertTrue(len(set(strat.getFinalValue() for strat in strategies)) > 1)
+
+    def testRunFunction(self):
+        feed = load_feed()
+        strategies = [build_strategy(feed, *params) for params in PARAMETERS[:2]]
+        self.assertEqual([round(result, 2) for result in multiplex.run(strategies)], [1000 - 22.7, 1000 + 32.7])
+
+    def testOptionalOverrides(self):
+        barFeed = strategy_test.StrategyTestCase().loadDailyBarFeed()
+        strategies = [strategy_test.TestStrategy(barFeed, 1000) for _ in range(2)]
+        multiplex.run(strategies)
+        for strat in strategies:
+            self.assertTrue(strat.onStartCalled)
+            self.assertTrue(strat.onFinishCalled)
+            self.assertFalse(strat.onIdleCalled)
+
+    def testResampledBarFeeds(self):
+        def build_feed():
+            ret = BarFeed(bar.Frequency.MINUTE)
+            begin = datetime.datetime(2011, 1, 1)
+            ret.addBarsFromSequence("inst", [
+                bar.BasicBar(begin + datetime.timedelta(hours=i), 10, 10, 10, 10, 10, None, bar.Frequency.MINUTE)
+                for i in range(72)
+            ])
+            return ret
+
+        expected = ResampledStrategy(build_feed())
+        expected.run()
+        self.assertEqual(len(expected.resampledBars), 2)
+
+        barFeed = build_feed()
+        strategies = [ResampledStrategy(barFeed) for _ in range(2)]
+        multiplex.run(strategies)
+        for strat in strategies:
+            self.assertEqual(strat.resampledBars, expected.resampledBars)
+
+        # Bar feeds resampled once the strategies started running.
+        barFeed = build_feed()
+        strategies = [ResampleOnStartStrategy(barFeed) for _ in range(2)]
+        multiplex.run(strategies)
+        for strat in strategies:
+            self.assertEqual(strat.resampledBars, expected.resampledBars)
+
+    def testErrors(self):
+        with self.assertRaisesRegexp(Exception, "No strategies to run"):
+            multiplex.Runner([])
+
+        with self.assertRaisesRegexp(Exception, "All strategies must use the same bar feed"):
+            multiplex.Runner([build_strategy(load_feed(), *params) for params in PARAMETERS])
+
+        runner = multiplex.Runner([strategy_test.TestStrategy(BarFeed(bar.Frequency.DAY), 1000)])
+        with self.assertRaisesRegexp(Exception, "Feed was empty"):
+            runner.run()
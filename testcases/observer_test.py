@@ -98,6 +98,9 @@ class RealtimeFeed(observer.Subject):
 
 
 class DispatcherTestCase(common.TestCase):
+    def buildDispatcher(self):
+        return dispatcher.Dispatcher()
+
     def test1NrtFeed(self):
         values = []
         now = datetime.datetime.now()
@@ -105,7 +108,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed = NonRealtimeFeed(copy.copy(datetimes))
         nrtFeed.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(nrtFeed)
         disp.run()
 
@@ -121,7 +124,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed2 = NonRealtimeFeed(copy.copy(datetimes2))
         nrtFeed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(nrtFeed1)
         disp.addSubject(nrtFeed2)
         disp.run()
@@ -137,7 +140,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed = RealtimeFeed(copy.copy(datetimes))
         nrtFeed.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(nrtFeed)
         disp.run()
 
@@ -153,7 +156,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed2 = RealtimeFeed(copy.copy(datetimes2))
         nrtFeed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(nrtFeed1)
         disp.addSubject(nrtFeed2)
         disp.run()
@@ -173,7 +176,7 @@ class DispatcherTestCase(common.TestCase):
         nrtFeed2 = NonRealtimeFeed(copy.copy(datetimes2))
         nrtFeed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(nrtFeed1)
         disp.addSubject(nrtFeed2)
         disp.run()
@@ -189,19 +192,19 @@ class DispatcherTestCase(common.TestCase):
         feed2 = RealtimeFeed([], 3)
         feed1 = RealtimeFeed([], 0)
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(feed3)
         disp.addSubject(feed2)
         disp.addSubject(feed1)
         self.assertEqual(disp.getSubjects(), [feed1, feed2, feed3])
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(feed1)
         disp.addSubject(feed2)
         disp.addSubject(feed3)
         self.assertEqual(disp.getSubjects(), [feed1, feed2, feed3])
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(feed3)
         disp.addSubject(feed4)
         disp.addSubject(feed2)
@@ -216,7 +219,7 @@ class DispatcherTestCase(common.TestCase):
         feed1.getEvent().subscribe(lambda x: values.append(x))
         feed2.getEvent().subscribe(lambda x: values.append(x))
 
-        disp = dispatcher.Dispatcher()
+        disp = self.buildDispatcher()
         disp.addSubject(feed2)
         disp.addSubject(feed1)
         self.assertEqual(disp.getSubjects(), [feed1, feed2])
@@ -224,6 +227,35 @@ class DispatcherTestCase(common.TestCase):
         # Check that although feed2 is realtime, feed1 was dispatched before.
         self.assertTrue(values[0] < values[1])
 
+    def testNrtFeedsInterleaved(self):
+        values = []
+        now = datetime.datetime.now()
+        feeds = []
+        for i in xrange(5):
+            datetimes = [now + datetime.timedelta(seconds=j) for j in xrange(i, 20, i + 1)]
+            feed = NonRealtimeFeed(datetimes)
+            feed.getEvent().subscribe(lambda x, i=i: values.append((x, i)))
+            feeds.append(feed)
+
+        disp = self.buildDispatcher()
+        dispatchedDateTimes = []
+        feeds[0].getEvent().subscribe(lambda x: dispatchedDateTimes.append(disp.getCurrentDateTime()))
+        for feed in feeds:
+            disp.addSubject(feed)
+        disp.run()
+
+        # Events are dispatched in datetime order and, for the same datetime, in the order subjects were added.
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(values), sum(len(xrange(i, 20, i + 1)) for i in xrange(5)))
+        self.assertEqual(dispatchedDateTimes, [now + datetime.timedelta(seconds=j) for j in xrange(20)])
+
+
+class HeapDispatcherTestCase(DispatcherTestCase):
+    def buildDispatcher(self):
+        ret = dispatcher.Dispatcher()
+        ret.setUseHeapScheduling(True)
+        return ret
+
 
 class EventTestCase(common.TestCase):
     def testEmitOrder(self):
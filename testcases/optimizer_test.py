@@ -18,13 +18,22 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
+import os
 import sys
 import logging
 
+from six.moves import cPickle
+
 from . import common
+from . import barfeed_test
 
+from pyalgotrade.optimizer import base
 from pyalgotrade.optimizer import local
+from pyalgotrade.optimizer import sharedbars
 from pyalgotrade import strategy
+from pyalgotrade import marketsession
+from pyalgotrade import bar
 from pyalgotrade.barfeed import yahoofeed
 
 sys.path.append("samples")
@@ -44,6 +53,23 @@ class FailingStrategy(strategy.BacktestingStrategy):
         raise Exception("oh no!")
 
 
+class ExitingStrategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed, instrument, smaPeriod):
+        super(ExitingStrategy, self).__init__(barFeed)
+
+    def onBars(self, bars):
+        os._exit(1)
+
+
+class ResultSinc(base.ResultSinc):
+    def __init__(self):
+        super(ResultSinc, self).__init__()
+        self.results = []
+
+    def onNewResult(self, result, parameters):
+        self.results.append((result, parameters.args))
+
+
 class OptimizerTestCase(common.TestCase):
     def testLocal(self):
         barFeed = yahoofeed.Feed()
@@ -62,3 +88,122 @@ class OptimizerTestCase(common.TestCase):
         barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
         res = local.run(FailingStrategy, barFeed, parameters_generator(instrument, 5, 100), logLevel=logging.DEBUG)
         self.assertIsNone(res)
+
+    def testResultsPerBatch(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        resultSinc = ResultSinc()
+        res = local.run_impl(
+            sma_crossover.SMACrossOver, barFeed, parameters_generator(instrument, 5, 24), 5, workerCount=2,
+            resultSinc=resultSinc
+        )
+        self.assertEquals(res.getParameters()[1], 20)
+        # The best result for each batch gets pushed.
+        self.assertEquals(len(resultSinc.results), 4)
+        self.assertEquals(max(resultSinc.results)[1], (instrument, 20))
+
+    def testWorkerDies(self):
+        barFeed = yahoofeed.Feed()
+        instrument = "orcl"
+        barFeed.addBarsFromCSV(instrument, common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+        checkInterval = local.WORKER_CHECK_INTERVAL
+        local.WORKER_CHECK_INTERVAL = 0.1
+        try:
+            with self.assertRaisesRegexp(Exception, "A worker process finished unexpectedly"):
+                local.run(ExitingStrategy, barFeed, parameters_generator(instrument, 5, 10), workerCount=1)
+        finally:
+            local.WORKER_CHECK_INTERVAL = checkInterval
+
+
+class SharedBarsTestCase(common.TestCase):
+    def assertSameBars(self, expectedFeed, barFeed):
+        expected = [(dateTime, bars) for dateTime, bars in expectedFeed]
+        actual = [(dateTime, bars) for dateTime, bars in barFeed]
+        self.assertEqual(len(expected), len(actual))
+        for (expectedDateTime, expectedBars), (dateTime, bars) in zip(expected, actual):
+            self.assertEqual(dateTime, expectedDateTime)
+            self.assertEqual(dateTime.tzinfo is None, expectedDateTime.tzinfo is None)
+            self.assertEqual(bars.getInstruments(), expectedBars.getInstruments())
+            for instrument in bars.getInstruments():
+                bar_ = bars[instrument]
+                expectedBar = expectedBars[instrument]
+                self.assertEqual(bar_.getDateTime(), expectedBar.getDateTime())
+                self.assertEqual(bar_.getOpen(), expectedBar.getOpen())
+                self.assertEqual(bar_.getHigh(), expectedBar.getHigh())
+                self.assertEqual(bar_.getLow(), expectedBar.getLow())
+                self.assertEqual(bar_.getClose(), expectedBar.getClose())
+                self.assertEqual(bar_.getVolume(), expectedBar.getVolume())
+                self.assertEqual(bar_.getAdjClose(), expectedBar.getAdjClose())
+                self.assertEqual(bar_.getExtraColumns(), expectedBar.getExtraColumns())
+        self.assertTrue(barFeed.eof())
+        self.assertIsNone(barFeed.peekDateTime())
+
+    def testLocalizedBars(self):
+        def build_feed():
+            ret = yahoofeed.Feed()
+            ret.addBarsFromCSV(
+                "orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"), marketsession.USEquities.timezone
+            )
+            return ret
+
+        with common.TmpDir() as tmpPath:
+            sharedBars = sharedbars.publish(build_feed(), tmpPath)
+            self.assertEqual(sharedBars.getInstruments(), ["orcl"])
+            self.assertTrue(sharedBars.barsHaveAdjClose())
+            barFeed = sharedBars.getBarFeed()
+            self.assertEqual(barFeed.peekDateTime(), build_feed().peekDateTime())
+            self.assertSameBars(build_feed(), barFeed)
+
+    def testMultipleInstruments(self):
+        with common.TmpDir() as tmpPath:
+            sharedBars = sharedbars.publish(barfeed_test.build_mem_bar_feed(False), tmpPath)
+            self.assertFalse(sharedBars.barsHaveAdjClose())
+            self.assertEqual(sorted(sharedBars.getInstruments()), ["inst-%d" % i for i in range(1, 6)])
+            barFeed = sharedBars.getBarFeed()
+            self.assertSameBars(barfeed_test.build_mem_bar_feed(False), barFeed)
+
+            # Go through the bars again after a reset.
+            barFeed.reset()
+            self.assertSameBars(barfeed_test.build_mem_bar_feed(False), barFeed)
+
+            barfeed_test.check_base_barfeed(self, sharedBars.getBarFeed(), False)
+
+    def testPickle(self):
+        with common.TmpDir() as tmpPath:
+            sharedBars = sharedbars.publish(barfeed_test.build_mem_bar_feed(False), tmpPath)
+            sharedBars.getBarFeed()
+            # Only the location of the bars gets pickled.
+            serialized = cPickle.dumps(sharedBars)
+            self.assertNotIn(b"BarColumns", serialized)
+            sharedBars = cPickle.loads(serialized)
+            self.assertEqual(sharedBars.getDataDir(), tmpPath)
+            self.assertSameBars(barfeed_test.build_mem_bar_feed(False), sharedBars.getBarFeed())
+
+    def testExtraColumnsAndAdjClose(self):
+        def build_feed():
+            ret = barfeed_test.TestMemBarFeed(bar.Frequency.DAY)
+            dateTimes = [datetime.datetime(2001, 1, i) for i in range(1, 4)]
+            # Only the first instrument has adjusted closes, and only the second one has extra columns.
+            ret.addBarsFromSequence("inst-1", [
+                bar.BasicBar(dateTime, 1, 1, 1, 1, 10, 1, bar.Frequency.DAY) for dateTime in dateTimes
+            ])
+            ret.addBarsFromSequence("inst-2", [
+                bar.BasicBar(dateTime, 1, 1, 1, 1, 10, None, bar.Frequency.DAY, {"signal": i, "name": "bar-%d" % i})
+                for i, dateTime in enumerate(dateTimes)
+            ])
+            return ret
+
+        with common.TmpDir() as tmpPath:
+            sharedBars = sharedbars.publish(build_feed(), tmpPath)
+            self.assertFalse(sharedBars.barsHaveAdjClose())
+            sharedBars = cPickle.loads(cPickle.dumps(sharedBars))
+            self.assertSameBars(build_feed(), sharedBars.getBarFeed())
+
+            barFeed = sharedBars.getBarFeed()
+            dateTime, bars = next(iter(barFeed))
+            self.assertEqual(bars["inst-1"].getExtraColumns(), {})
+            self.assertEqual(bars["inst-2"].getExtraColumns(), {"signal": 0, "name": "bar-0"})
+            # Bars keep their extra columns when pickled.
+            unpickled = cPickle.loads(cPickle.dumps(bars["inst-2"]))
+            self.assertEqual(unpickled.getExtraColumns(), {"signal": 0, "name": "bar-0"})
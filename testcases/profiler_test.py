@@ -0,0 +1,137 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import sys
+
+from . import common
+
+from pyalgotrade import profiler
+from pyalgotrade import observer
+from pyalgotrade import dispatcher
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.broker import fillstrategy
+from pyalgotrade.stratanalyzer import returns
+
+sys.path.append("samples")
+import sma_crossover
+
+
+def build_strategy():
+    feed = yahoofeed.Feed()
+    feed.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"))
+    ret = sma_crossover.SMACrossOver(feed, "orcl", 20)
+    ret.attachAnalyzer(returns.Returns())
+    return ret
+
+
+class ProfilerTestCase(common.TestCase):
+    def testStrategy(self):
+        emit = observer.Event.emit
+        dispatchSubject = dispatcher.Dispatcher.__dict__["_Dispatcher__dispatchSubject"]
+        fillMarketOrder = fillstrategy.DefaultStrategy.fillMarketOrder
+
+        expected = build_strategy()
+        expected.run()
+        strat = build_strategy()
+        with profiler.Profiler() as prof:
+            strat.run()
+        self.assertEqual(strat.getResult(), expected.getResult())
+
+        # Everything is back in place.
+        self.assertEqual(observer.Event.emit, emit)
+        self.assertEqual(dispatcher.Dispatcher.__dict__["_Dispatcher__dispatchSubject"], dispatchSubject)
+        self.assertEqual(fillstrategy.DefaultStrategy.fillMarketOrder, fillMarketOrder)
+        self.assertFalse(hasattr(observer.Event, "_profilerCall"))
+
+        stats = prof.getStats()
+        for name in [
+            "Feed.dispatch", "Broker.dispatch", "Broker.onBars", "SMACrossOver.__onBars", "SMA.__onNewValue",
+            "ReturnsAnalyzerBase.beforeOnBars", "DefaultStrategy.onBars", "DefaultStrategy.fillMarketOrder"
+        ]:
+            self.assertIn(name, stats)
+        self.assertEqual(stats["Feed.dispatch"].getCalls(), 252)
+        self.assertEqual(stats["SMA.__onNewValue"].getCalls(), 252)
+        for handlerStats in stats.values():
+            self.assertGreaterEqual(handlerStats.getCumulativeTime(), handlerStats.getOwnTime())
+        # The feed dispatch includes the strategy, which includes the indicator.
+        self.assertGreater(stats["Feed.dispatch"].getCumulativeTime(), stats["SMACrossOver.__onBars"].getCumulativeTime())
+        self.assertLess(stats["Feed.dispatch"].getOwnTime(), stats["Feed.dispatch"].getCumulativeTime())
+
+        self.assertEqual(prof.getIterations(), 253)
+        self.assertGreater(prof.getEventCount(), 252 * 3)
+        self.assertGreater(prof.getEventsPerSecond(), 0)
+        self.assertEqual(prof.getTop(1)[0].getName(), "Feed.dispatch")
+        self.assertEqual(len(prof.getTop(3, "own")), 3)
+        self.assertIn("Feed.dispatch", prof.getReport())
+        with self.assertRaisesRegexp(Exception, "Invalid sortBy value"):
+            prof.getTop(sortBy="invalid")
+
+    def testExceptions(self):
+        event = observer.Event()
+
+        def handler():
+            raise Exception("Handler failed")
+        event.subscribe(handler)
+
+        prof = profiler.Profiler()
+        prof.start()
+        try:
+            with self.assertRaisesRegexp(Exception, "A profiler is already running"):
+                profiler.Profiler().start()
+            with self.assertRaisesRegexp(Exception, "Handler failed"):
+                event.emit()
+            with self.assertRaisesRegexp(Exception, "Handler failed"):
+                event.emit()
+        finally:
+            prof.stop()
+        handlerStats = [stats for name, stats in prof.getStats().items() if name.endswith("handler")]
+        self.assertEqual(len(handlerStats), 1)
+        self.assertEqual(handlerStats[0].getCalls(), 2)
+
+        # Profiling can be resumed.
+        prof.start()
+        event.unsubscribe(handler)
+        event.subscribe(lambda: None)
+        event.emit()
+        prof.stop()
+        self.assertEqual(prof.getEventCount(), 3)
+
+    def testPatchingFails(self):
+        emit = observer.Event.emit
+        dispatchSubject = dispatcher.Dispatcher.__dict__["_Dispatcher__dispatchSubject"]
+
+        def get_subclasses(cls):
+            raise Exception("Patching failed")
+
+        getSubclasses = profiler._get_subclasses
+        profiler._get_subclasses = get_subclasses
+        try:
+            with self.assertRaisesRegexp(Exception, "Patching failed"):
+                profiler.Profiler().start()
+        finally:
+            profiler._get_subclasses = getSubclasses
+
+        # The methods patched before the failure were restored and no profiler was left running.
+        self.assertEqual(observer.Event.emit, emit)
+        self.assertEqual(dispatcher.Dispatcher.__dict__["_Dispatcher__dispatchSubject"], dispatchSubject)
+        self.assertFalse(hasattr(observer.Event, "_profilerCall"))
+        self.assertIsNone(profiler._active)
+        with profiler.Profiler():
+            pass
@@ -0,0 +1,289 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import datetime
+import os
+import time
+
+from . import common
+from . import barfeed_test
+from . import feed_test
+
+from pyalgotrade.barfeed import streamingfeed
+from pyalgotrade.barfeed import yahoofeed
+from pyalgotrade.barfeed import ninjatraderfeed
+from pyalgotrade.barfeed import sqlitefeed
+from pyalgotrade.barfeed import columnarfeed
+from pyalgotrade import bar
+from pyalgotrade import marketsession
+
+
+def load_yahoo_feed():
+    ret = yahoofeed.Feed()
+    ret.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"), marketsession.USEquities.timezone)
+    ret.addBarsFromCSV("orcl", common.get_data_file_path("orcl-2001-yahoofinance.csv"), marketsession.USEquities.timezone)
+    return ret
+
+
+def yahoo_row_parser():
+    return yahoofeed.RowParser(None, bar.Frequency.DAY, marketsession.USEquities.timezone)
+
+
+def build_streaming_feed(prefetch=0):
+    # Same bars as barfeed_test.build_mem_bar_feed.
+    ret = streamingfeed.Feed(bar.Frequency.DAY, prefetch=prefetch)
+    begin = datetime.datetime(2001, 1, 1)
+    for i in range(1, 6):
+        bars = []
+        for j in range(0, 30, i):
+            dateTime = begin + datetime.timedelta(days=j)
+            bars.append(bar.BasicBar(dateTime, j, j, j, j, i, None, bar.Frequency.DAY))
+        ret.addCursor("inst-%d" % i, streamingfeed.SequenceCursor(bars))
+    return ret
+
+
+def check_same_bars(testCase, expectedDS, actualDS):
+    testCase.assertEqual(len(expectedDS), len(actualDS))
+    for expected, actual in zip(expectedDS, actualDS):
+        testCase.assertEqual(expected.getDateTime(), actual.getDateTime())
+        testCase.assertEqual(expected.getOpen(), actual.getOpen())
+        testCase.assertEqual(expected.getHigh(), actual.getHigh())
+        testCase.assertEqual(expected.getLow(), actual.getLow())
+        testCase.assertEqual(expected.getClose(), actual.getClose())
+        testCase.assertEqual(expected.getVolume(), actual.getVolume())
+        testCase.assertEqual(expected.getAdjClose(), actual.getAdjClose())
+
+
+def consume(feed):
+    for dateTime, bars in feed:
+        pass
+
+
+class StreamingFeedTestCase(common.TestCase):
+    def testBaseFeedInterface(self):
+        feed = streamingfeed.Feed(bar.Frequency.DAY)
+        feed.addBarsFromCSV(
+            "orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"), yahoo_row_parser(), haveAdjClose=True
+        )
+        feed_test.tstBaseFeedInterface(self, feed)
+
+    def testBaseBarFeed(self):
+        check = barfeed_test.check_base_barfeed
+        check(self, build_streaming_feed(), False)
+
+    def testSameAsMemBarFeed(self):
+        expected = [(dateTime, bars.getInstruments()) for dateTime, bars in barfeed_test.build_mem_bar_feed(False)]
+        feed = build_streaming_feed()
+        self.assertEqual([(dateTime, bars.getInstruments()) for dateTime, bars in feed], expected)
+        self.assertTrue(feed.eof())
+        self.assertEqual(feed.peekDateTime(), None)
+        self.assertEqual(len(feed["inst-1"]), 30)
+        self.assertEqual(len(feed["inst-5"]), 6)
+
+    def testReset(self):
+        feed = build_streaming_feed()
+        consume(feed)
+        lastDateTime = feed.getCurrentDateTime()
+        feed.reset()
+        self.assertFalse(feed.eof())
+        self.assertEqual(feed.peekDateTime(), datetime.datetime(2001, 1, 1))
+        consume(feed)
+        self.assertEqual(feed.getCurrentDateTime(), lastDateTime)
+
+    def testDescendingCSV(self):
+        # Yahoo! Finance files are sorted in descending order.
+        yahooFeed = load_yahoo_feed()
+        feed = streamingfeed.Feed(bar.Frequency.DAY)
+        for year in [2000, 2001]:
+            feed.addBarsFromCSV(
+                "orcl-%d" % year, common.get_data_file_path("orcl-%d-yahoofinance.csv" % year), yahoo_row_parser(),
+                haveAdjClose=True
+            )
+        self.assertTrue(feed.barsHaveAdjClose())
+        consume(feed)
+        yahooFeed.loadAll()
+        expected = yahooFeed["orcl"]
+        check_same_bars(self, expected[:252], feed["orcl-2000"])
+        check_same_bars(self, expected[252:], feed["orcl-2001"])
+
+    def testAscendingCSV(self):
+        ntFeed = ninjatraderfeed.Feed(ninjatraderfeed.Frequency.MINUTE)
+        ntFeed.addBarsFromCSV("spy", common.get_data_file_path("nt-spy-minute-2011.csv"))
+        ntFeed.loadAll()
+
+        feed = streamingfeed.Feed(bar.Frequency.MINUTE)
+        rowParser = ninjatraderfeed.RowParser(bar.Frequency.MINUTE, None, marketsession.USEquities.timezone)
+        feed.addBarsFromCSV("spy", common.get_data_file_path("nt-spy-minute-2011.csv"), rowParser)
+        self.assertFalse(feed.barsHaveAdjClose())
+        consume(feed)
+        check_same_bars(self, ntFeed["spy"], feed["spy"])
+
+    def testDescendingCSVSmallBlocks(self):
+        with common.TmpDir() as tmpPath:
+            path = os.path.join(tmpPath, "bars.csv")
+            with open(path, "w") as f:
+                f.write("Date,Open,High,Low,Close,Volume,Adj Close\n")
+                for day in range(28, 0, -1):
+                    f.write("2000-01-%02d,%d,%d,%d,%d,1,%d\n" % (day, day, day, day, day, day))
+            lines = list(streamingfeed.iterate_lines_backwards(path, blockSize=7))
+            self.assertEqual(lines[0], "")
+            self.assertEqual(lines[1], "2000-01-01,1,1,1,1,1,1")
+            self.assertEqual(lines[-1], "Date,Open,High,Low,Close,Volume,Adj Close")
+            self.assertEqual(len(lines), 30)
+
+            cursor = streamingfeed.CSVCursor(path, yahoo_row_parser(), haveAdjClose=True)
+            self.assertEqual([bar_.getClose() for bar_ in cursor.open()], list(range(1, 29)))
+
+    def testBarFilter(self):
+        feed = streamingfeed.Feed(bar.Frequency.DAY)
+        barFilter = yahoofeed.csvfeed.DateRangeFilter(
+            marketsession.USEquities.timezone.localize(datetime.datetime(2000, 3, 1)),
+            marketsession.USEquities.timezone.localize(datetime.datetime(2000, 3, 31))
+        )
+        feed.addBarsFromCSV(
+            "orcl", common.get_data_file_path("orcl-2000-yahoofinance.csv"), yahoo_row_parser(), barFilter
+        )
+        consume(feed)
+        self.assertEqual(len(feed["orcl"]), 23)
+        self.assertEqual(feed["orcl"][0].getDateTime().date(), datetime.date(2000, 3, 1))
+        self.assertEqual(feed["orcl"][-1].getDateTime().date(), datetime.date(2000, 3, 31))
+
+    def testDatabaseCursors(self):
+        yahooFeed = load_yahoo_feed()
+        yahooFeed.loadAll()
+        with common.TmpDir() as tmpPath:
+            sqliteDB = sqlitefeed.Database(os.path.join(tmpPath, "bars.sqlite"))
+            sqliteDB.addBarsFromFeed(load_yahoo_feed())
+            columnarDB = columnarfeed.Database(tmpPath)
+            columnarDB.addBarsFromFeed(load_yahoo_feed())
+
+            feed = streamingfeed.Feed(bar.Frequency.DAY)
+            feed.addCursor("sqlite", streamingfeed.SQLiteCursor(
+                sqliteDB, "orcl", bar.Frequency.DAY, marketsession.USEquities.timezone, chunkSize=100
+            ))
+            feed.addCursor("columnar", streamingfeed.ColumnarCursor(
+                columnarDB, "orcl", bar.Frequency.DAY, marketsession.USEquities.timezone, chunkSize=100
+            ))
+            for dateTime, bars in feed:
+                self.assertEqual(sorted(bars.getInstruments()), ["columnar", "sqlite"])
+            check_same_bars(self, yahooFeed["orcl"], feed["sqlite"])
+            check_same_bars(self, yahooFeed["orcl"], feed["columnar"])
+            sqliteDB.disconnect()
+
+    def testDuplicateBars(self):
+        feed = streamingfeed.Feed(bar.Frequency.DAY)
+        dateTime = datetime.datetime(2001, 1, 1)
+        feed.addCursor("orcl", streamingfeed.SequenceCursor([
+            bar.BasicBar(dateTime, 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+            bar.BasicBar(dateTime, 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+        ]))
+        with self.assertRaisesRegexp(Exception, "Duplicate bars found for.*"):
+            consume(feed)
+
+    def testErrors(self):
+        feed = build_streaming_feed()
+        with self.assertRaisesRegexp(Exception, "A cursor for inst-1 was already added"):
+            feed.addCursor("inst-1", streamingfeed.SequenceCursor([]))
+        feed.start()
+        with self.assertRaisesRegexp(Exception, "Can't add more bars once you started consuming bars"):
+            feed.addCursor("inst-6", streamingfeed.SequenceCursor([]))
+
+        with common.TmpDir() as tmpPath:
+            cursor = streamingfeed.ColumnarCursor(columnarfeed.Database(tmpPath), "orcl", bar.Frequency.DAY)
+            with self.assertRaisesRegexp(Exception, "There are no bars for orcl"):
+                cursor.open()
+
+
+class PrefetchTestCase(common.TestCase):
+    def testSameAsWithoutPrefetch(self):
+        expected = [(dateTime, bars.getInstruments()) for dateTime, bars in build_streaming_feed()]
+        feed = build_streaming_feed(prefetch=2)
+        self.assertEqual([(dateTime, bars.getInstruments()) for dateTime, bars in feed], expected)
+        self.assertTrue(feed.eof())
+
+        # Go through the bars again after a reset.
+        feed.reset()
+        self.assertEqual(feed.peekDateTime(), datetime.datetime(2001, 1, 1))
+        self.assertEqual([(dateTime, bars.getInstruments()) for dateTime, bars in feed], expected)
+
+    def testCSVAndSQLite(self):
+        yahooFeed = load_yahoo_feed()
+        yahooFeed.loadAll()
+        with common.TmpDir() as tmpPath:
+            sqliteDB = sqlitefeed.Database(os.path.join(tmpPath, "bars.sqlite"))
+            sqliteDB.addBarsFromFeed(load_yahoo_feed())
+
+            feed = streamingfeed.Feed(bar.Frequency.DAY, prefetch=1)
+            feed.addCursor("sqlite", streamingfeed.SQLiteCursor(
+                sqliteDB, "orcl", bar.Frequency.DAY, marketsession.USEquities.timezone, chunkSize=100
+            ))
+            feed.addBarsFromCSV(
+                "csv", common.get_data_file_path("orcl-2000-yahoofinance.csv"), yahoo_row_parser(), haveAdjClose=True
+            )
+            consume(feed)
+            check_same_bars(self, yahooFeed["orcl"], feed["sqlite"])
+            self.assertEqual(len(feed["csv"]), 252)
+            sqliteDB.disconnect()
+
+    def testBackpressure(self):
+        produced = []
+
+        def values():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        prefetcher = streamingfeed.Prefetcher(values(), 2, batchSize=10)
+        self.assertEqual(prefetcher.next(), 0)
+        # At most one batch being consumed, two in the queue and one waiting to be put.
+        time.sleep(0.2)
+        self.assertLessEqual(len(produced), 40)
+        self.assertEqual([prefetcher.next() for _ in range(999)], list(range(1, 1000)))
+        self.assertEqual(prefetcher.next(), None)
+        self.assertEqual(prefetcher.next(), None)
+        prefetcher.stop()
+
+    def testStopWhileBlocked(self):
+        prefetcher = streamingfeed.Prefetcher(iter(range(1000)), 1, batchSize=1)
+        self.assertEqual(prefetcher.next(), 0)
+        prefetcher.stop()
+
+    def testErrorsAreRaisedInOrder(self):
+        def values():
+            for i in range(5):
+                yield i
+            raise Exception("Parse error")
+
+        prefetcher = streamingfeed.Prefetcher(values(), 1, batchSize=2)
+        self.assertEqual([prefetcher.next() for _ in range(5)], list(range(5)))
+        with self.assertRaisesRegexp(Exception, "Parse error"):
+            prefetcher.next()
+        self.assertEqual(prefetcher.next(), None)
+        prefetcher.stop()
+
+    def testDuplicateBars(self):
+        feed = streamingfeed.Feed(bar.Frequency.DAY, prefetch=1)
+        dateTime = datetime.datetime(2001, 1, 1)
+        feed.addCursor("orcl", streamingfeed.SequenceCursor([
+            bar.BasicBar(dateTime, 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+            bar.BasicBar(dateTime, 1, 1, 1, 1, 1, None, bar.Frequency.DAY),
+        ]))
+        with self.assertRaisesRegexp(Exception, "Duplicate bars found for.*"):
+            consume(feed)
@@ -0,0 +1,129 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import numpy as np
+
+from . import common
+from . import broker_backtesting_test
+
+from pyalgotrade import strategy
+from pyalgotrade.technical import crosssection
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import stats
+from pyalgotrade.technical import roc
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import highlow
+
+
+INSTRUMENTS = ["inst-%d" % i for i in range(5)]
+
+# Cross-sectional indicator class, streaming indicator class and parameters.
+INDICATORS = [
+    (crosssection.SMA, ma.SMA, (10, )),
+    (crosssection.EMA, ma.EMA, (10, )),
+    (crosssection.StdDev, stats.StdDev, (10, )),
+    (crosssection.StdDev, stats.StdDev, (10, 1)),
+    (crosssection.ZScore, stats.ZScore, (10, )),
+    (crosssection.RateOfChange, roc.RateOfChange, (5, )),
+    (crosssection.RSI, rsi.RSI, (14, )),
+    (crosssection.High, highlow.High, (10, )),
+    (crosssection.Low, highlow.Low, (10, )),
+]
+
+
+class ReaderStrategy(strategy.BacktestingStrategy):
+    # Builds the indicators after subscribing to the bar feed, and reads them on every bar.
+    def __init__(self, barFeed, useAdjustedValues):
+        super(ReaderStrategy, self).__init__(barFeed)
+        self.setUseAdjustedValues(useAdjustedValues)
+        self.engine = crosssection.Engine(barFeed)
+        self.indicators = []
+        for crossSectionalClass, streamingClass, params in INDICATORS:
+            self.indicators.append((
+                crossSectionalClass(self.engine, *params),
+                dict((instrument, streamingClass(barFeed[instrument].getPriceDataSeries(), *params)) for instrument in INSTRUMENTS)
+            ))
+        self.checks = 0
+
+    def onBars(self, bars):
+        for crossSectional, streaming in self.indicators:
+            values = crossSectional.getValues()
+            for instrument in INSTRUMENTS:
+                expected = streaming[instrument][-1] if len(streaming[instrument]) else None
+                actual = crossSectional.getValue(instrument)
+                position = self.engine.getInstrumentPosition(instrument)
+                if expected is None:
+                    assert actual is None, (crossSectional, instrument, actual)
+                    assert np.isnan(values[position])
+                else:
+                    assert abs(actual - expected) < 1e-9, (crossSectional, instrument, actual, expected)
+                    assert values[position] == actual
+                    self.checks += 1
+
+
+class CrossSectionTestCase(common.TestCase):
+    def testSameAsStreaming(self):
+        for useAdjustedValues in [False, True]:
+            barFeed = broker_backtesting_test.build_random_bar_feed(INSTRUMENTS, 1)
+            strat = ReaderStrategy(barFeed, useAdjustedValues)
+            strat.run()
+            self.assertTrue(strat.checks > 4000)
+            self.assertEqual(strat.engine.getInstruments(), INSTRUMENTS)
+
+    def testNewInstruments(self):
+        # More instruments than the initial capacity, that get added as they show up in the bars.
+        instruments = ["inst-%d" % i for i in range(crosssection.INITIAL_CAPACITY * 2 + 1)]
+        barFeed = broker_backtesting_test.build_random_bar_feed(instruments, 1)
+        engine = crosssection.Engine(broker_backtesting_test.RandomBarFeed(barFeed.getFrequency()))
+        high = crosssection.High(engine, 2)
+        volumes = crosssection.SMA(crosssection.Engine(barFeed, lambda bar: bar.getVolume()), 2)
+        self.assertEqual(engine.getInstruments(), [])
+
+        lastValues = {}
+        for dateTime, bars in barFeed:
+            engine.getBarFeed().getNewValuesEvent().emit(dateTime, bars)
+            for instrument in bars.getInstruments():
+                bar = bars[instrument]
+                if instrument in lastValues:
+                    prevClose, prevVolume = lastValues[instrument]
+                    self.assertEqual(high.getValue(instrument), max(prevClose, bar.getClose()))
+                    self.assertEqual(volumes.getValue(instrument), (prevVolume + bar.getVolume()) / 2.0)
+                else:
+                    self.assertEqual(high.getValue(instrument), None)
+                    self.assertEqual(volumes.getValue(instrument), None)
+                lastValues[instrument] = (bar.getClose(), bar.getVolume())
+        self.assertEqual(sorted(engine.getInstruments()), sorted(instruments))
+        self.assertEqual(engine.getCurrentDateTime(), barFeed.getCurrentDateTime())
+        self.assertEqual(len(high.getValues()), len(instruments))
+        self.assertEqual(high.getValue("unknown"), None)
+        self.assertEqual(len(high.getValuesDict()), len(instruments))
+
+    def testRanking(self):
+        barFeed = broker_backtesting_test.build_random_bar_feed(INSTRUMENTS, 1)
+        engine = crosssection.Engine(barFeed)
+        rateOfChange = crosssection.RateOfChange(engine, 20)
+        barFeed.start()
+        while not barFeed.eof():
+            barFeed.dispatch()
+        self.assertEqual(len(rateOfChange.getValuesDict()), len(INSTRUMENTS))
+        values = rateOfChange.getValues()
+        ranking = [engine.getInstruments()[i] for i in np.argsort(-values)]
+        valuesDict = rateOfChange.getValuesDict()
+        self.assertEqual(ranking, sorted(valuesDict, key=lambda instrument: -valuesDict[instrument]))
@@ -0,0 +1,127 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+import random
+
+from . import common
+
+from pyalgotrade import dataseries
+from pyalgotrade.technical import fusion
+from pyalgotrade.technical import bollinger
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import roc
+from pyalgotrade.technical import stats
+
+
+def build_chain(ds, maxLen=None):
+    sma = ma.SMA(ds, 5, maxLen=maxLen)
+    rateOfChange = roc.RateOfChange(sma, 3, maxLen=maxLen)
+    zScore = stats.ZScore(rateOfChange, 10, maxLen=maxLen)
+    return sma, rateOfChange, zScore
+
+
+def random_values(count):
+    rnd = random.Random(0)
+    return [rnd.uniform(90, 110) if rnd.random() > 0.05 else None for _ in range(count)]
+
+
+class FusionTestCase(common.TestCase):
+    def assertSameValues(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        self.assertEqual(list(actual.getDateTimes()), list(expected.getDateTimes()))
+        self.assertEqual(list(actual[:]), list(expected[:]))
+
+    def testChain(self):
+        for maxLen in [None, 7]:
+            expectedDS = dataseries.SequenceDataSeries()
+            expected = build_chain(expectedDS, maxLen)
+            ds = dataseries.SequenceDataSeries()
+            actual = build_chain(ds, maxLen)
+            fused = fusion.fuse([actual[-1]])
+            self.assertEqual(fused.getSource(), ds)
+            self.assertEqual(fused.getFilters(), list(actual))
+            self.assertEqual(fused.getLazyFilters(), list(actual[:2]))
+            self.assertEqual(ds.getNewValueEvent().getHandlerCount(), 1)
+
+            for value in random_values(200):
+                expectedDS.append(value)
+                ds.append(value)
+                self.assertEqual(actual[-1][-1], expected[-1][-1])
+            for actualFilter, expectedFilter in zip(actual, expected):
+                self.assertSameValues(actualFilter, expectedFilter)
+
+            # Lazy filters get values appended only when read.
+            for value in random_values(50):
+                expectedDS.append(value)
+                ds.append(value)
+                self.assertEqual(actual[0][-1], expected[0][-1])
+                self.assertEqual(len(actual[1]), len(expected[1]))
+            for actualFilter, expectedFilter in zip(actual, expected):
+                self.assertSameValues(actualFilter, expectedFilter)
+                self.assertTrue(type(actualFilter) is type(expectedFilter))
+
+    def testDAG(self):
+        expectedDS = dataseries.SequenceDataSeries()
+        expectedSMA = ma.SMA(expectedDS, 5)
+        expected = [expectedSMA, stats.StdDev(expectedDS, 5), stats.ZScore(expectedSMA, 5), ma.EMA(expectedSMA, 5)]
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 5)
+        actual = [sma, stats.StdDev(ds, 5), stats.ZScore(sma, 5), ma.EMA(sma, 5)]
+        fused = fusion.fuse(actual[1:], materialize=[sma])
+        self.assertEqual(fused.getFilters(), [actual[1], sma, actual[2], actual[3]])
+        self.assertEqual(fused.getLazyFilters(), [])
+
+        for value in random_values(100):
+            expectedDS.append(value)
+            ds.append(value)
+        for actualFilter, expectedFilter in zip(actual, expected):
+            self.assertSameValues(actualFilter, expectedFilter)
+
+    def testSubscribers(self):
+        ds = dataseries.SequenceDataSeries()
+        sma, rateOfChange, zScore = build_chain(ds)
+        smaValues = []
+        sma.getNewValueEvent().subscribe(lambda dataSeries, dateTime, value: smaValues.append(value))
+        fused = fusion.fuse([zScore])
+        # Filters with subscribers are not lazy.
+        self.assertEqual(fused.getLazyFilters(), [rateOfChange])
+        for value in range(10):
+            ds.append(value)
+        self.assertEqual(smaValues, [None] * 4 + [2, 3, 4, 5, 6, 7])
+
+    def testBollingerBands(self):
+        expectedDS = dataseries.SequenceDataSeries()
+        expected = bollinger.BollingerBands(expectedDS, 10, 2)
+        ds = dataseries.SequenceDataSeries()
+        actual = bollinger.BollingerBands(ds, 10, 2)
+        fusion.fuse([actual.getMiddleBand()])
+        # The bands are calculated after the middle band, so they must see the new values.
+        for value in random_values(100):
+            expectedDS.append(value)
+            ds.append(value)
+        self.assertSameValues(actual.getUpperBand(), expected.getUpperBand())
+        self.assertSameValues(actual.getMiddleBand(), expected.getMiddleBand())
+        self.assertSameValues(actual.getLowerBand(), expected.getLowerBand())
+
+    def testErrors(self):
+        with self.assertRaisesRegexp(Exception, "No filters to fuse"):
+            fusion.fuse([])
+        with self.assertRaisesRegexp(Exception, "All filters must be built on the same source dataseries"):
+            fusion.fuse([ma.SMA(dataseries.SequenceDataSeries(), 5), ma.SMA(dataseries.SequenceDataSeries(), 5)])
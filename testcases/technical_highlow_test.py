@@ -18,6 +18,10 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import random
+
+import numpy as np
+
 from . import common
 
 from pyalgotrade import dataseries
@@ -33,3 +37,46 @@ class HighLowTestCase(common.TestCase):
             values.append(value)
         self.assertEqual(high[-1], 5)
         self.assertEqual(low[-1], 3)
+
+    def testMatchesFullWindow(self):
+        rnd = random.Random(1234)
+        values = [None if rnd.random() < 0.1 else rnd.randint(0, 50) for _ in range(2000)]
+        for period in [1, 2, 5, 250]:
+            ds = dataseries.SequenceDataSeries(maxLen=len(values))
+            high = highlow.High(ds, period)
+            low = highlow.Low(ds, period)
+            window = []
+            for value in values:
+                ds.append(value)
+                if value is not None:
+                    window.append(value)
+                    window = window[-period:]
+                if len(window) == period:
+                    self.assertEqual(high[-1], max(window))
+                    self.assertEqual(low[-1], min(window))
+                else:
+                    self.assertEqual(high[-1], None)
+                    self.assertEqual(low[-1], None)
+
+
+class SlidingExtremumTestCase(common.TestCase):
+    def testMinMax(self):
+        lowest = highlow.SlidingExtremum(3, True)
+        highest = highlow.SlidingExtremum(3, False)
+        expected = [(None, None), (None, None), (1, 3), (1, 2), (2, 5), (2, 5), (5, 5), (5, 5)]
+        for value, (expectedMin, expectedMax) in zip([3, 1, 2, 2, 5, 5, 5, 5], expected):
+            lowest.add(value)
+            highest.add(value)
+            self.assertEqual(lowest.getValue(), expectedMin)
+            self.assertEqual(highest.getValue(), expectedMax)
+        self.assertTrue(highest.windowFull())
+
+    def testNaN(self):
+        highest = highlow.SlidingExtremum(2, False)
+        highest.add(1)
+        highest.add(float("nan"))
+        self.assertTrue(np.isnan(highest.getValue()))
+        highest.add(0)
+        self.assertTrue(np.isnan(highest.getValue()))
+        highest.add(-1)
+        self.assertEqual(highest.getValue(), 0)
@@ -19,11 +19,26 @@
 """
 
 import datetime
+from fractions import Fraction
+
+import numpy as np
 
 from . import common
 
 from pyalgotrade.technical import linreg
 from pyalgotrade import dataseries
+from pyalgotrade.utils import dt
+
+
+# The value of the regression line at x, calculated using exact arithmetic.
+def exact_value_at(xs, ys, x):
+    xs = [Fraction(value) for value in xs]
+    ys = [Fraction(value) for value in ys]
+    meanX = sum(xs) / len(xs)
+    meanY = sum(ys) / len(ys)
+    sxx = sum((value - meanX) ** 2 for value in xs)
+    sxy = sum((valueX - meanX) * (valueY - meanY) for valueX, valueY in zip(xs, ys))
+    return float(meanY + sxy / sxx * (Fraction(x) - meanX))
 
 
 class LeastSquaresRegressionTestCase(common.TestCase):
@@ -79,3 +94,58 @@ class LeastSquaresRegressionTestCase(common.TestCase):
         nextDateTime = nextDateTime + datetime.timedelta(milliseconds=50)
         seqDS.appendWithDateTime(nextDateTime, 5)
         self.assertEqual(round(lsReg[-1], 2), 5)
+
+    def testIncremental(self):
+        rnd = np.random.RandomState(1234)
+        values = (rnd.standard_normal(3000).cumsum() + 1000).tolist()
+        # Evaluating the line from scipy.stats.linregress at timestamps far from 0 is the least accurate of the two.
+        tolerance = max(values) * 1e-10
+        for windowSize in [2, 20, 200]:
+            seqDS = dataseries.SequenceDataSeries(maxLen=len(values))
+            lsReg = linreg.LeastSquaresRegression(seqDS, windowSize)
+            incrementalLsReg = linreg.LeastSquaresRegression(seqDS, windowSize, incremental=True)
+            nextDateTime = datetime.datetime(2012, 1, 1)
+            for value in values:
+                nextDateTime = nextDateTime + datetime.timedelta(minutes=1)
+                seqDS.appendWithDateTime(nextDateTime, value)
+                if lsReg[-1] is None:
+                    self.assertEqual(incrementalLsReg[-1], None)
+                else:
+                    self.assertLess(abs(lsReg[-1] - incrementalLsReg[-1]), tolerance)
+            futureDateTime = nextDateTime + datetime.timedelta(hours=1)
+            self.assertLess(abs(lsReg.getValueAt(futureDateTime) - incrementalLsReg.getValueAt(futureDateTime)), tolerance)
+
+
+class RollingRegressionTestCase(common.TestCase):
+    def testExact(self):
+        rnd = np.random.RandomState(1234)
+        values = (rnd.standard_normal(600).cumsum() + 1000).tolist()
+        begin = datetime.datetime(2012, 1, 1)
+        timestamps = [dt.datetime_to_timestamp(begin + datetime.timedelta(minutes=i)) for i in range(len(values))]
+        for windowSize in [2, 20, 200]:
+            regression = linreg.RollingRegression(windowSize)
+            for i, (timestamp, value) in enumerate(zip(timestamps, values)):
+                regression.add(timestamp, value)
+                # Checking some of the windows is enough, exact arithmetic is slow.
+                if regression.windowFull() and i % 13 == 0:
+                    window = slice(i - windowSize + 1, i + 1)
+                    expected = exact_value_at(timestamps[window], values[window], timestamp)
+                    tolerance = max(values[window]) * 1e-12
+                    self.assertLess(abs(regression.getValueAt(timestamp) - expected), tolerance)
+
+
+class SlopeTestCase(common.TestCase):
+    def testIncremental(self):
+        rnd = np.random.RandomState(1234)
+        values = (rnd.standard_normal(3000).cumsum() + 1000).tolist()
+        values[10] = None
+        for period in [2, 20, 200]:
+            seqDS = dataseries.SequenceDataSeries(maxLen=len(values))
+            slope = linreg.Slope(seqDS, period)
+            incrementalSlope = linreg.Slope(seqDS, period, incremental=True)
+            for value in values:
+                seqDS.append(value)
+                if slope[-1] is None:
+                    self.assertEqual(incrementalSlope[-1], None)
+                else:
+                    self.assertLess(abs(slope[-1] - incrementalSlope[-1]), 1e-9)
@@ -70,3 +70,76 @@ class TestCase(common.TestCase):
             if i >= 4:
                 self.assertEqual(round(zscore[-1], 4), round(expected[i], 4))
             i += 1
+
+    def __assertIncrementalMatches(self, buildFilter, values, tolerance):
+        expectedDS = dataseries.SequenceDataSeries(maxLen=len(values))
+        expected = buildFilter(expectedDS, False)
+        seqDS = dataseries.SequenceDataSeries(maxLen=len(values))
+        incremental = buildFilter(seqDS, True)
+        for value in values:
+            expectedDS.append(value)
+            seqDS.append(value)
+
+        for expectedValue, value in zip(expected, incremental):
+            if expectedValue is None:
+                self.assertEqual(value, None)
+            else:
+                self.assertLess(abs(expectedValue - value), tolerance)
+
+    def testIncremental(self):
+        rnd = numpy.random.RandomState(1234)
+        values = (rnd.standard_normal(5000).cumsum() + 1000).tolist()
+        values[100] = None
+        tolerance = max(abs(value) for value in values if value is not None) * 1e-12
+        for period in [2, 20, 200]:
+            self.__assertIncrementalMatches(
+                lambda ds, incremental: stats.StdDev(ds, period, incremental=incremental), values, tolerance
+            )
+            self.__assertIncrementalMatches(
+                lambda ds, incremental: stats.StdDev(ds, period, ddof=1, incremental=incremental), values, tolerance
+            )
+        for period in [20, 200]:
+            self.__assertIncrementalMatches(
+                lambda ds, incremental: stats.ZScore(ds, period, incremental=incremental), values, 1e-9
+            )
+
+    def testIncrementalConstantValues(self):
+        seqDS = dataseries.SequenceDataSeries()
+        stdDev = stats.StdDev(seqDS, 3, incremental=True)
+        for value in [1.1] * 10:
+            seqDS.append(value)
+        self.assertEqual(stdDev[-1], 0)
+
+    def testIncrementalLevelShift(self):
+        rnd = numpy.random.RandomState(1234)
+        windowSize = 50
+        values = (1e6 + rnd.standard_normal(windowSize) * 0.01).tolist()
+        values.extend((1 + rnd.standard_normal(windowSize * 3) * 0.01).tolist())
+        moments = stats.RollingMoments(windowSize)
+        for i, value in enumerate(values):
+            moments.add(value)
+            if i >= windowSize - 1:
+                window = numpy.array(values[i - windowSize + 1:i + 1])
+                tolerance = max(abs(value) for value in values[max(0, i - 2 * windowSize + 1):i + 1]) * 1e-12
+                self.assertLess(abs(moments.getMean() - window.mean()), tolerance)
+                self.assertLess(abs(moments.getStdDev() - window.std()), tolerance)
+                # Once the values around 1e6 are out of the window the standard deviation is as good as numpy's.
+                if i >= windowSize * 2 - 1:
+                    self.assertLess(abs(moments.getStdDev() - window.std()), window.std() * 1e-9)
+
+    def testRollingMoments(self):
+        moments = stats.RollingMoments(3)
+        values = [1, 2, 3, 4, 5, 6, float("nan"), 7, 8, 9, 10, 11]
+        for i, value in enumerate(values):
+            moments.add(value)
+            window = numpy.array(values[max(0, i-2):i+1])
+            if i < 2:
+                self.assertEqual(moments.getMean(), None)
+                self.assertEqual(moments.getStdDev(), None)
+            elif numpy.isnan(window).any():
+                self.assertTrue(numpy.isnan(moments.getMean()))
+                self.assertTrue(numpy.isnan(moments.getVariance()))
+            else:
+                self.assertAlmostEqual(moments.getMean(), window.mean())
+                self.assertAlmostEqual(moments.getVariance(), window.var())
+                self.assertAlmostEqual(moments.getStdDev(ddof=1), window.std(ddof=1))
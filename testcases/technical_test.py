@@ -18,10 +18,26 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
+import datetime
+import random
+
+import numpy as np
+
 from . import common
 
 from pyalgotrade import technical
 from pyalgotrade import dataseries
+from pyalgotrade import bar
+from pyalgotrade.dataseries import bards
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import stats
+from pyalgotrade.technical import highlow
+from pyalgotrade.technical import roc
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import atr
+from pyalgotrade.technical import vwap
+from pyalgotrade.technical import stoch
+from pyalgotrade.technical import cumret
 
 
 class TestEventWindow(technical.EventWindow):
@@ -68,3 +84,208 @@ class DataSeriesFilterTest(common.TestCase):
         for i in range(0, len(testFilter)):
             self.assertEqual(testFilter[i], ds[i])
             self.assertEqual(testFilter.getDataSeries()[i], ds[i])
+
+
+def build_random_values(count, noneProbability=0.05):
+    rnd = random.Random(1234)
+    return [None if rnd.random() < noneProbability else rnd.uniform(10, 20) for _ in range(count)]
+
+
+def build_random_bars(count):
+    rnd = random.Random(1234)
+    ret = []
+    dateTime = datetime.datetime(2000, 1, 1)
+    close = 10
+    for i in range(count):
+        open_ = close
+        close = open_ + rnd.uniform(-1, 1)
+        high = max(open_, close) + rnd.random()
+        low = min(open_, close) - rnd.random()
+        ret.append(bar.BasicBar(
+            dateTime + datetime.timedelta(days=i), open_, high, low, close, rnd.randint(1, 1000), close * 0.9,
+            bar.Frequency.DAY
+        ))
+    return ret
+
+
+class BatchTestCase(common.TestCase):
+    def __buildFilters(self, period):
+        # Every filter builder receives the dataseries to filter and returns the filter.
+        return [
+            lambda ds: ma.SMA(ds, period),
+            lambda ds: ma.EMA(ds, period),
+            lambda ds: ma.WMA(ds, list(range(1, period + 1))),
+            lambda ds: stats.StdDev(ds, period),
+            lambda ds: stats.ZScore(ds, period, ddof=1),
+            lambda ds: highlow.High(ds, period),
+            lambda ds: highlow.Low(ds, period),
+            lambda ds: roc.RateOfChange(ds, period),
+            lambda ds: rsi.RSI(ds, period),
+            lambda ds: cumret.CumulativeReturn(ds),
+        ]
+
+    def __buildBarFilters(self, period):
+        return [
+            lambda ds: atr.ATR(ds, period),
+            lambda ds: atr.ATR(ds, period, True),
+            lambda ds: vwap.VWAP(ds, period),
+            lambda ds: vwap.VWAP(ds, period, True),
+            lambda ds: stoch.StochasticOscillator(ds, period),
+            lambda ds: stoch.StochasticOscillator(ds, period, useAdjustedValues=True),
+        ]
+
+    def __getStreamingValues(self, buildFilter, dataSeries, values):
+        testFilter = buildFilter(dataSeries)
+        for value in values:
+            if isinstance(value, bar.Bar):
+                dataSeries.appendWithDateTime(value.getDateTime(), value)
+            else:
+                dataSeries.append(value)
+        return testFilter[:]
+
+    def __assertBatchEqualsStreaming(self, buildFilter, dataSeries, values):
+        expected = self.__getStreamingValues(buildFilter, dataSeries, values)
+        results = buildFilter(type(dataSeries)()).getEventWindow().onNewValues(None, values)
+        self.assertEqual(len(results), len(values))
+        # Results should be exactly the same, not just approximately.
+        self.assertEqual(
+            [None if np.isnan(value) else value for value in results[-len(expected):]],
+            [None if value is None or np.isnan(value) else value for value in expected]
+        )
+
+    def __assertSeedEqualsStreaming(self, buildFilter, dataSeries, values, seedCount):
+        dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(days=i) for i in range(len(values))]
+        expectedFilter = buildFilter(dataseries.SequenceDataSeries(maxLen=len(values)))
+        expectedDs = expectedFilter.getDataSeries()
+        for dateTime, value in zip(dateTimes, values):
+            expectedDs.appendWithDateTime(dateTime, value)
+
+        # Seed using the first values and then continue streaming.
+        testFilter = buildFilter(dataSeries)
+        testFilter.seed(dateTimes[:seedCount], values[:seedCount])
+        for dateTime, value in zip(dateTimes[seedCount:], values[seedCount:]):
+            dataSeries.appendWithDateTime(dateTime, value)
+
+        self.assertEqual(len(testFilter), min(len(values), testFilter.getMaxLen()))
+        self.assertEqual(testFilter[:], expectedFilter[-len(testFilter):])
+        self.assertEqual(list(testFilter.getDateTimes()), dateTimes[-len(testFilter):])
+
+    def testBatchEqualsStreaming(self):
+        values = build_random_values(3000)
+        for period in [2, 3, 14, 200]:
+            for buildFilter in self.__buildFilters(period):
+                self.__assertBatchEqualsStreaming(
+                    buildFilter, dataseries.SequenceDataSeries(maxLen=len(values)), values
+                )
+
+    def testBatchEqualsStreamingWithBars(self):
+        bars = build_random_bars(3000)
+        for period in [2, 3, 14, 200]:
+            for buildFilter in self.__buildBarFilters(period):
+                self.__assertBatchEqualsStreaming(buildFilter, bards.BarDataSeries(maxLen=len(bars)), bars)
+
+    def testBatchShorterThanWindow(self):
+        values = build_random_values(10)
+        for buildFilter in self.__buildFilters(20):
+            self.__assertBatchEqualsStreaming(buildFilter, dataseries.SequenceDataSeries(), values)
+        for buildFilter in self.__buildFilters(5):
+            results = buildFilter(dataseries.SequenceDataSeries()).getEventWindow().onNewValues(None, [])
+            self.assertEqual(len(results), 0)
+
+    def testBatchAfterStreaming(self):
+        # If the window is not empty values are processed one by one.
+        values = build_random_values(100)
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 10)
+        for value in values[:50]:
+            ds.append(value)
+        results = sma.getEventWindow().onNewValues(None, values[50:])
+        self.assertEqual(results[-1], ma.SMA(ds, 10).getEventWindow().onNewValues(None, values)[-1])
+
+    def testBatchNonNumeric(self):
+        results = TestEventWindow().onNewValues(None, ["a", None, 1])
+        self.assertEqual(results.dtype, object)
+        self.assertEqual(list(results), ["a", None, 1])
+
+    def testSeed(self):
+        values = build_random_values(500)
+        for seedCount in [0, 10, 250, 500]:
+            for buildFilter in self.__buildFilters(14):
+                self.__assertSeedEqualsStreaming(buildFilter, dataseries.SequenceDataSeries(), values, seedCount)
+                self.__assertSeedEqualsStreaming(
+                    buildFilter, dataseries.SequenceDataSeries(maxLen=100), values, seedCount
+                )
+
+    def testSeedWithBars(self):
+        bars = build_random_bars(500)
+        dateTimes = [bar_.getDateTime() for bar_ in bars]
+        expectedAtr = atr.ATR(bards.BarDataSeries(), 14)
+        for bar_ in bars:
+            expectedAtr.getDataSeries().appendWithDateTime(bar_.getDateTime(), bar_)
+
+        barDs = bards.BarDataSeries()
+        testAtr = atr.ATR(barDs, 14)
+        testAtr.seed(dateTimes[:300], bars[:300])
+        for bar_ in bars[300:]:
+            barDs.appendWithDateTime(bar_.getDateTime(), bar_)
+        self.assertEqual(testAtr[:], expectedAtr[:])
+        self.assertEqual(len(barDs), 200)
+
+    def testSeedFeedsDependants(self):
+        values = [float(i) for i in range(1, 21)]
+        ds = dataseries.SequenceDataSeries()
+        sma = ma.SMA(ds, 2)
+        smaOfSma = ma.SMA(sma, 2)
+        sma.seed(None, values)
+        self.assertEqual(len(ds), 0)
+        self.assertEqual(len(sma), 20)
+        self.assertEqual(sma[0], None)
+        self.assertEqual(sma[-1], 19.5)
+        self.assertEqual(smaOfSma[-1], 19)
+
+
+class IndicatorRegistryTestCase(common.TestCase):
+    def testSharedIndicators(self):
+        registry = technical.IndicatorRegistry()
+        ds1 = dataseries.SequenceDataSeries()
+        ds2 = dataseries.SequenceDataSeries()
+
+        sma = registry.get(ma.SMA, ds1, 10)
+        self.assertTrue(registry.get(ma.SMA, ds1, 10) is sma)
+        self.assertTrue(registry.get(ma.SMA, ds1, period=10) is sma)
+        self.assertTrue(registry.get(ma.SMA, ds1, 10, maxLen=dataseries.DEFAULT_MAX_LEN) is sma)
+        self.assertFalse(registry.get(ma.SMA, ds1, 10, maxLen=5) is sma)
+        self.assertFalse(registry.get(ma.SMA, ds1, 20) is sma)
+        self.assertFalse(registry.get(ma.SMA, ds2, 10) is sma)
+        self.assertFalse(registry.get(ma.EMA, ds1, 10) is sma)
+        stdDev = registry.get(stats.StdDev, ds1, 10)
+        self.assertTrue(registry.get(stats.StdDev, ds1, 10, ddof=0) is stdDev)
+        self.assertFalse(registry.get(stats.StdDev, ds1, 10, ddof=1) is stdDev)
+
+        self.assertEqual(len(registry), 7)
+        self.assertEqual(registry.getMisses(), 7)
+        self.assertEqual(registry.getHits(), 4)
+        self.assertEqual(registry.getStats(), {ma.SMA: (4, 3), ma.EMA: (1, 0), stats.StdDev: (2, 1)})
+
+        # Shared indicators get calculated as usual.
+        for i in range(20):
+            ds1.append(i)
+        self.assertEqual(sma[-1], 14.5)
+        self.assertEqual(len(sma), 20)
+
+    def testListParameters(self):
+        registry = technical.IndicatorRegistry()
+        ds = dataseries.SequenceDataSeries()
+        wma = registry.get(ma.WMA, ds, [1, 2, 3])
+        self.assertTrue(registry.get(ma.WMA, ds, [1, 2, 3]) is wma)
+        self.assertFalse(registry.get(ma.WMA, ds, (1, 2, 3)) is wma)
+        self.assertFalse(registry.get(ma.WMA, ds, [1, 2, 4]) is wma)
+        self.assertEqual(registry.getHits(), 1)
+
+    def testUnhashableParameters(self):
+        registry = technical.IndicatorRegistry()
+        ds = dataseries.SequenceDataSeries()
+        weights = {0: 1}
+        self.assertFalse(registry.get(ma.WMA, ds, weights) is registry.get(ma.WMA, ds, weights))
+        self.assertEqual(len(registry), 0)
+        self.assertEqual(registry.getMisses(), 2)
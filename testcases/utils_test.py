@@ -301,6 +301,25 @@ class NumPyDequeTestCase(CollectionTestCaseBase):
             d.append(i)
         self.assertEqual(d[0:3].sum(), 3)
 
+    def testWrapAround(self):
+        for maxLen in (1, 2, 3, 10):
+            d = collections.NumPyDeque(maxLen)
+            expected = []
+            for i in xrange(maxLen * 5 + 1):
+                d.append(i)
+                expected = (expected + [i])[-maxLen:]
+                self.assertEqual(list(d.data()), expected)
+                self.assertEqual(d[-1], i)
+                self.assertEqual(len(d), len(expected))
+
+    def testObjectValues(self):
+        d = collections.NumPyDeque(3, dtype=object)
+        for i in xrange(10):
+            d.append(str(i))
+        self.assertEqual(list(d.data()), ["7", "8", "9"])
+        d.resize(2)
+        self.assertEqual(list(d.data()), ["8", "9"])
+
 
 class ListDequeTestCase(CollectionTestCaseBase):
     def buildCollection(self, maxLen):
@@ -315,6 +334,23 @@ class ListDequeTestCase(CollectionTestCaseBase):
     def testResizeEmpty(self):
         CollectionTestCaseBase._testResizeEmptyImpl(self)
 
+    def testWrapAround(self):
+        for maxLen in (1, 2, 3, 10):
+            d = collections.ListDeque(maxLen)
+            expected = []
+            for i in xrange(maxLen * 5 + 1):
+                d.append(i)
+                expected = (expected + [i])[-maxLen:]
+                self.assertEqual(d.data(), expected)
+                self.assertEqual(len(d), len(expected))
+                for j in xrange(-len(expected), len(expected)):
+                    self.assertEqual(d[j], expected[j])
+                for j in xrange(-maxLen - 1, maxLen + 1):
+                    self.assertEqual(d[j:], expected[j:])
+                    self.assertEqual(d[:j:-1], expected[:j:-1])
+                with self.assertRaises(IndexError):
+                    d[len(expected)]
+
 
 class DateTimeTestCase(common.TestCase):
     def testTimeStampConversions(self):
@@ -0,0 +1,75 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares calculating indicators one value at a time, through the dataseries event chain, with calculating them in
+# batch mode using EventWindow.onNewValues.
+# Usage: python -m tools.benchmarks.batch
+
+import time
+
+import numpy as np
+
+from pyalgotrade import dataseries
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import stats
+from pyalgotrade.technical import highlow
+from pyalgotrade.technical import rsi
+
+
+VALUES = 200000
+PERIOD = 20
+
+FILTERS = [
+    ("SMA", lambda ds: ma.SMA(ds, PERIOD)),
+    ("EMA", lambda ds: ma.EMA(ds, PERIOD)),
+    ("StdDev", lambda ds: stats.StdDev(ds, PERIOD)),
+    ("ZScore", lambda ds: stats.ZScore(ds, PERIOD)),
+    ("High", lambda ds: highlow.High(ds, PERIOD)),
+    ("RSI", lambda ds: rsi.RSI(ds, PERIOD)),
+]
+
+
+def measure_streaming(buildFilter, values):
+    ds = dataseries.SequenceDataSeries()
+    buildFilter(ds)
+    begin = time.time()
+    for value in values:
+        ds.append(value)
+    return time.time() - begin
+
+
+def measure_batch(buildFilter, values):
+    eventWindow = buildFilter(dataseries.SequenceDataSeries()).getEventWindow()
+    begin = time.time()
+    eventWindow.onNewValues(None, values)
+    return time.time() - begin
+
+
+def main():
+    values = (np.random.RandomState(1234).standard_normal(VALUES).cumsum() + 1000).tolist()
+    print("Seconds to calculate %d values (period %d)" % (VALUES, PERIOD))
+    for name, buildFilter in FILTERS:
+        streaming = measure_streaming(buildFilter, values)
+        batch = measure_batch(buildFilter, values)
+        print("%-8s streaming %8.3f batch %8.3f (%.1fx)" % (name, streaming, batch, streaming / batch))
+
+
+if __name__ == "__main__":
+    main()
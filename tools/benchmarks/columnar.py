@@ -0,0 +1,95 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares loading minute bars from CSV files with loading them from a columnar bar database, and how long it takes
+# to go through all of them afterwards.
+# Usage: python -m tools.benchmarks.columnar
+
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import columnarfeed
+
+
+INSTRUMENTS = 10
+BARS = 20000
+
+
+def write_csv(path, rnd):
+    closes = rnd.standard_normal(BARS).cumsum() + 1000
+    dateTime = datetime.datetime(2010, 1, 1)
+    with open(path, "w") as f:
+        f.write("Date Time,Open,High,Low,Close,Volume,Adj Close\n")
+        for close in closes:
+            f.write("%s,%f,%f,%f,%f,%d,%f\n" % (
+                dateTime.strftime("%Y-%m-%d %H:%M:%S"), close, close + 1, close - 1, close, 100, close
+            ))
+            dateTime += datetime.timedelta(minutes=1)
+
+
+def measure(buildFeed):
+    begin = time.time()
+    feed = buildFeed()
+    loaded = time.time()
+    for dateTime, bars in feed:
+        pass
+    return loaded - begin, time.time() - loaded
+
+
+def main():
+    tmpDir = tempfile.mkdtemp()
+    try:
+        rnd = np.random.RandomState(1234)
+        instruments = ["inst-%d" % i for i in range(INSTRUMENTS)]
+        for instrument in instruments:
+            write_csv(os.path.join(tmpDir, instrument + ".csv"), rnd)
+
+        def build_csv_feed():
+            ret = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+            for instrument in instruments:
+                ret.addBarsFromCSV(instrument, os.path.join(tmpDir, instrument + ".csv"))
+            return ret
+
+        def build_columnar_feed():
+            ret = columnarfeed.Feed(os.path.join(tmpDir, "columnar"), bar.Frequency.MINUTE)
+            for instrument in instruments:
+                ret.loadBars(instrument)
+            return ret
+
+        begin = time.time()
+        columnarfeed.Database(os.path.join(tmpDir, "columnar")).addBarsFromFeed(build_csv_feed())
+        print("Conversion: %.2f seconds" % (time.time() - begin))
+
+        print("%d instruments with %d bars each. Seconds to load / go through all the bars" % (INSTRUMENTS, BARS))
+        print("CSV:      %6.2f / %6.2f" % measure(build_csv_feed))
+        print("Columnar: %6.2f / %6.2f" % measure(build_columnar_feed))
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()
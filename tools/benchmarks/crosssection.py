@@ -0,0 +1,91 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures calculating SMA, StdDev and RSI over a large universe, using one filter per instrument and using
+# cross-sectional indicators.
+# Usage: python -m tools.benchmarks.crosssection
+
+import datetime
+import random
+import time
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import membf
+from pyalgotrade.technical import crosssection
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stats
+
+
+INSTRUMENTS = 3000
+BARS = 100
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+def build_feed():
+    ret = BarFeed(bar.Frequency.DAY)
+    rnd = random.Random(0)
+    begin = datetime.datetime(2000, 1, 1)
+    for i in range(INSTRUMENTS):
+        bars = []
+        price = 100
+        for j in range(BARS):
+            price = max(1, price + rnd.uniform(-1, 1))
+            bars.append(bar.BasicBar(
+                begin + datetime.timedelta(days=j), price, price + 1, price - 1, price, 1000, None, bar.Frequency.DAY
+            ))
+        ret.addBarsFromSequence("inst-%d" % i, bars)
+    return ret
+
+
+def run(barFeed):
+    begin = time.time()
+    barFeed.start()
+    while not barFeed.eof():
+        barFeed.dispatch()
+    return time.time() - begin
+
+
+def main():
+    print("%d instruments, %d bars" % (INSTRUMENTS, BARS))
+    print("Bar feed only:          %.2f seconds" % run(build_feed()))
+
+    barFeed = build_feed()
+    for instrument in barFeed.getRegisteredInstruments():
+        prices = barFeed[instrument].getPriceDataSeries()
+        ma.SMA(prices, 20)
+        stats.StdDev(prices, 20)
+        rsi.RSI(prices, 14)
+    print("Filters per instrument: %.2f seconds" % run(barFeed))
+
+    barFeed = build_feed()
+    engine = crosssection.Engine(barFeed)
+    crosssection.SMA(engine, 20)
+    crosssection.StdDev(engine, 20)
+    crosssection.RSI(engine, 14)
+    print("Cross-sectional:        %.2f seconds" % run(barFeed))
+
+
+if __name__ == "__main__":
+    main()
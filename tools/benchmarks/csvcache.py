@@ -0,0 +1,68 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares loading minute bars from CSV files with loading them from a csvcache.Cache.
+# Usage: python -m tools.benchmarks.csvcache
+
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import csvcache
+from pyalgotrade.barfeed import csvfeed
+from tools.benchmarks import columnar
+
+
+INSTRUMENTS = 5
+
+
+def measure(instruments, tmpDir, cache):
+    begin = time.time()
+    feed = csvfeed.GenericBarFeed(bar.Frequency.MINUTE)
+    feed.setCache(cache)
+    for instrument in instruments:
+        feed.addBarsFromCSV(instrument, os.path.join(tmpDir, instrument + ".csv"))
+    return time.time() - begin
+
+
+def main():
+    tmpDir = tempfile.mkdtemp()
+    try:
+        rnd = np.random.RandomState(1234)
+        instruments = ["inst-%d" % i for i in range(INSTRUMENTS)]
+        for instrument in instruments:
+            columnar.write_csv(os.path.join(tmpDir, instrument + ".csv"), rnd)
+        cache = csvcache.Cache(os.path.join(tmpDir, "cache"))
+
+        print("%d instruments with %d bars each. Seconds to load" % (INSTRUMENTS, columnar.BARS))
+        print("No cache:   %6.2f" % measure(instruments, tmpDir, None))
+        print("Cache miss: %6.2f" % measure(instruments, tmpDir, cache))
+        print("Cache hit:  %6.2f" % measure(instruments, tmpDir, cache))
+        print("Cache size: %d bytes" % cache.getSize())
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares SequenceDataSeries and NumericSequenceDataSeries on the operations strategies and indicators use the most:
+# appending a value and reading the last one. NumericSequenceDataSeries is opt-in, and it should only be used by bar
+# feeds and technical indicators once it beats SequenceDataSeries on both.
+# Usage: python -m tools.benchmarks.dataseries
+
+import timeit
+
+from pyalgotrade import dataseries
+
+
+MAX_LENS = [100, 1024, 10000]
+APPENDS = 20000
+READS = 200000
+
+
+def measure(dataSeriesClass, maxLen):
+    ds = dataSeriesClass(maxLen)
+    for i in range(maxLen):
+        ds.append(float(i))
+    appendTime = timeit.timeit(lambda: ds.append(1.5), number=APPENDS)
+    readTime = timeit.timeit(lambda: ds[-1], number=READS)
+    return appendTime, readTime
+
+
+def main():
+    print("Seconds for %d appends and %d reads of the last value" % (APPENDS, READS))
+    for maxLen in MAX_LENS:
+        for dataSeriesClass in [dataseries.SequenceDataSeries, dataseries.NumericSequenceDataSeries]:
+            appendTime, readTime = measure(dataSeriesClass, maxLen)
+            print("maxLen %6d %-26s append %.4f read %.4f" % (maxLen, dataSeriesClass.__name__, appendTime, readTime))
+
+
+if __name__ == "__main__":
+    main()
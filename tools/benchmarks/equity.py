@@ -0,0 +1,98 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures a strategy with a large portfolio and the drawdown and returns analyzers attached, comparing incremental
+# mark to market equity with going through all the positions every time the equity is needed.
+# Usage: python -m tools.benchmarks.equity
+
+import datetime
+import time
+
+import six
+
+from pyalgotrade import bar
+from pyalgotrade import broker
+from pyalgotrade import strategy
+from pyalgotrade.barfeed import membf
+from pyalgotrade.broker import backtesting
+from pyalgotrade.stratanalyzer import drawdown
+from pyalgotrade.stratanalyzer import returns
+
+
+INSTRUMENTS = 2000
+BARS = 10
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+class FullScanBroker(backtesting.Broker):
+    def getEquity(self):
+        ret = self.getCash()
+        for instrument, shares in six.iteritems(self.getPositions()):
+            ret += self._getPriceForInstrument(instrument) * shares
+        return ret
+
+    def getPortfolioSnapshot(self):
+        return broker.PortfolioSnapshot(self._getCurrentDateTime(), self.getCash(), self.getEquity())
+
+
+class Strategy(strategy.BacktestingStrategy):
+    def onBars(self, bars):
+        self.getBroker().getEquity()
+
+
+def build_feed():
+    ret = BarFeed(bar.Frequency.MINUTE)
+    begin = datetime.datetime(2010, 1, 1)
+    for i in range(INSTRUMENTS):
+        bars = []
+        for j in range(BARS):
+            # Every instrument gets its bars at a different time.
+            dateTime = begin + datetime.timedelta(minutes=j, microseconds=i)
+            bars.append(bar.BasicBar(dateTime, 100, 200, 99, 100 + j, 1000, None, bar.Frequency.MINUTE))
+        ret.addBarsFromSequence("inst-%d" % i, bars)
+    ret.setUseHeapScheduling(True)
+    return ret
+
+
+def measure(brokerClass):
+    feed = build_feed()
+    brk = brokerClass(1000000, feed)
+    for i in range(INSTRUMENTS):
+        brk.setShares("inst-%d" % i, 10, 100)
+    strat = Strategy(feed, brk)
+    strat.attachAnalyzer(drawdown.DrawDown())
+    strat.attachAnalyzer(returns.Returns())
+    begin = time.time()
+    strat.run()
+    return time.time() - begin, strat.getResult()
+
+
+def main():
+    print("%d positions, %d bars each" % (INSTRUMENTS, BARS))
+    print("Full scan:   %.2f seconds. Equity: %s" % measure(FullScanBroker))
+    print("Incremental: %.2f seconds. Equity: %s" % measure(backtesting.Broker))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures bar throughput for a backtest over a large universe, with and without orders for a few instruments on each
+# bar, comparing lazy volume accounting in the fill strategy with computing the volume for every instrument on every
+# bar.
+# Usage: python -m tools.benchmarks.fillstrategy
+
+import datetime
+import time
+
+from pyalgotrade import bar
+from pyalgotrade import strategy
+from pyalgotrade.barfeed import membf
+from pyalgotrade.broker import fillstrategy
+
+
+INSTRUMENTS = 2000
+BARS = 100
+ORDERS_PER_BAR = 5
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+class EagerFillStrategy(fillstrategy.DefaultStrategy):
+    # Computes the volume for every instrument in the bars, as soon as they arrive.
+    def onBars(self, broker_, bars):
+        super(EagerFillStrategy, self).onBars(broker_, bars)
+        self.getVolumeLeft()
+
+
+class TradingStrategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed, fillStrategy, ordersPerBar):
+        super(TradingStrategy, self).__init__(barFeed, 1e9)
+        self.getBroker().setFillStrategy(fillStrategy)
+        self.__instruments = sorted(barFeed.getRegisteredInstruments())
+        self.__ordersPerBar = ordersPerBar
+        self.__bars = 0
+
+    def onBars(self, bars):
+        for i in range(self.__ordersPerBar):
+            instrument = self.__instruments[(self.__bars * self.__ordersPerBar + i) % len(self.__instruments)]
+            self.marketOrder(instrument, 1)
+        self.__bars += 1
+
+
+def build_feed():
+    ret = BarFeed(bar.Frequency.DAY)
+    begin = datetime.datetime(2010, 1, 1)
+    for i in range(INSTRUMENTS):
+        bars = [
+            bar.BasicBar(begin + datetime.timedelta(days=j), 100, 101, 99, 100, 1000, None, bar.Frequency.DAY)
+            for j in range(BARS)
+        ]
+        ret.addBarsFromSequence("inst-%d" % i, bars)
+    return ret
+
+
+def measure(fillStrategy, ordersPerBar):
+    strat = TradingStrategy(build_feed(), fillStrategy, ordersPerBar)
+    begin = time.time()
+    strat.run()
+    return BARS / (time.time() - begin)
+
+
+def main():
+    print("%d instruments, %d bars" % (INSTRUMENTS, BARS))
+    for ordersPerBar in [0, ORDERS_PER_BAR]:
+        print("%d orders per bar" % ordersPerBar)
+        print("  Eager volume: %.1f bars/second" % measure(EagerFillStrategy(), ordersPerBar))
+        print("  Lazy volume:  %.1f bars/second" % measure(fillstrategy.DefaultStrategy(), ordersPerBar))
+
+
+if __name__ == "__main__":
+    main()
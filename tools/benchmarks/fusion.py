@@ -0,0 +1,59 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures updating a ZScore(RateOfChange(SMA(ds))) chain, with one subscription per filter and fused.
+# Usage: python -m tools.benchmarks.fusion
+
+import random
+import time
+
+from pyalgotrade import dataseries
+from pyalgotrade.technical import fusion
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import roc
+from pyalgotrade.technical import stats
+
+
+VALUES = 100000
+
+
+def measure(fuse):
+    rnd = random.Random(0)
+    values = [rnd.uniform(90, 110) for _ in range(VALUES)]
+    ds = dataseries.SequenceDataSeries()
+    zScore = stats.ZScore(roc.RateOfChange(ma.SMA(ds, 20), 5), 20, incremental=True)
+    if fuse:
+        fusion.fuse([zScore])
+
+    begin = time.time()
+    for value in values:
+        ds.append(value)
+        zScore[-1]
+    return time.time() - begin
+
+
+def main():
+    print("%d values" % VALUES)
+    print("One subscription per filter: %.2f seconds" % measure(False))
+    print("Fused:                       %.2f seconds" % measure(True))
+
+
+if __name__ == "__main__":
+    main()
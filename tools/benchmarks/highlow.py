@@ -0,0 +1,65 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares the High filter, that tracks the highest value using a monotonic deque, with calculating the maximum over
+# the whole window on every new value, which is what it used to do.
+# Usage: python -m tools.benchmarks.highlow
+
+import time
+
+import numpy as np
+
+from pyalgotrade import dataseries
+from pyalgotrade import technical
+from pyalgotrade.technical import highlow
+
+
+WINDOW_SIZES = [10, 250, 2000]
+VALUES = 50000
+
+
+class FullWindowMaxEventWindow(technical.EventWindow):
+    def getValue(self):
+        ret = None
+        if self.windowFull():
+            ret = self.getValues().max()
+        return ret
+
+
+def measure(eventWindow, values):
+    ds = dataseries.SequenceDataSeries()
+    technical.EventBasedFilter(ds, eventWindow)
+    begin = time.time()
+    for value in values:
+        ds.append(value)
+    return VALUES / (time.time() - begin)
+
+
+def main():
+    values = np.random.RandomState(1234).standard_normal(VALUES).cumsum().tolist()
+    print("Values/sec")
+    for windowSize in WINDOW_SIZES:
+        monotonic = measure(highlow.HighLowEventWindow(windowSize, False), values)
+        fullWindow = measure(FullWindowMaxEventWindow(windowSize), values)
+        print("window %5d: monotonic deque %10.0f full window %10.0f" % (windowSize, monotonic, fullWindow))
+
+
+if __name__ == "__main__":
+    main()
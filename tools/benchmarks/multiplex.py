@@ -0,0 +1,100 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures running many SMA crossover variants over the same universe, one strategy at a time, each one loading the
+# bars, and all of them over a single pass of the bars using pyalgotrade.strategy.multiplex.
+# Usage: python -m tools.benchmarks.multiplex
+
+import datetime
+import random
+import time
+
+from pyalgotrade import bar
+from pyalgotrade import strategy
+from pyalgotrade.barfeed import membf
+from pyalgotrade.strategy import multiplex
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import cross
+
+
+INSTRUMENTS = 20
+BARS = 1000
+PARAMETERS = [(fast, slow) for fast in (5, 10, 15, 20, 25) for slow in (30, 50, 100, 200)]
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+class SMACrossOver(strategy.BacktestingStrategy):
+    def __init__(self, barFeed, fast, slow):
+        super(SMACrossOver, self).__init__(barFeed, 1e6)
+        self.setDebugMode(False)
+        self.__smas = {}
+        for instrument in barFeed.getRegisteredInstruments():
+            prices = barFeed[instrument].getCloseDataSeries()
+            self.__smas[instrument] = (ma.SMA(prices, fast), ma.SMA(prices, slow))
+
+    def onBars(self, bars):
+        for instrument, (fastSMA, slowSMA) in self.__smas.items():
+            if cross.cross_above(fastSMA, slowSMA) > 0:
+                self.marketOrder(instrument, 10)
+            elif cross.cross_below(fastSMA, slowSMA) > 0 and self.getBroker().getShares(instrument) > 0:
+                self.marketOrder(instrument, -self.getBroker().getShares(instrument))
+
+
+def build_feed():
+    # Building the bars stands for loading them from files.
+    ret = BarFeed(bar.Frequency.DAY)
+    rnd = random.Random(0)
+    begin = datetime.datetime(2000, 1, 1)
+    for i in range(INSTRUMENTS):
+        bars = []
+        price = 100
+        for j in range(BARS):
+            price = max(1, price + rnd.uniform(-1, 1))
+            bars.append(bar.BasicBar(
+                begin + datetime.timedelta(days=j), price, price + 1, price - 1, price, 1000, None, bar.Frequency.DAY
+            ))
+        ret.addBarsFromSequence("inst-%d" % i, bars)
+    return ret
+
+
+def main():
+    print("%d strategies, %d instruments, %d bars" % (len(PARAMETERS), INSTRUMENTS, BARS))
+
+    begin = time.time()
+    expected = []
+    for fast, slow in PARAMETERS:
+        strat = SMACrossOver(build_feed(), fast, slow)
+        strat.run()
+        expected.append(strat.getResult())
+    print("One run per strategy: %.2f seconds" % (time.time() - begin))
+
+    begin = time.time()
+    barFeed = build_feed()
+    results = multiplex.run([SMACrossOver(barFeed, fast, slow) for fast, slow in PARAMETERS])
+    print("Multiplexed:          %.2f seconds" % (time.time() - begin))
+    assert results == expected
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures NumPyDeque.append throughput (the cost EventWindow pays on every new value) for different window sizes,
+# and compares it with shifting the whole array on every append, which is what it used to do once full.
+# Usage: python -m tools.benchmarks.numpydeque
+
+import time
+
+import numpy as np
+
+from pyalgotrade.utils import collections
+
+
+WINDOW_SIZES = [10, 100, 1000, 10000]
+APPENDS = 100000
+
+
+class ShiftingDeque(object):
+    def __init__(self, maxLen):
+        self.__values = np.empty(maxLen)
+        self.__maxLen = maxLen
+        self.__nextPos = 0
+
+    def append(self, value):
+        if self.__nextPos < self.__maxLen:
+            self.__values[self.__nextPos] = value
+            self.__nextPos += 1
+        else:
+            self.__values[0:-1] = self.__values[1:]
+            self.__values[self.__nextPos - 1] = value
+
+    def data(self):
+        return self.__values[0:self.__nextPos]
+
+
+def measure(deque):
+    begin = time.time()
+    for i in range(APPENDS):
+        deque.append(i)
+        deque.data()
+    return APPENDS / (time.time() - begin)
+
+
+def main():
+    print("Appends/sec (append + data())")
+    for windowSize in WINDOW_SIZES:
+        ring = measure(collections.NumPyDeque(windowSize))
+        shifting = measure(ShiftingDeque(windowSize))
+        print("window %6d: ring buffer %10.0f shifting %10.0f" % (windowSize, ring, shifting))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures the overhead of the local optimizer by running many short backtests.
+# Usage: python -m tools.benchmarks.optimizer
+
+import datetime
+import logging
+import time
+
+from pyalgotrade import bar
+from pyalgotrade import strategy
+from pyalgotrade.barfeed import membf
+from pyalgotrade.optimizer import local
+
+
+BARS = 10
+EXECUTIONS = 5000
+WORKERS = 4
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+class Strategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed, param):
+        super(Strategy, self).__init__(barFeed)
+        self.__param = param
+
+    def onBars(self, bars):
+        pass
+
+    def getResult(self):
+        return self.__param
+
+
+def build_feed():
+    ret = BarFeed(bar.Frequency.DAY)
+    dateTime = datetime.datetime(2010, 1, 1)
+    bars = []
+    for i in range(BARS):
+        bars.append(bar.BasicBar(dateTime + datetime.timedelta(days=i), 10, 10, 10, 10, 100, None, bar.Frequency.DAY))
+    ret.addBarsFromSequence("inst", bars)
+    return ret
+
+
+def main():
+    logging.getLogger("pyalgotrade.optimizer").setLevel(logging.WARNING)
+    begin = time.time()
+    res = local.run(Strategy, build_feed(), [(i,) for i in range(EXECUTIONS)], workerCount=WORKERS, batchSize=50)
+    elapsed = time.time() - begin
+    assert res.getParameters() == (EXECUTIONS - 1,)
+    print("%d executions over %d bars with %d workers: %.2f seconds (%.2f ms per execution)" % (
+        EXECUTIONS, BARS, WORKERS, elapsed, elapsed * 1000 / EXECUTIONS
+    ))
+
+
+if __name__ == "__main__":
+    main()
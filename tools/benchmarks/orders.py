@@ -0,0 +1,99 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures the backtesting broker with many resting limit and stop orders, where each instrument gets a bar at a
+# different time, comparing the order index with processing every active order on every bar.
+# Usage: python -m tools.benchmarks.orders
+
+import datetime
+import time
+
+from pyalgotrade import bar
+from pyalgotrade import broker
+from pyalgotrade import strategy
+from pyalgotrade.barfeed import membf
+from pyalgotrade.broker import fillstrategy
+
+
+INSTRUMENTS = 200
+BARS = 100
+ORDERS_PER_INSTRUMENT = 20
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+class FullScanFillStrategy(fillstrategy.DefaultStrategy):
+    # The broker only uses the order index with DefaultStrategy.
+    pass
+
+
+class GridStrategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed, fillStrategy):
+        super(GridStrategy, self).__init__(barFeed, 1e9)
+        self.getBroker().setFillStrategy(fillStrategy)
+        self.__placed = False
+
+    def onBars(self, bars):
+        if self.__placed:
+            return
+        self.__placed = True
+        brk = self.getBroker()
+        for instrument in self.getFeed().getRegisteredInstruments():
+            for i in range(1, ORDERS_PER_INSTRUMENT // 2 + 1):
+                order = brk.createLimitOrder(broker.Order.Action.BUY, instrument, 100 - i * 5, 1)
+                order.setGoodTillCanceled(True)
+                brk.submitOrder(order)
+                order = brk.createStopOrder(broker.Order.Action.BUY, instrument, 100 + i * 5, 1)
+                order.setGoodTillCanceled(True)
+                brk.submitOrder(order)
+
+
+def build_feed():
+    ret = BarFeed(bar.Frequency.MINUTE)
+    begin = datetime.datetime(2010, 1, 1)
+    for i in range(INSTRUMENTS):
+        bars = []
+        for j in range(BARS):
+            # Every instrument gets its bars at a different time.
+            dateTime = begin + datetime.timedelta(minutes=j, seconds=i * 0.1)
+            bars.append(bar.BasicBar(dateTime, 100, 101, 99, 100, 1000, None, bar.Frequency.MINUTE))
+        ret.addBarsFromSequence("inst-%d" % i, bars)
+    ret.setUseHeapScheduling(True)
+    return ret
+
+
+def measure(fillStrategy):
+    strat = GridStrategy(build_feed(), fillStrategy)
+    begin = time.time()
+    strat.run()
+    return time.time() - begin
+
+
+def main():
+    print("%d instruments, %d bars each, %d resting orders per instrument" % (INSTRUMENTS, BARS, ORDERS_PER_INSTRUMENT))
+    print("Full scan:   %.2f seconds" % measure(FullScanFillStrategy()))
+    print("Order index: %.2f seconds" % measure(fillstrategy.DefaultStrategy()))
+
+
+if __name__ == "__main__":
+    main()
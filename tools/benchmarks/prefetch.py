@@ -0,0 +1,101 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares going through minute bars from CSV files, with a simulated I/O latency while reading them, using
+# streamingfeed.Feed with and without prefetching.
+# Usage: python -m tools.benchmarks.prefetch
+
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import streamingfeed
+from tools.benchmarks import columnar
+from tools.benchmarks import streaming
+
+
+INSTRUMENTS = 5
+# Seconds to wait every LATENCY_ROWS bars, like reading a block from a network mount.
+LATENCY = 0.002
+LATENCY_ROWS = 100
+
+
+class SlowCursor(streamingfeed.Cursor):
+    def __init__(self, cursor):
+        self.__cursor = cursor
+
+    def barsHaveAdjClose(self):
+        return self.__cursor.barsHaveAdjClose()
+
+    def open(self):
+        for i, bar_ in enumerate(self.__cursor.open()):
+            if i % LATENCY_ROWS == 0:
+                time.sleep(LATENCY)
+            yield bar_
+
+
+def measure(buildFeed):
+    feed = buildFeed()
+    window = np.zeros(50)
+    begin = time.time()
+    for dateTime, bars in feed:
+        # Some strategy logic.
+        for instrument in bars.getInstruments():
+            window = np.roll(window, 1)
+            window[0] = bars[instrument].getClose()
+            window.mean()
+            window.std()
+    return time.time() - begin
+
+
+def main():
+    tmpDir = tempfile.mkdtemp()
+    try:
+        rnd = np.random.RandomState(1234)
+        instruments = ["inst-%d" % i for i in range(INSTRUMENTS)]
+        for instrument in instruments:
+            columnar.write_csv(os.path.join(tmpDir, instrument + ".csv"), rnd)
+
+        def build_feed(prefetch):
+            ret = streamingfeed.Feed(bar.Frequency.MINUTE, maxLen=100, prefetch=prefetch)
+            for instrument in instruments:
+                rowParser = csvfeed.GenericRowParser(
+                    streaming.COLUMN_NAMES, "%Y-%m-%d %H:%M:%S", None, bar.Frequency.MINUTE, None
+                )
+                cursor = streamingfeed.CSVCursor(
+                    os.path.join(tmpDir, instrument + ".csv"), rowParser, haveAdjClose=True
+                )
+                ret.addCursor(instrument, SlowCursor(cursor))
+            return ret
+
+        print("%d instruments with %d bars each. Seconds to go through all the bars" % (INSTRUMENTS, columnar.BARS))
+        print("No prefetch: %6.2f" % measure(lambda: build_feed(0)))
+        print("Prefetch:    %6.2f" % measure(lambda: build_feed(16)))
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()
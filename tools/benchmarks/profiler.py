@@ -0,0 +1,95 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures a backtest with many instruments without profiling, with the profiler running, and without profiling
+# again once the profiler was stopped.
+# Usage: python -m tools.benchmarks.profiler
+
+import datetime
+import random
+import time
+
+from pyalgotrade import bar
+from pyalgotrade import profiler
+from pyalgotrade import strategy
+from pyalgotrade.barfeed import membf
+from pyalgotrade.technical import ma
+
+
+INSTRUMENTS = 50
+BARS = 2000
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+class Strategy(strategy.BacktestingStrategy):
+    def __init__(self, barFeed):
+        super(Strategy, self).__init__(barFeed, 1000000)
+        self.__smas = dict(
+            (instrument, ma.SMA(barFeed[instrument].getCloseDataSeries(), 20))
+            for instrument in barFeed.getRegisteredInstruments()
+        )
+
+    def onBars(self, bars):
+        for instrument, sma in self.__smas.items():
+            if sma[-1] is not None and self.getBroker().getShares(instrument) == 0:
+                if bars[instrument].getClose() > sma[-1]:
+                    self.marketOrder(instrument, 10)
+
+
+def build_feed():
+    rnd = random.Random(0)
+    ret = BarFeed(bar.Frequency.DAY)
+    for i in range(INSTRUMENTS):
+        bars = []
+        price = 100.0
+        for j in range(BARS):
+            price = max(1, price + rnd.uniform(-1, 1))
+            dateTime = datetime.datetime(2000, 1, 1) + datetime.timedelta(days=j)
+            bars.append(bar.BasicBar(dateTime, price, price + 1, price - 1, price, 1000, None, bar.Frequency.DAY))
+        ret.addBarsFromSequence("inst-%d" % i, bars)
+    return ret
+
+
+def measure(prof=None):
+    strat = Strategy(build_feed())
+    begin = time.time()
+    if prof is not None:
+        with prof:
+            strat.run()
+    else:
+        strat.run()
+    return time.time() - begin
+
+
+def main():
+    print("%d instruments, %d bars" % (INSTRUMENTS, BARS))
+    print("Not profiling:         %.2f seconds" % measure())
+    prof = profiler.Profiler()
+    print("Profiling:             %.2f seconds" % measure(prof))
+    print("After profiling:       %.2f seconds" % measure())
+    print(prof.getReport(10))
+
+
+if __name__ == "__main__":
+    main()
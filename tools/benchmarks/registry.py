@@ -0,0 +1,67 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Measures filtering a universe where several components build the same indicator stack for each instrument, building
+# the indicators separately and sharing them using pyalgotrade.technical.IndicatorRegistry.
+# Usage: python -m tools.benchmarks.registry
+
+import random
+import time
+
+from pyalgotrade import dataseries
+from pyalgotrade import technical
+from pyalgotrade.technical import ma
+from pyalgotrade.technical import rsi
+from pyalgotrade.technical import stats
+
+
+INSTRUMENTS = 200
+VALUES = 500
+COMPONENTS = 3
+
+
+def build_indicators(build, ds):
+    return [build(ma.SMA, ds, 50), build(stats.StdDev, ds, 20), build(rsi.RSI, ds, 14)]
+
+
+def measure(build):
+    rnd = random.Random(0)
+    series = [dataseries.SequenceDataSeries() for _ in range(INSTRUMENTS)]
+    for ds in series:
+        for _ in range(COMPONENTS):
+            build_indicators(build, ds)
+
+    begin = time.time()
+    for _ in range(VALUES):
+        for ds in series:
+            ds.append(rnd.uniform(90, 110))
+    return time.time() - begin
+
+
+def main():
+    print("%d instruments, %d values, %d components" % (INSTRUMENTS, VALUES, COMPONENTS))
+    print("Separate indicators: %.2f seconds" % measure(lambda indicatorClass, ds, *args: indicatorClass(ds, *args)))
+    registry = technical.IndicatorRegistry()
+    print("Shared indicators:   %.2f seconds" % measure(registry.get))
+    print("Indicators built: %d. Duplicates avoided: %d" % (registry.getMisses(), registry.getHits()))
+
+
+if __name__ == "__main__":
+    main()
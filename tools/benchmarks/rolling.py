@@ -0,0 +1,71 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares StdDev, ZScore, Slope and LeastSquaresRegression calculated over the whole window on every value with the
+# incremental versions, for different window sizes.
+# Usage: python -m tools.benchmarks.rolling
+
+import datetime
+import time
+
+import numpy as np
+
+from pyalgotrade import dataseries
+from pyalgotrade.technical import stats
+from pyalgotrade.technical import linreg
+
+
+WINDOW_SIZES = [20, 200, 2000]
+VALUES = 20000
+
+FILTERS = [
+    ("StdDev", lambda ds, windowSize, incremental: stats.StdDev(ds, windowSize, incremental=incremental)),
+    ("ZScore", lambda ds, windowSize, incremental: stats.ZScore(ds, windowSize, incremental=incremental)),
+    ("Slope", lambda ds, windowSize, incremental: linreg.Slope(ds, windowSize, incremental=incremental)),
+    ("LSReg", lambda ds, windowSize, incremental: linreg.LeastSquaresRegression(
+        ds, windowSize, incremental=incremental
+    )),
+]
+
+
+def measure(buildFilter, windowSize, incremental, dateTimes, values):
+    ds = dataseries.SequenceDataSeries()
+    buildFilter(ds, windowSize, incremental)
+    begin = time.time()
+    for dateTime, value in zip(dateTimes, values):
+        ds.appendWithDateTime(dateTime, value)
+    return VALUES / (time.time() - begin)
+
+
+def main():
+    values = (np.random.RandomState(1234).standard_normal(VALUES).cumsum() + 1000).tolist()
+    dateTimes = [datetime.datetime(2000, 1, 1) + datetime.timedelta(minutes=i) for i in range(VALUES)]
+    print("Values/sec")
+    for name, buildFilter in FILTERS:
+        for windowSize in WINDOW_SIZES:
+            fullWindow = measure(buildFilter, windowSize, False, dateTimes, values)
+            incremental = measure(buildFilter, windowSize, True, dateTimes, values)
+            print("%-7s window %5d: full window %10.0f incremental %10.0f (%.1fx)" % (
+                name, windowSize, fullWindow, incremental, incremental / fullWindow
+            ))
+
+
+if __name__ == "__main__":
+    main()
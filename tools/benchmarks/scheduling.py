@@ -0,0 +1,105 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares linear and heap based scheduling in membf.BarFeed and dispatcher.Dispatcher.
+# Instruments trade sparsely (each one has a bar every STRIDE minutes, staggered), which is the case where
+# the heap pays off since only a few instruments have bars on each datetime.
+# Usage: python -m tools.benchmarks.scheduling
+
+import datetime
+import time
+
+from pyalgotrade import bar
+from pyalgotrade import dispatcher
+from pyalgotrade.barfeed import membf
+from pyalgotrade.feed import memfeed
+
+
+INSTRUMENT_COUNTS = [10, 100, 1000, 3000]
+STEPS = 2000
+STRIDE = 50
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+def build_bar_feed(instrumentCount, useHeapScheduling):
+    ret = BarFeed(bar.Frequency.MINUTE, maxLen=10)
+    ret.setUseHeapScheduling(useHeapScheduling)
+    begin = datetime.datetime(2018, 1, 1)
+    for i in range(instrumentCount):
+        bars = []
+        for step in range(i % STRIDE, STEPS, STRIDE):
+            dateTime = begin + datetime.timedelta(minutes=step)
+            bars.append(bar.BasicBar(dateTime, 10, 10, 10, 10, 100, None, bar.Frequency.MINUTE))
+        ret.addBarsFromSequence("inst-%d" % i, bars)
+    return ret
+
+
+def build_mem_feeds(feedCount):
+    ret = []
+    begin = datetime.datetime(2018, 1, 1)
+    for i in range(feedCount):
+        feed = memfeed.MemFeed(maxLen=10)
+        values = []
+        for step in range(i % STRIDE, STEPS, STRIDE):
+            values.append((begin + datetime.timedelta(minutes=step), {"value": step}))
+        feed.addValues(values)
+        ret.append(feed)
+    return ret
+
+
+def run_dispatcher(subjects, useHeapScheduling):
+    disp = dispatcher.Dispatcher()
+    disp.setUseHeapScheduling(useHeapScheduling)
+    for subject in subjects:
+        disp.addSubject(subject)
+    begin = time.time()
+    disp.run()
+    return time.time() - begin
+
+
+def main():
+    print("Single membf.BarFeed with N instruments (events/sec)")
+    for instrumentCount in INSTRUMENT_COUNTS:
+        results = []
+        for useHeapScheduling in (False, True):
+            barFeed = build_bar_feed(instrumentCount, useHeapScheduling)
+            eventCount = [0]
+            barFeed.getNewValuesEvent().subscribe(lambda dateTime, bars: eventCount.__setitem__(0, eventCount[0] + 1))
+            elapsed = run_dispatcher([barFeed], useHeapScheduling)
+            results.append(eventCount[0] / elapsed)
+        print("%6d instruments: linear %10.0f heap %10.0f" % (instrumentCount, results[0], results[1]))
+
+    print("Dispatcher with N subjects (events/sec)")
+    for feedCount in INSTRUMENT_COUNTS:
+        results = []
+        for useHeapScheduling in (False, True):
+            feeds = build_mem_feeds(feedCount)
+            eventCount = sum(len(range(i % STRIDE, STEPS, STRIDE)) for i in range(feedCount))
+            elapsed = run_dispatcher(feeds, useHeapScheduling)
+            results.append(eventCount / elapsed)
+        print("%6d subjects:    linear %10.0f heap %10.0f" % (feedCount, results[0], results[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares importing bars into a SQLite database one bar at a time, like dbfeed.Database.addBarsFromFeed does, with
+# the batched import in sqlitefeed.Database, and loading them with sqlitefeed.Feed and sqlitefeed.StreamingFeed.
+# Usage: python -m tools.benchmarks.sqlite
+
+import datetime
+import os
+import shutil
+import tempfile
+import time
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import dbfeed
+from pyalgotrade.barfeed import membf
+from pyalgotrade.barfeed import sqlitefeed
+
+
+INSTRUMENTS = 5
+BARS = 2000
+
+
+class BarFeed(membf.BarFeed):
+    def barsHaveAdjClose(self):
+        return False
+
+
+def build_feed():
+    ret = BarFeed(bar.Frequency.MINUTE)
+    for i in range(INSTRUMENTS):
+        dateTime = datetime.datetime(2010, 1, 1)
+        bars = []
+        for j in range(BARS):
+            bars.append(bar.BasicBar(dateTime, j, j, j, j, j, None, bar.Frequency.MINUTE))
+            dateTime += datetime.timedelta(minutes=1)
+        ret.addBarsFromSequence("inst-%d" % i, bars)
+    return ret
+
+
+def measure(dbFilePath, addBarsFromFeed, pragmas=None):
+    if os.path.exists(dbFilePath):
+        os.remove(dbFilePath)
+    db = sqlitefeed.Database(dbFilePath, pragmas)
+    begin = time.time()
+    addBarsFromFeed(db, build_feed())
+    ret = time.time() - begin
+    db.disconnect()
+    return ret
+
+
+def consume(feed):
+    begin = time.time()
+    for dateTime, bars in feed:
+        pass
+    return time.time() - begin
+
+
+def main():
+    tmpDir = tempfile.mkdtemp()
+    try:
+        dbFilePath = os.path.join(tmpDir, "bars.sqlite")
+        instruments = ["inst-%d" % i for i in range(INSTRUMENTS)]
+
+        print("%d instruments with %d bars each. Seconds to import" % (INSTRUMENTS, BARS))
+        print("One bar at a time:    %6.2f" % measure(dbFilePath, dbfeed.Database.addBarsFromFeed))
+        print("Batched:              %6.2f" % measure(dbFilePath, sqlitefeed.Database.addBarsFromFeed))
+        print("Batched, bulk pragmas: %5.2f" % measure(
+            dbFilePath, sqlitefeed.Database.addBarsFromFeed, sqlitefeed.BULK_PRAGMAS
+        ))
+
+        def build_sqlite_feed():
+            ret = sqlitefeed.Feed(dbFilePath, bar.Frequency.MINUTE)
+            for instrument in instruments:
+                ret.loadBars(instrument)
+            return ret
+
+        print("Seconds to load and go through the bars")
+        begin = time.time()
+        feed = build_sqlite_feed()
+        print("Feed:          %6.2f" % (time.time() - begin + consume(feed)))
+        print("StreamingFeed: %6.2f" % consume(sqlitefeed.StreamingFeed(dbFilePath, bar.Frequency.MINUTE, instruments)))
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# PyAlgoTrade
+#
+# Copyright 2011-2018 Gabriel Martin Becedillas Ruiz
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+.. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
+"""
+
+# Compares the peak memory used, and the time it takes, to go through minute bars from CSV files using
+# csvfeed.GenericBarFeed, that loads every bar up front, and streamingfeed.Feed, that reads them as they are needed.
+# Usage: python -m tools.benchmarks.streaming
+
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from pyalgotrade import bar
+from pyalgotrade.barfeed import csvfeed
+from pyalgotrade.barfeed import streamingfeed
+from tools.benchmarks import columnar
+
+
+INSTRUMENTS = 10
+COLUMN_NAMES = {
+    "datetime": "Date Time",
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "volume": "Volume",
+    "adj_close": "Adj Close",
+}
+
+
+def measure(buildFeed):
+    tracemalloc.start()
+    begin = time.time()
+    feed = buildFeed()
+    for dateTime, bars in feed:
+        pass
+    elapsed = time.time() - begin
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / float(2**20)
+
+
+def main():
+    tmpDir = tempfile.mkdtemp()
+    try:
+        rnd = np.random.RandomState(1234)
+        instruments = ["inst-%d" % i for i in range(INSTRUMENTS)]
+        for instrument in instruments:
+            columnar.write_csv(os.path.join(tmpDir, instrument + ".csv"), rnd)
+
+        def build_csv_feed():
+            ret = csvfeed.GenericBarFeed(bar.Frequency.MINUTE, maxLen=100)
+            for instrument in instruments:
+                ret.addBarsFromCSV(instrument, os.path.join(tmpDir, instrument + ".csv"))
+            return ret
+
+        def build_streaming_feed():
+            ret = streamingfeed.Feed(bar.Frequency.MINUTE, maxLen=100)
+            for instrument in instruments:
+                rowParser = csvfeed.GenericRowParser(
+                    COLUMN_NAMES, "%Y-%m-%d %H:%M:%S", None, bar.Frequency.MINUTE, None
+                )
+                ret.addBarsFromCSV(instrument, os.path.join(tmpDir, instrument + ".csv"), rowParser, haveAdjClose=True)
+            return ret
+
+        print("%d instruments with %d bars each. Seconds / peak MB" % (INSTRUMENTS, columnar.BARS))
+        print("CSV:       %6.2f / %6.2f" % measure(build_csv_feed))
+        print("Streaming: %6.2f / %6.2f" % measure(build_streaming_feed))
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == "__main__":
+    main()